@@ -0,0 +1,400 @@
+"""Command line interface for end-of-day scripts.
+
+    python src/cli.py [--db PATH] [--json] [--quiet] COMMAND ...
+
+The common options may also follow the command.
+
+Commands: summary, export, backup, restore, verify, rebuild-rollups and
+bench. Only the data layer is used, never Qt, and exporters are imported
+by the commands that need them so the CLI starts quickly. With ``--json``
+the result is printed as one JSON object; progress messages from the data
+layer go to stderr either way.
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from database import rollups
+from database.db_manager import get_repository
+from utils.date_ranges import month_bounds, to_date
+
+PROG = 'daily-register'
+
+def _date_arg(value: str) -> date:
+    """Parse 'today', 'yesterday', YYYY-MM-DD or DD-MM-YYYY."""
+    if value == 'today':
+        return date.today()
+    if value == 'yesterday':
+        return date.today() - timedelta(days=1)
+    for pattern in ('%Y-%m-%d', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(value, pattern).date()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"invalid date: {value!r} (use YYYY-MM-DD, DD-MM-YYYY, today or yesterday)")
+
+def _month_arg(value: str) -> Tuple[int, int]:
+    try:
+        parsed = datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid month: {value!r} (use YYYY-MM)")
+    return parsed.year, parsed.month
+
+def _date_range(args) -> Tuple[date, date]:
+    """Get the inclusive date range selected by --date, --month or --from/--to (default today)."""
+    if args.month:
+        start, end_exclusive = month_bounds(*args.month)
+        return to_date(start), to_date(end_exclusive) - timedelta(days=1)
+    if args.date:
+        return args.date, args.date
+    start = args.from_date or args.to_date or date.today()
+    end = args.to_date or start
+    return (start, end) if start <= end else (end, start)
+
+def _rupees(amount: float) -> str:
+    return f"₹{amount:,.2f}"
+
+# Commands return (result, text): the result is printed as JSON with --json,
+# the text otherwise. A result with 'ok': False makes the exit status 1.
+
+def cmd_summary(db, args) -> Tuple[Dict[str, Any], str]:
+    """Totals of a date range from the daily rollups."""
+    start, end = _date_range(args)
+    totals = rollups.range_totals(db, start, end)
+    top_items = [
+        dict(zip(('code', 'name', 'count', 'weight', 'amount'), row))
+        for row in db.query('''
+            SELECT code, MAX(name), SUM(count), SUM(weight), SUM(amount)
+            FROM daily_item_totals
+            WHERE date BETWEEN ? AND ?
+            GROUP BY code
+            ORDER BY SUM(amount) DESC, code
+            LIMIT ?
+        ''', (start.isoformat(), end.isoformat(), args.top))
+    ]
+    result = {'from': start.isoformat(), 'to': end.isoformat(), 'totals': totals, 'top_items': top_items}
+
+    period = start.strftime('%d-%m-%Y') if start == end else \
+        f"{start.strftime('%d-%m-%Y')} to {end.strftime('%d-%m-%Y')}"
+    t = totals
+    lines = [
+        f"Daily Register summary: {period}",
+        f"Transactions: {int(t['transaction_count'])}",
+        f"New items:    {int(t['item_count'])}  gold {t['new_gold_weight']:.3f} g, "
+        f"silver {t['new_silver_weight']:.3f} g, {_rupees(t['new_amount'])}",
+        f"Old items:    {int(t['old_item_count'])}  gold {t['old_gold_weight']:.3f} g, "
+        f"silver {t['old_silver_weight']:.3f} g, {_rupees(t['old_amount'])}",
+        f"Billable:     {int(t['billable_item_count'])}  gold {t['billable_gold_weight']:.3f} g, "
+        f"silver {t['billable_silver_weight']:.3f} g, {_rupees(t['billable_amount'])}",
+        f"Payments:     cash {_rupees(t['cash_amount'])}, card {_rupees(t['card_amount'])}, "
+        f"UPI {_rupees(t['upi_amount'])}, total {_rupees(t['net_amount_paid'])}",
+    ]
+    if top_items:
+        lines.append("Top items:")
+        lines.extend(
+            f"  {item['code']:<8} {item['name']:<20} {int(item['count']):>4}  {_rupees(item['amount'])}"
+            for item in top_items
+        )
+    return result, '\n'.join(lines)
+
+def cmd_export(db, args) -> Tuple[Dict[str, Any], str]:
+    """Export a date range as Excel, CSV or a columnar snapshot, or the head office changes."""
+    start, end = _date_range(args)
+    result: Dict[str, Any] = {'format': args.format, 'from': start.isoformat(), 'to': end.isoformat()}
+
+    if args.format == 'excel':
+        from utils.excel_exporter import ExcelExporter
+        out = Path(args.out) if args.out else None
+        if out and out.suffix.lower() == '.xlsx':
+            exporter = ExcelExporter(db, export_dir=str(out.parent))
+            result['path'] = exporter.export_range(start, end, filename=out.name)
+        else:
+            exporter = ExcelExporter(db, export_dir=str(out or 'exports'))
+            result['path'] = exporter.export_range(start, end)
+    elif args.format == 'csv':
+        from utils.csv_exporter import CsvExporter
+        path = args.out or f"{args.layout}_{start.isoformat()}_{end.isoformat()}.csv"
+        result['rows'] = CsvExporter(db).export(path, start, end, layout=args.layout)
+        result['path'] = str(path)
+    elif args.format == 'snapshot':
+        from database import columnar
+        path = args.out or f"register_{start.isoformat()}_{end.isoformat()}.npz"
+        result['rows'] = columnar.write_snapshot(db, path, start, end)
+        result['path'] = str(path)
+    else:
+        from database import replication
+        header = replication.export_changeset(db, args.out or '.', full=args.full)
+        result.pop('from')
+        result.pop('to')
+        result['path'] = header['path'] if header else None
+        result['rows'] = header['count'] if header else 0
+        if header is None:
+            return result, "Nothing changed since the last changeset"
+    return result, f"Exported {args.format} to {result['path']}"
+
+def _backup_manager(db):
+    from utils.backup_manager import BackupManager
+    manager = BackupManager(db)
+    # A background prune would be cut short when the CLI exits; see --prune
+    manager.auto_prune = False
+    return manager
+
+def cmd_backup(db, args) -> Tuple[Dict[str, Any], str]:
+    """Take a full or incremental backup."""
+    manager = _backup_manager(db)
+    if args.incremental:
+        path = manager.create_incremental_backup()
+    else:
+        path = manager.create_backup(args.out)
+    result = {'path': path, 'size': os.path.getsize(path) if path else 0}
+    if args.prune:
+        result['pruned'] = manager.prune_backups()
+    text = f"Backed up to {path}" if path else "Nothing changed since the last backup"
+    return result, text
+
+def cmd_restore(db, args) -> Tuple[Dict[str, Any], str]:
+    """Restore a backup, or the incremental backups up to a point in time."""
+    if not args.yes:
+        raise ValueError("restoring replaces the database; pass --yes to confirm")
+    manager = _backup_manager(db)
+    if args.at:
+        manager.restore_point_in_time(args.at)
+        return {'restored': args.at}, f"Restored the database as of {args.at}"
+    if not args.backup:
+        raise ValueError("give a backup file or --at TIMESTAMP")
+    manager.restore_backup(args.backup)
+    return {'restored': args.backup}, f"Restored the database from {args.backup}"
+
+def cmd_verify(db, args) -> Tuple[Dict[str, Any], str]:
+    """Check backups, or the live database and its newest backup."""
+    manager = _backup_manager(db)
+    checks = []
+    if args.backups:
+        targets = args.backups
+    else:
+        transactions = db.query('SELECT COUNT(*) FROM transactions')[0][0]
+        rolled_up = db.query('SELECT COALESCE(SUM(transaction_count), 0) FROM daily_totals')[0][0]
+        checks.append({'target': 'rollups', 'ok': transactions == int(rolled_up),
+                       'detail': f"{transactions} transactions, {int(rolled_up)} in daily rollups"})
+        targets = [db.db_path]
+        latest = manager.list_backups()
+        if latest:
+            targets.append(latest[0]['path'])
+    for target in targets:
+        checks.append({'target': str(target), 'ok': manager.verify_backup(target)})
+
+    result = {'ok': all(check['ok'] for check in checks), 'checks': checks}
+    lines = [
+        f"{'OK    ' if check['ok'] else 'FAILED'} {check['target']}"
+        + (f" ({check['detail']})" if check.get('detail') else '')
+        for check in checks
+    ]
+    return result, '\n'.join(lines)
+
+def cmd_rebuild_rollups(db, args) -> Tuple[Dict[str, Any], str]:
+    """Recompute the daily and monthly rollups from the transactions."""
+    started = time.perf_counter()
+    db.rebuild_rollups()
+    seconds = time.perf_counter() - started
+    days = db.query('SELECT COUNT(*) FROM daily_totals')[0][0]
+    return {'days': days, 'seconds': round(seconds, 3)}, f"Rebuilt rollups for {days} days in {seconds:.2f}s"
+
+# Register filters timed by bench, as RegisterFilter fields. '{code}' is the
+# most sold item code of the range and 'all_dates' drops the date range.
+FILTER_BENCHMARKS: Dict[str, Dict[str, Any]] = {
+    'code': {'code': '{code}'},
+    'code_prefix': {'code_prefix': '{prefix}'},
+    'gold_billable': {'metal': 'gold', 'billable': True},
+    'card_or_upi': {'payment_modes': ('card', 'upi')},
+    'amount_band': {'min_amount': 10000, 'max_amount': 50000},
+    'silver_weight_cash': {'metal': 'silver', 'min_weight': 20, 'max_weight': 100, 'payment_modes': ('cash',)},
+    'code_all_dates': {'code': '{code}', 'all_dates': True},
+    'large_slips_all_dates': {'min_amount': 200000, 'all_dates': True},
+}
+
+def _time(operation: Callable[[], Any], repeat: int) -> Tuple[Dict[str, float], Any]:
+    """Run an operation repeat times; returns the best and median milliseconds and the last result."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = operation()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'best_ms': round(min(samples), 3), 'median_ms': round(statistics.median(samples), 3)}, result
+
+def _filter_benchmarks(db, start: date, end: date, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time the register filters of FILTER_BENCHMARKS over a date range."""
+    from database.filters import RegisterFilter
+
+    rows = db.query("""
+        SELECT i.code FROM items i JOIN transactions t ON t.id = i.transaction_id
+        WHERE t.date BETWEEN ? AND ? AND i.code IS NOT NULL AND i.code != ''
+        GROUP BY i.code ORDER BY COUNT(*) DESC LIMIT 1
+    """, (start.isoformat(), end.isoformat()))
+    code = rows[0][0] if rows else 'GR'
+    timings = {}
+    for name, spec in FILTER_BENCHMARKS.items():
+        fields = {key: value.format(code=code, prefix=code[:1]) if isinstance(value, str) else value
+                  for key, value in spec.items() if key != 'all_dates'}
+        if not spec.get('all_dates'):
+            fields.update(from_date=start, to_date=end)
+        register_filter = RegisterFilter(**fields)
+        timing, transactions = _time(lambda: db.get_filtered_transactions(register_filter), repeat)
+        timings[name] = dict(timing, rows=len(transactions))
+    return timings
+
+def cmd_bench(db, args) -> Tuple[Dict[str, Any], str]:
+    """Time common reads and register filters on this database, or on a synthetic one."""
+    if args.synthetic:
+        return _bench_synthetic(args)
+    if args.date or args.month or args.from_date or args.to_date:
+        start, end = _date_range(args)
+    else:
+        first, last = db.query('SELECT MIN(date), MAX(date) FROM transactions')[0]
+        start, end = (to_date(first), to_date(last)) if first else (date.today(), date.today())
+    year, month = end.year, end.month
+
+    operations: Dict[str, Callable[[], Any]] = {
+        'transactions_range': lambda: db.get_transactions_range(start, end),
+        'transactions_day': lambda: db.get_transactions_by_date(end),
+        'rollup_totals': lambda: rollups.range_totals(db, start, end),
+        'monthly_report': lambda: db.get_monthly_report(year, month),
+    }
+    timings = {name: _time(operation, args.repeat)[0] for name, operation in operations.items()}
+    filter_timings = _filter_benchmarks(db, start, end, args.repeat)
+
+    count = db.query('SELECT COUNT(*) FROM transactions WHERE date BETWEEN ? AND ?',
+                     (start.isoformat(), end.isoformat()))[0][0]
+    result = {'from': start.isoformat(), 'to': end.isoformat(), 'transactions': count,
+              'repeat': args.repeat, 'timings': timings, 'filter_timings': filter_timings}
+    lines = [f"{count} transactions from {start.isoformat()} to {end.isoformat()}, best of {args.repeat}:"]
+    lines.extend(
+        f"  {name:<22} {timing['best_ms']:>10.2f} ms  (median {timing['median_ms']:.2f} ms)"
+        for name, timing in timings.items()
+    )
+    lines.append("Register filters:")
+    lines.extend(
+        f"  {name:<22} {timing['best_ms']:>10.2f} ms  (median {timing['median_ms']:.2f} ms, {timing['rows']} rows)"
+        for name, timing in filter_timings.items()
+    )
+    return result, '\n'.join(lines)
+
+def _bench_synthetic(args) -> Tuple[Dict[str, Any], str]:
+    """Run bench on a temporary database of synthetic slips ending today."""
+    import tempfile
+    from database import synthetic
+    from database.db_manager import DatabaseManager
+
+    end = date.today()
+    start = end - timedelta(days=max(round(365.25 * args.synthetic), 1) - 1)
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, 'synthetic.db'))
+        try:
+            started = time.perf_counter()
+            count = synthetic.populate(db, start, end, args.slips_per_day)
+            print(f"Generated {count} synthetic transactions in {time.perf_counter() - started:.1f}s")
+            result, text = cmd_bench(db, argparse.Namespace(**dict(vars(args), synthetic=None)))
+        finally:
+            db.close()
+    result['synthetic'] = {'years': args.synthetic, 'slips_per_day': args.slips_per_day}
+    return result, f"Synthetic database of {args.synthetic:g} years:\n{text}"
+
+def _add_common_options(parser: argparse.ArgumentParser, default: Any = None):
+    """Add --db, --json and --quiet; ``default`` replaces their defaults when given."""
+    defaults = {} if default is None else {'default': default}
+    parser.add_argument('--db', help='database file (default: the application database)', **defaults)
+    parser.add_argument('--json', action='store_true', help='print the result as JSON', **defaults)
+    parser.add_argument('-q', '--quiet', action='store_true', help='hide progress messages', **defaults)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=PROG, description='Reports, exports and backups of the daily register.')
+    _add_common_options(parser)
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    # The common options may also follow the command; SUPPRESS keeps the
+    # command from resetting what was given before it
+    common = argparse.ArgumentParser(add_help=False)
+    _add_common_options(common, default=argparse.SUPPRESS)
+
+    date_range = argparse.ArgumentParser(add_help=False)
+    group = date_range.add_argument_group('date range (default today)')
+    group.add_argument('--date', type=_date_arg, help='a single day')
+    group.add_argument('--month', type=_month_arg, help='a whole month, YYYY-MM')
+    group.add_argument('--from', dest='from_date', type=_date_arg, help='first day')
+    group.add_argument('--to', dest='to_date', type=_date_arg, help='last day (inclusive)')
+
+    summary = commands.add_parser('summary', parents=[common, date_range], help='totals for a date range')
+    summary.add_argument('--top', type=int, default=10, help='item codes to list (default 10)')
+    summary.set_defaults(handler=cmd_summary)
+
+    export = commands.add_parser('export', parents=[common, date_range], help='export a date range')
+    export.add_argument('format', choices=['excel', 'csv', 'snapshot', 'changeset'])
+    export.add_argument('--out', help='output file (a directory for excel and changeset)')
+    export.add_argument('--layout', default='transactions', choices=['transactions', 'items', 'old_items'],
+                        help='CSV layout')
+    export.add_argument('--full', action='store_true', help='changeset of the whole register')
+    export.set_defaults(handler=cmd_export)
+
+    backup = commands.add_parser('backup', parents=[common], help='back up the database')
+    backup.add_argument('--incremental', action='store_true', help='back up only the changes when possible')
+    backup.add_argument('--out', help='backup file (default: timestamped archive in the backup directory)')
+    backup.add_argument('--prune', action='store_true', help='then delete backups past the retention policy')
+    backup.set_defaults(handler=cmd_backup)
+
+    restore = commands.add_parser('restore', parents=[common], help='restore a backup')
+    restore.add_argument('backup', nargs='?', help='backup file')
+    restore.add_argument('--at', help="restore the incremental backups up to 'YYYY-MM-DD HH:MM:SS'")
+    restore.add_argument('--yes', action='store_true', help='confirm replacing the database')
+    restore.set_defaults(handler=cmd_restore)
+
+    verify = commands.add_parser('verify', parents=[common], help='check backups or the live database')
+    verify.add_argument('backups', nargs='*', help='backup files (default: the database and newest backup)')
+    verify.set_defaults(handler=cmd_verify)
+
+    rebuild = commands.add_parser('rebuild-rollups', parents=[common], help='recompute the daily and monthly totals')
+    rebuild.set_defaults(handler=cmd_rebuild_rollups)
+
+    bench = commands.add_parser('bench', parents=[common, date_range], help='time common reads (default: all dates)')
+    bench.add_argument('--repeat', type=int, default=5, help='runs per operation (default 5)')
+    bench.add_argument('--synthetic', type=float, metavar='YEARS',
+                       help='bench a temporary database of this many years of synthetic slips instead')
+    bench.add_argument('--slips-per-day', type=int, default=60, help='average synthetic slips per day (default 60)')
+    bench.set_defaults(handler=cmd_bench)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    stdout = sys.stdout
+    log = open(os.devnull, 'w') if args.quiet else sys.stderr
+    try:
+        # The data layer reports progress with print(); stdout is kept for the result
+        with contextlib.redirect_stdout(log):
+            db = get_repository(args.db)
+            try:
+                result, text = args.handler(db, args)
+            finally:
+                db.close()
+    except Exception as e:
+        if args.json:
+            print(json.dumps({'ok': False, 'error': str(e)}), file=stdout)
+        print(f"{PROG}: error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.quiet:
+            log.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str), file=stdout)
+    else:
+        print(text, file=stdout)
+    return 0 if result.get('ok', True) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
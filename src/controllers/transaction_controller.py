@@ -1,10 +1,9 @@
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-import os
 
 from models.transaction import Transaction, NewItem, OldItem
 from services.transaction_service import TransactionService
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, get_repository
 from services.item_service import ItemService
 
 class TransactionController:
@@ -12,17 +11,11 @@ class TransactionController:
     
     def __init__(self, db_manager=None):
         """Initialize the controller with a database manager."""
-        self.service = TransactionService()
-        
-        # Get the database path from environment or use default
-        app_data_dir = os.path.join(os.getenv('APPDATA', ''), 'DailyRegister')
-        os.makedirs(app_data_dir, exist_ok=True)
-        db_path = os.path.join(app_data_dir, 'transactions.db')
-        
-        # Initialize database manager with the path
-        self.db_manager = db_manager or DatabaseManager(db_path)
+        # All layers share one repository (one connection, one schema)
+        self.db_manager = db_manager or get_repository()
+        self.service = TransactionService(self.db_manager)
         self.current_transaction = Transaction()
-        self.item_service = ItemService()
+        self.item_service = ItemService(self.db_manager)
     
     def validate_item_code(self, code: str) -> bool:
         """Validate item code format."""
@@ -0,0 +1,122 @@
+"""NumPy backend for date range summaries over very large ranges.
+
+For multi-year ranges, building a dict per transaction and item and then
+looping over them in Python dominates the summary. These functions fetch the
+needed item columns in one query each, load them into NumPy arrays and
+aggregate with masked sums and ``np.bincount``. They return the same
+structures as the TransactionViewModel loops they replace.
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+from utils.date_ranges import to_date
+
+# Metal categories as the view model classifies them: new items by a 'G' or
+# 'S' anywhere in the type, old items by an exact (case-insensitive) match
+_NEW_METAL_SQL = "CASE WHEN instr(i.type, 'G') > 0 THEN 0 WHEN instr(i.type, 'S') > 0 THEN 1 ELSE 2 END"
+_OLD_METAL_SQL = ("CASE WHEN UPPER(o.type) IN ('G', 'GOLD') THEN 0 "
+                  "WHEN UPPER(o.type) IN ('S', 'SILVER') THEN 1 ELSE 2 END")
+
+def _range_params(from_date, to_date_):
+    return to_date(from_date).isoformat(), to_date(to_date_).isoformat()
+
+def item_row_count(db, from_date, to_date_) -> int:
+    """Get the number of new and old items in a range from the daily rollups."""
+    rows = db.query('''
+        SELECT COALESCE(SUM(item_count + old_item_count), 0)
+        FROM daily_totals
+        WHERE date BETWEEN ? AND ?
+    ''', _range_params(from_date, to_date_))
+    return int(rows[0][0])
+
+def date_range_summary(db, from_date, to_date_) -> Dict[str, float]:
+    """Get new, old and payment totals for a date range (inclusive)."""
+    params = _range_params(from_date, to_date_)
+    # 0 = new item, 1 = old item
+    items = db.query(f'''
+        SELECT 0, {_NEW_METAL_SQL}, i.weight, i.amount
+        FROM transactions t JOIN items i ON i.transaction_id = t.id
+        WHERE t.date BETWEEN ? AND ?
+        UNION ALL
+        SELECT 1, {_OLD_METAL_SQL}, o.weight, o.amount
+        FROM transactions t JOIN old_items o ON o.transaction_id = t.id
+        WHERE t.date BETWEEN ? AND ?
+    ''', params + params)
+    payments = db.query('''
+        SELECT cash_amount, card_amount, upi_amount
+        FROM transactions
+        WHERE date BETWEEN ? AND ?
+    ''', params)
+
+    columns = np.array(items, dtype=np.float64).reshape(-1, 4)
+    kind = columns[:, 0].astype(np.int64)
+    metal = columns[:, 1].astype(np.int64)
+    weight, amount = columns[:, 2], columns[:, 3]
+
+    # Index kind * 3 + metal: new gold, new silver, new other, old gold, ...
+    group = kind * 3 + metal
+    weights = np.bincount(group, weights=weight, minlength=6)
+    amounts = np.bincount(kind, weights=amount, minlength=2)
+    paid = np.array(payments, dtype=np.float64).reshape(-1, 3).sum(axis=0)
+
+    return {
+        'new_gold_weight': float(weights[0]),
+        'new_silver_weight': float(weights[1]),
+        'new_amount': float(amounts[0]),
+        'old_gold_weight': float(weights[3]),
+        'old_silver_weight': float(weights[4]),
+        'old_amount': float(amounts[1]),
+        'cash_total': float(paid[0]),
+        'card_total': float(paid[1]),
+        'upi_total': float(paid[2])
+    }
+
+def billable_items_range(db, from_date, to_date_) -> Dict[str, Dict[str, Any]]:
+    """Get billable and non-billable items grouped by code for a date range (inclusive)."""
+    rows = db.query('''
+        SELECT i.code, i.name, i.weight, i.amount, i.is_billable
+        FROM transactions t JOIN items i ON i.transaction_id = t.id
+        WHERE t.date BETWEEN ? AND ?
+        ORDER BY t.date DESC, t.id DESC, i.id
+    ''', _range_params(from_date, to_date_))
+    result = {'billable': {}, 'non_billable': {}}
+    if not rows:
+        return result
+
+    codes, names, weights, amounts, billable = zip(*rows)
+    weight = np.array(weights, dtype=np.float64)
+    amount = np.array(amounts, dtype=np.float64)
+    billable = np.array([bool(flag) for flag in billable])
+    unique_codes, code_ids = np.unique(np.array(codes, dtype=object), return_inverse=True)
+
+    # Group key: code id * 2 + billable flag
+    group = code_ids * 2 + billable
+    size = len(unique_codes) * 2
+    total_weight = np.bincount(group, weights=weight, minlength=size)
+    total_amount = np.bincount(group, weights=amount, minlength=size)
+
+    # A stable sort keeps each group's items in register order; the first row
+    # of a group gives its name
+    order = np.argsort(group, kind='stable')
+    sorted_groups = group[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    weight_list = weight[order].tolist()
+    amount_list = amount[order].tolist()
+    # Groups are added in order of their first item, as the row loop adds them
+    first_rows = order[starts]
+    for index in np.argsort(first_rows, kind='stable').tolist():
+        start, end = int(starts[index]), int(ends[index])
+        key = int(sorted_groups[start])
+        target = result['billable' if key % 2 else 'non_billable']
+        target[unique_codes[key // 2]] = {
+            'name': names[order[start]],
+            'total_weight': float(total_weight[key]),
+            'total_amount': float(total_amount[key]),
+            'items': [
+                {'weight': w, 'amount': a}
+                for w, a in zip(weight_list[start:end], amount_list[start:end])
+            ]
+        }
+    return result
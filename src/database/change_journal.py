@@ -0,0 +1,142 @@
+"""Delta files for incremental backups.
+
+The ``change_log`` table records the id of every transaction written since
+the last full backup. A delta file holds the current state of those
+transactions (or a delete marker for the ones that are gone) as gzip
+compressed JSON lines:
+
+    {"type": "header", "from_seq": 10, "to_seq": 42, "created_at": "...", "count": 3}
+    {"type": "upsert", "transaction": [...], "items": [[...]], "old_items": [[...]]}
+    {"type": "delete", "id": 7}
+
+Replaying the deltas of a chain in order onto its full base reproduces the
+database as it was when the last delta was written.
+"""
+import gzip
+import json
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database import rollups
+
+TRANSACTION_COLUMNS = [
+    'id', 'date', 'timestamp', 'comments', 'total_amount', 'net_amount_paid',
+    'cash_amount', 'card_amount', 'upi_amount'
+]
+ITEM_COLUMNS = ['code', 'name', 'type', 'weight', 'amount', 'is_billable']
+OLD_ITEM_COLUMNS = ['type', 'weight', 'amount']
+
+def last_seq(cursor) -> int:
+    """Get the newest change_log sequence number (0 if the log is empty)."""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def write_delta(conn: sqlite3.Connection, path: str, since_seq: int) -> Optional[Dict[str, Any]]:
+    """Write the transactions changed after since_seq to a delta file.
+
+    The changes are read inside a single read transaction so the delta is
+    consistent with the sequence number it records.
+
+    Args:
+        conn: A connection of its own on the live database (not the shared one).
+        path: Destination .jsonl.gz file.
+        since_seq: Sequence number covered by the previous backup.
+
+    Returns:
+        dict: The delta header, or None if nothing changed (no file is written).
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        to_seq = last_seq(cursor)
+        if to_seq <= since_seq:
+            return None
+        cursor.execute('''
+            SELECT DISTINCT transaction_id FROM change_log WHERE seq > ? AND seq <= ?
+        ''', (since_seq, to_seq))
+        changed_ids = [row[0] for row in cursor.fetchall()]
+
+        header = {
+            'type': 'header',
+            'from_seq': since_seq,
+            'to_seq': to_seq,
+            'created_at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+            'count': len(changed_ids)
+        }
+        with gzip.open(path, 'wt', encoding='utf-8') as out:
+            out.write(json.dumps(header) + '\n')
+            for transaction_id in changed_ids:
+                cursor.execute(
+                    f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions WHERE id = ?",
+                    (transaction_id,)
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    out.write(json.dumps({'type': 'delete', 'id': transaction_id}) + '\n')
+                    continue
+                cursor.execute(
+                    f"SELECT {', '.join(ITEM_COLUMNS)} FROM items WHERE transaction_id = ? ORDER BY id",
+                    (transaction_id,)
+                )
+                items = cursor.fetchall()
+                cursor.execute(
+                    f"SELECT {', '.join(OLD_ITEM_COLUMNS)} FROM old_items WHERE transaction_id = ? ORDER BY id",
+                    (transaction_id,)
+                )
+                old_items = cursor.fetchall()
+                out.write(json.dumps({
+                    'type': 'upsert', 'transaction': row, 'items': items, 'old_items': old_items
+                }) + '\n')
+        return header
+    finally:
+        conn.rollback()
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Read the header line of a delta file."""
+    with gzip.open(path, 'rt', encoding='utf-8') as delta:
+        return json.loads(delta.readline())
+
+def apply_delta(conn: sqlite3.Connection, path: str) -> int:
+    """Replay a delta file onto a database, refreshing the rollups it touches.
+
+    Returns:
+        int: The number of transactions written or deleted.
+    """
+    cursor = conn.cursor()
+    touched_dates: List[str] = []
+    count = 0
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as delta:
+            for line in delta:
+                record = json.loads(line)
+                if record['type'] == 'header':
+                    continue
+                transaction_id = record['id'] if record['type'] == 'delete' else record['transaction'][0]
+                cursor.execute('SELECT date FROM transactions WHERE id = ?', (transaction_id,))
+                touched_dates.extend(row[0] for row in cursor.fetchall())
+                cursor.execute('DELETE FROM items WHERE transaction_id = ?', (transaction_id,))
+                cursor.execute('DELETE FROM old_items WHERE transaction_id = ?', (transaction_id,))
+                cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+                if record['type'] == 'upsert':
+                    cursor.execute(f'''
+                        INSERT INTO transactions ({', '.join(TRANSACTION_COLUMNS)})
+                        VALUES ({', '.join('?' for _ in TRANSACTION_COLUMNS)})
+                    ''', record['transaction'])
+                    cursor.executemany(f'''
+                        INSERT INTO items (transaction_id, {', '.join(ITEM_COLUMNS)})
+                        VALUES (?, {', '.join('?' for _ in ITEM_COLUMNS)})
+                    ''', [[transaction_id] + item for item in record['items']])
+                    cursor.executemany(f'''
+                        INSERT INTO old_items (transaction_id, {', '.join(OLD_ITEM_COLUMNS)})
+                        VALUES (?, {', '.join('?' for _ in OLD_ITEM_COLUMNS)})
+                    ''', [[transaction_id] + item for item in record['old_items']])
+                    touched_dates.append(record['transaction'][1])
+                count += 1
+        rollups.refresh_days(cursor, touched_dates)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return count
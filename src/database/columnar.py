@@ -0,0 +1,237 @@
+"""Columnar snapshots of the register as NumPy ``.npz`` files.
+
+A snapshot holds a date range as typed column arrays so that analyses over
+years of items are vectorized NumPy operations instead of row loops:
+
+- dates are int32 day numbers (days since 1970-01-01, so
+  ``day.astype('datetime64[D]')`` gives calendar dates);
+- amounts are int64 paise and weights int64 milligrams;
+- item codes are int32 ids into the ``codes``/``code_names`` dictionary;
+- metals are int8 (0 gold, 1 silver, 2 other) and billable flags bool.
+
+Items, old items and transactions each get a group of columns prefixed
+``item_``, ``old_`` and ``txn_``. The archive is written uncompressed, so
+load_snapshot can memory-map every column straight from the file.
+"""
+import json
+import os
+import sqlite3
+import zipfile
+from pathlib import Path
+from array import array
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from utils.date_ranges import day_bounds
+
+FORMAT = 'daily-register-columnar'
+FORMAT_VERSION = 1
+AMOUNT_SCALE = 100  # paise per rupee
+WEIGHT_SCALE = 1000  # milligrams per gram
+METALS = ('gold', 'silver', 'other')
+
+_DAY_SQL = "CAST(julianday(t.date) - 2440587.5 AS INTEGER)"
+_METAL_SQL = ("CASE WHEN UPPER({col}) IN ('G', 'GOLD') THEN 0 "
+              "WHEN UPPER({col}) IN ('S', 'SILVER') THEN 1 ELSE 2 END")
+
+def _scaled(expression: str, scale: int) -> str:
+    return f"CAST(ROUND({expression} * {scale}) AS INTEGER)"
+
+# group -> (query, [(column, array typecode, numpy dtype)]); a 'code' column is mapped to ids
+_GROUPS = {
+    'item': (
+        f'''
+        SELECT {_DAY_SQL}, t.id, i.code, {_METAL_SQL.format(col='i.type')},
+               {_scaled('i.weight', WEIGHT_SCALE)}, {_scaled('i.amount', AMOUNT_SCALE)},
+               CASE WHEN i.is_billable THEN 1 ELSE 0 END
+        FROM transactions t
+        JOIN items i ON i.transaction_id = t.id
+        {{where}}
+        ORDER BY t.date, t.id, i.id
+        ''',
+        [('day', 'l', np.int32), ('transaction_id', 'q', np.int64), ('code', 'l', np.int32),
+         ('metal', 'b', np.int8), ('weight_mg', 'q', np.int64), ('amount_paise', 'q', np.int64),
+         ('billable', 'b', np.bool_)]
+    ),
+    'old': (
+        f'''
+        SELECT {_DAY_SQL}, t.id, {_METAL_SQL.format(col='o.type')},
+               {_scaled('o.weight', WEIGHT_SCALE)}, {_scaled('o.amount', AMOUNT_SCALE)}
+        FROM transactions t
+        JOIN old_items o ON o.transaction_id = t.id
+        {{where}}
+        ORDER BY t.date, t.id, o.id
+        ''',
+        [('day', 'l', np.int32), ('transaction_id', 'q', np.int64), ('metal', 'b', np.int8),
+         ('weight_mg', 'q', np.int64), ('amount_paise', 'q', np.int64)]
+    ),
+    'txn': (
+        f'''
+        SELECT {_DAY_SQL}, t.id, {_scaled('t.total_amount', AMOUNT_SCALE)},
+               {_scaled('t.net_amount_paid', AMOUNT_SCALE)}, {_scaled('t.cash_amount', AMOUNT_SCALE)},
+               {_scaled('t.card_amount', AMOUNT_SCALE)}, {_scaled('t.upi_amount', AMOUNT_SCALE)}
+        FROM transactions t
+        {{where}}
+        ORDER BY t.date, t.id
+        ''',
+        [('day', 'l', np.int32), ('id', 'q', np.int64), ('total_paise', 'q', np.int64),
+         ('net_paise', 'q', np.int64), ('cash_paise', 'q', np.int64),
+         ('card_paise', 'q', np.int64), ('upi_paise', 'q', np.int64)]
+    ),
+}
+
+def write_snapshot(db, path, start_date=None, end_date=None, batch_size: int = 5000) -> Dict[str, int]:
+    """Write a date range of the register as a columnar .npz snapshot.
+
+    Rows are streamed from a read-only snapshot connection into typed
+    buffers, so no Python object is kept per row and the shared connection
+    stays free for the counter.
+
+    Args:
+        db: DatabaseManager to export from.
+        path: Destination .npz file.
+        start_date: First date to export; all dates if omitted.
+        end_date: Last date to export (inclusive); defaults to start_date.
+        batch_size: Rows fetched per round trip.
+
+    Returns:
+        dict: Row counts per group ('item', 'old', 'txn').
+    """
+    where, params = '', ()
+    if start_date is not None:
+        where = 'WHERE t.date >= ? AND t.date < ?'
+        params = day_bounds(start_date, end_date)
+
+    code_ids: Dict[str, int] = {}
+    code_names = []
+    columns = {}
+    counts = {}
+    conn = sqlite3.connect(f"file:{Path(db.db_path).as_posix()}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        for group, (query, spec) in _GROUPS.items():
+            buffers = [array(typecode) for _, typecode, _ in spec]
+            code_index = next((i for i, (name, _, _) in enumerate(spec) if name == 'code'), None)
+            cursor.execute(query.format(where=where), params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if code_index is not None:
+                    rows = [list(row) for row in rows]
+                    for row in rows:
+                        code = row[code_index]
+                        if code not in code_ids:
+                            code_ids[code] = len(code_ids)
+                            code_names.append(code)
+                        row[code_index] = code_ids[code]
+                for buffer, values in zip(buffers, zip(*rows)):
+                    buffer.extend(values)
+            for (name, _, dtype), buffer in zip(spec, buffers):
+                columns[f"{group}_{name}"] = np.asarray(buffer).astype(dtype)
+            counts[group] = len(buffers[0])
+
+        names = dict(cursor.execute(
+            'SELECT code, MAX(name) FROM items GROUP BY code'
+        ).fetchall())
+    finally:
+        conn.close()
+
+    columns['codes'] = np.array(code_names, dtype=str)
+    columns['code_names'] = np.array([names.get(code, '') for code in code_names], dtype=str)
+    meta = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+        'start_date': params[0] if params else None,
+        'end_date_exclusive': params[1] if params else None,
+        'amount_scale': AMOUNT_SCALE,
+        'weight_scale': WEIGHT_SCALE,
+        'metals': list(METALS),
+        'counts': counts,
+    }
+    columns['meta'] = np.array(json.dumps(meta))
+
+    temp_path = f"{path}.tmp.npz"
+    np.savez(temp_path, **columns)
+    os.replace(temp_path, path)
+    print(f"[Columnar] Wrote {counts} rows to: {path}")
+    return counts
+
+class ColumnarSnapshot:
+    """Read-only columns of a snapshot, memory-mapped from the .npz file."""
+
+    def __init__(self, path, columns: Dict[str, np.ndarray], meta: dict):
+        self.path = path
+        self.columns = columns
+        self.meta = meta
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def keys(self):
+        return self.columns.keys()
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self.columns['codes']
+
+    def code_id(self, code: str) -> Optional[int]:
+        """Get the id of an item code, or None if the snapshot doesn't contain it."""
+        matches = np.flatnonzero(self.codes == code)
+        return int(matches[0]) if len(matches) else None
+
+    def dates(self, group: str = 'item') -> np.ndarray:
+        """Get a group's day numbers as datetime64[D] dates."""
+        return self.columns[f"{group}_day"].astype('datetime64[D]')
+
+    def rupees(self, column: str) -> np.ndarray:
+        """Get an amount column in rupees."""
+        return self.columns[column] / self.meta['amount_scale']
+
+    def grams(self, column: str) -> np.ndarray:
+        """Get a weight column in grams."""
+        return self.columns[column] / self.meta['weight_scale']
+
+def load_snapshot(path) -> ColumnarSnapshot:
+    """Open a columnar snapshot without reading its columns into memory.
+
+    np.load ignores ``mmap_mode`` for .npz archives, so each stored member
+    is located in the zip file and memory-mapped directly.
+    """
+    columns = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Column {name} is compressed and can't be memory-mapped")
+            # The local header's name and extra fields can differ from the central directory
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"Column {name} holds Python objects")
+            if not shape or 0 in shape:
+                # Scalars and empty columns are read outright
+                columns[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+            else:
+                columns[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                          order='F' if fortran_order else 'C')
+
+    meta = json.loads(str(columns.pop('meta')[()]))
+    if meta.get('format') != FORMAT:
+        raise ValueError(f"Not a columnar snapshot: {path}")
+    if meta.get('version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Snapshot format {meta['version']} is newer than supported ({FORMAT_VERSION})")
+    return ColumnarSnapshot(path, columns, meta)
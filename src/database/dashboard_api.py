@@ -0,0 +1,295 @@
+"""Read-only JSON API for dashboards, e.g. a tablet in the back office.
+
+The server runs an asyncio event loop on a background thread and answers
+GET requests only:
+
+    GET /day?date=...                 totals of one day (default today)
+    GET /range?from=...&to=...        totals and per-day rows of a date range
+    GET /billable?from=...&to=...     billable totals and per-item amounts
+    GET /recent?limit=...             the newest transactions (default 20)
+
+Responses are built from the rollup tables and kept in a ResultCache; when
+the application runs the server, it shares the cache of the UI's Analytics,
+so the dashboard and the window reuse and invalidate the same entries.
+Every response carries an ETag made of the server's epoch and the cache's
+version. A dashboard polling with ``If-None-Match`` gets ``304 Not
+Modified`` until something is written, which costs a ``PRAGMA
+data_version`` instead of a query.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+from datetime import date
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from database import rollups
+from database.db_manager import get_repository
+from database.result_cache import ResultCache
+from utils.date_ranges import to_date
+
+DEFAULT_PORT = 8766
+
+# /recent depends on every date; its cache entry spans all of them
+_ALL_DATES = ('0001-01-01', '9999-12-31')
+
+class DashboardServer:
+    """Serves day, range, billable and recent-transaction summaries as JSON."""
+
+    # Largest accepted /recent limit
+    max_recent = 200
+    # Seconds an idle keep-alive connection stays open
+    idle_timeout = 30
+
+    def __init__(self, db=None, cache: Optional[ResultCache] = None,
+                 host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        """Initialize the server.
+
+        Args:
+            db: The repository to read; the shared repository if omitted.
+            cache: The result cache to serve from, e.g. ``Analytics.cache``;
+                a new cache on db if omitted.
+            host: Address to listen on ('0.0.0.0' for the whole LAN).
+            port: Port to listen on; 0 picks a free port.
+        """
+        self.db = db or get_repository()
+        # An empty cache is falsy, so test for None
+        self.cache = cache if cache is not None else ResultCache(self.db)
+        self.host = host
+        self.port = port
+        self.epoch = uuid.uuid4().hex
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._start_error = None
+        self.db.add_reset_listener(self._on_reset)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _on_reset(self):
+        """Invalidate every ETag after the database file was replaced."""
+        self.epoch = uuid.uuid4().hex
+
+    def etag(self) -> str:
+        return f'"{self.epoch}-{self.cache.version()}"'
+
+    def _range_params(self, params: Dict[str, str]) -> Tuple[str, str]:
+        start = to_date(params.get('from') or date.today()).isoformat()
+        end = to_date(params.get('to') or start).isoformat()
+        if end < start:
+            raise ValueError(f"'to' ({end}) is before 'from' ({start})")
+        return start, end
+
+    def _compute(self, path: str, params: Dict[str, str]):
+        """Get (key, start, end, compute) for a path, or None if it is unknown."""
+        if path == '/day':
+            day = to_date(params.get('date') or date.today()).isoformat()
+            return ('dashboard_day', day), day, day, lambda: {
+                'date': day, 'totals': rollups.range_totals(self.db, day, day)
+            }
+
+        if path == '/range':
+            start, end = self._range_params(params)
+            return ('dashboard_range', start, end), start, end, lambda: {
+                'from': start, 'to': end,
+                'totals': rollups.range_totals(self.db, start, end),
+                'days': rollups.range_days(self.db, start, end)
+            }
+
+        if path == '/billable':
+            start, end = self._range_params(params)
+
+            def billable():
+                totals = rollups.range_totals(self.db, start, end)
+                return {
+                    'from': start, 'to': end,
+                    'totals': {column: totals[column] for column in rollups.DAILY_COLUMNS
+                               if column.startswith('billable_')},
+                    'new_amount': totals['new_amount'],
+                    'items': rollups.range_item_totals(self.db, start, end)
+                }
+            return ('dashboard_billable', start, end), start, end, billable
+
+        if path == '/recent':
+            limit = int(params.get('limit', 20))
+            if not 0 < limit <= self.max_recent:
+                raise ValueError(f"limit must be between 1 and {self.max_recent}")
+            return ('dashboard_recent', limit), _ALL_DATES[0], _ALL_DATES[1], lambda: {
+                'transactions': self.db.get_recent_transactions(limit)
+            }
+
+        return None
+
+    def handle_get(self, path: str, params: Dict[str, str], if_none_match: Optional[str] = None):
+        """Answer a GET request; returns (status, body bytes, headers)."""
+        route = self._compute(path, params)
+        if route is None:
+            return HTTPStatus.NOT_FOUND, _json_body({'error': f"Unknown path: {path}"}), {}
+
+        # Read the ETag before computing, so a write racing the query can
+        # only cause one extra reload, never a stale body under a new ETag
+        etag = self.etag()
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if if_none_match == etag:
+            return HTTPStatus.NOT_MODIFIED, b'', headers
+
+        key, start, end, compute = route
+        body = self.cache.get_or_compute(key, start, end, lambda: _json_body(compute()))
+        return HTTPStatus.OK, body, headers
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                method, target, version = (parts + ['', '', ''])[:3]
+                # Request bodies aren't read, so only GETs keep the connection open
+                keep_alive = (method == 'GET' and version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                status, body, response_headers = await self._respond(method, target, headers)
+                if status == HTTPStatus.METHOD_NOT_ALLOWED:
+                    response_headers['Allow'] = 'GET'
+                self._write_response(writer, status, body, response_headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str]):
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, _json_body({'error': 'The dashboard API is read-only'}), {}
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            # Queries run off the event loop so one slow range doesn't stall other dashboards
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.handle_get, url.path, params, headers.get('if-none-match')
+            )
+        except (KeyError, ValueError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, _json_body({'error': str(e)}), {}
+        except Exception as e:
+            print(f"[DashboardServer] Error handling GET {url.path}: {e}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, _json_body({'error': str(e)}), {}
+
+    @staticmethod
+    def _write_response(writer, status: int, body: bytes, headers: Dict[str, str], keep_alive: bool):
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if status != HTTPStatus.NOT_MODIFIED:
+            lines.append('Content-Type: application/json')
+            lines.append(f"Content-Length: {len(body)}")
+        # Dashboards are often pages served from somewhere else
+        lines.append('Access-Control-Allow-Origin: *')
+        lines.append('Access-Control-Expose-Headers: ETag')
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if status != HTTPStatus.NOT_MODIFIED:
+            writer.write(body)
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            self._start_error = e
+            self._started.set()
+            return
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._shutdown())
+        self._loop.close()
+
+    async def _shutdown(self):
+        """Close the listening socket and drop the open keep-alive connections."""
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def start(self) -> 'DashboardServer':
+        """Serve requests on a background thread.
+
+        Raises:
+            OSError: If the address can't be listened on.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._started.clear()
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run_loop, name='DashboardServer', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            self._thread = None
+            print(f"[DashboardServer] Error listening on {self.host}:{self.port}: {self._start_error}")
+            raise self._start_error
+        print(f"[DashboardServer] Serving {self.db.db_path} at {self.url}")
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+        self.db.remove_reset_listener(self._on_reset)
+
+    def serve_forever(self):
+        """Serve requests until interrupted."""
+        self.start()
+        try:
+            while self._thread.is_alive():
+                # A timeout keeps Ctrl+C responsive on Windows
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+def _json_body(payload) -> bytes:
+    return json.dumps(payload).encode('utf-8')
+
+def main(argv=None):
+    """Run the dashboard API from the command line."""
+    parser = argparse.ArgumentParser(description='Serve register summaries to dashboards.')
+    parser.add_argument('--db', help='Database file (default: the application database)')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    args = parser.parse_args(argv)
+
+    server = DashboardServer(get_repository(args.db), host=args.host, port=args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
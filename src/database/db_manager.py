@@ -1,10 +1,20 @@
+import json
 import sqlite3
 from datetime import datetime
 import traceback
-from typing import List, Dict, Any, Optional
+import threading
+import random
+import time
+import weakref
+from contextlib import ExitStack
+from typing import List, Dict, Any, Optional, Iterable, Callable, Set, TypeVar, ContextManager
 import os
 import sys # Import sys
 
+from database import schema, migrations, rollups, search, filters, change_journal, replication
+from database.repository import TransactionRepository
+from utils.date_ranges import to_date
+
 # Helper function to determine the database path in AppData
 def _get_appdata_db_path():
     """Gets the path to the database file in the user's AppData directory."""
@@ -35,8 +45,164 @@ def _get_appdata_db_path():
     # Return the full path to the database file
     return os.path.join(app_dir, "transactions.db")
 
-class DatabaseManager:
-    """Manages database operations for the application."""
+
+def app_data_dir() -> str:
+    """Get the application's data directory, which holds the default database."""
+    return os.path.dirname(_get_appdata_db_path())
+
+# Journal modes the DAILY_REGISTER_JOURNAL_MODE setting accepts
+JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST')
+# File systems whose locking can't back WAL's shared memory index
+_NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'afpfs', 'davfs', 'fuse.sshfs'}
+
+def _is_network_path(path: str) -> bool:
+    """Check whether a file lives on a network share."""
+    path = os.path.abspath(path)
+    if sys.platform == 'win32':
+        if path.startswith('\\\\'):
+            return True
+        import ctypes
+        drive = os.path.splitdrive(path)[0] + '\\'
+        return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+    try:
+        with open('/proc/mounts', encoding='utf-8') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    # The longest mount point above the file is the file system it is on
+    mount_point, fs_type = '', ''
+    for point, kind in mounts:
+        point = point.replace('\\040', ' ')
+        if (path == point or path.startswith(point.rstrip('/') + '/')) and len(point) > len(mount_point):
+            mount_point, fs_type = point, kind
+    return fs_type in _NETWORK_FILESYSTEMS
+
+def journal_mode_for(db_path: str) -> str:
+    """Choose the SQLite journal mode for a database file.
+
+    WAL lets readers such as online backups run without blocking writers,
+    but its shared memory index only works when every connection is on the
+    same machine. A database on a network share (several counters sharing
+    one file) therefore uses the rollback journal (DELETE). The
+    DAILY_REGISTER_JOURNAL_MODE environment variable overrides the choice.
+
+    Raises:
+        ValueError: If the environment variable names an unknown mode.
+    """
+    mode = os.getenv('DAILY_REGISTER_JOURNAL_MODE', '').strip().upper()
+    if mode:
+        if mode not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode {mode!r}; use one of {', '.join(JOURNAL_MODES)}")
+        return mode
+    return 'DELETE' if _is_network_path(db_path) else 'WAL'
+
+# Shared repositories, one per database file
+_repositories: Dict[str, 'DatabaseManager'] = {}
+_repositories_lock = threading.Lock()
+
+def get_repository(db_path: Optional[str] = None) -> 'DatabaseManager':
+    """Get the shared repository for a database file.
+
+    Every part of the application that works on the same file gets the same
+    DatabaseManager, and therefore the same connection and schema.
+
+    Args:
+        db_path: Optional path to the database file. If not provided, uses the default path.
+    """
+    path = os.path.abspath(db_path if db_path is not None else _get_appdata_db_path())
+    with _repositories_lock:
+        repository = _repositories.get(path)
+        if repository is None or repository.conn is None:
+            repository = DatabaseManager(path)
+            _repositories[path] = repository
+        return repository
+
+# Every open repository, so a restore can reach all connections to a file
+_instances: 'weakref.WeakSet[DatabaseManager]' = weakref.WeakSet()
+
+def repositories_for(db_path: str) -> List['DatabaseManager']:
+    """Get every open repository on a database file."""
+    path = os.path.abspath(db_path)
+    return [
+        repository for repository in list(_instances)
+        if os.path.abspath(repository.db_path) == path
+    ]
+
+def replace_database_file(db_path: str, new_file: str):
+    """Swap a database file under every repository that has it open.
+
+    The repositories' swap guards are entered first, so side connections
+    (e.g. a backup scheduler's) are closed and work running on the file
+    finishes. All repositories on the file are then quiesced by holding
+    their locks, their WAL is checkpointed and their connections closed. The new file is then
+    renamed over the old one, the repositories reconnect (migrating the new
+    file if it has an older schema) and their reset listeners run. The new
+    file's replication restarts with a full changeset (see
+    replication.restart_after_replace()).
+
+    Args:
+        db_path: The live database file.
+        new_file: A validated database file on the same filesystem.
+    """
+    repositories = sorted(repositories_for(db_path), key=id)
+    with ExitStack() as stack:
+        # Before the locks: a running backup may need them to finish
+        for repository in repositories:
+            for guard in list(repository._swap_guards):
+                stack.enter_context(guard())
+        for repository in repositories:
+            stack.enter_context(repository._lock)
+        replaced_seq = 0
+        for repository in repositories:
+            if repository.conn:
+                replaced_seq = max(replaced_seq, change_journal.last_seq(repository.conn.cursor()))
+            repository._checkpoint_and_close()
+
+        os.replace(new_file, db_path)
+        # Nothing may replay the old file's journal onto the new one
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+        for repository in repositories:
+            repository.reconnect()
+        if repositories:
+            repositories[0]._write(lambda cursor: replication.restart_after_replace(cursor, replaced_seq))
+
+    for repository in repositories:
+        repository._notify_reset()
+
+T = TypeVar('T')
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    """Check whether an error means another connection holds the database lock."""
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def _format_timestamp(value) -> str:
+    """Format a timestamp as 'YYYY-MM-DD HH:MM:SS' for storage."""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    return str(value)
+
+class DatabaseManager(TransactionRepository):
+    """Manages database operations for the application.
+
+    Several counters may write to one database file. Writes run in short
+    ``BEGIN IMMEDIATE`` transactions that wait up to ``busy_timeout_ms`` for
+    the write lock and are retried with backoff while another connection
+    holds it. Commits from other connections are picked up with
+    poll_external_changes().
+    """
+
+    # How long a statement waits for another connection's lock
+    busy_timeout_ms = 5000
+    # Extra attempts for a write that still finds the database locked
+    write_retries = 5
+    # First retry delay; doubled on every further attempt, up to a second
+    retry_backoff_seconds = 0.05
+    # Results of this many recent batch operations with an op_id are kept
+    max_applied_operations = 10000
     
     def __init__(self, db_path: Optional[str] = None):
         """Initialize the database manager.
@@ -47,78 +213,321 @@ class DatabaseManager:
         self.db_path = db_path if db_path is not None else _get_appdata_db_path()
         print(f"[DatabaseManager] Using database file at: {self.db_path}")
         self.conn = None
+        # Serializes use of the shared connection across threads
+        self._lock = threading.RLock()
+        # Callbacks told which dates a committed write touched
+        self._change_listeners: List[Callable[[Set[str]], None]] = []
+        # Callbacks run after the database file was replaced
+        self._reset_listeners: List[Callable[[], None]] = []
+        # Context managers held around a swap of the database file
+        self._swap_guards: List[Callable[[], ContextManager]] = []
+        # What poll_external_changes() has already reported
+        self._seen_data_version = None
+        self._seen_change_seq = 0
         self._create_tables()
+        _instances.add(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database file."""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute(f'PRAGMA journal_mode = {journal_mode_for(self.db_path)}')
+        return conn
 
     def _create_tables(self):
-        """Create the necessary tables if they don't exist."""
-        try:
-            if self.conn:
-                self.conn.close()
-            self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-
-            # Create transactions table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date DATE NOT NULL,
-                    timestamp DATETIME NOT NULL,
-                    comments TEXT,
-                    total_amount REAL DEFAULT 0,
-                    net_amount_paid REAL DEFAULT 0,
-                    cash_amount REAL DEFAULT 0,
-                    card_amount REAL DEFAULT 0,
-                    upi_amount REAL DEFAULT 0
-            )
-            ''')
-
-            # Create items table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transaction_id INTEGER NOT NULL,
-                    code TEXT NOT NULL,
-                    name TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                weight REAL NOT NULL,
-                amount REAL NOT NULL,
-                    is_billable BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE
-            )
-            ''')
-
-                # Create old_items table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS old_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transaction_id INTEGER NOT NULL,
-                    type TEXT NOT NULL,
-                weight REAL NOT NULL,
-                amount REAL NOT NULL,
-                    FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE
-            )
-            ''')
+        """Create the necessary tables if they don't exist, migrating older layouts."""
+        with self._lock:
+            try:
+                if self.conn:
+                    self.conn.close()
+                self.conn = self._connect()
+                cursor = self.conn.cursor()
+                cursor.execute('PRAGMA user_version')
+                version = cursor.fetchone()[0]
 
-            self.conn.commit()
-        except Exception as e:
-            print(f"Error creating tables: {e}")
-            if self.conn:
-                self.conn.rollback()
-        finally:
+                # Databases written by the JSON-blob services are converted once
+                if migrations.is_json_blob_layout(cursor):
+                    migrated = migrations.migrate_json_transactions(self.conn)
+                    print(f"[DatabaseManager] Migrated {migrated} JSON transactions to the normalized schema")
+
+                schema.create_schema(cursor)
+                migrations.upgrade(cursor, version)
+                self.conn.commit()
+                self._seen_data_version = cursor.execute('PRAGMA data_version').fetchone()[0]
+                self._seen_change_seq = self._last_change_seq(cursor)
+            except Exception as e:
+                print(f"Error creating tables: {e}")
+                if self.conn:
+                    self.conn.rollback()
+
+    def reconnect(self):
+        """Re-open the connection, e.g. after the database file was replaced."""
+        self._create_tables()
+
+    def replace_database(self, new_file: str):
+        """Swap a validated file in as this database for every repository on it.
+
+        See replace_database_file().
+        """
+        replace_database_file(self.db_path, new_file)
+
+    def _checkpoint_and_close(self):
+        """Fold the WAL into the database file and close the connection."""
+        with self._lock:
             if self.conn:
+                try:
+                    self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                except sqlite3.Error as e:
+                    print(f"[DatabaseManager] Checkpoint failed: {e}")
                 self.conn.close()
-                self.conn = None  # Set to None to indicate it's closed
+                self.conn = None
 
     def close(self):
         """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
 
     def __del__(self):
         """Destructor to ensure connection is closed."""
         self.close()
 
+    def add_change_listener(self, listener: Callable[[Set[str]], None]):
+        """Register a callback run with the ISO dates touched by each committed write."""
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[Set[str]], None]):
+        """Unregister a change listener."""
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def add_reset_listener(self, listener: Callable[[], None]):
+        """Register a callback run after the database file was replaced, e.g. by a restore."""
+        self._reset_listeners.append(listener)
+
+    def remove_reset_listener(self, listener: Callable[[], None]):
+        """Unregister a reset listener."""
+        if listener in self._reset_listeners:
+            self._reset_listeners.remove(listener)
+
+    def add_swap_guard(self, guard: Callable[[], ContextManager]):
+        """Register a callable returning a context manager held while the database file is swapped.
+
+        Owners of side connections close them when the context is entered
+        and may wait there for their work on the file to finish; they carry
+        on when it exits.
+        """
+        self._swap_guards.append(guard)
+
+    def remove_swap_guard(self, guard: Callable[[], ContextManager]):
+        """Unregister a swap guard."""
+        if guard in self._swap_guards:
+            self._swap_guards.remove(guard)
+
+    def _notify_reset(self):
+        """Tell the reset listeners the database contents were replaced."""
+        for listener in list(self._reset_listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"[DatabaseManager] Error in reset listener: {e}")
+
+    def _notify_change(self, dates: Iterable[str]):
+        """Tell the change listeners which dates were modified."""
+        dates = {str(date) for date in dates if date}
+        for listener in list(self._change_listeners):
+            try:
+                listener(dates)
+            except Exception as e:
+                print(f"[DatabaseManager] Error in change listener: {e}")
+
+    def data_version(self) -> int:
+        """Get SQLite's data_version, which changes whenever another connection commits."""
+        with self._lock:
+            cursor = self._cursor()
+            cursor.execute('PRAGMA data_version')
+            return cursor.fetchone()[0]
+
+    def query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """Run a read-only query on the shared connection and return all rows."""
+        with self._lock:
+            cursor = self._cursor()
+            cursor.execute(sql, tuple(params))
+            return cursor.fetchall()
+
+    @staticmethod
+    def _last_change_seq(cursor: sqlite3.Cursor) -> int:
+        """Get the newest change_log sequence number (0 if nothing was logged)."""
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def poll_external_changes(self) -> Optional[Set[str]]:
+        """Find the dates other connections changed since the last poll.
+
+        Costs one ``PRAGMA data_version`` when nothing was committed
+        elsewhere. Otherwise the dates are read from change_log and passed
+        to the change listeners.
+
+        Returns:
+            set: ISO dates changed by other connections (empty if none), or
+            None if the log was pruned past the last poll and the changed
+            dates are unknown.
+        """
+        with self._lock:
+            cursor = self._cursor()
+            version = cursor.execute('PRAGMA data_version').fetchone()[0]
+            if version == self._seen_data_version:
+                return set()
+            self._seen_data_version = version
+
+            if self._last_change_seq(cursor) <= self._seen_change_seq:
+                return set()
+            changes = self.changes_since(self._seen_change_seq)
+            self._seen_change_seq = changes['seq']
+
+        dates = set(changes['dates'])
+        if not changes['complete']:
+            return None
+        self._notify_change(dates)
+        return dates
+
+    def _write(self, operation: Callable[[sqlite3.Cursor], T]) -> T:
+        """Run operation(cursor) in a BEGIN IMMEDIATE transaction and commit it.
+
+        Taking the write lock up front means a locked database fails at
+        BEGIN, before any work is done, instead of at the first write of a
+        deferred transaction. While another connection holds the lock the
+        whole transaction is retried with exponential backoff and jitter.
+        """
+        for attempt in range(self.write_retries + 1):
+            with self._lock:
+                cursor = self._cursor()
+                try:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    seq_before = self._last_change_seq(cursor)
+                    result = operation(cursor)
+                    seq_after = self._last_change_seq(cursor)
+                    self.conn.commit()
+                    # Our own changes needn't be reported by poll_external_changes,
+                    # unless they follow other connections' unseen ones
+                    if seq_before == self._seen_change_seq:
+                        self._seen_change_seq = seq_after
+                    return result
+                except sqlite3.OperationalError as e:
+                    if self.conn and self.conn.in_transaction:
+                        self.conn.rollback()
+                    if not _is_busy(e) or attempt == self.write_retries:
+                        raise
+                except Exception:
+                    if self.conn and self.conn.in_transaction:
+                        self.conn.rollback()
+                    raise
+            # Wait outside the lock so this process can keep reading
+            delay = min(self.retry_backoff_seconds * (2 ** attempt), 1.0) * random.uniform(0.5, 1.5)
+            print(f"[DatabaseManager] Database is locked, retrying write in {delay:.2f}s")
+            time.sleep(delay)
+
+    def _cursor(self) -> sqlite3.Cursor:
+        """Get a cursor on the shared connection, reconnecting if it was closed."""
+        if not self.conn:
+            self.conn = self._connect()
+        return self.conn.cursor()
+
+    def _transaction_values(self, transaction_data: Dict[str, Any]) -> tuple:
+        """Build the transactions row (without id) for a transaction dictionary."""
+        timestamp = _format_timestamp(transaction_data.get('timestamp') or datetime.now())
+        payment_details = transaction_data.get('payment_details', {})
+
+        # Calculate totals
+        total_amount = sum(item['amount'] for item in transaction_data.get('new_items', []))
+        total_amount += sum(item['amount'] for item in transaction_data.get('old_items', []))
+        net_amount_paid = sum(
+            payment_details.get(payment_type, 0.0)
+            for payment_type in ['cash', 'card', 'upi']
+        )
+        return (
+            timestamp[:10],
+            timestamp,
+            transaction_data.get('comments', ''),
+            total_amount,
+            net_amount_paid,
+            payment_details.get('cash', 0.0),
+            payment_details.get('card', 0.0),
+            payment_details.get('upi', 0.0)
+        )
+
+    def _insert_items(self, cursor: sqlite3.Cursor, transaction_id: int, transaction_data: Dict[str, Any]):
+        """Insert the new and old items of a transaction."""
+        cursor.executemany('''
+            INSERT INTO items (transaction_id, code, name, type, weight, amount, is_billable)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                transaction_id,
+                item['code'],
+                item['name'],
+                item['type'],
+                item['weight'],
+                item['amount'],
+                item.get('is_billable', False)
+            )
+            for item in transaction_data.get('new_items', [])
+        ])
+        cursor.executemany('''
+            INSERT INTO old_items (transaction_id, type, weight, amount)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (transaction_id, item['type'], item['weight'], item['amount'])
+            for item in transaction_data.get('old_items', [])
+        ])
+
+    def _insert_transaction(self, cursor: sqlite3.Cursor, transaction_data: Dict[str, Any]) -> tuple:
+        """Insert a transaction and its items; returns (id, dates touched)."""
+        values = self._transaction_values(transaction_data)
+        cursor.execute('''
+            INSERT INTO transactions (
+                date, timestamp, comments, total_amount, net_amount_paid,
+                cash_amount, card_amount, upi_amount
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', values)
+        transaction_id = cursor.lastrowid
+        self._insert_items(cursor, transaction_id, transaction_data)
+        return transaction_id, [values[0]]
+
+    def _update_transaction(self, cursor: sqlite3.Cursor, transaction_id: int,
+                            transaction_data: Dict[str, Any]) -> List[str]:
+        """Replace a transaction and its items; returns the dates touched."""
+        values = self._transaction_values(transaction_data)
+        cursor.execute('SELECT date, timestamp FROM transactions WHERE id = ?', (transaction_id,))
+        existing = cursor.fetchone()
+        if existing and not transaction_data.get('timestamp'):
+            values = tuple(existing) + values[2:]
+
+        cursor.execute('''
+            UPDATE transactions
+            SET date = ?, timestamp = ?, comments = ?, total_amount = ?, net_amount_paid = ?,
+                cash_amount = ?, card_amount = ?, upi_amount = ?
+            WHERE id = ?
+        ''', values + (transaction_id,))
+
+        # Replace existing items
+        cursor.execute('DELETE FROM items WHERE transaction_id = ?', (transaction_id,))
+        cursor.execute('DELETE FROM old_items WHERE transaction_id = ?', (transaction_id,))
+        self._insert_items(cursor, transaction_id, transaction_data)
+        return [values[0], existing[0] if existing else None]
+
+    def _delete_transaction(self, cursor: sqlite3.Cursor, transaction_id: int) -> List[str]:
+        """Delete a transaction and its items; returns the dates touched."""
+        cursor.execute('SELECT date FROM transactions WHERE id = ?', (transaction_id,))
+        dates = [row[0] for row in cursor.fetchall()]
+        cursor.execute('DELETE FROM items WHERE transaction_id = ?', (transaction_id,))
+        cursor.execute('DELETE FROM old_items WHERE transaction_id = ?', (transaction_id,))
+        cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+        return dates
+
     def add_transaction(self, transaction_data: Dict[str, Any]) -> int:
         """Add a new transaction.
         
@@ -128,187 +537,25 @@ class DatabaseManager:
         Returns:
             int: The ID of the newly created transaction.
         """
-        try:
-            if not self.conn:
-                self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Calculate totals
-            total_amount = sum(item['amount'] for item in transaction_data.get('new_items', []))
-            total_amount += sum(item['amount'] for item in transaction_data.get('old_items', []))
-            net_amount_paid = sum(
-                transaction_data.get('payment_details', {}).get(payment_type, 0.0)
-                for payment_type in ['cash', 'card', 'upi']
-            )
-            
-            # Insert transaction
-            cursor.execute('''
-                INSERT INTO transactions (
-                    date, timestamp, comments, total_amount, net_amount_paid,
-                    cash_amount, card_amount, upi_amount
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now().date(),
-                transaction_data.get('timestamp', datetime.now()),
-                transaction_data.get('comments', ''),
-                total_amount,
-                net_amount_paid,
-                transaction_data.get('payment_details', {}).get('cash', 0.0),
-                transaction_data.get('payment_details', {}).get('card', 0.0),
-                transaction_data.get('payment_details', {}).get('upi', 0.0)
-            ))
-            
-            transaction_id = cursor.lastrowid
-            
-            # Insert new items
-            for item in transaction_data.get('new_items', []):
-                cursor.execute('''
-                    INSERT INTO items (transaction_id, code, name, type, weight, amount, is_billable)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    transaction_id,
-                    item['code'],
-                    item['name'],
-                    item['type'],
-                    item['weight'],
-                    item['amount'],
-                    item.get('is_billable', False)
-                ))
-
-            # Insert old items
-            for item in transaction_data.get('old_items', []):
-                    cursor.execute('''
-                    INSERT INTO old_items (transaction_id, type, weight, amount)
-                    VALUES (?, ?, ?, ?)
-                    ''', (
-                        transaction_id,
-                    item['type'],
-                        item['weight'],
-                        item['amount']
-                    ))
-            
-            self.conn.commit()
-            return transaction_id
-            
-        except Exception as e:
-            if self.conn:
-                self.conn.rollback()
-            print(f"Error adding transaction: {e}")
-            raise
+        def insert(cursor):
+            transaction_id, dates = self._insert_transaction(cursor, transaction_data)
+            rollups.refresh_days(cursor, dates)
+            return transaction_id, dates
 
-    def get_transactions_by_date(self, date: datetime.date) -> List[Dict[str, Any]]:
-        """Get all transactions for a specific date."""
         try:
-            if not self.conn:
-                self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Get transactions
-            cursor.execute('''
-            SELECT * FROM transactions WHERE date = ?
-            ''', (date,))
-            
-            transactions = []
-            for row in cursor.fetchall():
-                transaction = {
-                    'id': row[0],
-                    'date': row[1],
-                    'timestamp': row[2],
-                    'comments': row[3],
-                    'total_amount': row[4],
-                    'net_amount_paid': row[5],
-                    'cash_amount': row[6],
-                    'card_amount': row[7],
-                    'upi_amount': row[8]
-                }
-                
-                # Get items for this transaction
-                cursor.execute('SELECT * FROM items WHERE transaction_id = ?', (transaction['id'],))
-                items = []
-                for item_row in cursor.fetchall():
-                    items.append({
-                        'id': item_row[0],
-                        'transaction_id': item_row[1],
-                        'code': item_row[2],
-                        'name': item_row[3],
-                        'type': item_row[4],
-                        'weight': item_row[5],
-                        'amount': item_row[6],
-                        'is_billable': bool(item_row[7])
-                    })
-                transaction['new_items'] = items
-
-                # Get old items for this transaction
-                cursor.execute('SELECT * FROM old_items WHERE transaction_id = ?', (transaction['id'],))
-                old_items = []
-                for item_row in cursor.fetchall():
-                    old_items.append({
-                        'id': item_row[0],
-                        'transaction_id': item_row[1],
-                        'type': item_row[2],
-                        'weight': item_row[3],
-                        'amount': item_row[4]
-                    })
-                transaction['old_items'] = old_items
-                
-                transactions.append(transaction)
-            
-            return transactions
-            
+            transaction_id, dates = self._write(insert)
         except Exception as e:
-            print(f"Error getting transactions: {e}")
-            raise
-
-    def get_transaction_summary(self, date: datetime.date) -> Dict[str, Dict[str, float]]:
-        """Get summary of transactions for a specific date."""
-        try:
-            transactions = self.get_transactions_by_date(date)
-            
-            summary = {
-                'new_items': {'gold': 0.0, 'silver': 0.0},
-                'old_items': {'gold': 0.0, 'silver': 0.0},
-                'billable_items': {'gold': 0.0, 'silver': 0.0, 'amount': 0.0},
-                'payments': {'cash': 0.0, 'card': 0.0, 'upi': 0.0},
-                'total_amount': 0.0,
-                'net_amount_paid': 0.0,
-                'total_weight': 0.0
-            }
-            
-            for transaction in transactions:
-                # Sum up new items
-                for item in transaction['new_items']:
-                    item_type = 'gold' if item['type'] == 'G' else 'silver'
-                    summary['new_items'][item_type] += item['weight']
-                    summary['total_weight'] += item['weight']
-                    if item['is_billable']:
-                        summary['billable_items'][item_type] += item['weight']
-                        summary['billable_items']['amount'] += item['amount']
-                
-                # Sum up old items
-                for item in transaction['old_items']:
-                    item_type = 'gold' if item['type'] == 'G' else 'silver'
-                    summary['old_items'][item_type] += item['weight']
-                    summary['total_weight'] += item['weight']
-                
-                # Sum up payments
-                summary['payments']['cash'] += transaction['cash_amount']
-                summary['payments']['card'] += transaction['card_amount']
-                summary['payments']['upi'] += transaction['upi_amount']
-                
-                # Sum up totals
-                summary['total_amount'] += transaction['total_amount']
-                summary['net_amount_paid'] += transaction['net_amount_paid']
-            
-            return summary
-            
-        except Exception as e:
-            print(f"Error getting transaction summary: {e}")
+            print(f"Error adding transaction: {e}")
             raise
+        self._notify_change(dates)
+        return transaction_id
 
     def update_transaction(self, transaction_id: int, transaction_data: Dict[str, Any]) -> bool:
         """Update an existing transaction.
         
+        The original date and timestamp are kept unless transaction_data
+        provides a new timestamp.
+        
         Args:
             transaction_id: The ID of the transaction to update.
             transaction_data: Dictionary containing updated transaction details.
@@ -316,187 +563,239 @@ class DatabaseManager:
         Returns:
             bool: True if the update was successful, False otherwise.
         """
+        def update(cursor):
+            dates = self._update_transaction(cursor, transaction_id, transaction_data)
+            rollups.refresh_days(cursor, dates)
+            return dates
+
         try:
-            if not self.conn:
-                self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Calculate totals
-            total_amount = sum(item['amount'] for item in transaction_data.get('new_items', []))
-            total_amount += sum(item['amount'] for item in transaction_data.get('old_items', []))
-            net_amount_paid = sum(
-                transaction_data.get('payment_details', {}).get(payment_type, 0.0)
-                for payment_type in ['cash', 'card', 'upi']
-            )
-            
-            # Update transaction
-            cursor.execute('''
-            UPDATE transactions 
-                SET date = ?, timestamp = ?, comments = ?, total_amount = ?, net_amount_paid = ?,
-                    cash_amount = ?, card_amount = ?, upi_amount = ?
-                WHERE id = ?
-            ''', (
-                datetime.now().date(),
-                transaction_data.get('timestamp', datetime.now()),
-                transaction_data.get('comments', ''),
-                total_amount,
-                net_amount_paid,
-                transaction_data.get('payment_details', {}).get('cash', 0.0),
-                transaction_data.get('payment_details', {}).get('card', 0.0),
-                transaction_data.get('payment_details', {}).get('upi', 0.0),
-                transaction_id
-            ))
-            
-            # Delete existing items
-            cursor.execute('DELETE FROM items WHERE transaction_id = ?', (transaction_id,))
-            cursor.execute('DELETE FROM old_items WHERE transaction_id = ?', (transaction_id,))
-            
-            # Insert new items
-            for item in transaction_data.get('new_items', []):
-                cursor.execute('''
-                    INSERT INTO items (transaction_id, code, name, type, weight, amount, is_billable)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    transaction_id,
-                    item['code'],
-                    item['name'],
-                    item['type'],
-                    item['weight'],
-                    item['amount'],
-                    item.get('is_billable', False)
-                ))
-            
-            # Insert old items
-            for item in transaction_data.get('old_items', []):
-                    cursor.execute('''
-                    INSERT INTO old_items (transaction_id, type, weight, amount)
-                    VALUES (?, ?, ?, ?)
-                    ''', (
-                        transaction_id,
-                    item['type'],
-                        item['weight'],
-                        item['amount']
-                    ))
-            
-            self.conn.commit()
-            return True
-            
+            changed_dates = self._write(update)
         except Exception as e:
-            if self.conn:
-                self.conn.rollback()
             print(f"Error updating transaction: {e}")
             return False
+        self._notify_change(changed_dates)
+        return True
 
     def delete_transaction(self, transaction_id: int) -> bool:
         """Delete a transaction and its related items"""
+        def delete(cursor):
+            dates = self._delete_transaction(cursor, transaction_id)
+            rollups.refresh_days(cursor, dates)
+            return dates
+
         try:
-            if not self.conn:
-                self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Delete items first (foreign key constraint)
-            cursor.execute('DELETE FROM items WHERE transaction_id = ?', (transaction_id,))
-            cursor.execute('DELETE FROM old_items WHERE transaction_id = ?', (transaction_id,))
-            
-            # Delete transaction
-            cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
-            
-            self.conn.commit()
-            return True
-            
+            dates = self._write(delete)
         except Exception as e:
-            if self.conn:
-                self.conn.rollback()
             print(f"Error deleting transaction: {e}")
             return False
+        self._notify_change(dates)
+        return True
 
-    def delete_all_transactions_for_date(self, date):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all transaction IDs for the date
-        cursor.execute("SELECT id FROM transactions WHERE date = ?", (date,))
-        transaction_ids = [row[0] for row in cursor.fetchall()]
-        
-        # Delete items first
-        for t_id in transaction_ids:
-            cursor.execute("DELETE FROM items WHERE transaction_id = ?", (t_id,))
-        
-        # Delete transactions
-        cursor.execute("DELETE FROM transactions WHERE date = ?", (date,))
-        
-        conn.commit()
-        conn.close()
+    def apply_batch(self, operations: List[Dict[str, Any]]) -> List[Any]:
+        """Apply several writes in one transaction.
+
+        The rollups of the touched dates are refreshed once for the whole
+        batch. Either every operation is applied or none is.
+
+        An operation with an ``op_id`` is recorded in applied_operations
+        in the same transaction. If that op_id was applied before, its
+        stored result is returned and the operation is skipped, so a batch
+        resent after a lost response is applied once, across restarts too.
+
+        Args:
+            operations: Dictionaries with an ``op`` of 'add' (with
+                ``transaction``), 'update' (with ``id`` and ``transaction``)
+                or 'delete' (with ``id``), and optionally an ``op_id``.
+
+        Returns:
+            list: The new ID for each 'add' and True for the other operations.
+
+        Raises:
+            ValueError: If an operation is unknown.
+        """
+        def apply(cursor):
+            results = []
+            dates = set()
+            for operation in operations:
+                op_id = operation.get('op_id')
+                if op_id:
+                    cursor.execute('SELECT result FROM applied_operations WHERE op_id = ?', (op_id,))
+                    row = cursor.fetchone()
+                    if row:
+                        results.append(json.loads(row[0]))
+                        continue
+                op = operation.get('op')
+                if op == 'add':
+                    transaction_id, touched = self._insert_transaction(cursor, operation['transaction'])
+                    results.append(transaction_id)
+                elif op == 'update':
+                    touched = self._update_transaction(cursor, operation['id'], operation['transaction'])
+                    results.append(True)
+                elif op == 'delete':
+                    touched = self._delete_transaction(cursor, operation['id'])
+                    results.append(True)
+                else:
+                    raise ValueError(f"Unknown batch operation: {op}")
+                dates.update(touched)
+                if op_id:
+                    cursor.execute('INSERT INTO applied_operations (op_id, result) VALUES (?, ?)',
+                                   (op_id, json.dumps(results[-1])))
+            if any(operation.get('op_id') for operation in operations):
+                cursor.execute(
+                    'DELETE FROM applied_operations WHERE rowid <= (SELECT MAX(rowid) FROM applied_operations) - ?',
+                    (self.max_applied_operations,)
+                )
+            rollups.refresh_days(cursor, dates)
+            return results, dates
 
-    def get_transactions_by_date_range(self, from_date: datetime.date, to_date: datetime.date) -> List[Dict[str, Any]]:
-        """Get all transactions between two dates (inclusive)."""
         try:
-            if not self.conn:
-                self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Get transactions within date range
-            cursor.execute("""
+            results, dates = self._write(apply)
+        except Exception as e:
+            print(f"[DatabaseManager] Error applying batch of {len(operations)} writes: {e}")
+            raise
+        self._notify_change(dates)
+        return results
+
+    def change_version(self) -> int:
+        """Get the newest change_log sequence number.
+
+        Unlike data_version(), it also moves with this connection's own
+        commits, so it versions the register for every reader.
+        """
+        with self._lock:
+            return self._last_change_seq(self._cursor())
+
+    def changes_since(self, since_seq: int) -> Dict[str, Any]:
+        """Get the dates changed after a change_log sequence number.
+
+        Returns:
+            dict: ``seq`` (newest sequence number), ``dates`` (sorted ISO
+            dates) and ``complete`` (False if the log was pruned past
+            since_seq, so the dates may be missing some).
+        """
+        with self._lock:
+            cursor = self._cursor()
+            last_seq = self._last_change_seq(cursor)
+            cursor.execute('SELECT COUNT(*) FROM change_log WHERE seq > ?', (since_seq,))
+            complete = cursor.fetchone()[0] == max(last_seq - since_seq, 0)
+            cursor.execute(
+                'SELECT DISTINCT date FROM change_log WHERE seq > ? AND date IS NOT NULL ORDER BY date',
+                (since_seq,)
+            )
+            dates = [row[0] for row in cursor.fetchall()]
+        return {'seq': last_seq, 'dates': dates, 'complete': complete}
+
+    def delete_all_transactions_for_date(self, date):
+        """Delete all transactions (and their items) for a date."""
+        date_str = to_date(date).isoformat()
+
+        def delete(cursor):
+            subquery = 'SELECT id FROM transactions WHERE date = ?'
+            cursor.execute(f'DELETE FROM items WHERE transaction_id IN ({subquery})', (date_str,))
+            cursor.execute(f'DELETE FROM old_items WHERE transaction_id IN ({subquery})', (date_str,))
+            cursor.execute('DELETE FROM transactions WHERE date = ?', (date_str,))
+            rollups.refresh_days(cursor, [date_str])
+
+        self._write(delete)
+        self._notify_change([date_str])
+
+    # Transaction ids bound per item query, below SQLite's parameter limit
+    fetch_chunk_size = 500
+
+    def _rows_of_transactions(self, cursor: sqlite3.Cursor, select: str, ids: Iterable[int]) -> List[tuple]:
+        """Run an item query for the given transaction ids, a chunk of ids at a time.
+
+        Looking items up by id keeps the WHERE clause that found the
+        transactions, e.g. a register filter, from being evaluated again.
+        """
+        ids = list(ids)
+        rows = []
+        for start in range(0, len(ids), self.fetch_chunk_size):
+            chunk = ids[start:start + self.fetch_chunk_size]
+            cursor.execute(
+                f"{select} WHERE transaction_id IN ({', '.join('?' for _ in chunk)}) ORDER BY id", chunk
+            )
+            rows.extend(cursor.fetchall())
+        return rows
+
+    def _fetch_transactions(self, where: str, params: Iterable, order_by: str) -> List[Dict[str, Any]]:
+        """Load transactions matching a WHERE clause together with their items.
+
+        The WHERE clause is evaluated once; items and old items are then
+        fetched by transaction id in chunks instead of one query per
+        transaction.
+        """
+        params = tuple(params)
+        with self._lock:
+            cursor = self._cursor()
+            cursor.execute(f'''
                 SELECT id, date, timestamp, comments, total_amount, net_amount_paid,
                        cash_amount, card_amount, upi_amount
-                FROM transactions 
-                WHERE date BETWEEN ? AND ?
-                ORDER BY date DESC, id DESC
-            """, (from_date, to_date))
-            
+                FROM transactions
+                WHERE {where}
+                ORDER BY {order_by}
+            ''', params)
+
             transactions = []
+            by_id = {}
             for row in cursor.fetchall():
+                timestamp = row[2]
+                time_str = timestamp.split()[1] if timestamp and ' ' in timestamp else ''
                 transaction = {
                     'id': row[0],
                     'date': row[1],
-                    'timestamp': row[2],
+                    'timestamp': timestamp,
+                    'time': time_str,
                     'comments': row[3],
                     'total_amount': row[4],
                     'net_amount_paid': row[5],
                     'cash_amount': row[6],
                     'card_amount': row[7],
-                    'upi_amount': row[8]
+                    'upi_amount': row[8],
+                    'new_items': [],
+                    'old_items': []
                 }
-                
-                # Get items for this transaction
-                cursor.execute("""
-                    SELECT code, name, type, weight, amount, is_billable
-                    FROM items
-                    WHERE transaction_id = ?
-                """, (transaction['id'],))
-                
-                transaction['new_items'] = []
-                for item_row in cursor.fetchall():
-                    transaction['new_items'].append({
-                        'code': item_row[0],
-                        'name': item_row[1],
-                        'type': item_row[2],
-                        'weight': item_row[3],
-                        'amount': item_row[4],
-                        'is_billable': bool(item_row[5])
-                    })
-                
-                # Get old items for this transaction
-                cursor.execute("""
-                    SELECT type, weight, amount
-                    FROM old_items
-                    WHERE transaction_id = ?
-                """, (transaction['id'],))
-                
-                transaction['old_items'] = []
-                for old_item_row in cursor.fetchall():
-                    transaction['old_items'].append({
-                        'type': old_item_row[0],
-                        'weight': old_item_row[1],
-                        'amount': old_item_row[2]
-                    })
-                
                 transactions.append(transaction)
-            
+                by_id[transaction['id']] = transaction
+
+            if not transactions:
+                return transactions
+
+            for item_row in self._rows_of_transactions(cursor, '''
+                SELECT id, transaction_id, code, name, type, weight, amount, is_billable
+                FROM items
+            ''', by_id):
+                by_id[item_row[1]]['new_items'].append({
+                    'id': item_row[0],
+                    'transaction_id': item_row[1],
+                    'code': item_row[2],
+                    'name': item_row[3],
+                    'type': item_row[4],
+                    'weight': item_row[5],
+                    'amount': item_row[6],
+                    'is_billable': bool(item_row[7])
+                })
+
+            for item_row in self._rows_of_transactions(cursor, '''
+                SELECT id, transaction_id, type, weight, amount
+                FROM old_items
+            ''', by_id):
+                by_id[item_row[1]]['old_items'].append({
+                    'id': item_row[0],
+                    'transaction_id': item_row[1],
+                    'type': item_row[2],
+                    'weight': item_row[3],
+                    'amount': item_row[4]
+                })
+
             return transactions
-            
+
+    def get_transactions_by_date(self, date: datetime.date) -> List[Dict[str, Any]]:
+        """Get all transactions for a specific date."""
+        try:
+            return self._fetch_transactions('date = ?', (to_date(date).isoformat(),), 'id')
         except Exception as e:
-            print(f"Error getting transactions by date range: {e}")
+            print(f"Error getting transactions: {e}")
             raise
 
     def get_transactions_range(self, start_date, end_date):
@@ -507,158 +806,152 @@ class DatabaseManager:
             end_date: The end date (inclusive)
             
         Returns:
-            list: List of transactions between the dates
+            list: List of transactions between the dates, newest first
         """
         try:
-            # Always create a new connection for this operation
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get transactions within date range
-            cursor.execute("""
-                SELECT id, date, timestamp, comments, total_amount, net_amount_paid,
-                       cash_amount, card_amount, upi_amount
-                FROM transactions 
-                WHERE date BETWEEN ? AND ?
-                ORDER BY date DESC, id DESC
-            """, (start_date, end_date))
-            
-            transactions = []
-            for row in cursor.fetchall():
-                # Extract time from timestamp
-                timestamp = row[2]
-                time_str = timestamp.split()[1] if timestamp and ' ' in timestamp else ''
-                
-                transaction = {
-                    'id': row[0],
-                    'date': row[1],
-                    'time': time_str,
-                    'comments': row[3],
-                    'total_amount': row[4],
-                    'net_amount_paid': row[5],
-                    'cash_amount': row[6],
-                    'card_amount': row[7],
-                    'upi_amount': row[8],
-                    'new_items': [],
-                    'old_items': []
-                }
-                
-                # Get new items for this transaction
-                cursor.execute("""
-                    SELECT code, name, type, weight, amount, is_billable
-                    FROM items
-                    WHERE transaction_id = ?
-                """, (transaction['id'],))
-                
-                for item_row in cursor.fetchall():
-                    transaction['new_items'].append({
-                        'code': item_row[0],
-                        'name': item_row[1],
-                        'type': item_row[2],
-                        'weight': item_row[3],
-                        'amount': item_row[4],
-                        'is_billable': bool(item_row[5])
-                    })
-                
-                # Get old items for this transaction
-                cursor.execute("""
-                    SELECT type, weight, amount
-                    FROM old_items
-                    WHERE transaction_id = ?
-                """, (transaction['id'],))
-                
-                for old_item_row in cursor.fetchall():
-                    transaction['old_items'].append({
-                        'type': old_item_row[0],
-                        'weight': old_item_row[1],
-                        'amount': old_item_row[2]
-                    })
-                
-                transactions.append(transaction)
-            
-            return transactions
-            
+            return self._fetch_transactions(
+                'date BETWEEN ? AND ?',
+                (to_date(start_date).isoformat(), to_date(end_date).isoformat()),
+                'date DESC, id DESC'
+            )
         except Exception as e:
             print(f"Error getting transactions by date range: {e}")
             raise
-        finally:
-            if 'conn' in locals():
-                conn.close() 
 
-    def save_transaction(self, transaction_data):
-        """Save a transaction to the database.
-        
+    def get_recent_transactions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the most recently added transactions, newest first."""
+        try:
+            return self._fetch_transactions(
+                'id IN (SELECT id FROM transactions ORDER BY id DESC LIMIT ?)', (int(limit),), 'id DESC'
+            )
+        except Exception as e:
+            print(f"Error getting recent transactions: {e}")
+            raise
+
+    def get_filtered_transactions(self, register_filter: 'filters.RegisterFilter') -> List[Dict[str, Any]]:
+        """Get the transactions a register filter selects, newest first."""
+        try:
+            where, params = register_filter.where()
+            return self._fetch_transactions(where, params, register_filter.order_by())
+        except Exception as e:
+            print(f"Error getting filtered transactions: {e}")
+            raise
+
+    def search_transactions(self, text: str = '', limit: int = 200, **filters) -> List[Dict[str, Any]]:
+        """Find transactions by words in their comments or item names and codes.
+
         Args:
-            transaction_data: Dictionary containing transaction details including new_items, old_items, and payment_details.
-            
+            text: Words to find; each matches as a prefix, so partial words work.
+            limit: Number of transactions returned at most.
+            **filters: Fields of a filters.RegisterFilter, e.g. from_date,
+                to_date, min_amount or code_prefix.
+
         Returns:
-            bool: True if the transaction was saved successfully, False otherwise.
+            list: The matching transactions, newest first.
         """
         try:
-            if not self.conn:
-                self.conn = sqlite3.connect(self.db_path)
-            cursor = self.conn.cursor()
-            
-            # Calculate totals
-            total_amount = sum(item['amount'] for item in transaction_data.get('new_items', []))
-            total_amount += sum(item['amount'] for item in transaction_data.get('old_items', []))
-            net_amount_paid = sum(
-                transaction_data.get('payment_details', {}).get(payment_type, 0.0)
-                for payment_type in ['cash', 'card', 'upi']
+            use_index = bool(self.query("SELECT 1 FROM sqlite_master WHERE name = 'search_index'"))
+            sql, params = search.build_query(text, use_index=use_index, limit=limit, **filters)
+            # The ids are found once; the rows and items are then fetched by primary key
+            ids = [row[0] for row in self.query(sql, params)]
+            if not ids:
+                return []
+            return self._fetch_transactions(
+                f"id IN ({', '.join('?' for _ in ids)})", ids, 'date DESC, id DESC'
             )
+        except Exception as e:
+            print(f"Error searching transactions: {e}")
+            raise
+
+    def rebuild_rollups(self):
+        """Recompute all daily and monthly rollups from the transactions."""
+        self._write(rollups.rebuild)
+
+    def prune_change_log(self, up_to_seq: int):
+        """Drop change_log entries already covered by a full backup.
+
+        Once the register replicates to a head office (it has a branch_id),
+        entries after the changeset watermark are kept for the next
+        changeset, so pruning stops at the watermark.
+        """
+        def prune(cursor):
+            cursor.execute("SELECT key, value FROM sync_state WHERE key IN ('branch_id', 'changeset_seq')")
+            state = dict(cursor.fetchall())
+            limit = up_to_seq
+            if 'branch_id' in state:
+                limit = min(up_to_seq, int(state.get('changeset_seq', 0)))
+            cursor.execute('DELETE FROM change_log WHERE seq <= ?', (limit,))
+
+        self._write(prune)
+
+    def get_sync_state(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a replication setting from the sync_state table."""
+        rows = self.query('SELECT value FROM sync_state WHERE key = ?', (key,))
+        return rows[0][0] if rows else default
+
+    def set_sync_state(self, key: str, value: str):
+        """Store a replication setting in the sync_state table."""
+        self._write(lambda cursor: cursor.execute(
+            'INSERT INTO sync_state (key, value) VALUES (?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (key, str(value))
+        ))
+
+    def get_monthly_report(self, year: int, month: int) -> Optional[Dict[str, Any]]:
+        """Get the monthly report for a month from the rollup tables.
+
+        Returns:
+            dict: Keys month, totals, days, top_items, busiest_day and
+            billable_share, or None if the month has no transactions.
+        """
+        try:
+            return rollups.monthly_report(self, year, month)
+        except Exception as e:
+            print(f"Error getting monthly report: {e}")
+            raise
+
+    def get_transaction_summary(self, date: datetime.date) -> Dict[str, Dict[str, float]]:
+        """Get summary of transactions for a specific date."""
+        try:
+            transactions = self.get_transactions_by_date(date)
             
-            # Insert transaction
-            cursor.execute('''
-                INSERT INTO transactions (
-                    date, timestamp, comments, total_amount, net_amount_paid,
-                    cash_amount, card_amount, upi_amount
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now().date(),
-                transaction_data.get('timestamp', datetime.now()),
-                transaction_data.get('comments', ''),
-                total_amount,
-                net_amount_paid,
-                transaction_data.get('payment_details', {}).get('cash', 0.0),
-                transaction_data.get('payment_details', {}).get('card', 0.0),
-                transaction_data.get('payment_details', {}).get('upi', 0.0)
-            ))
-            
-            transaction_id = cursor.lastrowid
+            summary = {
+                'new_items': {'gold': 0.0, 'silver': 0.0},
+                'old_items': {'gold': 0.0, 'silver': 0.0},
+                'billable_items': {'gold': 0.0, 'silver': 0.0, 'amount': 0.0},
+                'payments': {'cash': 0.0, 'card': 0.0, 'upi': 0.0},
+                'total_amount': 0.0,
+                'net_amount_paid': 0.0,
+                'total_weight': 0.0
+            }
             
-            # Insert new items
-            for item in transaction_data.get('new_items', []):
-                cursor.execute('''
-                    INSERT INTO items (transaction_id, code, name, type, weight, amount, is_billable)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    transaction_id,
-                    item['code'],
-                    item['name'],
-                    item['type'],
-                    item['weight'],
-                    item['amount'],
-                    item.get('is_billable', False)
-                ))
-
-            # Insert old items
-            for item in transaction_data.get('old_items', []):
-                    cursor.execute('''
-                    INSERT INTO old_items (transaction_id, type, weight, amount)
-                    VALUES (?, ?, ?, ?)
-                    ''', (
-                        transaction_id,
-                    item['type'],
-                        item['weight'],
-                        item['amount']
-                    ))
+            for transaction in transactions:
+                # Sum up new items
+                for item in transaction['new_items']:
+                    item_type = 'gold' if item['type'] == 'G' else 'silver'
+                    summary['new_items'][item_type] += item['weight']
+                    summary['total_weight'] += item['weight']
+                    if item['is_billable']:
+                        summary['billable_items'][item_type] += item['weight']
+                        summary['billable_items']['amount'] += item['amount']
+                
+                # Sum up old items
+                for item in transaction['old_items']:
+                    item_type = 'gold' if item['type'] == 'G' else 'silver'
+                    summary['old_items'][item_type] += item['weight']
+                    summary['total_weight'] += item['weight']
+                
+                # Sum up payments
+                summary['payments']['cash'] += transaction['cash_amount']
+                summary['payments']['card'] += transaction['card_amount']
+                summary['payments']['upi'] += transaction['upi_amount']
+                
+                # Sum up totals
+                summary['total_amount'] += transaction['total_amount']
+                summary['net_amount_paid'] += transaction['net_amount_paid']
             
-            self.conn.commit()
-            return True
+            return summary
             
         except Exception as e:
-            if self.conn:
-                self.conn.rollback()
-            print(f"Error saving transaction: {e}")
-            return False
\ No newline at end of file
+            print(f"Error getting transaction summary: {e}")
+            raise
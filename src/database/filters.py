@@ -0,0 +1,154 @@
+"""Composite filters over the register's transactions.
+
+A RegisterFilter combines a date range, item conditions (code or code
+prefix, metal, billable flag, weight band), the payment modes used and a
+band of the slip total. ``where()`` compiles it to one parameterized WHERE
+clause on the transactions table, which the repository uses to fetch the
+matching slips with their items, so the register and its summary come
+from the same query.
+
+The clause is shaped for the indexes of schema.INDEXES_SQL. Dates bound
+``idx_transactions_date`` and each slip in range has its item conditions
+checked inside ``idx_items_filter`` (``idx_items_code`` for an exact code)
+without reading the items table.
+Without a start date, a code or code prefix becomes a range on
+``idx_items_code`` that finds the slips instead.
+"""
+from dataclasses import dataclass, fields, replace
+from typing import Any, List, Optional, Tuple
+
+from utils import date_ranges
+
+PAYMENT_MODES = ('cash', 'card', 'upi')
+
+METAL_TYPES = {
+    'gold': ('G', 'GOLD'),
+    'silver': ('S', 'SILVER'),
+}
+
+def _prefix_bounds(prefix: str) -> Tuple[str, str]:
+    """Get half-open bounds [prefix, next prefix) matching every string starting with prefix."""
+    if not prefix:
+        raise ValueError("A code prefix can't be empty")
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def _normalize_code(code: Optional[str]) -> Optional[str]:
+    """Strip and upper-case an item code; blank codes become None."""
+    if code is None:
+        return None
+    return str(code).strip().upper() or None
+
+@dataclass
+class RegisterFilter:
+    """Conditions a transaction must meet to be shown in the register.
+
+    Item conditions must all hold for the same new item; a slip is selected
+    if any of its new items does. Unset fields don't filter.
+    """
+    from_date: Any = None
+    to_date: Any = None
+    code: Optional[str] = None  # Exact item code, case-insensitive
+    code_prefix: Optional[str] = None  # Start of the item code, e.g. 'G'
+    metal: Optional[str] = None  # 'gold' or 'silver'
+    billable: Optional[bool] = None
+    min_weight: Optional[float] = None  # Weight band of the matching item
+    max_weight: Optional[float] = None
+    payment_modes: Tuple[str, ...] = ()  # Slips paid at least partly by one of these
+    min_amount: Optional[float] = None  # Band of the slip total
+    max_amount: Optional[float] = None
+
+    def __post_init__(self):
+        self.code = _normalize_code(self.code)
+        self.code_prefix = _normalize_code(self.code_prefix)
+        if self.metal is not None and self.metal not in METAL_TYPES:
+            raise ValueError(f"Unknown metal: {self.metal}")
+        unknown = set(self.payment_modes) - set(PAYMENT_MODES)
+        if unknown:
+            raise ValueError(f"Unknown payment modes: {', '.join(sorted(unknown))}")
+
+    def is_empty(self) -> bool:
+        """Check whether no condition is set."""
+        return all(getattr(self, f.name) in (None, (), '') for f in fields(self))
+
+    def has_conditions(self) -> bool:
+        """Check whether anything besides the date range is set."""
+        return not replace(self, from_date=None, to_date=None).is_empty()
+
+    def _item_conditions(self) -> Tuple[List[str], List[Any]]:
+        conditions, params = [], []
+        if self.code:
+            conditions.append('code = ?')
+            params.append(self.code)
+        elif self.code_prefix:
+            conditions.append('code >= ? AND code < ?')
+            params.extend(_prefix_bounds(self.code_prefix))
+        if self.metal:
+            types = METAL_TYPES[self.metal]
+            conditions.append(f"UPPER(type) IN ({', '.join('?' for _ in types)})")
+            params.extend(types)
+        if self.billable is not None:
+            conditions.append('is_billable = ?')
+            params.append(int(self.billable))
+        if self.min_weight is not None:
+            conditions.append('weight >= ?')
+            params.append(float(self.min_weight))
+        if self.max_weight is not None:
+            conditions.append('weight <= ?')
+            params.append(float(self.max_weight))
+        return conditions, params
+
+    def conditions(self) -> Tuple[List[str], List[Any]]:
+        """Get the conditions on the transactions table and their parameters.
+
+        Columns are unqualified, so the conditions can be joined with other
+        conditions on ``transactions``, e.g. by search.build_query().
+        """
+        conditions, params = [], []
+        if self.from_date is not None:
+            conditions.append('date >= ?')
+            params.append(date_ranges.to_date(self.from_date).isoformat())
+        if self.to_date is not None:
+            conditions.append('date <= ?')
+            params.append(date_ranges.to_date(self.to_date).isoformat())
+
+        item_conditions, item_params = self._item_conditions()
+        if item_conditions and self.from_date is None and (self.code or self.code_prefix):
+            # Without dates the code is the narrowest condition; idx_items_code finds its slips
+            conditions.append(
+                f"id IN (SELECT transaction_id FROM items WHERE {' AND '.join(item_conditions)})"
+            )
+            params.extend(item_params)
+        elif item_conditions:
+            # The dates pick the slips; idx_items_filter checks each one's items
+            conditions.append(
+                'EXISTS (SELECT 1 FROM items WHERE items.transaction_id = transactions.id AND '
+                f"{' AND '.join(item_conditions)})"
+            )
+            params.extend(item_params)
+
+        if self.payment_modes:
+            conditions.append('(' + ' OR '.join(f'{mode}_amount > 0' for mode in self.payment_modes) + ')')
+        # With dates, the unary + keeps SQLite from choosing idx_transactions_amount over the date index
+        amount = '+total_amount' if self.from_date is not None or self.to_date is not None else 'total_amount'
+        if self.min_amount is not None:
+            conditions.append(f'{amount} >= ?')
+            params.append(float(self.min_amount))
+        if self.max_amount is not None:
+            conditions.append(f'{amount} <= ?')
+            params.append(float(self.max_amount))
+        return conditions, params
+
+    def order_by(self) -> str:
+        """Get the ORDER BY clause listing the matches newest first.
+
+        Without dates the other conditions are narrower than the date index,
+        so the unary + stops SQLite from scanning that index to avoid the sort.
+        """
+        if self.from_date is None and self.to_date is None:
+            return '+date DESC, id DESC'
+        return 'date DESC, id DESC'
+
+    def where(self) -> Tuple[str, List[Any]]:
+        """Compile the filter to a WHERE clause on transactions and its parameters."""
+        conditions, params = self.conditions()
+        return ' AND '.join(conditions) or '1', params
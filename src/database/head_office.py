@@ -0,0 +1,289 @@
+"""Consolidated register of several branches, fed by changeset files.
+
+The head office database has the branch register's tables with a
+``branch_id`` column and the branch's own id (``source_id``) on every row,
+so a row's global id is (branch_id, source_id). Daily and monthly rollups
+are kept over all branches with the same rollup tables a branch has.
+
+Applying a changeset is idempotent: every changeset id is recorded, and a
+full changeset that ends before the branch's last applied sequence number
+is skipped. Incremental changesets must start exactly at the last applied
+sequence number; one that overlaps it or leaves a gap is refused.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from database import replication, rollups
+from database.db_manager import journal_mode_for
+from database.replication import FILE_SUFFIX
+from utils.date_ranges import to_date
+
+TABLES_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS branches (
+        branch_id TEXT PRIMARY KEY,
+        name TEXT,
+        last_seq INTEGER NOT NULL DEFAULT 0,
+        last_applied_at TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS applied_changesets (
+        changeset_id TEXT PRIMARY KEY,
+        branch_id TEXT NOT NULL,
+        from_seq INTEGER NOT NULL,
+        to_seq INTEGER NOT NULL,
+        full INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        branch_id TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        timestamp DATETIME NOT NULL,
+        comments TEXT,
+        total_amount REAL DEFAULT 0,
+        net_amount_paid REAL DEFAULT 0,
+        cash_amount REAL DEFAULT 0,
+        card_amount REAL DEFAULT 0,
+        upi_amount REAL DEFAULT 0,
+        UNIQUE (branch_id, source_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaction_id INTEGER NOT NULL REFERENCES transactions (id) ON DELETE CASCADE,
+        branch_id TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        code TEXT NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        weight REAL NOT NULL,
+        amount REAL NOT NULL,
+        is_billable BOOLEAN DEFAULT 1
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS old_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaction_id INTEGER NOT NULL REFERENCES transactions (id) ON DELETE CASCADE,
+        branch_id TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        weight REAL NOT NULL,
+        amount REAL NOT NULL
+    )
+    ''',
+]
+
+INDEXES_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)',
+    'CREATE INDEX IF NOT EXISTS idx_transactions_branch_date ON transactions (branch_id, date)',
+    'CREATE INDEX IF NOT EXISTS idx_items_transaction ON items (transaction_id)',
+    'CREATE INDEX IF NOT EXISTS idx_items_branch_source ON items (branch_id, source_id)',
+    'CREATE INDEX IF NOT EXISTS idx_old_items_transaction ON old_items (transaction_id)',
+    'CREATE INDEX IF NOT EXISTS idx_old_items_branch_source ON old_items (branch_id, source_id)',
+]
+
+class HeadOfficeDatabase:
+    """The consolidated multi-branch register."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute(f'PRAGMA journal_mode = {journal_mode_for(db_path)}')
+        with self._lock:
+            cursor = self.conn.cursor()
+            for statement in TABLES_SQL + INDEXES_SQL:
+                cursor.execute(statement)
+            rollups.create_tables(cursor)
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+
+    def query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """Run a read-only query and return all rows."""
+        with self._lock:
+            return self.conn.execute(sql, tuple(params)).fetchall()
+
+    def branches(self) -> List[Dict[str, Any]]:
+        """Get the known branches with their last applied sequence numbers."""
+        rows = self.query('SELECT branch_id, name, last_seq, last_applied_at FROM branches ORDER BY name, branch_id')
+        return [dict(zip(('branch_id', 'name', 'last_seq', 'last_applied_at'), row)) for row in rows]
+
+    def apply_changeset(self, path) -> Dict[str, Any]:
+        """Apply a changeset file in one database transaction.
+
+        Returns:
+            dict: The changeset header with ``applied`` (False if it was
+            skipped as already applied or older than the branch's last
+            applied changeset).
+
+        Raises:
+            ValueError: If the file isn't a changeset, changesets between
+                the branch's last applied one and this one are missing, or
+                an incremental changeset overlaps what was already applied.
+        """
+        records = replication.read_changeset(path)
+        header = next(records)
+        branch_id = header['branch_id']
+        with self._lock:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('SELECT 1 FROM applied_changesets WHERE changeset_id = ?', (header['changeset_id'],))
+                already_applied = cursor.fetchone() is not None
+                cursor.execute('SELECT last_seq FROM branches WHERE branch_id = ?', (branch_id,))
+                row = cursor.fetchone()
+                last_seq = row[0] if row else 0
+                # A full changeset older than what was applied would roll the branch back
+                if already_applied or (header['full'] and header['to_seq'] < last_seq):
+                    self.conn.rollback()
+                    return dict(header, applied=False)
+                if not header['full'] and header['from_seq'] < last_seq:
+                    raise ValueError(
+                        f"Changeset of branch {header['branch_name'] or branch_id} overlaps sequence numbers "
+                        f"already applied ({header['from_seq']} to {header['to_seq']}, applied up to {last_seq}); "
+                        f"export a full changeset"
+                    )
+                if not header['full'] and header['from_seq'] > last_seq:
+                    raise ValueError(
+                        f"Changesets of branch {header['branch_name'] or branch_id} after sequence {last_seq} "
+                        f"are missing (this one starts at {header['from_seq']}); export a full changeset"
+                    )
+
+                touched_dates = set()
+                if header['full']:
+                    touched_dates.update(self._delete_branch(cursor, branch_id))
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= 500:
+                        touched_dates.update(self._apply_records(cursor, branch_id, batch))
+                        batch = []
+                touched_dates.update(self._apply_records(cursor, branch_id, batch))
+                rollups.refresh_days(cursor, touched_dates)
+
+                now = datetime.now().isoformat(sep=' ', timespec='seconds')
+                cursor.execute('''
+                    INSERT INTO branches (branch_id, name, last_seq, last_applied_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (branch_id) DO UPDATE
+                    SET name = excluded.name, last_seq = excluded.last_seq, last_applied_at = excluded.last_applied_at
+                ''', (branch_id, header['branch_name'], header['to_seq'], now))
+                cursor.execute('''
+                    INSERT INTO applied_changesets (changeset_id, branch_id, from_seq, to_seq, full, count, applied_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (header['changeset_id'], branch_id, header['from_seq'], header['to_seq'],
+                      int(header['full']), header['count'], now))
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                print(f"[HeadOfficeDatabase] Error applying changeset {path}: {e}")
+                raise
+        print(f"[HeadOfficeDatabase] Applied {header['count']} transactions of branch "
+              f"{header['branch_name'] or branch_id} ({header['from_seq']} to {header['to_seq']})")
+        return dict(header, applied=True)
+
+    def apply_directory(self, directory) -> List[Dict[str, Any]]:
+        """Apply every changeset in a directory, oldest first per branch."""
+        headers = [(replication.read_header(path), path) for path in Path(directory).glob(f'*{FILE_SUFFIX}')]
+        headers.sort(key=lambda entry: (entry[0]['branch_id'], entry[0]['to_seq'], entry[0]['full']))
+        return [self.apply_changeset(path) for _, path in headers]
+
+    def _delete_branch(self, cursor, branch_id: str) -> List[str]:
+        """Delete every row of a branch; returns the dates it had."""
+        cursor.execute('SELECT DISTINCT date FROM transactions WHERE branch_id = ?', (branch_id,))
+        dates = [row[0] for row in cursor.fetchall()]
+        cursor.execute('DELETE FROM items WHERE branch_id = ?', (branch_id,))
+        cursor.execute('DELETE FROM old_items WHERE branch_id = ?', (branch_id,))
+        cursor.execute('DELETE FROM transactions WHERE branch_id = ?', (branch_id,))
+        return dates
+
+    def _apply_records(self, cursor, branch_id: str, records: List[Dict[str, Any]]) -> List[str]:
+        """Apply upsert and delete records with bulk statements; returns the dates touched."""
+        if not records:
+            return []
+        source_ids = [record['id'] if record['type'] == 'delete' else record['transaction'][0] for record in records]
+        placeholders = ', '.join('?' for _ in source_ids)
+        cursor.execute(f'''
+            SELECT date FROM transactions WHERE branch_id = ? AND source_id IN ({placeholders})
+        ''', [branch_id] + source_ids)
+        dates = [row[0] for row in cursor.fetchall()]
+
+        # Existing items are replaced along with their transaction
+        for table in ('items', 'old_items'):
+            cursor.execute(f'''
+                DELETE FROM {table} WHERE transaction_id IN (
+                    SELECT id FROM transactions WHERE branch_id = ? AND source_id IN ({placeholders})
+                )
+            ''', [branch_id] + source_ids)
+        deleted = [record['id'] for record in records if record['type'] == 'delete']
+        cursor.executemany('DELETE FROM transactions WHERE branch_id = ? AND source_id = ?',
+                           [(branch_id, source_id) for source_id in deleted])
+
+        upserts = [record for record in records if record['type'] == 'upsert']
+        columns = replication.TRANSACTION_COLUMNS[1:]
+        # The head office id of a transaction stays the same across updates
+        cursor.executemany(f'''
+            INSERT INTO transactions (branch_id, source_id, {', '.join(columns)})
+            VALUES (?, ?, {', '.join('?' for _ in columns)})
+            ON CONFLICT (branch_id, source_id) DO UPDATE
+            SET {', '.join(f'{column} = excluded.{column}' for column in columns)}
+        ''', [[branch_id] + record['transaction'] for record in upserts])
+        if not upserts:
+            return dates
+
+        cursor.execute(f'''
+            SELECT source_id, id FROM transactions WHERE branch_id = ? AND source_id IN ({placeholders})
+        ''', [branch_id] + source_ids)
+        local_ids = dict(cursor.fetchall())
+        item_columns = replication.ITEM_COLUMNS[1:]
+        cursor.executemany(f'''
+            INSERT INTO items (transaction_id, branch_id, source_id, {', '.join(item_columns)})
+            VALUES (?, ?, {', '.join('?' for _ in replication.ITEM_COLUMNS)})
+        ''', [
+            [local_ids[record['transaction'][0]], branch_id] + item
+            for record in upserts for item in record['items']
+        ])
+        old_item_columns = replication.OLD_ITEM_COLUMNS[1:]
+        cursor.executemany(f'''
+            INSERT INTO old_items (transaction_id, branch_id, source_id, {', '.join(old_item_columns)})
+            VALUES (?, ?, {', '.join('?' for _ in replication.OLD_ITEM_COLUMNS)})
+        ''', [
+            [local_ids[record['transaction'][0]], branch_id] + item
+            for record in upserts for item in record['old_items']
+        ])
+        dates.extend(record['transaction'][1] for record in upserts)
+        return dates
+
+    def branch_totals(self, start_date, end_date) -> List[Dict[str, Any]]:
+        """Get each branch's transaction count and payment totals for a date range (inclusive)."""
+        rows = self.query('''
+            SELECT b.branch_id, b.name, COUNT(t.id), COALESCE(SUM(t.total_amount), 0),
+                   COALESCE(SUM(t.cash_amount), 0), COALESCE(SUM(t.card_amount), 0),
+                   COALESCE(SUM(t.upi_amount), 0)
+            FROM branches b
+            LEFT JOIN transactions t ON t.branch_id = b.branch_id AND t.date BETWEEN ? AND ?
+            GROUP BY b.branch_id
+            ORDER BY b.name, b.branch_id
+        ''', (to_date(start_date).isoformat(), to_date(end_date).isoformat()))
+        keys = ('branch_id', 'name', 'transaction_count', 'total_amount', 'cash_amount', 'card_amount', 'upi_amount')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get_monthly_report(self, year: int, month: int) -> Optional[Dict[str, Any]]:
+        """Get the monthly report over all branches from the rollup tables."""
+        return rollups.monthly_report(self, year, month)
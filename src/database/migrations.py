@@ -0,0 +1,160 @@
+"""One-time migrations that bring older database layouts onto the current schema."""
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from database import rollups, schema
+
+def table_columns(cursor, table: str) -> List[str]:
+    """Get the column names of a table (empty if the table doesn't exist)."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+def is_json_blob_layout(cursor) -> bool:
+    """Check whether the transactions table stores items as JSON blobs."""
+    return 'new_items' in table_columns(cursor, 'transactions')
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Parse the timestamp formats written by the JSON-blob services."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+def _load_items(raw) -> List[Dict]:
+    """Decode a JSON item list, treating malformed blobs as empty."""
+    try:
+        items = json.loads(raw) if raw else []
+    except (TypeError, ValueError):
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+def _item_type(item: Dict, item_types: Dict[str, str]) -> str:
+    """Work out the G/S/O type of a legacy item."""
+    if item.get('type'):
+        return str(item['type'])
+    code = str(item.get('code') or item.get('item_code') or '').upper()
+    if code in item_types:
+        return item_types[code]
+    return code[:1] if code[:1] in ('G', 'S') else 'O'
+
+def migrate_json_transactions(conn: sqlite3.Connection) -> int:
+    """Convert a JSON-blob transactions table into the normalized tables.
+
+    Transaction ids are preserved. All rows are converted in a single
+    transaction using bulk inserts; either the whole table is migrated or
+    nothing changes.
+
+    Returns:
+        int: The number of transactions migrated.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, timestamp, new_items, old_items, comments,
+               cash_amount, card_amount, upi_amount
+        FROM transactions
+        ORDER BY id
+    ''')
+    legacy_rows = cursor.fetchall()
+
+    item_types = {}
+    if table_columns(cursor, 'item_codes'):
+        cursor.execute('SELECT code, type FROM item_codes')
+        item_types = {code.upper(): type_ for code, type_ in cursor.fetchall()}
+
+    transaction_rows = []
+    item_rows = []
+    old_item_rows = []
+    for row_id, raw_timestamp, raw_new, raw_old, comments, cash, card, upi in legacy_rows:
+        parsed = _parse_timestamp(raw_timestamp)
+        timestamp = parsed.isoformat(sep=' ', timespec='seconds') if parsed else str(raw_timestamp or '')
+        new_items = _load_items(raw_new)
+        old_items = _load_items(raw_old)
+        cash, card, upi = float(cash or 0), float(card or 0), float(upi or 0)
+
+        total_amount = sum(float(item.get('amount') or 0) for item in new_items)
+        total_amount += sum(float(item.get('amount') or 0) for item in old_items)
+        transaction_rows.append((
+            row_id, timestamp[:10], timestamp, comments or '',
+            total_amount, cash + card + upi, cash, card, upi
+        ))
+        for item in new_items:
+            item_rows.append((
+                row_id,
+                str(item.get('code') or item.get('item_code') or ''),
+                str(item.get('name') or item.get('item_name') or ''),
+                _item_type(item, item_types),
+                float(item.get('weight') or 0),
+                float(item.get('amount') or 0),
+                bool(item.get('is_billable', False))
+            ))
+        for item in old_items:
+            old_item_rows.append((
+                row_id,
+                str(item.get('type') or ''),
+                float(item.get('weight') or 0),
+                float(item.get('amount') or 0)
+            ))
+
+    # Table rebuild as recommended by SQLite: foreign keys must be off while
+    # the old table is dropped and the new one renamed into place
+    conn.commit()
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        cursor.execute('BEGIN')
+        cursor.execute(schema.transactions_table_sql('transactions_normalized'))
+        schema.create_item_tables(cursor)
+        cursor.executemany('''
+            INSERT INTO transactions_normalized (
+                id, date, timestamp, comments, total_amount, net_amount_paid,
+                cash_amount, card_amount, upi_amount
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', transaction_rows)
+        cursor.executemany('''
+            INSERT INTO items (transaction_id, code, name, type, weight, amount, is_billable)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', item_rows)
+        cursor.executemany('''
+            INSERT INTO old_items (transaction_id, type, weight, amount)
+            VALUES (?, ?, ?, ?)
+        ''', old_item_rows)
+        cursor.execute('DROP TABLE transactions')
+        cursor.execute('ALTER TABLE transactions_normalized RENAME TO transactions')
+
+        # The db_service layout also created an unused new_items table
+        if 'item_code' in table_columns(cursor, 'new_items'):
+            cursor.execute('SELECT COUNT(*) FROM new_items')
+            if cursor.fetchone()[0] == 0:
+                cursor.execute('DROP TABLE new_items')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute('PRAGMA foreign_keys = ON')
+
+    return len(transaction_rows)
+
+def upgrade(cursor, from_version: int) -> None:
+    """Fill in data for schema versions newer than from_version.
+
+    Runs after create_schema() has created any new tables.
+    """
+    if from_version < 2:
+        rollups.rebuild(cursor)
+    if 3 <= from_version < 4:
+        # change_log predates the date column; its triggers are replaced
+        if 'date' not in table_columns(cursor, 'change_log'):
+            cursor.execute('ALTER TABLE change_log ADD COLUMN date TEXT')
+        for name in schema.CHANGE_LOG_TRIGGER_NAMES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        for statement in schema.CHANGE_LOG_TRIGGERS_SQL:
+            cursor.execute(statement)
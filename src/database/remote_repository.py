@@ -0,0 +1,447 @@
+"""Repository that reads and writes the register through a SyncServer.
+
+A counter using RemoteRepository never opens the database file itself.
+Writes are appended to a local queue and sent to the server in batches;
+while the server is unreachable they stay queued (on disk, if a queue file
+is given) and are sent in order once it is back. Range reads are cached
+with the server's ETags, so rereading an unchanged range costs a
+``304 Not Modified`` round trip.
+
+Filtered reads, search and the SQL reads of rollups and analytics
+(``query()``) are answered by the server, so the register window works on
+a RemoteRepository as it does on a DatabaseManager. File-bound work
+(backups, restores, exports and head office changesets) and edits of the
+item master happen on the server machine.
+"""
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlencode
+
+from database.repository import TransactionRepository
+from utils.date_ranges import to_date
+
+class ServerUnavailable(ConnectionError):
+    """The sync server could not be reached."""
+
+class ServerRejected(ValueError):
+    """The sync server refused a request as invalid."""
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class RemoteRepository(TransactionRepository):
+    """TransactionRepository backed by a SyncServer on the shop LAN.
+
+    Transactions added while the server is unreachable get a negative local
+    ID until they are sent; updating or deleting such a transaction edits
+    the queued write instead of queueing another one. Reads don't include
+    queued writes.
+    """
+
+    def __init__(self, base_url: str, queue_path: Optional[str] = None,
+                 timeout: float = 5.0, batch_size: int = 100, max_cached_ranges: int = 32):
+        """Initialize the repository.
+
+        Args:
+            base_url: The server's URL, e.g. 'http://192.168.1.10:8765'.
+            queue_path: JSON lines file keeping unsent writes across restarts;
+                kept in memory only if omitted.
+            timeout: Seconds to wait for the server on each request.
+            batch_size: Queued writes sent per request.
+            max_cached_ranges: Date ranges whose rows are kept for ETag revalidation.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.db_path = self.base_url
+        self.queue_path = queue_path
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.max_cached_ranges = max_cached_ranges
+        # Writes that the server rejected after they were queued
+        self.rejected_operations: List[Dict[str, Any]] = []
+        self._lock = threading.RLock()
+        self._queue: List[Dict[str, Any]] = self._load_queue()
+        self._next_local_id = min([-1] + [op['local_id'] - 1 for op in self._queue if 'local_id' in op])
+        self._ranges: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._change_listeners: List[Callable[[Set[str]], None]] = []
+        self._reset_listeners: List[Callable[[], None]] = []
+        self._epoch = None
+        self._seen_version = 0
+        # Changes made before this repository was created aren't reported
+        self.is_available()
+
+    # Transport
+
+    def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                 body: Any = None, headers: Optional[Dict[str, str]] = None):
+        """Send a request; returns (status, headers, payload).
+
+        Raises:
+            ServerUnavailable: If the server can't be reached or failed.
+            ServerRejected: If the server refused the request as invalid.
+        """
+        url = self.base_url + path
+        if params:
+            url += '?' + urlencode(params)
+        data = json.dumps(body, default=_json_default).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(url, data=data, method=method, headers=dict(headers or {}))
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return e.code, e.headers, None
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except (ValueError, AttributeError):
+                message = e.reason
+            if 400 <= e.code < 500:
+                raise ServerRejected(message) from e
+            raise ServerUnavailable(f"Server error {e.code}: {message}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise ServerUnavailable(f"Sync server {self.base_url} is unreachable: {e}") from e
+
+    def _check_epoch(self, epoch: str, version: int) -> bool:
+        """Note the server's epoch and, on first contact, its version.
+
+        Returns:
+            bool: False if the epoch changed since the last response, which
+            means the server's data may have been replaced.
+        """
+        if epoch == self._epoch:
+            return True
+        first_contact = self._epoch is None
+        self._epoch = epoch
+        self._seen_version = version
+        if first_contact:
+            return True
+        # The server restarted or its database was restored
+        self._ranges.clear()
+        self._notify_reset()
+        return False
+
+    def is_available(self) -> bool:
+        """Check whether the server answers."""
+        try:
+            _, _, status = self._request('GET', '/status')
+        except (ServerUnavailable, ServerRejected):
+            return False
+        self._check_epoch(status['epoch'], status['version'])
+        return True
+
+    # Write queue
+
+    def _load_queue(self) -> List[Dict[str, Any]]:
+        if not self.queue_path or not os.path.exists(self.queue_path):
+            return []
+        with open(self.queue_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _save_queue(self):
+        """Write the queue file atomically."""
+        if not self.queue_path:
+            return
+        temp_path = f"{self.queue_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for operation in self._queue:
+                f.write(json.dumps(operation, default=_json_default) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.queue_path)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of writes waiting to be sent."""
+        return len(self._queue)
+
+    def _enqueue(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        # Round-trip through JSON so queued writes don't share state with the caller
+        operation = json.loads(json.dumps(dict(operation, op_id=uuid.uuid4().hex), default=_json_default))
+        self._queue.append(operation)
+        self._save_queue()
+        return operation
+
+    def _queued_add(self, local_id: int) -> Optional[Dict[str, Any]]:
+        return next((op for op in self._queue if op.get('local_id') == local_id), None)
+
+    def _send_queue(self) -> Dict[str, Any]:
+        """Send queued writes in batches; returns the server's results by op_id.
+
+        Stops at the first batch the server can't be reached for; the rest
+        stay queued. When the server rejects a batch its writes are resent
+        one at a time, and only the rejected ones are dropped from the
+        queue into rejected_operations.
+        """
+        results = {}
+        one_by_one = 0
+        while self._queue:
+            batch = self._queue[:1 if one_by_one else self.batch_size]
+            try:
+                for operation, result in zip(batch, self._send_batch(batch)):
+                    results[operation['op_id']] = result
+            except ServerUnavailable as e:
+                print(f"[RemoteRepository] {len(self._queue)} writes stay queued: {e}")
+                break
+            except ServerRejected as e:
+                if len(batch) > 1:
+                    one_by_one = len(batch)
+                    continue
+                print(f"[RemoteRepository] Error: server rejected a queued write: {e}")
+                batch[0]['error'] = str(e)
+                self.rejected_operations.extend(batch)
+            one_by_one = max(one_by_one - len(batch), 0)
+            del self._queue[:len(batch)]
+            self._save_queue()
+        return results
+
+    def flush(self) -> int:
+        """Send queued writes to the server.
+
+        Returns:
+            int: The number of writes still queued.
+        """
+        with self._lock:
+            self._send_queue()
+            return len(self._queue)
+
+    def _send_batch(self, batch: List[Dict[str, Any]]) -> List[Any]:
+        """Send operations as one batch and return their results."""
+        operations = [{key: value for key, value in op.items() if key != 'local_id'} for op in batch]
+        _, _, response = self._request('POST', '/batch', body={'operations': operations})
+        self._check_epoch(response['epoch'], response['version_before'])
+        # Our own writes needn't be reported by poll_external_changes
+        if response['version_before'] == self._seen_version:
+            self._seen_version = response['version']
+        return response['results']
+
+    def _write(self, operation: Dict[str, Any]) -> Any:
+        """Queue a write and send the queue, earlier writes first.
+
+        Returns:
+            The server's result, or None if the write stays queued.
+
+        Raises:
+            ServerRejected: If the server refused this write.
+            NotImplementedError: If operation is a cursor callback, as the
+                item master uses on a DatabaseManager; it can't be sent.
+        """
+        if callable(operation):
+            raise NotImplementedError("Only transactions can be written through the sync server")
+        with self._lock:
+            operation = self._enqueue(operation)
+            results = self._send_queue()
+            if operation['op_id'] in results:
+                return results[operation['op_id']]
+            if operation in self._queue:
+                return None
+            # Rejected; the caller hears about it, so it isn't kept
+            self.rejected_operations = [op for op in self.rejected_operations if op is not operation]
+            raise ServerRejected(operation['error'])
+
+    def add_transaction(self, transaction_data: Dict[str, Any]) -> int:
+        """Add a transaction.
+
+        Returns:
+            int: The server's ID, or a negative local ID if the write is queued.
+        """
+        with self._lock:
+            local_id = self._next_local_id
+            self._next_local_id -= 1
+            result = self._write({'op': 'add', 'transaction': transaction_data, 'local_id': local_id})
+            if result is not None:
+                return result
+            # Sent with a later batch; the server's ID isn't known yet
+            return local_id
+
+    def update_transaction(self, transaction_id: int, transaction_data: Dict[str, Any]) -> bool:
+        """Update a transaction; True once the server applied or queued it."""
+        with self._lock:
+            if transaction_id < 0:
+                queued = self._queued_add(transaction_id)
+                if queued is None:
+                    return False
+                queued['transaction'] = json.loads(json.dumps(transaction_data, default=_json_default))
+                self._save_queue()
+                return True
+            try:
+                self._write({'op': 'update', 'id': transaction_id, 'transaction': transaction_data})
+            except ServerRejected as e:
+                print(f"Error updating transaction: {e}")
+                return False
+            return True
+
+    def delete_transaction(self, transaction_id: int) -> bool:
+        """Delete a transaction; True once the server applied or queued it."""
+        with self._lock:
+            if transaction_id < 0:
+                queued = self._queued_add(transaction_id)
+                if queued is None:
+                    return False
+                self._queue.remove(queued)
+                self._save_queue()
+                return True
+            try:
+                self._write({'op': 'delete', 'id': transaction_id})
+            except ServerRejected as e:
+                print(f"Error deleting transaction: {e}")
+                return False
+            return True
+
+    # Reads
+
+    def get_transactions_range(self, start_date, end_date) -> List[Dict[str, Any]]:
+        """Get transactions between two dates (inclusive), newest first.
+
+        An unchanged range is revalidated with its ETag instead of being
+        downloaded again. While the server is unreachable the last copy of
+        the range is returned, if there is one.
+
+        Raises:
+            ServerUnavailable: If the server is unreachable and the range isn't cached.
+        """
+        key = (to_date(start_date).isoformat(), to_date(end_date).isoformat())
+        with self._lock:
+            if self._queue:
+                self.flush()
+            cached = self._ranges.get(key)
+            headers = {'If-None-Match': cached[0]} if cached else {}
+            try:
+                status, response_headers, transactions = self._request(
+                    'GET', '/transactions', {'from': key[0], 'to': key[1]}, headers=headers
+                )
+            except ServerUnavailable:
+                if cached is None:
+                    raise
+                print(f"[RemoteRepository] Server unreachable, showing cached {key[0]} to {key[1]}")
+                return cached[1]
+
+            if status == 304:
+                self._ranges.move_to_end(key)
+                return cached[1]
+            self._ranges[key] = (response_headers.get('ETag'), transactions)
+            self._ranges.move_to_end(key)
+            while len(self._ranges) > self.max_cached_ranges:
+                self._ranges.popitem(last=False)
+            return transactions
+
+    def get_transactions_by_date(self, date) -> List[Dict[str, Any]]:
+        """Get all transactions for a specific date, oldest first."""
+        return list(reversed(self.get_transactions_range(date, date)))
+
+    def get_transaction_summary(self, date) -> Dict[str, Any]:
+        """Get the summary of a day's transactions from the server."""
+        return self._request('GET', '/summary', {'date': to_date(date).isoformat()})[2]
+
+    def get_monthly_report(self, year: int, month: int) -> Optional[Dict[str, Any]]:
+        """Get a monthly report from the server."""
+        return self._request('GET', '/monthly', {'year': year, 'month': month})[2]
+
+    def _read(self, method: str, path: str, params: Optional[Dict[str, Any]] = None, body: Any = None) -> Any:
+        """Send queued writes, then make a read request and return its payload."""
+        with self._lock:
+            if self._queue:
+                self.flush()
+        return self._request(method, path, params, body)[2]
+
+    def query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """Run a read-only query on the server's database and return all rows."""
+        rows = self._read('POST', '/query', body={'sql': sql, 'params': list(params)})
+        return [tuple(row) for row in rows]
+
+    def get_recent_transactions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the most recently added transactions, newest first."""
+        return self._read('GET', '/recent', {'limit': int(limit)})
+
+    def get_filtered_transactions(self, register_filter) -> List[Dict[str, Any]]:
+        """Get the transactions a filters.RegisterFilter selects, newest first."""
+        return self._read('POST', '/filtered', body={'filter': asdict(register_filter)})
+
+    def search_transactions(self, text: str = '', limit: int = 200, **filters) -> List[Dict[str, Any]]:
+        """Find transactions by words in their comments or item names and codes.
+
+        See DatabaseManager.search_transactions().
+        """
+        return self._read('POST', '/search', body={'text': text, 'limit': int(limit), 'filters': filters})
+
+    # Change notification
+
+    def add_change_listener(self, listener: Callable[[Set[str]], None]):
+        """Call listener(dates) when transactions on the given ISO dates change."""
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[Set[str]], None]):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def add_reset_listener(self, listener: Callable[[], None]):
+        """Call listener() when the server's data was replaced."""
+        self._reset_listeners.append(listener)
+
+    def remove_reset_listener(self, listener: Callable[[], None]):
+        if listener in self._reset_listeners:
+            self._reset_listeners.remove(listener)
+
+    def _notify_change(self, dates: Set[str]):
+        for listener in list(self._change_listeners):
+            try:
+                listener(dates)
+            except Exception as e:
+                print(f"[RemoteRepository] Error in change listener: {e}")
+
+    def _notify_reset(self):
+        for listener in list(self._reset_listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"[RemoteRepository] Error in reset listener: {e}")
+
+    def data_version(self) -> int:
+        """Get the last server version seen; it changes as other counters write."""
+        return self._seen_version
+
+    def poll_external_changes(self) -> Optional[Set[str]]:
+        """Find the dates other counters changed since the last poll.
+
+        Also sends queued writes once the server is reachable again.
+
+        Returns:
+            set: ISO dates changed by other counters (empty if none or if the
+            server is unreachable), or None if the changed dates are unknown.
+        """
+        with self._lock:
+            if self._queue:
+                self.flush()
+            try:
+                _, _, changes = self._request('GET', '/changes', {'since': self._seen_version})
+            except ServerUnavailable:
+                return set()
+            if not self._check_epoch(changes['epoch'], changes['seq']):
+                return None
+            if changes['seq'] <= self._seen_version:
+                return set()
+            self._seen_version = changes['seq']
+
+        dates = set(changes['dates'])
+        if not changes['complete']:
+            return None
+        self._notify_change(dates)
+        return dates
+
+    def close(self):
+        """Send what can be sent; unsent writes stay in the queue file."""
+        with self._lock:
+            if self._queue:
+                self.flush()
@@ -0,0 +1,186 @@
+"""Changesets that replicate a branch's register to the head office.
+
+Each branch writes append-only changeset files, carried to the head office
+(on a USB stick, for example) and applied there with HeadOfficeDatabase.
+A changeset holds the current state of every transaction changed since the
+branch's watermark, as gzip compressed JSON lines of row lists:
+
+    {"type": "header", "format": "daily-register-changeset", "branch_id": "...",
+     "from_seq": 10, "to_seq": 42, "full": false, "columns": {...}, ...}
+    {"type": "upsert", "transaction": [...], "items": [[...]], "old_items": [[...]]}
+    {"type": "delete", "id": 7}
+
+A transaction's or item's global id is its branch id together with its id
+in the branch database. Upserts replace a transaction with its items, so
+inserts, updates and item deletions all travel as upserts.
+
+Full backups prune the change_log only up to the watermark. When entries
+past it are missing anyway (e.g. the database was restored from an older
+copy), the changed transactions are unknown and a full changeset of the
+whole register is written instead; the head office then replaces
+everything it holds for the branch. Replacing the database file (a
+restore) drops the watermark and moves the sequence past the old file's,
+so the next changeset is full and never reuses applied sequence numbers.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from database import change_journal
+
+FORMAT = 'daily-register-changeset'
+FORMAT_VERSION = 1
+FILE_SUFFIX = '.changeset.jsonl.gz'
+
+TRANSACTION_COLUMNS = change_journal.TRANSACTION_COLUMNS
+ITEM_COLUMNS = ['id'] + change_journal.ITEM_COLUMNS
+OLD_ITEM_COLUMNS = ['id'] + change_journal.OLD_ITEM_COLUMNS
+
+def branch_identity(db) -> Dict[str, str]:
+    """Get the branch id and name, creating the id on first use."""
+    branch_id = db.get_sync_state('branch_id')
+    if branch_id is None:
+        branch_id = uuid.uuid4().hex
+        db.set_sync_state('branch_id', branch_id)
+    return {'branch_id': branch_id, 'branch_name': db.get_sync_state('branch_name', '')}
+
+def set_branch_name(db, name: str):
+    """Set the name the head office shows for this branch."""
+    db.set_sync_state('branch_name', name)
+
+def restart_after_replace(cursor, replaced_seq: int):
+    """Start replication over after the database file was replaced.
+
+    A restored copy reuses change_log sequence numbers the head office has
+    already applied. Its sequence is moved past the replaced file's
+    (replaced_seq) and the watermark is dropped, so the next changeset is
+    full and replaces everything the head office holds for the branch.
+    """
+    if change_journal.last_seq(cursor) < replaced_seq:
+        cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'change_log'", (replaced_seq,))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', ?)", (replaced_seq,))
+    cursor.execute("DELETE FROM sync_state WHERE key = 'changeset_seq'")
+
+def _transaction_record(cursor, transaction_id: int) -> Optional[Dict[str, Any]]:
+    """Get the upsert record of a transaction, or None if it doesn't exist."""
+    cursor.execute(f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions WHERE id = ?", (transaction_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    cursor.execute(
+        f"SELECT {', '.join(ITEM_COLUMNS)} FROM items WHERE transaction_id = ? ORDER BY id", (transaction_id,)
+    )
+    items = cursor.fetchall()
+    cursor.execute(
+        f"SELECT {', '.join(OLD_ITEM_COLUMNS)} FROM old_items WHERE transaction_id = ? ORDER BY id",
+        (transaction_id,)
+    )
+    old_items = cursor.fetchall()
+    return {'type': 'upsert', 'transaction': row, 'items': items, 'old_items': old_items}
+
+def export_changeset(db, out_dir, full: bool = False, since_seq: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Write the branch's changes since its watermark to a new changeset file.
+
+    The changes are read inside a single read-only transaction, so the
+    changeset matches the sequence number it records. The watermark moves
+    to that number once the file is written.
+
+    Args:
+        db: The branch's DatabaseManager.
+        out_dir: Directory for the changeset (e.g. on a USB stick).
+        full: Export the whole register instead of the changes.
+        since_seq: Export changes after this sequence number instead of the
+            watermark, e.g. to write a lost changeset again.
+
+    Returns:
+        dict: The changeset header with its ``path``, or None if nothing
+        changed (no file is written).
+    """
+    identity = branch_identity(db)
+    if since_seq is None:
+        since_seq = int(db.get_sync_state('changeset_seq', 0))
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(f"file:{Path(db.db_path).as_posix()}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        to_seq = change_journal.last_seq(cursor)
+        if not full:
+            cursor.execute('SELECT COUNT(*) FROM change_log WHERE seq > ? AND seq <= ?', (since_seq, to_seq))
+            # Entries missing from the log were pruned; the changes are unknown
+            full = since_seq == 0 or cursor.fetchone()[0] != max(to_seq - since_seq, 0)
+        if full:
+            cursor.execute('SELECT id FROM transactions ORDER BY id')
+        else:
+            if to_seq <= since_seq:
+                return None
+            cursor.execute('''
+                SELECT DISTINCT transaction_id FROM change_log WHERE seq > ? AND seq <= ? ORDER BY transaction_id
+            ''', (since_seq, to_seq))
+        transaction_ids = [row[0] for row in cursor.fetchall()]
+
+        header = {
+            'type': 'header',
+            'format': FORMAT,
+            'version': FORMAT_VERSION,
+            'changeset_id': uuid.uuid4().hex,
+            **identity,
+            'from_seq': 0 if full else since_seq,
+            'to_seq': to_seq,
+            'full': full,
+            'created_at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+            'count': len(transaction_ids),
+            'columns': {
+                'transaction': TRANSACTION_COLUMNS,
+                'item': ITEM_COLUMNS,
+                'old_item': OLD_ITEM_COLUMNS
+            }
+        }
+        name = f"{identity['branch_id'][:12]}-{header['from_seq']:010d}-{to_seq:010d}{FILE_SUFFIX}"
+        path = out_dir / name
+        temp_path = out_dir / f"{name}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as out:
+            out.write(json.dumps(header) + '\n')
+            for transaction_id in transaction_ids:
+                record = _transaction_record(cursor, transaction_id)
+                if record is None:
+                    record = {'type': 'delete', 'id': transaction_id}
+                out.write(json.dumps(record, separators=(',', ':')) + '\n')
+        os.replace(temp_path, path)
+    finally:
+        conn.close()
+
+    db.set_sync_state('changeset_seq', to_seq)
+    header['path'] = str(path)
+    print(f"[Replication] Wrote {'full ' if full else ''}changeset of {len(transaction_ids)} "
+          f"transactions to: {path}")
+    return header
+
+def read_changeset(path) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records of a changeset file, header first.
+
+    Raises:
+        ValueError: If the file isn't a changeset this version can read.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as changeset:
+        header = json.loads(changeset.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != FORMAT:
+            raise ValueError(f"Not a changeset file: {path}")
+        if header.get('version', 0) > FORMAT_VERSION:
+            raise ValueError(f"Changeset format {header['version']} is newer than supported ({FORMAT_VERSION})")
+        yield header
+        for line in changeset:
+            if line.strip():
+                yield json.loads(line)
+
+def read_header(path) -> Dict[str, Any]:
+    """Read the header of a changeset file."""
+    return next(read_changeset(path))
@@ -0,0 +1,49 @@
+"""The repository interface every transaction data source implements."""
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, List
+
+class TransactionRepository(ABC):
+    """Read and write access to the register's transactions.
+
+    Transactions are dictionaries with the keys ``id``, ``date``,
+    ``timestamp``, ``time``, ``comments``, ``total_amount``,
+    ``net_amount_paid``, ``cash_amount``, ``card_amount``, ``upi_amount``,
+    ``new_items`` and ``old_items``.
+    """
+
+    @abstractmethod
+    def add_transaction(self, transaction_data: Dict[str, Any]) -> int:
+        """Add a new transaction and return its ID."""
+
+    @abstractmethod
+    def update_transaction(self, transaction_id: int, transaction_data: Dict[str, Any]) -> bool:
+        """Replace an existing transaction and its items."""
+
+    @abstractmethod
+    def delete_transaction(self, transaction_id: int) -> bool:
+        """Delete a transaction and its items."""
+
+    @abstractmethod
+    def get_transactions_by_date(self, date: date) -> List[Dict[str, Any]]:
+        """Get all transactions for a specific date."""
+
+    @abstractmethod
+    def get_transactions_range(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Get transactions between two dates (inclusive), newest first."""
+
+    def save_transaction(self, transaction_data: Dict[str, Any]) -> bool:
+        """Save a new transaction, returning False instead of raising on failure."""
+        try:
+            return bool(self.add_transaction(transaction_data))
+        except Exception as e:
+            print(f"Error saving transaction: {e}")
+            return False
+
+    def get_transactions(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Get transactions for a date range."""
+        return self.get_transactions_range(start_date, end_date)
+
+    def get_transactions_by_date_range(self, from_date: date, to_date: date) -> List[Dict[str, Any]]:
+        """Get all transactions between two dates (inclusive)."""
+        return self.get_transactions_range(from_date, to_date)
@@ -0,0 +1,106 @@
+"""Cache for results computed over date ranges of the register."""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+
+from utils.date_ranges import DateLike, to_date
+
+class ResultCache:
+    """Memoizes results keyed by an arbitrary key and the date range they cover.
+
+    An entry is dropped when a write through the repository touches a date
+    inside its range. A commit from any other connection (seen through
+    ``PRAGMA data_version``) drops every entry, since the dates it touched
+    are unknown.
+    """
+
+    def __init__(self, db, max_entries: int = 256):
+        """Initialize the cache.
+
+        Args:
+            db: The repository whose changes invalidate the cache.
+            max_entries: Number of entries kept before the least recently used is evicted.
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so results computed concurrently with a write are not stored
+        self._generation = 0
+        self._data_version = db.data_version()
+        db.add_change_listener(self.invalidate_dates)
+        db.add_reset_listener(self._on_reset)
+
+    def _check_external_changes(self):
+        """Clear the cache if another connection committed since the last check."""
+        version = self.db.data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self.clear()
+
+    def get_or_compute(self, key: Hashable, start: DateLike, end: DateLike, compute: Callable[[], Any]) -> Any:
+        """Get the cached result for key, computing and storing it if missing.
+
+        Args:
+            key: Identifies the computation and its arguments.
+            start: First date (inclusive) the result depends on.
+            end: Last date (inclusive) the result depends on.
+            compute: Called without arguments to produce the result.
+        """
+        self._check_external_changes()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][2]
+            generation = self._generation
+
+        value = compute()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (to_date(start).isoformat(), to_date(end).isoformat(), value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate_dates(self, dates: Iterable[str]):
+        """Drop entries whose range contains any of the given ISO dates."""
+        dates = list(dates)
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, (start, end, _) in self._entries.items()
+                if any(start <= date <= end for date in dates)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def version(self) -> int:
+        """Get a number that changes whenever cached results may have gone stale.
+
+        Checking it costs a ``PRAGMA data_version``, not a query, so callers
+        can revalidate their own copies of results cheaply.
+        """
+        self._check_external_changes()
+        with self._lock:
+            return self._generation
+
+    def _on_reset(self):
+        """Drop everything after the database file was replaced."""
+        self._data_version = self.db.data_version()
+        self.clear()
+
+    def close(self):
+        """Stop following the repository's changes; the cache can't be used afterwards."""
+        self.db.remove_change_listener(self.invalidate_dates)
+        self.db.remove_reset_listener(self._on_reset)
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,292 @@
+"""Pre-aggregated daily and monthly totals.
+
+``daily_totals`` and ``daily_item_totals`` hold one row per day (and per
+item code) computed from the transactions of that day. ``monthly_totals``
+and ``monthly_item_totals`` are derived from the daily rows. The repository
+refreshes the affected days and months inside every write transaction, so
+reports for any month read a handful of pre-computed rows instead of
+scanning that month's items.
+"""
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.date_ranges import day_bounds, month_bounds, to_date
+
+DAILY_COLUMNS = [
+    'transaction_count', 'item_count', 'old_item_count',
+    'new_gold_weight', 'new_silver_weight', 'new_amount',
+    'old_gold_weight', 'old_silver_weight', 'old_amount',
+    'billable_gold_weight', 'billable_silver_weight', 'billable_amount', 'billable_item_count',
+    'cash_amount', 'card_amount', 'upi_amount', 'total_amount', 'net_amount_paid'
+]
+
+ITEM_COLUMNS = ['count', 'weight', 'amount', 'billable_amount']
+
+TABLES_SQL = [
+    f'''
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            date TEXT PRIMARY KEY,
+            {', '.join(f'{column} REAL NOT NULL DEFAULT 0' for column in DAILY_COLUMNS)}
+        )
+    ''',
+    f'''
+        CREATE TABLE IF NOT EXISTS daily_item_totals (
+            date TEXT NOT NULL,
+            code TEXT NOT NULL,
+            name TEXT,
+            {', '.join(f'{column} REAL NOT NULL DEFAULT 0' for column in ITEM_COLUMNS)},
+            PRIMARY KEY (date, code)
+        )
+    ''',
+    f'''
+        CREATE TABLE IF NOT EXISTS monthly_totals (
+            month TEXT PRIMARY KEY,
+            day_count INTEGER NOT NULL DEFAULT 0,
+            busiest_day TEXT,
+            {', '.join(f'{column} REAL NOT NULL DEFAULT 0' for column in DAILY_COLUMNS)}
+        )
+    ''',
+    f'''
+        CREATE TABLE IF NOT EXISTS monthly_item_totals (
+            month TEXT NOT NULL,
+            code TEXT NOT NULL,
+            name TEXT,
+            {', '.join(f'{column} REAL NOT NULL DEFAULT 0' for column in ITEM_COLUMNS)},
+            PRIMARY KEY (month, code)
+        )
+    ''',
+]
+
+_GOLD = "UPPER(type) IN ('G', 'GOLD')"
+_SILVER = "UPPER(type) IN ('S', 'SILVER')"
+
+def create_tables(cursor) -> None:
+    """Create the rollup tables if they don't exist."""
+    for statement in TABLES_SQL:
+        cursor.execute(statement)
+
+def _compute_daily_rows(cursor, start: str, end_exclusive: str) -> Dict[str, Dict[str, float]]:
+    """Aggregate transactions, items and old items per day for [start, end_exclusive)."""
+    days: Dict[str, Dict[str, float]] = {}
+
+    def day(date: str) -> Dict[str, float]:
+        return days.setdefault(date, {column: 0 for column in DAILY_COLUMNS})
+
+    cursor.execute('''
+        SELECT date, COUNT(*), SUM(cash_amount), SUM(card_amount), SUM(upi_amount),
+               SUM(total_amount), SUM(net_amount_paid)
+        FROM transactions
+        WHERE date >= ? AND date < ?
+        GROUP BY date
+    ''', (start, end_exclusive))
+    for date, count, cash, card, upi, total, net in cursor.fetchall():
+        day(date).update(
+            transaction_count=count, cash_amount=cash or 0, card_amount=card or 0,
+            upi_amount=upi or 0, total_amount=total or 0, net_amount_paid=net or 0
+        )
+
+    cursor.execute(f'''
+        SELECT t.date, COUNT(*),
+               SUM(CASE WHEN {_GOLD} THEN i.weight ELSE 0 END),
+               SUM(CASE WHEN {_SILVER} THEN i.weight ELSE 0 END),
+               SUM(i.amount),
+               SUM(CASE WHEN i.is_billable AND {_GOLD} THEN i.weight ELSE 0 END),
+               SUM(CASE WHEN i.is_billable AND {_SILVER} THEN i.weight ELSE 0 END),
+               SUM(CASE WHEN i.is_billable THEN i.amount ELSE 0 END),
+               SUM(CASE WHEN i.is_billable THEN 1 ELSE 0 END)
+        FROM items i
+        JOIN transactions t ON t.id = i.transaction_id
+        WHERE t.date >= ? AND t.date < ?
+        GROUP BY t.date
+    ''', (start, end_exclusive))
+    for row in cursor.fetchall():
+        day(row[0]).update(
+            item_count=row[1], new_gold_weight=row[2] or 0, new_silver_weight=row[3] or 0,
+            new_amount=row[4] or 0, billable_gold_weight=row[5] or 0,
+            billable_silver_weight=row[6] or 0, billable_amount=row[7] or 0,
+            billable_item_count=row[8] or 0
+        )
+
+    cursor.execute(f'''
+        SELECT t.date, COUNT(*),
+               SUM(CASE WHEN {_GOLD} THEN o.weight ELSE 0 END),
+               SUM(CASE WHEN {_SILVER} THEN o.weight ELSE 0 END),
+               SUM(o.amount)
+        FROM old_items o
+        JOIN transactions t ON t.id = o.transaction_id
+        WHERE t.date >= ? AND t.date < ?
+        GROUP BY t.date
+    ''', (start, end_exclusive))
+    for date, count, gold, silver, amount in cursor.fetchall():
+        day(date).update(
+            old_item_count=count, old_gold_weight=gold or 0,
+            old_silver_weight=silver or 0, old_amount=amount or 0
+        )
+
+    return days
+
+def _refresh_daily(cursor, start: str, end_exclusive: str) -> None:
+    """Recompute daily_totals and daily_item_totals for [start, end_exclusive)."""
+    cursor.execute('DELETE FROM daily_totals WHERE date >= ? AND date < ?', (start, end_exclusive))
+    cursor.execute('DELETE FROM daily_item_totals WHERE date >= ? AND date < ?', (start, end_exclusive))
+
+    days = _compute_daily_rows(cursor, start, end_exclusive)
+    cursor.executemany(f'''
+        INSERT INTO daily_totals (date, {', '.join(DAILY_COLUMNS)})
+        VALUES (?, {', '.join('?' for _ in DAILY_COLUMNS)})
+    ''', [
+        (date,) + tuple(values[column] for column in DAILY_COLUMNS)
+        for date, values in days.items()
+    ])
+
+    cursor.execute('''
+        INSERT INTO daily_item_totals (date, code, name, count, weight, amount, billable_amount)
+        SELECT t.date, i.code, MAX(i.name), COUNT(*), SUM(i.weight), SUM(i.amount),
+               SUM(CASE WHEN i.is_billable THEN i.amount ELSE 0 END)
+        FROM items i
+        JOIN transactions t ON t.id = i.transaction_id
+        WHERE t.date >= ? AND t.date < ?
+        GROUP BY t.date, i.code
+    ''', (start, end_exclusive))
+
+def _refresh_months(cursor, months: Iterable[str]) -> None:
+    """Recompute monthly_totals and monthly_item_totals from the daily rows."""
+    for month in sorted(set(months)):
+        start, end_exclusive = month_bounds(int(month[:4]), int(month[5:7]))
+        cursor.execute('DELETE FROM monthly_totals WHERE month = ?', (month,))
+        cursor.execute('DELETE FROM monthly_item_totals WHERE month = ?', (month,))
+        cursor.execute(f'''
+            INSERT INTO monthly_totals (month, day_count, busiest_day, {', '.join(DAILY_COLUMNS)})
+            SELECT ?, COUNT(*),
+                   (SELECT date FROM daily_totals
+                    WHERE date >= ? AND date < ?
+                    ORDER BY transaction_count DESC, date LIMIT 1),
+                   {', '.join(f'SUM({column})' for column in DAILY_COLUMNS)}
+            FROM daily_totals
+            WHERE date >= ? AND date < ?
+            HAVING COUNT(*) > 0
+        ''', (month, start, end_exclusive, start, end_exclusive))
+        cursor.execute('''
+            INSERT INTO monthly_item_totals (month, code, name, count, weight, amount, billable_amount)
+            SELECT ?, code, MAX(name), SUM(count), SUM(weight), SUM(amount), SUM(billable_amount)
+            FROM daily_item_totals
+            WHERE date >= ? AND date < ?
+            GROUP BY code
+        ''', (month, start, end_exclusive))
+
+def refresh_days(cursor, dates: Iterable[Any]) -> None:
+    """Recompute the rollups for the given dates and the months containing them.
+
+    Must run inside the write transaction that changed those dates.
+    """
+    dates = {to_date(date).isoformat() for date in dates if date}
+    for date in dates:
+        _refresh_daily(cursor, *day_bounds(date))
+    _refresh_months(cursor, (date[:7] for date in dates))
+
+def rebuild(cursor) -> None:
+    """Recompute every rollup row from the transactions."""
+    for table in ('daily_totals', 'daily_item_totals', 'monthly_totals', 'monthly_item_totals'):
+        cursor.execute(f'DELETE FROM {table}')
+    cursor.execute('SELECT MIN(date), MAX(date) FROM transactions')
+    first, last = cursor.fetchone()
+    if not first:
+        return
+    _refresh_daily(cursor, first, (to_date(last) + timedelta(days=1)).isoformat())
+    cursor.execute('SELECT DISTINCT substr(date, 1, 7) FROM daily_totals')
+    _refresh_months(cursor, [row[0] for row in cursor.fetchall()])
+
+def _row_dict(columns: List[str], row) -> Dict[str, Any]:
+    return dict(zip(columns, row))
+
+def range_totals(db, start: Any, end: Any) -> Dict[str, float]:
+    """Sum the daily rollups of a date range (inclusive).
+
+    Returns:
+        dict: Every DAILY_COLUMNS total plus ``day_count``, the number of
+        days with transactions.
+    """
+    rows = db.query(f'''
+        SELECT COUNT(*), {', '.join(f'COALESCE(SUM({column}), 0)' for column in DAILY_COLUMNS)}
+        FROM daily_totals
+        WHERE date >= ? AND date < ?
+    ''', day_bounds(start, end))
+    return _row_dict(['day_count'] + DAILY_COLUMNS, rows[0])
+
+def range_days(db, start: Any, end: Any) -> List[Dict[str, Any]]:
+    """Get the daily rollup rows of a date range (inclusive), oldest first."""
+    return [
+        _row_dict(['date'] + DAILY_COLUMNS, row)
+        for row in db.query(f'''
+            SELECT date, {', '.join(DAILY_COLUMNS)}
+            FROM daily_totals
+            WHERE date >= ? AND date < ?
+            ORDER BY date
+        ''', day_bounds(start, end))
+    ]
+
+def range_item_totals(db, start: Any, end: Any) -> List[Dict[str, Any]]:
+    """Sum the per-item-code daily rollups of a date range (inclusive), by amount."""
+    return [
+        _row_dict(['code', 'name'] + ITEM_COLUMNS, row)
+        for row in db.query(f'''
+            SELECT code, MAX(name), {', '.join(f'SUM({column})' for column in ITEM_COLUMNS)}
+            FROM daily_item_totals
+            WHERE date >= ? AND date < ?
+            GROUP BY code
+            ORDER BY SUM(amount) DESC, code
+        ''', day_bounds(start, end))
+    ]
+
+def monthly_report(db, year: int, month: int, top_items: int = 10) -> Optional[Dict[str, Any]]:
+    """Build the monthly report from the rollup tables.
+
+    Args:
+        db: The repository to read from.
+        year: Report year.
+        month: Report month (1-12).
+        top_items: Number of item codes to list, by amount.
+
+    Returns:
+        dict: The report, or None if the month has no transactions.
+    """
+    month_key = f"{year:04d}-{month:02d}"
+    start, end_exclusive = month_bounds(year, month)
+
+    rows = db.query(f'''
+        SELECT day_count, busiest_day, {', '.join(DAILY_COLUMNS)}
+        FROM monthly_totals WHERE month = ?
+    ''', (month_key,))
+    if not rows:
+        return None
+    totals = _row_dict(['day_count', 'busiest_day'] + DAILY_COLUMNS, rows[0])
+
+    days = [
+        _row_dict(['date'] + DAILY_COLUMNS, row)
+        for row in db.query(f'''
+            SELECT date, {', '.join(DAILY_COLUMNS)}
+            FROM daily_totals
+            WHERE date >= ? AND date < ?
+            ORDER BY date
+        ''', (start, end_exclusive))
+    ]
+    items = [
+        _row_dict(['code', 'name'] + ITEM_COLUMNS, row)
+        for row in db.query(f'''
+            SELECT code, name, {', '.join(ITEM_COLUMNS)}
+            FROM monthly_item_totals
+            WHERE month = ?
+            ORDER BY amount DESC, code
+            LIMIT ?
+        ''', (month_key, top_items))
+    ]
+    busiest = next((day for day in days if day['date'] == totals['busiest_day']), None)
+
+    return {
+        'month': month_key,
+        'totals': totals,
+        'days': days,
+        'top_items': items,
+        'busiest_day': busiest,
+        'billable_share': totals['billable_amount'] / totals['new_amount'] if totals['new_amount'] else 0.0
+    }
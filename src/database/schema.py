@@ -0,0 +1,150 @@
+"""Schema definition for the transactions database.
+
+This is the only schema the application writes. ``PRAGMA user_version``
+records which version of it a database file has been brought up to.
+"""
+from database import rollups, search
+
+# 1: normalized transactions/items/old_items
+# 2: daily and monthly rollup tables
+# 3: change_log journal for incremental backups
+# 4: change_log records the register date each change touched
+# 5: sync_state keeps the branch identity and changeset watermark
+# 6: search_index full-text index of comments and item names and codes
+# 7: applied_operations remembers the op ids of batches from the sync server
+SCHEMA_VERSION = 7
+
+def transactions_table_sql(name: str = 'transactions') -> str:
+    """Get the CREATE TABLE statement for the transactions table."""
+    return f'''
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE NOT NULL,
+            timestamp DATETIME NOT NULL,
+            comments TEXT,
+            total_amount REAL DEFAULT 0,
+            net_amount_paid REAL DEFAULT 0,
+            cash_amount REAL DEFAULT 0,
+            card_amount REAL DEFAULT 0,
+            upi_amount REAL DEFAULT 0
+        )
+    '''
+
+ITEMS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaction_id INTEGER NOT NULL,
+        code TEXT NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        weight REAL NOT NULL,
+        amount REAL NOT NULL,
+        is_billable BOOLEAN DEFAULT 1,
+        FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE
+    )
+'''
+
+OLD_ITEMS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS old_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaction_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        weight REAL NOT NULL,
+        amount REAL NOT NULL,
+        FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE
+    )
+'''
+
+CHANGE_LOG_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        transaction_id INTEGER NOT NULL,
+        changed_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+        date TEXT
+    )
+'''
+
+# Small key/value settings of the replication to the head office
+SYNC_STATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+'''
+
+# Results of recent batch operations by their client op_id, written in the
+# batch's own transaction so a resent batch is recognised after a restart
+APPLIED_OPERATIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS applied_operations (
+        op_id TEXT PRIMARY KEY,
+        result TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    )
+'''
+
+def _change_log_trigger(table: str, event: str, body: str) -> str:
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            {body}
+        END
+    '''
+
+_ITEM_CHANGE_SQL = '''
+    INSERT INTO change_log (transaction_id, date)
+    VALUES ({row}.transaction_id, (SELECT date FROM transactions WHERE id = {row}.transaction_id));
+'''
+
+# Every write to a transaction or its items records the transaction id and
+# its date; a transaction moved to another date records both dates
+CHANGE_LOG_TRIGGERS_SQL = [
+    _change_log_trigger('transactions', 'INSERT',
+                        'INSERT INTO change_log (transaction_id, date) VALUES (NEW.id, NEW.date);'),
+    _change_log_trigger('transactions', 'UPDATE', '''
+            INSERT INTO change_log (transaction_id, date) VALUES (NEW.id, NEW.date);
+            INSERT INTO change_log (transaction_id, date)
+            SELECT OLD.id, OLD.date WHERE OLD.date IS NOT NEW.date;'''),
+    _change_log_trigger('transactions', 'DELETE',
+                        'INSERT INTO change_log (transaction_id, date) VALUES (OLD.id, OLD.date);'),
+] + [
+    _change_log_trigger(table, event, _ITEM_CHANGE_SQL.format(row=row))
+    for table in ('items', 'old_items')
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD'))
+]
+
+CHANGE_LOG_TRIGGER_NAMES = [
+    f'change_log_{table}_{event}'
+    for table in ('transactions', 'items', 'old_items')
+    for event in ('insert', 'update', 'delete')
+]
+
+INDEXES_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)',
+    'CREATE INDEX IF NOT EXISTS idx_items_transaction ON items (transaction_id)',
+    'CREATE INDEX IF NOT EXISTS idx_old_items_transaction ON old_items (transaction_id)',
+    # Covering indexes for the register filters (database.filters)
+    'CREATE INDEX IF NOT EXISTS idx_items_code ON items (code, transaction_id)',
+    'CREATE INDEX IF NOT EXISTS idx_items_filter ON items (transaction_id, code, type, is_billable, weight)',
+    'CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (total_amount)',
+]
+
+def create_item_tables(cursor) -> None:
+    """Create the items and old_items tables if they don't exist."""
+    cursor.execute(ITEMS_TABLE_SQL)
+    cursor.execute(OLD_ITEMS_TABLE_SQL)
+
+def create_schema(cursor) -> None:
+    """Create all tables and indexes if they don't exist."""
+    cursor.execute(transactions_table_sql())
+    create_item_tables(cursor)
+    for statement in INDEXES_SQL:
+        cursor.execute(statement)
+    rollups.create_tables(cursor)
+    cursor.execute(CHANGE_LOG_TABLE_SQL)
+    for statement in CHANGE_LOG_TRIGGERS_SQL:
+        cursor.execute(statement)
+    cursor.execute(SYNC_STATE_TABLE_SQL)
+    cursor.execute(APPLIED_OPERATIONS_TABLE_SQL)
+    search.create_index(cursor)
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
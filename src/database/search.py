@@ -0,0 +1,148 @@
+"""Full-text search over transaction comments and item names and codes.
+
+``search_index`` is an FTS5 table with one row per transaction, keyed by
+the transaction id. Triggers on transactions and items rebuild a
+transaction's row whenever its comments or items change, so the index is
+current inside every write transaction without the repository's help.
+
+Python builds whose SQLite lacks FTS5 get no index; searches then fall back
+to LIKE over the same columns, matching words at their start like the
+index does. The fallback is slower, and it only knows spaces as word
+breaks, so "ji" finds "Sharma ji" but not "Sharma-ji" without the index.
+"""
+import re
+import sqlite3
+from typing import Any, List, Tuple
+
+from database.filters import RegisterFilter
+
+INDEX_TABLE_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        comments, names, codes,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+
+_REINDEX_SQL = '''
+    DELETE FROM search_index WHERE rowid = {id};
+    INSERT INTO search_index (rowid, comments, names, codes)
+    SELECT t.id, COALESCE(t.comments, ''),
+           COALESCE((SELECT group_concat(name, ' ') FROM items WHERE transaction_id = t.id), ''),
+           COALESCE((SELECT group_concat(code, ' ') FROM items WHERE transaction_id = t.id), '')
+    FROM transactions t
+    WHERE t.id = {id};
+'''
+
+_POPULATE_SQL = '''
+    INSERT INTO search_index (rowid, comments, names, codes)
+    SELECT t.id, COALESCE(t.comments, ''),
+           COALESCE(group_concat(i.name, ' '), ''), COALESCE(group_concat(i.code, ' '), '')
+    FROM transactions t
+    LEFT JOIN items i ON i.transaction_id = t.id
+    GROUP BY t.id
+'''
+
+def _trigger(name: str, event: str, body: str) -> str:
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS search_{name}
+        AFTER {event}
+        BEGIN
+            {body}
+        END
+    '''
+
+TRIGGERS_SQL = [
+    _trigger('transactions_insert', 'INSERT ON transactions', _REINDEX_SQL.format(id='NEW.id')),
+    _trigger('transactions_update', 'UPDATE OF comments ON transactions', _REINDEX_SQL.format(id='NEW.id')),
+    _trigger('transactions_delete', 'DELETE ON transactions',
+             'DELETE FROM search_index WHERE rowid = OLD.id;'),
+    _trigger('items_insert', 'INSERT ON items', _REINDEX_SQL.format(id='NEW.transaction_id')),
+    _trigger('items_update', 'UPDATE OF transaction_id, code, name ON items',
+             _REINDEX_SQL.format(id='OLD.transaction_id') + _REINDEX_SQL.format(id='NEW.transaction_id')),
+    _trigger('items_delete', 'DELETE ON items', _REINDEX_SQL.format(id='OLD.transaction_id')),
+]
+
+TRIGGER_NAMES = [
+    f'search_{table}_{event}'
+    for table in ('transactions', 'items')
+    for event in ('insert', 'update', 'delete')
+]
+
+def has_index(cursor) -> bool:
+    """Check whether the database has the FTS5 search index."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+    return cursor.fetchone() is not None
+
+def create_index(cursor) -> bool:
+    """Create the search index and its triggers, filling a new index from the transactions.
+
+    Returns:
+        bool: False if this SQLite has no FTS5, in which case searches use LIKE.
+    """
+    existed = has_index(cursor)
+    try:
+        cursor.execute(INDEX_TABLE_SQL)
+    except sqlite3.OperationalError as e:
+        print(f"[Search] Full-text index unavailable, searching without it: {e}")
+        return False
+    for statement in TRIGGERS_SQL:
+        cursor.execute(statement)
+    if not existed:
+        rebuild(cursor)
+    return True
+
+def rebuild(cursor) -> None:
+    """Recompute the whole search index from the transactions and items."""
+    cursor.execute('DELETE FROM search_index')
+    cursor.execute(_POPULATE_SQL)
+
+def match_expression(text: str) -> str:
+    """Turn what was typed into an FTS5 query matching every word as a prefix.
+
+    "sharma ri" becomes ``"sharma"* "ri"*``, so results narrow as the user
+    types and punctuation can't break the query syntax.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+def build_query(text: str = '', *, use_index: bool = True, limit: int = 200,
+                **filters) -> Tuple[str, List[Any]]:
+    """Build a query selecting the ids of the newest matching transactions.
+
+    Args:
+        text: Words to find in comments, item names or item codes.
+        use_index: Whether to match text through search_index rather than LIKE.
+        limit: Number of transactions returned at most.
+        **filters: Fields of a filters.RegisterFilter, e.g. from_date,
+            to_date, min_amount, max_amount, min_weight and max_weight.
+
+    Returns:
+        tuple: The SQL and its parameters.
+    """
+    register_filter = RegisterFilter(**filters)
+    conditions, params = [], []
+
+    words = re.findall(r'\w+', text or '')
+    if words and use_index:
+        conditions.append('id IN (SELECT rowid FROM search_index WHERE search_index MATCH ?)')
+        params.append(match_expression(text))
+    for word in ([] if use_index else words):
+        # A leading space lets '% word%' match the first word too, so only word starts match
+        conditions.append('''(
+            ' ' || comments LIKE ? OR EXISTS (
+                SELECT 1 FROM items
+                WHERE items.transaction_id = transactions.id AND (' ' || name LIKE ? OR ' ' || code LIKE ?)
+            ))''')
+        params.extend([f'% {word}%'] * 3)
+
+    filter_conditions, filter_params = register_filter.conditions()
+    conditions += filter_conditions
+    params += filter_params
+
+    sql = f'''
+        SELECT id FROM transactions
+        WHERE {' AND '.join(conditions) or '1'}
+        ORDER BY {register_filter.order_by()}
+        LIMIT ?
+    '''
+    return sql, params + [int(limit)]
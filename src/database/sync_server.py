@@ -0,0 +1,268 @@
+"""Sync server that owns the register database for a shop's counters.
+
+Sharing one SQLite file between machines over a network share is fragile.
+Instead, one machine on the shop LAN runs this server on the database file
+and the counters talk to it through RemoteRepository. The server uses only
+the standard library:
+
+    GET  /status                          {"epoch", "version"}
+    GET  /transactions?from=...&to=...    transactions of a date range
+    GET  /changes?since=<version>         dates changed after a version
+    GET  /summary?date=...                get_transaction_summary()
+    GET  /monthly?year=...&month=...      get_monthly_report()
+    GET  /recent?limit=...                get_recent_transactions()
+    POST /batch                           {"operations": [...]} -> {"results": [...]}
+    POST /query                           {"sql", "params"} -> rows of a read-only query
+    POST /filtered                        {"filter": {...}} -> get_filtered_transactions()
+    POST /search                          {"text", "limit", "filters"} -> search_transactions()
+
+The version is the newest change_log sequence number, so it moves with
+every commit from any connection. Range reads carry an ETag built from the
+server's epoch and the version; a client sending it back in
+``If-None-Match`` gets ``304 Not Modified`` while nothing was written. The
+epoch is new for every server start and every database restore, so an
+ETag never matches data it wasn't computed from.
+
+Every batch operation carries an ``op_id`` chosen by the client. The
+repository records the results of recent op ids in the batch's own
+transaction, so a batch resent after a lost response, or after the server
+restarted, is not applied twice.
+
+Queries sent to ``/query`` (rollup and analytics reads) run on a read-only
+connection that can't attach other files, so a counter can read the
+register but only change it through ``/batch``.
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from database.db_manager import get_repository
+from database.filters import RegisterFilter
+from services.item_service import ItemService
+
+DEFAULT_PORT = 8765
+
+class _SyncRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the SyncServer that owns the handler's HTTP server."""
+
+    server_version = 'DailyRegisterSync/1'
+
+    def log_message(self, format, *args):
+        # Counters poll every few seconds; errors are printed where they're handled
+        pass
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method: str):
+        sync = self.server.sync
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if method == 'GET':
+                status, payload, headers = sync.handle_get(url.path, params, self.headers.get('If-None-Match'))
+            else:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                status, payload, headers = sync.handle_post(url.path, body)
+        except (KeyError, ValueError, TypeError, sqlite3.IntegrityError) as e:
+            status, payload, headers = HTTPStatus.BAD_REQUEST, {'error': str(e)}, None
+        except Exception as e:
+            print(f"[SyncServer] Error handling {method} {url.path}: {e}")
+            status, payload, headers = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}, None
+
+        if status == HTTPStatus.NOT_MODIFIED:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+        else:
+            self._send_json(status, payload, headers)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+def _filter_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn RegisterFilter fields sent as JSON back into constructor arguments."""
+    if 'payment_modes' in fields:
+        fields = dict(fields, payment_modes=tuple(fields['payment_modes']))
+    return fields
+
+class SyncServer:
+    """Serves a DatabaseManager to the counters over HTTP."""
+
+    def __init__(self, db=None, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        """Initialize the server.
+
+        Args:
+            db: The repository to serve; the shared repository if omitted.
+            host: Address to listen on ('0.0.0.0' for the whole LAN).
+            port: Port to listen on; 0 picks a free port.
+        """
+        self.db = db or get_repository()
+        self.epoch = uuid.uuid4().hex
+        self._batch_lock = threading.Lock()
+        self._thread = None
+        self.db.add_reset_listener(self._on_reset)
+        # Counters read the item master from here but can't create it themselves
+        self.db._write(ItemService._create_table)
+
+        self.httpd = ThreadingHTTPServer((host, port), _SyncRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.sync = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _on_reset(self):
+        """Invalidate every ETag after the database file was replaced."""
+        self.epoch = uuid.uuid4().hex
+
+    def version(self) -> int:
+        """Get the version of the served data."""
+        return self.db.change_version()
+
+    def etag(self, version: int) -> str:
+        return f'"{self.epoch}-{version}"'
+
+    def handle_get(self, path: str, params: Dict[str, str], if_none_match: Optional[str] = None):
+        """Answer a GET request; returns (status, payload, headers)."""
+        if path == '/status':
+            return HTTPStatus.OK, {'epoch': self.epoch, 'version': self.version()}, None
+
+        if path == '/transactions':
+            version = self.version()
+            etag = self.etag(version)
+            headers = {'ETag': etag}
+            if if_none_match == etag:
+                return HTTPStatus.NOT_MODIFIED, None, headers
+            transactions = self.db.get_transactions_range(params['from'], params.get('to', params['from']))
+            # The rows may include writes committed after the version was read;
+            # the ETag then only causes one extra reload
+            return HTTPStatus.OK, transactions, headers
+
+        if path == '/changes':
+            changes = self.db.changes_since(int(params.get('since', 0)))
+            changes['epoch'] = self.epoch
+            return HTTPStatus.OK, changes, None
+
+        if path == '/summary':
+            return HTTPStatus.OK, self.db.get_transaction_summary(params['date']), None
+
+        if path == '/monthly':
+            report = self.db.get_monthly_report(int(params['year']), int(params['month']))
+            return HTTPStatus.OK, report, None
+
+        if path == '/recent':
+            return HTTPStatus.OK, self.db.get_recent_transactions(int(params.get('limit', 20))), None
+
+        return HTTPStatus.NOT_FOUND, {'error': f"Unknown path: {path}"}, None
+
+    def handle_post(self, path: str, body: Dict[str, Any]):
+        """Answer a POST request; returns (status, payload, headers)."""
+        if path == '/batch':
+            results = self.apply_batch(body['operations'])
+            return HTTPStatus.OK, {'epoch': self.epoch, **results}, None
+
+        if path == '/query':
+            return HTTPStatus.OK, self.read_query(body['sql'], body.get('params', [])), None
+
+        if path == '/filtered':
+            register_filter = RegisterFilter(**_filter_fields(body.get('filter', {})))
+            return HTTPStatus.OK, self.db.get_filtered_transactions(register_filter), None
+
+        if path == '/search':
+            transactions = self.db.search_transactions(
+                body.get('text', ''), int(body.get('limit', 200)), **_filter_fields(body.get('filters', {}))
+            )
+            return HTTPStatus.OK, transactions, None
+
+        return HTTPStatus.NOT_FOUND, {'error': f"Unknown path: {path}"}, None
+
+    def read_query(self, sql: str, params: List[Any]) -> List[List[Any]]:
+        """Run a query on a read-only connection and return its rows.
+
+        Raises:
+            ValueError: If the query fails, e.g. because it tries to write.
+        """
+        conn = sqlite3.connect(f"file:{Path(self.db.db_path).as_posix()}?mode=ro", uri=True)
+        conn.set_authorizer(
+            lambda action, *args: sqlite3.SQLITE_DENY if action == sqlite3.SQLITE_ATTACH else sqlite3.SQLITE_OK
+        )
+        try:
+            return [list(row) for row in conn.execute(sql, params).fetchall()]
+        except sqlite3.Error as e:
+            raise ValueError(f"Query failed: {e}") from e
+        finally:
+            conn.close()
+
+    def apply_batch(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply the operations not applied before in one database transaction.
+
+        Returns:
+            dict: ``results`` (one per operation, in order), and the
+            ``version_before`` and ``version`` around the write.
+        """
+        with self._batch_lock:
+            version_before = self.version()
+            results = self.db.apply_batch(operations)
+            return {'results': results, 'version_before': version_before, 'version': self.version()}
+
+    def start(self) -> 'SyncServer':
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='SyncServer', daemon=True)
+        self._thread.start()
+        print(f"[SyncServer] Serving {self.db.db_path} at {self.url}")
+        return self
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted."""
+        print(f"[SyncServer] Serving {self.db.db_path} at {self.url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.db.remove_reset_listener(self._on_reset)
+
+def main(argv=None):
+    """Run the sync server from the command line."""
+    parser = argparse.ArgumentParser(description='Serve the register database to the counters.')
+    parser.add_argument('--db', help='Database file (default: the application database)')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    args = parser.parse_args(argv)
+
+    server = SyncServer(get_repository(args.db), args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
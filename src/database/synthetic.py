@@ -0,0 +1,78 @@
+"""Synthetic register data for benchmarks.
+
+Fills a repository with plausible slips over a date range: a few item codes
+of gold and silver with typical weights and rates, a mix of billable
+items, old-item exchanges and cash/card/UPI payments, and comments naming
+customers. A seed makes the data reproducible.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator
+
+from utils.date_ranges import to_date
+
+# (code, name, type, weight range in grams, rate per gram)
+ITEMS = [
+    ('GR', 'Gold Ring', 'G', (2.0, 8.0), 6500.0),
+    ('GCH', 'Gold Chain', 'G', (5.0, 30.0), 6400.0),
+    ('GER', 'Gold Earrings', 'G', (1.5, 6.0), 6500.0),
+    ('GBN', 'Gold Bangle', 'G', (10.0, 40.0), 6300.0),
+    ('SR', 'Silver Ring', 'S', (3.0, 12.0), 85.0),
+    ('SCH', 'Silver Chain', 'S', (10.0, 60.0), 80.0),
+    ('SAN', 'Silver Anklet', 'S', (20.0, 120.0), 80.0),
+    ('SUT', 'Silver Utensil', 'S', (50.0, 400.0), 75.0),
+]
+
+CUSTOMERS = ['Sharma', 'Verma', 'Gupta', 'Singh', 'Khan', 'Patel', 'Rao', 'Iyer', 'Das', 'Mehta']
+
+def slips(start: Any, end: Any, slips_per_day: int = 60, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Generate transaction dictionaries for every day from start to end (inclusive)."""
+    rng = random.Random(seed)
+    day = to_date(start)
+    last = to_date(end)
+    while day <= last:
+        opening = datetime(day.year, day.month, day.day, 10, 0)
+        for _ in range(rng.randint(slips_per_day // 2, slips_per_day * 3 // 2)):
+            new_items = []
+            for _ in range(rng.choice((1, 1, 1, 2, 3))):
+                code, name, item_type, (low, high), rate = rng.choice(ITEMS)
+                weight = round(rng.uniform(low, high), 3)
+                new_items.append({
+                    'code': code, 'name': name, 'type': item_type, 'weight': weight,
+                    'amount': round(weight * rate * rng.uniform(1.05, 1.2), 2),
+                    'is_billable': rng.random() < 0.6
+                })
+            old_items = []
+            if rng.random() < 0.2:
+                weight = round(rng.uniform(2.0, 20.0), 3)
+                old_items.append({'type': rng.choice('GS'), 'weight': weight, 'amount': round(weight * 60.0, 2)})
+            # Old items are taken in exchange, so the customer pays the difference
+            paid = sum(item['amount'] for item in new_items) - sum(item['amount'] for item in old_items)
+            mode = rng.choice(('cash', 'cash', 'card', 'upi'))
+            yield {
+                'timestamp': opening + timedelta(minutes=rng.randint(0, 600)),
+                'comments': f"{rng.choice(CUSTOMERS)} {rng.choice(('', 'ji', 'family', 'order'))}".strip(),
+                'new_items': new_items,
+                'old_items': old_items,
+                'payment_details': {payment: paid if payment == mode else 0.0 for payment in ('cash', 'card', 'upi')}
+            }
+        day += timedelta(days=1)
+
+def populate(db, start: Any, end: Any, slips_per_day: int = 60, seed: int = 0, batch_size: int = 2000) -> int:
+    """Add synthetic slips for a date range to a repository.
+
+    Returns:
+        int: The number of transactions added.
+    """
+    count = 0
+    batch = []
+    for slip in slips(start, end, slips_per_day, seed):
+        batch.append({'op': 'add', 'transaction': slip})
+        if len(batch) >= batch_size:
+            db.apply_batch(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.apply_batch(batch)
+        count += len(batch)
+    return count
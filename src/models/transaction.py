@@ -21,10 +21,89 @@ class OldItem:
     amount: float
     timestamp: datetime = field(default_factory=datetime.now)
 
+def item_metal(item: Dict) -> Optional[str]:
+    """Get 'gold' or 'silver' for an item from its type, or its code prefix if it has no type."""
+    item_type = (item.get('type') or item.get('code', '')[:1]).upper()
+    if item_type in ('G', 'GOLD'):
+        return 'gold'
+    if item_type in ('S', 'SILVER'):
+        return 'silver'
+    return None
+
+class SlipTotals:
+    """Running totals of a slip's new and old items.
+
+    Updated as items are added and removed, so summaries of the slip being
+    entered don't re-sum the item lists.
+    """
+
+    def __init__(self, new_items: Optional[List[Dict]] = None, old_items: Optional[List[Dict]] = None):
+        self.reset()
+        for item in new_items or []:
+            self.add_new(item)
+        for item in old_items or []:
+            self.add_old(item)
+
+    def reset(self) -> None:
+        """Zero all totals."""
+        self.new_count = 0
+        self.new_weight = {'gold': 0.0, 'silver': 0.0}
+        self.new_amount = 0.0
+        self.old_count = 0
+        self.old_weight = {'gold': 0.0, 'silver': 0.0}
+        self.old_amount = 0.0
+        self.billable_count = 0
+        self.billable_weight = {'gold': 0.0, 'silver': 0.0}
+        self.billable_amount = 0.0
+
+    def _update_new(self, item: Dict, sign: int) -> None:
+        weight = float(item.get('weight', 0)) * sign
+        amount = float(item.get('amount', 0)) * sign
+        metal = item_metal(item)
+        self.new_count += sign
+        self.new_amount += amount
+        if metal:
+            self.new_weight[metal] += weight
+        if item.get('is_billable', False):
+            self.billable_count += sign
+            self.billable_amount += amount
+            if metal:
+                self.billable_weight[metal] += weight
+        if self.new_count == 0:
+            # Don't carry rounding residue into the next items
+            self.new_weight = {'gold': 0.0, 'silver': 0.0}
+            self.new_amount = 0.0
+        if self.billable_count == 0:
+            self.billable_weight = {'gold': 0.0, 'silver': 0.0}
+            self.billable_amount = 0.0
+
+    def _update_old(self, item: Dict, sign: int) -> None:
+        metal = item_metal(item)
+        self.old_count += sign
+        self.old_amount += float(item.get('amount', 0)) * sign
+        if metal:
+            self.old_weight[metal] += float(item.get('weight', 0)) * sign
+        if self.old_count == 0:
+            self.old_weight = {'gold': 0.0, 'silver': 0.0}
+            self.old_amount = 0.0
+
+    def add_new(self, item: Dict) -> None:
+        self._update_new(item, 1)
+
+    def remove_new(self, item: Dict) -> None:
+        self._update_new(item, -1)
+
+    def add_old(self, item: Dict) -> None:
+        self._update_old(item, 1)
+
+    def remove_old(self, item: Dict) -> None:
+        self._update_old(item, -1)
+
 class Transaction:
     def __init__(self):
         self.new_items: List[Dict] = []
         self.old_items: List[Dict] = []
+        self.totals = SlipTotals()
         self.payment_details: Dict = {'cash': 0, 'card': 0, 'upi': 0}
         self.timestamp: Optional[datetime] = None
         self.comments: str = ""  # New field for transaction comments
@@ -40,6 +119,7 @@ class Transaction:
         if item['amount'] <= 0:
             raise ValueError("Amount must be greater than 0")
         self.new_items.append(item)
+        self.totals.add_new(item)
         
     def add_old_item(self, item: Dict) -> None:
         """Add an old item to the transaction."""
@@ -50,16 +130,17 @@ class Transaction:
         if item['amount'] <= 0:
             raise ValueError("Amount must be greater than 0")
         self.old_items.append(item)
+        self.totals.add_old(item)
         
     def remove_new_item(self, index: int) -> None:
         """Remove a new item from the transaction."""
         if 0 <= index < len(self.new_items):
-            self.new_items.pop(index)
+            self.totals.remove_new(self.new_items.pop(index))
             
     def remove_old_item(self, index: int) -> None:
         """Remove an old item from the transaction."""
         if 0 <= index < len(self.old_items):
-            self.old_items.pop(index)
+            self.totals.remove_old(self.old_items.pop(index))
             
     def set_payment_details(self, details: Dict) -> None:
         """Set payment details for the transaction."""
@@ -81,53 +162,27 @@ class Transaction:
         
     def get_total_amount(self) -> float:
         """Calculate total amount of the transaction."""
-        new_items_total = sum(item['amount'] for item in self.new_items)
-        old_items_total = sum(item['amount'] for item in self.old_items)
-        total = new_items_total - old_items_total
+        total = self.totals.new_amount - self.totals.old_amount
         return max(0, total)  # Return 0 if the total would be negative
         
     def get_summary(self) -> Dict:
-        """Get a summary of the transaction."""
-        # Calculate new items summary
-        new_items_total = sum(item['amount'] for item in self.new_items)
-        new_gold = sum(item['weight'] for item in self.new_items if item['type'] == 'G' or item['type'] == 'Gold')
-        new_silver = sum(item['weight'] for item in self.new_items if item['type'] == 'S' or item['type'] == 'Silver')
-        
-        # Calculate old items summary
-        old_items_total = sum(item['amount'] for item in self.old_items)
-        old_gold = sum(item['weight'] for item in self.old_items if item['type'] == 'Gold')
-        old_silver = sum(item['weight'] for item in self.old_items if item['type'] == 'Silver')
-        
-        # Calculate billable items summary
-        billable_items = [item for item in self.new_items if item.get('is_billable', False)]
-        billable_gold = sum(item['weight'] for item in billable_items if item['code'].startswith('G'))
-        billable_silver = sum(item['weight'] for item in billable_items if item['code'].startswith('S'))
-        billable_total = sum(item['amount'] for item in billable_items)
-        
-        # Calculate total to pay (never negative)
-        total_to_pay = max(0, new_items_total - old_items_total)
-        
+        """Get a summary of the transaction from its running totals."""
+        totals = self.totals
         return {
             # Transaction Summary
-            'new_items_count': len(self.new_items),
-            'new_items_total': new_items_total,
-            'old_items_count': len(self.old_items),
-            'old_items_total': old_items_total,
-            'total_to_pay': total_to_pay,
+            'new_items_count': totals.new_count,
+            'new_items_total': totals.new_amount,
+            'old_items_count': totals.old_count,
+            'old_items_total': totals.old_amount,
+            'total_to_pay': self.get_total_amount(),
             
             # Daily Summary
-            'new_items': {
-                'gold': new_gold,
-                'silver': new_silver
-            },
-            'old_items': {
-                'gold': old_gold,
-                'silver': old_silver
-            },
+            'new_items': dict(totals.new_weight),
+            'old_items': dict(totals.old_weight),
             'billable_items': {
-                'gold': billable_gold,
-                'silver': billable_silver,
-                'amount': billable_total
+                'gold': totals.billable_weight['gold'],
+                'silver': totals.billable_weight['silver'],
+                'amount': totals.billable_amount
             },
             'payments': self.payment_details.copy()
         }
@@ -148,6 +203,7 @@ class Transaction:
         transaction = cls()
         transaction.new_items = data.get('new_items', [])
         transaction.old_items = data.get('old_items', [])
+        transaction.totals = SlipTotals(transaction.new_items, transaction.old_items)
         transaction.payment_details = data.get('payment_details', {})
         transaction.timestamp = data.get('timestamp')
         transaction.comments = data.get('comments', '')  # Load comments from dictionary
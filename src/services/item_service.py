@@ -1,23 +1,15 @@
 from typing import Dict, List, Optional
 from datetime import datetime
-import os
-from database.db_manager import DatabaseManager
-import sqlite3
+from database.db_manager import DatabaseManager, get_repository
 
 class ItemService:
     def __init__(self, db: Optional[DatabaseManager] = None):
         """Initialize the item service.
         
         Args:
-            db: Optional database manager instance. If not provided, a new one will be created.
+            db: Optional database manager instance. If not provided, the shared repository is used.
         """
-        # Get the database path from environment or use default
-        app_data_dir = os.path.join(os.getenv('APPDATA', ''), 'DailyRegister')
-        os.makedirs(app_data_dir, exist_ok=True)
-        db_path = os.path.join(app_data_dir, 'transactions.db')
-        
-        # Use the provided db manager or create a new one with the correct path
-        self.db = db if db is not None else DatabaseManager(db_path)
+        self.db = db if db is not None else get_repository()
         
         # Initialize database and load item codes
         self.init_db()
@@ -26,54 +18,53 @@ class ItemService:
         self._items_cache: Dict[str, dict] = {}
         self._load_cache()
         
+        # A restore replaces the item_codes table along with everything else
+        self.db.add_reset_listener(self._reload_cache)
+        
     def init_db(self):
         """Initialize the database with required tables."""
         try:
-            if not self.db.conn:
-                self.db.conn = sqlite3.connect(self.db.db_path)
-            cursor = self.db.conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS item_codes (
-                    code TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    type TEXT NOT NULL,  -- 'G' or 'S' or 'O'
-                    last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Insert default items if the table is empty
-            cursor.execute('SELECT COUNT(*) FROM item_codes')
-            if cursor.fetchone()[0] == 0:
-                default_items = {
-                    # Other Items
-                    'BARTAN': {'name': 'Bartan', 'type': 'O'},
-                    'POOJA': {'name': 'Pooja', 'type': 'O'},
-                    'MURTI': {'name': 'Murti', 'type': 'O'},
-                    'MIX': {'name': 'Mixed Items', 'type': 'O'}
-                }
-                
-                for code, info in default_items.items():
-                    cursor.execute('''
-                        INSERT INTO item_codes (code, name, type)
-                        VALUES (?, ?, ?)
-                    ''', (code, info['name'], info['type']))
-                
-                self.db.conn.commit()
+            self.db._write(self._create_table)
+        except NotImplementedError:
+            # A sync server creates the table in the database it serves
+            pass
         except Exception as e:
             print(f"Error initializing database: {e}")
-            if self.db.conn:
-                self.db.conn.rollback()
+
+    @staticmethod
+    def _create_table(cursor):
+        """Create item_codes, with the default items if it is empty."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS item_codes (
+                code TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                type TEXT NOT NULL,  -- 'G' or 'S' or 'O'
+                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Insert default items if the table is empty
+        cursor.execute('SELECT COUNT(*) FROM item_codes')
+        if cursor.fetchone()[0] == 0:
+            default_items = {
+                # Other Items
+                'BARTAN': {'name': 'Bartan', 'type': 'O'},
+                'POOJA': {'name': 'Pooja', 'type': 'O'},
+                'MURTI': {'name': 'Murti', 'type': 'O'},
+                'MIX': {'name': 'Mixed Items', 'type': 'O'}
+            }
+            
+            for code, info in default_items.items():
+                cursor.execute('''
+                    INSERT INTO item_codes (code, name, type)
+                    VALUES (?, ?, ?)
+                ''', (code, info['name'], info['type']))
             
     def _load_cache(self):
         """Load items into cache."""
         try:
-            if not self.db.conn:
-                self.db.conn = sqlite3.connect(self.db.db_path)
-            cursor = self.db.conn.cursor()
-            
-            cursor.execute('SELECT code, name, type, last_used FROM item_codes')
-            for code, name, type_, last_used in cursor.fetchall():
+            rows = self.db.query('SELECT code, name, type, last_used FROM item_codes')
+            for code, name, type_, last_used in rows:
                 self._items_cache[code] = {
                     'name': name,
                     'type': type_,
@@ -82,6 +73,12 @@ class ItemService:
         except Exception as e:
             print(f"Error loading cache: {e}")
                 
+    def _reload_cache(self):
+        """Reload the item codes after the database file was replaced."""
+        self.init_db()
+        self._items_cache.clear()
+        self._load_cache()
+                
     @property
     def ITEM_CODES(self) -> Dict[str, dict]:
         """Get all item codes from the database."""
@@ -124,15 +121,11 @@ class ItemService:
                     del self._items_cache[code]
                 return False
                 
-            if not self.db.conn:
-                self.db.conn = sqlite3.connect(self.db.db_path)
-            cursor = self.db.conn.cursor()
-            
-            cursor.execute('''
+            # Through the repository's write path, so a locked shared file is retried
+            self.db._write(lambda cursor: cursor.execute('''
                 INSERT OR REPLACE INTO item_codes (code, name, type, last_used)
                 VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (code, name, type_))
-            self.db.conn.commit()
+            ''', (code, name, type_)))
                 
             # Update cache
             self._items_cache[code] = {
@@ -144,8 +137,6 @@ class ItemService:
             return True
         except Exception as e:
             print(f"Error adding item: {e}")
-            if self.db.conn:
-                self.db.conn.rollback()
             return False
             
     def delete_item(self, code: str) -> bool:
@@ -154,12 +145,7 @@ class ItemService:
             if not code:
                 return False
                 
-            if not self.db.conn:
-                self.db.conn = sqlite3.connect(self.db.db_path)
-            cursor = self.db.conn.cursor()
-            
-            cursor.execute('DELETE FROM item_codes WHERE code = ?', (code,))
-            self.db.conn.commit()
+            self.db._write(lambda cursor: cursor.execute('DELETE FROM item_codes WHERE code = ?', (code,)))
                 
             # Remove from cache
             if code in self._items_cache:
@@ -167,8 +153,6 @@ class ItemService:
             return True
         except Exception as e:
             print(f"Error deleting item: {e}")
-            if self.db.conn:
-                self.db.conn.rollback()
             return False
             
     def get_suggestions(self, prefix: str) -> List[Dict]:
@@ -205,35 +189,24 @@ class ItemService:
             if not code or code not in self._items_cache:
                 return False
                 
-            if not self.db.conn:
-                self.db.conn = sqlite3.connect(self.db.db_path)
-            cursor = self.db.conn.cursor()
-            
             current_time = datetime.now().isoformat()
-            cursor.execute('''
+            self.db._write(lambda cursor: cursor.execute('''
                 UPDATE item_codes
                 SET last_used = ?
                 WHERE code = ?
-            ''', (current_time, code))
-            self.db.conn.commit()
+            ''', (current_time, code)))
                 
             # Update cache
             self._items_cache[code]['last_used'] = current_time
             return True
         except Exception as e:
             print(f"Error updating last used: {e}")
-            if self.db.conn:
-                self.db.conn.rollback()
             return False
             
     def get_recent_items(self, limit: int = 10) -> List[Dict]:
         """Get recently used items."""
         try:
-            if not self.db.conn:
-                self.db.conn = sqlite3.connect(self.db.db_path)
-            cursor = self.db.conn.cursor()
-            
-            cursor.execute('''
+            rows = self.db.query('''
                 SELECT code, name, type, last_used
                 FROM item_codes
                 ORDER BY last_used DESC
@@ -246,7 +219,7 @@ class ItemService:
                     'type': type_,
                     'last_used': last_used
                 }
-                for code, name, type_, last_used in cursor.fetchall()
+                for code, name, type_, last_used in rows
             ]
         except Exception as e:
             print(f"Error getting recent items: {e}")
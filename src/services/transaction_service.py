@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from models.transaction import Transaction, NewItem, OldItem
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, get_repository
 from services.item_service import ItemService
 
 class TransactionService:
@@ -12,10 +12,10 @@ class TransactionService:
         """Initialize the transaction service.
         
         Args:
-            db: Optional database manager instance. If not provided, a new one will be created.
+            db: Optional database manager instance. If not provided, the shared repository is used.
         """
-        self.db = db if db is not None else DatabaseManager()
-        self.item_service = ItemService(db)
+        self.db = db if db is not None else get_repository()
+        self.item_service = ItemService(self.db)
         self.current_transaction = {
             'new_items': [],
             'old_items': [],
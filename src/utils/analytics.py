@@ -1,151 +1,177 @@
-import pandas as pd
-import sqlite3
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 import os
+from typing import Dict, List, Optional
+
+from database.db_manager import DatabaseManager, app_data_dir, get_repository
+from database.remote_repository import RemoteRepository
+from database.result_cache import ResultCache
+from utils.date_ranges import day_bounds, month_bounds, is_closed_period, to_date
+from utils.trends_chart import TrendsChartRenderer
 
 class Analytics:
-    def __init__(self, db_path):
-        self.db_path = db_path
-        self.reports_dir = os.path.join(os.path.dirname(db_path), 'reports')
+    """Sales statistics computed with SQL aggregates on the shared repository connection.
+
+    Results for periods that are wholly in the past are memoized; they stay
+    cached until a write touches one of their dates.
+    """
+
+    def __init__(self, db_path=None, db: Optional[DatabaseManager] = None):
+        self.db = db or get_repository(db_path)
+        self.db_path = self.db.db_path
+        # A repository on a sync server has no folder of its own
+        data_dir = app_data_dir() if isinstance(self.db, RemoteRepository) else os.path.dirname(self.db_path)
+        self.reports_dir = os.path.join(data_dir, 'reports')
         if not os.path.exists(self.reports_dir):
             os.makedirs(self.reports_dir)
+        self.cache = ResultCache(self.db)
+        self.chart_renderer = TrendsChartRenderer(self)
+
+    def close(self):
+        """Release the result cache's listeners on the repository."""
+        self.cache.close()
+
+    def _memoized(self, key, start, end, compute):
+        """Serve closed periods from the cache; always recompute periods that include today."""
+        if is_closed_period(end):
+            return self.cache.get_or_compute(key, start, end, compute)
+        return compute()
 
     def get_daily_summary(self, date):
         """Get summary of transactions for a specific date"""
-        conn = sqlite3.connect(self.db_path)
-        query = f"""
-        SELECT 
-            COUNT(*) as total_transactions,
-            SUM(total_amount) as total_sales,
-            SUM(cash_amount) as total_cash,
-            SUM(card_amount) as total_card,
-            SUM(upi_amount) as total_upi
-        FROM transactions 
-        WHERE date = '{date}'
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df.to_dict('records')[0]
+        date_str = to_date(date).isoformat()
+
+        def compute():
+            row = self.db.query("""
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(total_amount), 0),
+                    COALESCE(SUM(cash_amount), 0),
+                    COALESCE(SUM(card_amount), 0),
+                    COALESCE(SUM(upi_amount), 0)
+                FROM transactions
+                WHERE date = ?
+            """, (date_str,))[0]
+            return {
+                'total_transactions': row[0],
+                'total_sales': row[1],
+                'total_cash': row[2],
+                'total_card': row[3],
+                'total_upi': row[4]
+            }
+
+        return dict(self._memoized(('daily_summary', date_str), date_str, date_str, compute))
 
     def calculate_daily_profit(self, date):
         """Calculate profit for a specific date"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Get all transactions for the date
-        query = f"""
-        SELECT * FROM transactions 
-        WHERE date = '{date}'
-        """
-        df = pd.read_sql_query(query, conn)
-        
-        # Calculate total revenue
-        total_revenue = df['total_amount'].sum()
-        
+        total_revenue = self.get_daily_summary(date)['total_sales']
+
         # You would need to implement your profit calculation logic here
         # For example: profit = revenue - costs
         # This is a placeholder calculation
         estimated_profit = total_revenue * 0.15  # 15% profit margin
-        
-        conn.close()
+
         return {
             'date': date,
             'total_revenue': total_revenue,
             'estimated_profit': estimated_profit
         }
 
+    def get_daily_totals(self, start_date, end_date) -> List[Dict]:
+        """Get per-day transaction counts and payment totals for a date range (inclusive).
+
+        For a range that reaches today, the days before today come from the
+        cache and only today's totals are queried, so extending the range
+        by a day doesn't recompute the whole period.
+        """
+        start, end = to_date(start_date), to_date(end_date)
+        today = date.today()
+        if start < today <= end:
+            yesterday = today - timedelta(days=1)
+            return self.get_daily_totals(start, yesterday) + self._query_daily_totals(today, end)
+        if is_closed_period(end):
+            key = ('daily_totals', start.isoformat(), end.isoformat())
+            return list(self.cache.get_or_compute(key, start, end, lambda: self._query_daily_totals(start, end)))
+        return self._query_daily_totals(start, end)
+
+    def _query_daily_totals(self, start_date, end_date) -> List[Dict]:
+        """Query per-day totals for a date range (inclusive)."""
+        rows = self.db.query("""
+            SELECT
+                date,
+                COUNT(*),
+                SUM(total_amount),
+                SUM(cash_amount),
+                SUM(card_amount),
+                SUM(upi_amount)
+            FROM transactions
+            WHERE date >= ? AND date < ?
+            GROUP BY date
+            ORDER BY date
+        """, day_bounds(start_date, end_date))
+        return [
+            {
+                'date': row[0],
+                'transaction_count': row[1],
+                'daily_total': row[2],
+                'cash_total': row[3],
+                'card_total': row[4],
+                'upi_total': row[5]
+            }
+            for row in rows
+        ]
+
     def generate_trends_report(self, start_date, end_date):
-        """Generate trends report for a date range"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = f"""
-        SELECT 
-            date,
-            COUNT(*) as transaction_count,
-            SUM(total_amount) as daily_total,
-            SUM(cash_amount) as cash_total,
-            SUM(card_amount) as card_total,
-            SUM(upi_amount) as upi_total
-        FROM transactions 
-        WHERE date BETWEEN '{start_date}' AND '{end_date}'
-        GROUP BY date
-        ORDER BY date
+        """Generate trends report for a date range.
+
+        The chart is drawn on the calling thread if it isn't cached; the UI
+        uses TrendsChartWorker to do this in the background instead.
         """
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if df.empty:
+        days = self.get_daily_totals(start_date, end_date)
+        if not days:
             return None
-            
-        # Create visualizations
-        plt.figure(figsize=(15, 10))
-        
-        # Daily totals
-        plt.subplot(2, 2, 1)
-        plt.plot(df['date'], df['daily_total'], marker='o')
-        plt.title('Daily Total Sales')
-        plt.xticks(rotation=45)
-        
-        # Payment method distribution
-        plt.subplot(2, 2, 2)
-        payment_methods = ['cash_total', 'card_total', 'upi_total']
-        totals = [df[method].sum() for method in payment_methods]
-        plt.pie(totals, labels=['Cash', 'Card', 'UPI'], autopct='%1.1f%%')
-        plt.title('Payment Method Distribution')
-        
-        # Transaction count trend
-        plt.subplot(2, 2, 3)
-        plt.bar(df['date'], df['transaction_count'])
-        plt.title('Daily Transaction Count')
-        plt.xticks(rotation=45)
-        
-        # Save the plot
-        plt.tight_layout()
-        plot_path = os.path.join(self.reports_dir, f'trends_{start_date}_to_{end_date}.png')
-        plt.savefig(plot_path)
-        plt.close()
-        
+
         return {
-            'plot_path': plot_path,
-            'summary_stats': {
-                'total_sales': df['daily_total'].sum(),
-                'avg_daily_sales': df['daily_total'].mean(),
-                'total_transactions': df['transaction_count'].sum(),
-                'avg_transaction_value': df['daily_total'].sum() / df['transaction_count'].sum(),
-                'payment_distribution': {
-                    'cash': df['cash_total'].sum(),
-                    'card': df['card_total'].sum(),
-                    'upi': df['upi_total'].sum()
-                }
+            'plot_path': self.chart_renderer.render(start_date, end_date),
+            'summary_stats': self._trend_stats(days)
+        }
+
+    @staticmethod
+    def _trend_stats(days: List[Dict]) -> Dict:
+        """Summarize a list of per-day totals."""
+        total_sales = sum(day['daily_total'] for day in days)
+        total_transactions = sum(day['transaction_count'] for day in days)
+        return {
+            'total_sales': total_sales,
+            'avg_daily_sales': total_sales / len(days),
+            'total_transactions': total_transactions,
+            'avg_transaction_value': total_sales / total_transactions,
+            'payment_distribution': {
+                'cash': sum(day['cash_total'] for day in days),
+                'card': sum(day['card_total'] for day in days),
+                'upi': sum(day['upi_total'] for day in days)
             }
         }
 
     def get_monthly_statistics(self, year, month):
         """Get monthly statistics"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = f"""
-        SELECT *
-        FROM transactions 
-        WHERE strftime('%Y-%m', date) = '{year:04d}-{month:02d}'
-        """
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if df.empty:
+        start_str, end_exclusive = month_bounds(year, month)
+        end_str = (to_date(end_exclusive) - timedelta(days=1)).isoformat()
+        days = self.get_daily_totals(start_str, end_str)
+
+        if not days:
             return None
-            
+
+        total_sales = sum(day['daily_total'] for day in days)
+        total_transactions = sum(day['transaction_count'] for day in days)
         return {
-            'total_sales': df['total_amount'].sum(),
-            'total_transactions': len(df),
-            'average_transaction': df['total_amount'].mean(),
-            'busiest_day': df.groupby('date').size().idxmax(),
-            'highest_sale_day': df.groupby('date')['total_amount'].sum().idxmax(),
+            'total_sales': total_sales,
+            'total_transactions': total_transactions,
+            'average_transaction': total_sales / total_transactions,
+            'busiest_day': max(days, key=lambda day: day['transaction_count'])['date'],
+            'highest_sale_day': max(days, key=lambda day: day['daily_total'])['date'],
             'payment_methods': {
-                'cash': df['cash_amount'].sum(),
-                'card': df['card_amount'].sum(),
-                'upi': df['upi_amount'].sum()
+                'cash': sum(day['cash_total'] for day in days),
+                'card': sum(day['card_total'] for day in days),
+                'upi': sum(day['upi_total'] for day in days)
             }
-        } 
\ No newline at end of file
+        }
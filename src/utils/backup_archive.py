@@ -0,0 +1,122 @@
+"""Compressed backup archives.
+
+An archive is an xz-compressed tar file holding two members:
+``manifest.json`` first, then the database file itself. The manifest comes
+first so it can be read without decompressing the database, and all
+reading and writing streams through fixed-size buffers.
+"""
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tarfile
+from datetime import datetime
+from typing import Any, Dict
+
+from database import schema
+
+ARCHIVE_SUFFIX = '.tar.xz'
+MANIFEST_NAME = 'manifest.json'
+DATABASE_NAME = 'transactions.db'
+MANIFEST_FORMAT = 1
+CHUNK_SIZE = 1024 * 1024
+
+class BackupArchiveError(Exception):
+    """Raised when an archive is malformed or doesn't match its manifest."""
+
+def is_archive(path) -> bool:
+    """Check whether a backup path names a compressed archive."""
+    return str(path).endswith(ARCHIVE_SUFFIX)
+
+def file_sha256(path) -> str:
+    """Get the SHA-256 of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_manifest(db_file) -> Dict[str, Any]:
+    """Describe a database snapshot: versions, row counts, size and checksum."""
+    conn = sqlite3.connect(f"file:{os.fspath(db_file)}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA user_version')
+        user_version = cursor.fetchone()[0]
+        row_counts = {}
+        for table in ('transactions', 'items', 'old_items'):
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            row_counts[table] = cursor.fetchone()[0]
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+        row = cursor.fetchone()
+        change_log_seq = row[0] if row else 0
+    finally:
+        conn.close()
+
+    return {
+        'format': MANIFEST_FORMAT,
+        'created_at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+        'schema_version': schema.SCHEMA_VERSION,
+        'user_version': user_version,
+        'row_counts': row_counts,
+        'change_log_seq': change_log_seq,
+        'db_size': os.path.getsize(db_file),
+        'sha256': file_sha256(db_file)
+    }
+
+def write_archive(db_file, archive_path, manifest: Dict[str, Any], preset: int = 3) -> None:
+    """Compress a database snapshot and its manifest into archive_path.
+
+    The archive is written under a temporary name and renamed when complete.
+    """
+    temp_path = f"{archive_path}.part"
+    try:
+        with tarfile.open(temp_path, mode='w:xz', preset=preset) as archive:
+            payload = json.dumps(manifest, indent=2).encode('utf-8')
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(payload)
+            info.mtime = int(datetime.now().timestamp())
+            archive.addfile(info, io.BytesIO(payload))
+
+            info = archive.gettarinfo(db_file, arcname=DATABASE_NAME)
+            with open(db_file, 'rb') as f:
+                archive.addfile(info, f)
+        os.replace(temp_path, archive_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def read_manifest(archive_path) -> Dict[str, Any]:
+    """Read the manifest of an archive without decompressing the database."""
+    with tarfile.open(archive_path, mode='r:xz') as archive:
+        member = archive.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise BackupArchiveError(f"{archive_path} has no manifest")
+        return json.load(archive.extractfile(member))
+
+def extract_database(archive_path, dest_path) -> Dict[str, Any]:
+    """Stream the database out of an archive into dest_path, checking its checksum.
+
+    Returns:
+        dict: The archive's manifest.
+    """
+    with tarfile.open(archive_path, mode='r|xz') as archive:
+        manifest = None
+        for member in archive:
+            if member.name == MANIFEST_NAME:
+                manifest = json.load(archive.extractfile(member))
+            elif member.name == DATABASE_NAME:
+                if manifest is None:
+                    raise BackupArchiveError(f"{archive_path} has no manifest")
+                digest = hashlib.sha256()
+                source = archive.extractfile(member)
+                with open(dest_path, 'wb') as out:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
+                if digest.hexdigest() != manifest['sha256']:
+                    os.remove(dest_path)
+                    raise BackupArchiveError(f"Checksum mismatch in {archive_path}")
+                return manifest
+    raise BackupArchiveError(f"{archive_path} has no database")
@@ -0,0 +1,116 @@
+"""Catalog of the backups in a backup directory.
+
+The catalog is kept in ``catalog.json`` beside the backups and held in
+memory, so listing backups or finding the latest one never scans the
+directory. Each entry records the file name, kind (``full``, ``base``,
+``delta`` or ``pre_restore``), creation time and size; archives also carry
+their manifest and deltas the name of the base they extend.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+CATALOG_FILE = 'catalog.json'
+CATALOG_VERSION = 1
+
+def entry_time(entry: Dict[str, Any]) -> datetime:
+    """Get the creation time of a catalog entry."""
+    return datetime.fromisoformat(entry['created_at'])
+
+def select_retained(entries: List[Dict[str, Any]], daily: int, weekly: int, monthly: int) -> Set[str]:
+    """Choose the backups a grandfather-father-son policy keeps.
+
+    The newest backup of each of the ``daily`` most recent days with
+    backups is kept, likewise for the ``weekly`` most recent ISO weeks and
+    the ``monthly`` most recent months.
+
+    Args:
+        entries: Catalog entries to choose from.
+
+    Returns:
+        set: Names of the entries to keep.
+    """
+    entries = sorted(entries, key=entry_time, reverse=True)
+    periods = (
+        (lambda moment: moment.date(), daily),
+        (lambda moment: moment.isocalendar()[:2], weekly),
+        (lambda moment: (moment.year, moment.month), monthly),
+    )
+    keep = set()
+    for period_of, count in periods:
+        seen = set()
+        for entry in entries:
+            period = period_of(entry_time(entry))
+            if period in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.add(period)
+            keep.add(entry['name'])
+    return keep
+
+class BackupCatalog:
+    """In-memory index of a backup directory persisted as catalog.json."""
+
+    def __init__(self, backup_dir, scan: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None):
+        """Load the catalog.
+
+        Args:
+            backup_dir: Directory holding the backups and catalog.json.
+            scan: Called to build the entries once if the catalog file doesn't exist yet.
+        """
+        self.backup_dir = Path(backup_dir)
+        self.path = self.backup_dir / CATALOG_FILE
+        self._lock = threading.RLock()
+        self._entries: List[Dict[str, Any]] = []
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get('backups', [])
+        elif scan is not None:
+            self._entries = list(scan())
+            self._save()
+        self._sort()
+
+    def _sort(self):
+        self._entries.sort(key=entry_time, reverse=True)
+
+    def _save(self):
+        """Write the catalog atomically."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CATALOG_VERSION, 'backups': self._entries}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def add(self, entry: Dict[str, Any]):
+        """Record a new backup, replacing any entry with the same name."""
+        with self._lock:
+            self._entries = [existing for existing in self._entries if existing['name'] != entry['name']]
+            self._entries.append(entry)
+            self._sort()
+            self._save()
+
+    def remove(self, names: Iterable[str]):
+        """Forget the given backups."""
+        names = set(names)
+        with self._lock:
+            self._entries = [entry for entry in self._entries if entry['name'] not in names]
+            self._save()
+
+    def entries(self, kinds: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get the entries, newest first, optionally only of some kinds."""
+        with self._lock:
+            if kinds is None:
+                return list(self._entries)
+            kinds = set(kinds)
+            return [entry for entry in self._entries if entry['kind'] in kinds]
+
+    def latest(self, kinds: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get the newest entry, optionally only of some kinds."""
+        with self._lock:
+            if kinds is None:
+                return self._entries[0] if self._entries else None
+            kinds = set(kinds)
+            return next((entry for entry in self._entries if entry['kind'] in kinds), None)
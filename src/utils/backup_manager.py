@@ -2,69 +2,218 @@ import os
 import shutil
 import json
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import sqlite3
-import pandas as pd
-from services.database_service import DatabaseService
+import threading
+from typing import Callable, Optional
+from database import change_journal, schema
+from database.db_manager import DatabaseManager, get_repository
+from utils import backup_archive
+from utils.backup_catalog import BackupCatalog, entry_time, select_retained
+from utils.csv_exporter import CsvExporter
+
+CHAIN_STATE_FILE = 'incremental.json'
 
 class BackupManager:
-    """Manages database backups."""
-    
-    def __init__(self, db_service: DatabaseService = None):
-        """Initialize backup manager with optional database service."""
-        self.db_service = db_service or DatabaseService()
-        
-        # Get AppData/Roaming path
-        app_data = os.getenv('APPDATA')
-        if not app_data:
-            raise ValueError("Could not get APPDATA directory")
-        
-        # Create backups directory in AppData/DailyRegister/backups
-        self.backup_dir = Path(app_data) / 'DailyRegister' / 'backups'
+    """Manages database backups.
+
+    Backups are written as compressed archives carrying a manifest (see
+    utils.backup_archive); a destination ending in ``.db`` gets a plain
+    database copy instead. Besides full backups, the manager keeps
+    incremental chains: a full base backup followed by delta files holding
+    only the transactions changed since the previous backup. A new base is
+    taken every ``full_backup_interval_days`` days.
+
+    Backups in the backup directory are recorded in a BackupCatalog and
+    pruned in the background with a grandfather-father-son policy.
+    """
+
+    full_backup_interval_days = 7
+    # xz preset for archives; higher compresses better but is much slower
+    compression_preset = 3
+
+    # Retention: everything from the last keep_recent_hours, plus the newest
+    # backup of each of the last keep_daily days, keep_weekly weeks and keep_monthly months
+    keep_recent_hours = 24
+    keep_daily = 7
+    keep_weekly = 4
+    keep_monthly = 12
+    auto_prune = True
+
+    def __init__(self, db: DatabaseManager = None):
+        """Initialize backup manager with optional database manager."""
+        self.db = db or get_repository()
+
+        # Create backups directory next to the database (AppData/DailyRegister/backups)
+        self.backup_dir = Path(self.db.db_path).parent / 'backups'
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         print(f"[BackupManager] Using backup directory: {self.backup_dir}")
 
+        self.catalog = BackupCatalog(self.backup_dir, scan=self._scan_backup_dir)
+        # Held for every read-modify-write of the incremental chain state
+        self._chain_lock = threading.RLock()
+        self._prune_thread = None
+
     def ensure_backup_dir(self):
         """Create backup directory if it doesn't exist"""
         if not os.path.exists(self.backup_dir):
             os.makedirs(self.backup_dir)
 
-    def create_backup(self):
-        """Create a backup of the current database."""
+    def create_backup(self, backup_path=None, progress: Optional[Callable[[int, int], None]] = None,
+                      pages: int = 1024, kind: str = 'full'):
+        """Create a backup of the current database.
+
+        The copy is taken with SQLite's online backup API from a separate
+        connection that holds one read snapshot for the whole run, so the
+        backup is consistent and writes on the shared connection carry on
+        while it runs. The copy is written to a temporary file, checked with
+        ``PRAGMA integrity_check`` and then compressed (or, for a ``.db``
+        destination, moved) into place.
+
+        Args:
+            backup_path: Optional destination. Defaults to a timestamped archive in the backup directory.
+            progress: Optional callback receiving (copied_pages, total_pages) after each step.
+            pages: Number of pages copied per step.
+            kind: Catalog kind recorded for backups written to the backup directory.
+        """
         try:
-            # Generate backup filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_filename = f"db_backup_{timestamp}.db"
-            backup_path = self.backup_dir / backup_filename
-
-            # Copy the current database file to backup location
-            shutil.copy2(self.db_service.db_file, backup_path)
-            
+            if backup_path is None:
+                # Generate backup filename with timestamp
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                backup_filename = f"db_backup_{timestamp}{backup_archive.ARCHIVE_SUFFIX}"
+                backup_path = self.backup_dir / backup_filename
+
+            temp_path = f"{backup_path}.snapshot"
+            try:
+                self._snapshot(temp_path, progress, pages)
+                if backup_archive.is_archive(backup_path):
+                    manifest = backup_archive.build_manifest(temp_path)
+                    backup_archive.write_archive(temp_path, backup_path, manifest, self.compression_preset)
+                else:
+                    os.replace(temp_path, backup_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
             print(f"[BackupManager] Created backup at: {backup_path}")
+            if Path(backup_path).resolve().parent == self.backup_dir.resolve():
+                self._register(Path(backup_path), kind)
+                if self.auto_prune:
+                    self.prune_in_background()
             return str(backup_path)
 
         except Exception as e:
             print(f"[BackupManager] Error creating backup: {e}")
             raise
 
+    def _snapshot(self, temp_path, progress=None, pages: int = 1024):
+        """Copy the live database to temp_path with the online backup API and verify it."""
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        def report(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+
+        source = sqlite3.connect(self.db.db_path)
+        target = sqlite3.connect(temp_path)
+        try:
+            # Pin one snapshot; in WAL mode this doesn't block writers
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(target, pages=pages, progress=report)
+            source.rollback()
+            # Make the copy a single self-contained file
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+            source.close()
+
+        if not self._check_integrity(temp_path):
+            raise sqlite3.DatabaseError("Backup failed the integrity check")
+
+    def _check_integrity(self, db_file) -> bool:
+        """Run PRAGMA integrity_check on a database file."""
+        try:
+            conn = sqlite3.connect(f"file:{Path(db_file).as_posix()}?mode=ro", uri=True)
+            try:
+                result = conn.execute('PRAGMA integrity_check').fetchall()
+            finally:
+                conn.close()
+            if result != [('ok',)]:
+                print(f"[BackupManager] Integrity check failed for {db_file}: {result[:5]}")
+                return False
+            return True
+        except sqlite3.Error as e:
+            print(f"[BackupManager] Could not verify {db_file}: {e}")
+            return False
+
+    def _user_version(self, db_file) -> int:
+        """Get the schema version recorded in a database file."""
+        conn = sqlite3.connect(f"file:{Path(db_file).as_posix()}?mode=ro", uri=True)
+        try:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            conn.close()
+
+    def _materialize(self, backup_path, dest_path):
+        """Write the database held by a backup (archive or plain copy) to dest_path."""
+        if backup_archive.is_archive(backup_path):
+            backup_archive.extract_database(backup_path, dest_path)
+        else:
+            shutil.copyfile(backup_path, dest_path)
+
+    def verify_backup(self, backup_path) -> bool:
+        """Check a backup's checksum (for archives) and run PRAGMA integrity_check on it."""
+        if not backup_archive.is_archive(backup_path):
+            return self._check_integrity(backup_path)
+        temp_path = self.backup_dir / f"verify_{os.getpid()}.db"
+        try:
+            self._materialize(backup_path, temp_path)
+            return self._check_integrity(temp_path)
+        except (backup_archive.BackupArchiveError, OSError, EOFError) as e:
+            print(f"[BackupManager] Could not verify {backup_path}: {e}")
+            return False
+        finally:
+            if temp_path.exists():
+                os.remove(temp_path)
+
     def restore_backup(self, backup_path):
-        """Restore database from a backup file."""
+        """Restore database from a backup file while the application keeps running.
+
+        The backup is decompressed (or copied) into a temporary file next to
+        the database and validated with ``PRAGMA quick_check`` and its schema
+        version. Every repository on the database is then quiesced, the file
+        is swapped in with an atomic rename and the repositories reconnect;
+        their reset listeners drop the caches built from the old data.
+        """
         try:
             if not os.path.exists(backup_path):
                 raise FileNotFoundError("Backup file not found")
 
-            # Create a backup of current database before restoring
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            pre_restore_backup = self.backup_dir / f"pre_restore_backup_{timestamp}.db"
-            shutil.copy2(self.db_service.db_file, pre_restore_backup)
-
-            # Restore the backup
-            shutil.copy2(backup_path, self.db_service.db_file)
-            
-            # Reload the database
-            self.db_service.init_db()
-            
+            temp_path = f"{self.db.db_path}.restore"
+            try:
+                self._materialize(backup_path, temp_path)
+                if not self._quick_check(temp_path):
+                    raise sqlite3.DatabaseError("Backup failed the integrity check")
+                if self._user_version(temp_path) > schema.SCHEMA_VERSION:
+                    raise ValueError("Backup was written by a newer version of the application")
+
+                # Create a backup of current database before restoring
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                pre_restore_backup = self.backup_dir / f"pre_restore_backup_{timestamp}{backup_archive.ARCHIVE_SUFFIX}"
+                self.create_backup(pre_restore_backup, kind='pre_restore')
+
+                # Swap the file under every open connection; older layouts are migrated on reconnect
+                self.db.replace_database(temp_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            # The restored change_log no longer continues the current chain
+            self._close_chain()
+
             print(f"[BackupManager] Restored backup from: {backup_path}")
             return True
 
@@ -72,44 +221,329 @@ class BackupManager:
             print(f"[BackupManager] Error restoring backup: {e}")
             raise
 
-    def export_to_csv(self, start_date=None, end_date=None):
-        """Export database contents to CSV files"""
-        conn = sqlite3.connect(self.db_service.db_file)
-        
-        # Export transactions
-        query = "SELECT * FROM transactions"
-        if start_date and end_date:
-            query += f" WHERE date BETWEEN '{start_date}' AND '{end_date}'"
-        
-        df = pd.read_sql_query(query, conn)
-        csv_path = os.path.join(self.backup_dir, f'transactions_{datetime.now().strftime("%Y%m%d")}.csv')
-        df.to_csv(csv_path, index=False)
-        
-        conn.close()
+    def _quick_check(self, db_file) -> bool:
+        """Run PRAGMA quick_check on a database file."""
+        try:
+            conn = sqlite3.connect(f"file:{Path(db_file).as_posix()}?mode=ro", uri=True)
+            try:
+                return conn.execute('PRAGMA quick_check').fetchall() == [('ok',)]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[BackupManager] Could not check {db_file}: {e}")
+            return False
+
+    def _register(self, path: Path, kind: str, base: Optional[str] = None, created_at: Optional[str] = None):
+        """Record a backup file in the catalog."""
+        manifest = backup_archive.read_manifest(path) if backup_archive.is_archive(path) else None
+        if created_at is None:
+            created_at = manifest['created_at'] if manifest else datetime.now().isoformat(sep=' ', timespec='seconds')
+        entry = {
+            'name': path.name,
+            'kind': kind,
+            'created_at': created_at,
+            'size': path.stat().st_size,
+            'manifest': manifest
+        }
+        if base:
+            entry['base'] = base
+        self.catalog.add(entry)
+
+    def _scan_backup_dir(self):
+        """Build catalog entries from the files in the backup directory.
+
+        Only used once, when a backup directory has no catalog yet.
+        """
+        bases = {}
+        for chain in self._load_chain_state()['chains']:
+            for delta in chain['deltas']:
+                bases[delta['path']] = chain['base']
+
+        entries = []
+        for file in self.backup_dir.iterdir():
+            name = file.name
+            if name.startswith('db_delta_') and name.endswith('.jsonl.gz'):
+                kind = 'delta'
+            elif name.startswith('db_base_'):
+                kind = 'base'
+            elif name.startswith('pre_restore_backup_'):
+                kind = 'pre_restore'
+            elif name.startswith('db_backup_'):
+                kind = 'full'
+            else:
+                continue
+            if not (backup_archive.is_archive(name) or name.endswith('.db') or kind == 'delta'):
+                continue
+
+            manifest = None
+            try:
+                if kind == 'delta':
+                    created_at = change_journal.read_header(file)['created_at']
+                elif backup_archive.is_archive(name):
+                    manifest = backup_archive.read_manifest(file)
+                    created_at = manifest['created_at']
+                else:
+                    created_at = datetime.fromtimestamp(file.stat().st_mtime).isoformat(sep=' ', timespec='seconds')
+            except (backup_archive.BackupArchiveError, OSError, EOFError, ValueError) as e:
+                print(f"[BackupManager] Skipping unreadable backup {file}: {e}")
+                continue
+
+            entry = {
+                'name': name,
+                'kind': kind,
+                'created_at': created_at,
+                'size': file.stat().st_size,
+                'manifest': manifest
+            }
+            if kind == 'delta' and name in bases:
+                entry['base'] = bases[name]
+            entries.append(entry)
+        return entries
+
+    def prune_backups(self):
+        """Delete backups the retention policy no longer keeps.
+
+        The active incremental chain is always kept; a delta is kept as long
+        as its base is.
+
+        Returns:
+            list: Names of the deleted backups.
+        """
+        with self._chain_lock:
+            state = self._load_chain_state()
+            active_base = state['chains'][-1]['base'] if state['chains'] else None
+
+            candidates = self.catalog.entries(('full', 'base', 'pre_restore'))
+            cutoff = datetime.now() - timedelta(hours=self.keep_recent_hours)
+            keep = select_retained(candidates, self.keep_daily, self.keep_weekly, self.keep_monthly)
+            keep.update(entry['name'] for entry in candidates if entry_time(entry) >= cutoff)
+            if active_base:
+                keep.add(active_base)
+
+            doomed = {entry['name'] for entry in candidates if entry['name'] not in keep}
+            doomed.update(
+                entry['name'] for entry in self.catalog.entries(('delta',))
+                if entry.get('base') in doomed
+            )
+            if not doomed:
+                return []
+
+            for name in doomed:
+                try:
+                    (self.backup_dir / name).unlink(missing_ok=True)
+                except OSError as e:
+                    print(f"[BackupManager] Could not remove backup {name}: {e}")
+            self.catalog.remove(doomed)
+
+            remaining = [chain for chain in state['chains'] if chain['base'] not in doomed]
+            if len(remaining) != len(state['chains']):
+                state['chains'] = remaining
+                self._save_chain_state(state)
+
+            print(f"[BackupManager] Pruned {len(doomed)} old backups")
+            return sorted(doomed)
+
+    def prune_in_background(self):
+        """Run prune_backups on a background thread unless one is already running.
+
+        Returns:
+            threading.Thread: The pruning thread.
+        """
+        if self._prune_thread is not None and self._prune_thread.is_alive():
+            return self._prune_thread
+
+        def run():
+            try:
+                self.prune_backups()
+            except Exception as e:
+                print(f"[BackupManager] Error pruning backups: {e}")
+
+        self._prune_thread = threading.Thread(target=run, name='backup-prune', daemon=True)
+        self._prune_thread.start()
+        return self._prune_thread
+
+    def _load_chain_state(self):
+        """Load the incremental chain state from the backup directory."""
+        state_path = self.backup_dir / CHAIN_STATE_FILE
+        if not state_path.exists():
+            return {'chains': []}
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_chain_state(self, state):
+        """Write the incremental chain state atomically."""
+        state_path = self.backup_dir / CHAIN_STATE_FILE
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, state_path)
+
+    def _close_chain(self):
+        """Make the next incremental backup start a new base."""
+        with self._chain_lock:
+            state = self._load_chain_state()
+            if state['chains']:
+                state['chains'][-1]['closed'] = True
+                self._save_chain_state(state)
+
+    def _live_seq(self) -> int:
+        """Get the newest change_log sequence number of the live database."""
+        rows = self.db.query("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+        return rows[0][0] if rows else 0
+
+    def create_incremental_backup(self, progress: Optional[Callable[[int, int], None]] = None,
+                                  pages: int = 1024):
+        """Back up the changes since the last backup, starting a new base when due.
+
+        Args:
+            progress: Optional callback passed to create_backup when a base is taken.
+            pages: Pages per step passed to create_backup when a base is taken.
+
+        Returns:
+            str: Path of the new base or delta file, or None if nothing changed.
+        """
+        try:
+            # A prune started meanwhile (e.g. by the base backup) waits for the new chain
+            with self._chain_lock:
+                state = self._load_chain_state()
+                chain = state['chains'][-1] if state['chains'] else None
+                now = datetime.now()
+                if (
+                    chain is None
+                    or chain.get('closed')
+                    or (now - datetime.fromisoformat(chain['created_at'])).days >= self.full_backup_interval_days
+                ):
+                    return self._create_base(state, progress, pages)
+
+                since_seq = chain['deltas'][-1]['to_seq'] if chain['deltas'] else chain['seq']
+                if self._live_seq() < since_seq:
+                    # The database was replaced outside the chain
+                    return self._create_base(state, progress, pages)
+
+                delta_path = self.backup_dir / f"db_delta_{now.strftime('%Y%m%d_%H%M%S_%f')}.jsonl.gz"
+                conn = sqlite3.connect(self.db.db_path)
+                try:
+                    header = change_journal.write_delta(conn, str(delta_path), since_seq)
+                finally:
+                    conn.close()
+                if header is None:
+                    return None
+
+                chain['deltas'].append({
+                    'path': delta_path.name,
+                    'created_at': header['created_at'],
+                    'from_seq': header['from_seq'],
+                    'to_seq': header['to_seq'],
+                    'count': header['count']
+                })
+                self._save_chain_state(state)
+                self._register(delta_path, 'delta', base=chain['base'], created_at=header['created_at'])
+                print(f"[BackupManager] Wrote {header['count']} changed transactions to: {delta_path}")
+                return str(delta_path)
+
+        except Exception as e:
+            print(f"[BackupManager] Error creating incremental backup: {e}")
+            raise
+
+    def _create_base(self, state, progress=None, pages: int = 1024):
+        """Take a full base backup and start a new chain with it; called with _chain_lock held."""
+        created_at = datetime.now()
+        base_path = self.backup_dir / (
+            f"db_base_{created_at.strftime('%Y%m%d_%H%M%S_%f')}{backup_archive.ARCHIVE_SUFFIX}"
+        )
+        self.create_backup(base_path, progress=progress, pages=pages, kind='base')
+        # From this base's own manifest; the catalog may order a same-second older base first
+        seq = backup_archive.read_manifest(base_path)['change_log_seq']
+
+        state['chains'].append({
+            'base': base_path.name,
+            'created_at': created_at.isoformat(sep=' ', timespec='seconds'),
+            'seq': seq,
+            'deltas': []
+        })
+        self._save_chain_state(state)
+        # Changes up to the base are in the base; the journal only needs what follows
+        self.db.prune_change_log(seq)
+        return str(base_path)
+
+    def restore_point_in_time(self, point_in_time):
+        """Restore the database as of the last backup taken at or before point_in_time.
+
+        The chain's base is copied to a temporary file, its deltas up to the
+        given time are replayed onto it, and the result is restored.
+
+        Args:
+            point_in_time: A datetime or ISO 'YYYY-MM-DD HH:MM:SS' string.
+        """
+        try:
+            if not isinstance(point_in_time, datetime):
+                point_in_time = datetime.fromisoformat(str(point_in_time))
+
+            chains = [
+                chain for chain in self._load_chain_state()['chains']
+                if datetime.fromisoformat(chain['created_at']) <= point_in_time
+            ]
+            if not chains:
+                raise FileNotFoundError(f"No incremental backup found before {point_in_time}")
+            chain = chains[-1]
+
+            temp_path = self.backup_dir / 'point_in_time_restore.db'
+            self._materialize(self.backup_dir / chain['base'], temp_path)
+            try:
+                conn = sqlite3.connect(temp_path)
+                try:
+                    for delta in chain['deltas']:
+                        if datetime.fromisoformat(delta['created_at']) > point_in_time:
+                            break
+                        change_journal.apply_delta(conn, str(self.backup_dir / delta['path']))
+                finally:
+                    conn.close()
+                return self.restore_backup(temp_path)
+            finally:
+                if temp_path.exists():
+                    os.remove(temp_path)
+
+        except Exception as e:
+            print(f"[BackupManager] Error restoring point in time: {e}")
+            raise
+
+    def export_to_csv(self, start_date=None, end_date=None, layout='transactions', compress=False):
+        """Export a CSV layout of the register to the backup directory.
+
+        Args:
+            start_date: First date to export; all dates if omitted.
+            end_date: Last date to export (inclusive).
+            layout: 'transactions', 'items' or 'old_items'.
+            compress: Write a .csv.gz file.
+
+        Returns:
+            str: Path of the CSV file.
+        """
+        suffix = '.csv.gz' if compress else '.csv'
+        csv_path = os.path.join(self.backup_dir, f'{layout}_{datetime.now().strftime("%Y%m%d")}{suffix}')
+        CsvExporter(self.db).export(csv_path, start_date, end_date, layout=layout, compress=compress)
         return csv_path
 
     def list_backups(self):
-        """List all available backup files."""
+        """List all restorable backups in the backup directory, newest first."""
         try:
-            backups = []
-            for file in self.backup_dir.glob('db_backup_*.db'):
-                backups.append({
-                    'path': str(file),
-                    'timestamp': datetime.strptime(
-                        file.stem.replace('db_backup_', ''),
-                        '%Y%m%d_%H%M%S'
-                    )
-                })
-            return sorted(backups, key=lambda x: x['timestamp'], reverse=True)
+            return [
+                {
+                    'path': str(self.backup_dir / entry['name']),
+                    'timestamp': entry_time(entry),
+                    'kind': entry['kind'],
+                    'manifest': entry['manifest']
+                }
+                for entry in self.catalog.entries(('full', 'base', 'pre_restore'))
+            ]
 
         except Exception as e:
             print(f"[BackupManager] Error listing backups: {e}")
             raise
 
     def auto_backup(self):
-        """Create automatic backup if needed"""
-        # Check if we need to create a backup (e.g., daily)
-        latest_backups = self.list_backups()
-        if not latest_backups or (datetime.now() - latest_backups[0]['timestamp']).days >= 1:
-            return self.create_backup()
-        return None 
\ No newline at end of file
+        """Create an incremental backup if the last backup is a day old"""
+        latest = self.catalog.latest(('full', 'base', 'delta'))
+        if latest and (datetime.now() - entry_time(latest)).days < 1:
+            return None
+        return self.create_incremental_backup()
@@ -0,0 +1,173 @@
+"""Background scheduler for automatic backups."""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as day_time, timedelta
+from typing import Optional
+
+from utils.backup_catalog import entry_time
+
+class BackupScheduler:
+    """Takes incremental backups on a worker thread.
+
+    A backup is due when the cadence interval has passed since the last
+    run, when the counter has been idle (no slip entry) for a while after
+    some activity, or once a day at closing time. A due backup is skipped if
+    ``PRAGMA data_version`` shows no commit since the previous one. The copy
+    sleeps between backup steps so it doesn't starve the counter of disk I/O.
+    """
+
+    def __init__(self, backup_manager, interval_minutes: int = 120, idle_minutes: int = 10,
+                 day_close: Optional[day_time] = day_time(21, 0), throttle_seconds: float = 0.05,
+                 pages_per_step: int = 256, poll_seconds: float = 30.0):
+        """Initialize the scheduler.
+
+        Args:
+            backup_manager: BackupManager used to take the backups.
+            interval_minutes: Longest time between two backups while the app runs.
+            idle_minutes: Minutes without slip entry after which pending changes are backed up.
+            day_close: Time of day at which the day's final backup is taken, or None.
+            throttle_seconds: Pause after each backup step.
+            pages_per_step: Database pages copied per backup step.
+            poll_seconds: How often the schedule is checked.
+        """
+        self.backup_manager = backup_manager
+        self.interval = timedelta(minutes=interval_minutes)
+        self.idle = timedelta(minutes=idle_minutes)
+        self.day_close = day_close
+        self.throttle_seconds = throttle_seconds
+        self.pages_per_step = pages_per_step
+        self.poll_seconds = poll_seconds
+
+        latest = backup_manager.catalog.latest(('full', 'base', 'delta'))
+        self.last_run_at: Optional[datetime] = entry_time(latest) if latest else None
+        self.last_result: Optional[str] = None
+        self._last_data_version: Optional[int] = None
+        self._last_activity: Optional[datetime] = None
+        self._day_closed_on = None
+        self._requested: Optional[str] = None
+
+        self._monitor: Optional[sqlite3.Connection] = None
+        # Held while a backup runs; a swap of the database file waits for it
+        self._backup_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        backup_manager.db.add_swap_guard(self._paused)
+        backup_manager.db.add_reset_listener(self._on_database_reset)
+
+    @contextmanager
+    def _paused(self):
+        """Let a running backup finish and close the monitor while the database file is swapped."""
+        with self._backup_lock:
+            self._close_monitor()
+            yield
+
+    def _close_monitor(self):
+        """Close the monitor connection; it is reopened lazily on the next check."""
+        if self._monitor is not None:
+            monitor, self._monitor = self._monitor, None
+            monitor.close()
+
+    def _on_database_reset(self):
+        """Watch the new file after a restore and back it up at the next check."""
+        self._last_data_version = None
+        self._close_monitor()
+
+    def start(self):
+        """Start the scheduler thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='backup-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the scheduler thread and wait for a running backup to finish."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify_activity(self):
+        """Record slip entry activity at the counter."""
+        self._last_activity = datetime.now()
+
+    def request_backup(self, reason: str = 'manual'):
+        """Ask for a backup at the next check, e.g. when the day is closed."""
+        self._requested = reason
+        self._wake.set()
+
+    def _data_version(self) -> int:
+        """Get data_version from the scheduler's own connection.
+
+        data_version only changes for commits made by other connections, so
+        the scheduler watches the file through a connection it doesn't write with.
+        """
+        if self._monitor is None:
+            self._monitor = sqlite3.connect(self.backup_manager.db.db_path, check_same_thread=False)
+        return self._monitor.execute('PRAGMA data_version').fetchone()[0]
+
+    def due_reason(self, now: Optional[datetime] = None) -> Optional[str]:
+        """Get why a backup is due now, or None."""
+        now = now or datetime.now()
+        if self._requested:
+            return self._requested
+        if self.day_close is not None and self._day_closed_on != now.date() and now.time() >= self.day_close:
+            return 'day_close'
+        if (
+            self._last_activity is not None
+            and (self.last_run_at is None or self._last_activity > self.last_run_at)
+            and now - self._last_activity >= self.idle
+        ):
+            return 'idle'
+        if self.last_run_at is None or now - self.last_run_at >= self.interval:
+            return 'cadence'
+        return None
+
+    def run_pending(self, now: Optional[datetime] = None) -> Optional[str]:
+        """Take a backup if one is due and the database changed.
+
+        Returns:
+            str: Path of the new backup, or None if none was written.
+        """
+        now = now or datetime.now()
+        reason = self.due_reason(now)
+        if reason is None:
+            return None
+        self._requested = None
+        if reason == 'day_close':
+            self._day_closed_on = now.date()
+
+        def throttle(copied, total):
+            if self.throttle_seconds and not self._stop.is_set():
+                time.sleep(self.throttle_seconds)
+
+        with self._backup_lock:
+            version = self._data_version()
+            self.last_run_at = now
+            if version == self._last_data_version:
+                print(f"[BackupScheduler] Skipping {reason} backup: no changes")
+                return None
+
+            self.last_result = self.backup_manager.create_incremental_backup(
+                progress=throttle, pages=self.pages_per_step
+            )
+            self._last_data_version = version
+        print(f"[BackupScheduler] {reason} backup: {self.last_result or 'nothing new'}")
+        return self.last_result
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    print(f"[BackupScheduler] Error running backup: {e}")
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+        finally:
+            with self._backup_lock:
+                self._close_monitor()
@@ -0,0 +1,108 @@
+"""CSV export of the register using the standard library csv module."""
+import csv
+import gzip
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from database.db_manager import DatabaseManager, get_repository
+from utils.date_ranges import day_bounds
+
+# layout name -> (header, query); each query takes the range WHERE clause
+LAYOUTS = {
+    'transactions': (
+        ["id", "date", "timestamp", "total_amount", "net_amount_paid",
+         "cash_amount", "card_amount", "upi_amount", "comments"],
+        '''
+        SELECT t.id, t.date, t.timestamp, t.total_amount, t.net_amount_paid,
+               t.cash_amount, t.card_amount, t.upi_amount, t.comments
+        FROM transactions t
+        {where}
+        ORDER BY t.date, t.id
+        '''
+    ),
+    'items': (
+        ["transaction_id", "date", "timestamp", "code", "name", "type", "weight", "amount",
+         "is_billable", "net_amount_paid", "cash_amount", "card_amount", "upi_amount"],
+        '''
+        SELECT t.id, t.date, t.timestamp, i.code, i.name, i.type, i.weight, i.amount,
+               i.is_billable, t.net_amount_paid, t.cash_amount, t.card_amount, t.upi_amount
+        FROM transactions t
+        JOIN items i ON i.transaction_id = t.id
+        {where}
+        ORDER BY t.date, t.id, i.id
+        '''
+    ),
+    'old_items': (
+        ["transaction_id", "date", "timestamp", "type", "weight", "amount"],
+        '''
+        SELECT t.id, t.date, t.timestamp, o.type, o.weight, o.amount
+        FROM transactions t
+        JOIN old_items o ON o.transaction_id = t.id
+        {where}
+        ORDER BY t.date, t.id, o.id
+        '''
+    ),
+}
+
+class CsvExporter:
+    """Streams transactions, items or old items of the register to CSV.
+
+    Rows are read in batches from a read-only connection of the exporter's
+    own and written as they arrive, so the export never holds the whole
+    table in memory or the shared connection's lock.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, batch_size: int = 1000):
+        self.db = db or get_repository()
+        self.batch_size = batch_size
+
+    def export(self, path, start_date=None, end_date=None, layout: str = 'transactions',
+               compress: Optional[bool] = None) -> int:
+        """Export a layout to a CSV file.
+
+        Args:
+            path: Destination file.
+            start_date: First date to export; all dates if omitted.
+            end_date: Last date to export (inclusive); defaults to start_date.
+            layout: One of 'transactions', 'items' (one row per item with its
+                transaction's fields) or 'old_items'.
+            compress: Write gzip. Defaults to whether path ends with '.gz'.
+
+        Returns:
+            int: Number of data rows written.
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown CSV layout: {layout}")
+        header, query = LAYOUTS[layout]
+
+        where, params = '', ()
+        if start_date is not None:
+            where = 'WHERE t.date >= ? AND t.date < ?'
+            params = day_bounds(start_date, end_date)
+
+        if compress is None:
+            compress = str(path).endswith('.gz')
+        opener = gzip.open if compress else open
+
+        conn = sqlite3.connect(f"file:{Path(self.db.db_path).as_posix()}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute(query.format(where=where), params)
+            rows_written = 0
+            with opener(path, 'wt', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    rows_written += len(rows)
+        except Exception as e:
+            print(f"[CsvExporter] Error exporting {layout}: {e}")
+            raise
+        finally:
+            conn.close()
+
+        print(f"[CsvExporter] Exported {rows_written} {layout} rows to: {path}")
+        return rows_written
@@ -0,0 +1,34 @@
+"""Date range helpers for building index-friendly SQL predicates."""
+from datetime import date, datetime, timedelta
+from typing import Tuple, Union
+
+DateLike = Union[date, datetime, str]
+
+def to_date(value: DateLike) -> date:
+    """Convert a date, datetime or 'YYYY-MM-DD' string to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def day_bounds(start: DateLike, end: DateLike = None) -> Tuple[str, str]:
+    """Get half-open ISO bounds [start, end + 1 day) for an inclusive date range.
+
+    Comparing an ISO timestamp column with these bounds
+    (``timestamp >= ? AND timestamp < ?``) lets SQLite seek an index on the
+    column instead of evaluating ``date(timestamp)`` for every row.
+    """
+    start_day = to_date(start)
+    end_day = to_date(end) if end is not None else start_day
+    return start_day.isoformat(), (end_day + timedelta(days=1)).isoformat()
+
+def month_bounds(year: int, month: int) -> Tuple[str, str]:
+    """Get half-open ISO bounds [first of month, first of next month)."""
+    first = date(year, month, 1)
+    next_first = date(year + month // 12, month % 12 + 1, 1)
+    return first.isoformat(), next_first.isoformat()
+
+def is_closed_period(end: DateLike) -> bool:
+    """Check whether a period ending on ``end`` (inclusive) lies wholly in the past."""
+    return to_date(end) < date.today()
@@ -1,82 +1,214 @@
-import pandas as pd
+import sqlite3
+from datetime import datetime
 from pathlib import Path
-from typing import List
-from models.transaction import Transaction
+from typing import Optional
+
+from database.db_manager import DatabaseManager, get_repository
+from utils.date_ranges import day_bounds, to_date
+
+# (header, style, width) per column; style names refer to the NamedStyles below
+TRANSACTION_COLUMNS = [
+    ("ID", None, 8), ("Date", 'date', 12), ("Time", None, 10), ("Total Amount", 'amount', 14),
+    ("Net Paid", 'amount', 14), ("Cash", 'amount', 12), ("Card", 'amount', 12), ("UPI", 'amount', 12),
+    ("Comments", None, 40),
+]
+ITEM_COLUMNS = [
+    ("Transaction ID", None, 14), ("Date", 'date', 12), ("Code", None, 10), ("Item Name", None, 24),
+    ("Type", None, 8), ("Billable", None, 9), ("Weight (gm)", 'weight', 12), ("Amount", 'amount', 14),
+]
+OLD_ITEM_COLUMNS = [
+    ("Transaction ID", None, 14), ("Date", 'date', 12), ("Type", None, 8),
+    ("Weight (gm)", 'weight', 12), ("Amount", 'amount', 14),
+]
+
+NUMBER_FORMATS = {
+    'amount': "₹#,##0.00",
+    'weight': "0.000",
+    'date': "yyyy-mm-dd",
+}
 
 class ExcelExporter:
+    """Exports a date range of the register to an .xlsx workbook.
+
+    Rows are streamed from the database into an openpyxl write-only
+    workbook, so memory use doesn't grow with the size of the range. Styles
+    are registered once per column type, and the summary sheet is computed
+    from the rollup tables with SQL aggregates.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, export_dir="exports"):
+        self.db = db or get_repository()
+        self.export_dir = Path(export_dir)
+
+    def export_range(self, start_date, end_date, filename=None) -> str:
+        """Export the transactions, items and old items of a date range (inclusive).
+
+        Args:
+            start_date: First date of the range.
+            end_date: Last date of the range.
+            filename: Optional destination. Defaults to exports/jewelry_sales_<start>_to_<end>.xlsx.
+
+        Returns:
+            str: Path of the workbook.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, NamedStyle
+
+        start, end_exclusive = day_bounds(start_date, end_date)
+        if filename is None:
+            self.export_dir.mkdir(parents=True, exist_ok=True)
+            filename = self.export_dir / (
+                f"jewelry_sales_{to_date(start_date).isoformat()}_to_{to_date(end_date).isoformat()}.xlsx"
+            )
+
+        workbook = Workbook(write_only=True)
+        for name, number_format in NUMBER_FORMATS.items():
+            workbook.add_named_style(NamedStyle(name=name, number_format=number_format))
+        bold = Font(bold=True)
+
+        # One read snapshot for every sheet, on a connection of our own so the
+        # export doesn't hold the shared connection while it writes the file
+        conn = sqlite3.connect(f"file:{Path(self.db.db_path).as_posix()}?mode=ro", uri=True)
+        try:
+            cursor = conn.cursor()
+            cursor.arraysize = 1000
+            cursor.execute('BEGIN')
+
+            summary_sheet = workbook.create_sheet("Summary")
+            self._write_summary(summary_sheet, cursor, start, end_exclusive, bold, WriteOnlyCell)
+
+            cursor.execute('''
+                SELECT id, date, substr(timestamp, 12, 8), total_amount, net_amount_paid,
+                       cash_amount, card_amount, upi_amount, comments
+                FROM transactions
+                WHERE date >= ? AND date < ?
+                ORDER BY date, id
+            ''', (start, end_exclusive))
+            self._write_rows(workbook.create_sheet("Transactions"), TRANSACTION_COLUMNS, cursor, bold, WriteOnlyCell)
+
+            cursor.execute('''
+                SELECT t.id, t.date, i.code, i.name, i.type,
+                       CASE WHEN i.is_billable THEN 'Yes' ELSE 'No' END, i.weight, i.amount
+                FROM transactions t
+                JOIN items i ON i.transaction_id = t.id
+                WHERE t.date >= ? AND t.date < ?
+                ORDER BY t.date, t.id, i.id
+            ''', (start, end_exclusive))
+            self._write_rows(workbook.create_sheet("Items"), ITEM_COLUMNS, cursor, bold, WriteOnlyCell)
+
+            cursor.execute('''
+                SELECT t.id, t.date, o.type, o.weight, o.amount
+                FROM transactions t
+                JOIN old_items o ON o.transaction_id = t.id
+                WHERE t.date >= ? AND t.date < ?
+                ORDER BY t.date, t.id, o.id
+            ''', (start, end_exclusive))
+            self._write_rows(workbook.create_sheet("Old Items"), OLD_ITEM_COLUMNS, cursor, bold, WriteOnlyCell)
+        finally:
+            conn.close()
+
+        workbook.save(filename)
+        print(f"[ExcelExporter] Exported {start} to {end_exclusive} (exclusive) to: {filename}")
+        return str(filename)
+
+    @staticmethod
+    def _write_rows(sheet, columns, cursor, bold, cell_type):
+        """Stream query rows into a write-only sheet with per-column styles."""
+        for index, (_, _, width) in enumerate(columns):
+            sheet.column_dimensions[chr(ord('A') + index)].width = width
+        sheet.freeze_panes = 'A2'
+
+        header = []
+        for title, _, _ in columns:
+            cell = cell_type(sheet, value=title)
+            cell.font = bold
+            header.append(cell)
+        sheet.append(header)
+
+        styles = [style for _, style, _ in columns]
+        date_index = next((i for i, style in enumerate(styles) if style == 'date'), None)
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                values = list(row)
+                if date_index is not None and values[date_index]:
+                    values[date_index] = datetime.strptime(values[date_index], '%Y-%m-%d')
+                out = []
+                for value, style in zip(values, styles):
+                    if style is None:
+                        out.append(value)
+                    else:
+                        cell = cell_type(sheet, value=value)
+                        cell.style = style
+                        out.append(cell)
+                sheet.append(out)
+
     @staticmethod
-    def export_transactions(transactions: List[Transaction], date: str) -> str:
-        # Create export directory if it doesn't exist
-        export_dir = Path("exports")
-        export_dir.mkdir(exist_ok=True)
-        
-        # Create filename
-        filename = export_dir / f"jewelry_sales_{date}.xlsx"
-        
-        # Convert transactions to DataFrame
-        data = []
-        for transaction in transactions:
-            values = [
-                transaction.id,
-                transaction.item_name,
-                transaction.item_type,
-                "Yes" if transaction.is_billable else "No",
-                transaction.weight,
-                transaction.total_amount,
-                transaction.net_amount_paid,
-                transaction.old_item_returned,
-                transaction.old_item_weight,
-                transaction.old_item_amount,
-                transaction.payment_mode,
-                transaction.comments
-            ]
-            data.append(values)
-        
-        # Create DataFrame
-        columns = ["ID", "Item Name", "Type", "Billable", "Weight (gm)", 
-                  "Total Amount", "Net Paid", "Old Item", "Old Item Weight", 
-                  "Old Item Amount", "Payment", "Comments"]
-        df = pd.DataFrame(data, columns=columns)
-        
-        # Calculate summary
-        summary = {
-            "Item Name": "TOTAL",
-            "Weight (gm)": df[df["Type"] == "Gold"]["Weight (gm)"].sum(),
-            "Total Amount": df["Total Amount"].sum(),
-            "Net Paid": df["Net Paid"].sum(),
-            "Old Item Weight": [
-                df[df["Old Item"] == "Gold"]["Old Item Weight"].sum(),
-                df[df["Old Item"] == "Silver"]["Old Item Weight"].sum()
-            ],
-            "Old Item Amount": df["Old Item Amount"].sum()
-        }
-        
-        # Add silver weight in comments
-        summary["Comments"] = f"Silver Weight: {df[df['Type'] == 'Silver']['Weight (gm)'].sum()} gm"
-        
-        # Export to Excel
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name="Sales", index=False)
-            
-            # Get the workbook and sheet
-            workbook = writer.book
-            sheet = writer.sheets["Sales"]
-            
-            # Add summary row
-            sheet.append([])
-            sheet.append(["SUMMARY", "", "", "", 
-                        f"Gold: {summary['Weight (gm)']} gm", 
-                        summary["Total Amount"],
-                        summary["Net Paid"],
-                        "",
-                        f"Old Gold: {summary['Old Item Weight'][0]} gm, Old Silver: {summary['Old Item Weight'][1]} gm",
-                        summary["Old Item Amount"],
-                        "", summary["Comments"]])
-            
-            # Format currency columns
-            for row in range(2, sheet.max_row):  # Skip header
-                for col in [6, 7, 10]:  # Total Amount, Net Paid, and Old Item Amount columns
-                    cell = sheet.cell(row=row, column=col)
-                    cell.number_format = "₹#,##0.00"
-        
-        return str(filename) 
\ No newline at end of file
+    def _write_summary(sheet, cursor, start, end_exclusive, bold, cell_type):
+        """Write range totals and the top item codes, aggregated from the rollup tables."""
+        sheet.column_dimensions['A'].width = 28
+        sheet.column_dimensions['B'].width = 16
+        sheet.column_dimensions['C'].width = 24
+        sheet.column_dimensions['D'].width = 10
+        sheet.column_dimensions['E'].width = 14
+
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(transaction_count), 0),
+                   COALESCE(SUM(new_gold_weight), 0), COALESCE(SUM(new_silver_weight), 0),
+                   COALESCE(SUM(new_amount), 0),
+                   COALESCE(SUM(old_gold_weight), 0), COALESCE(SUM(old_silver_weight), 0),
+                   COALESCE(SUM(old_amount), 0),
+                   COALESCE(SUM(billable_gold_weight), 0), COALESCE(SUM(billable_silver_weight), 0),
+                   COALESCE(SUM(billable_amount), 0),
+                   COALESCE(SUM(cash_amount), 0), COALESCE(SUM(card_amount), 0),
+                   COALESCE(SUM(upi_amount), 0), COALESCE(SUM(net_amount_paid), 0)
+            FROM daily_totals
+            WHERE date >= ? AND date < ?
+        ''', (start, end_exclusive))
+        totals = cursor.fetchone()
+
+        def styled(value, style):
+            cell = cell_type(sheet, value=value)
+            cell.style = style
+            return cell
+
+        title = cell_type(sheet, value="SUMMARY")
+        title.font = bold
+        sheet.append([title])
+        sheet.append(["Days with sales", totals[0]])
+        sheet.append(["Transactions", int(totals[1])])
+        for label, value, style in (
+            ("New gold weight (gm)", totals[2], 'weight'),
+            ("New silver weight (gm)", totals[3], 'weight'),
+            ("New items amount", totals[4], 'amount'),
+            ("Old gold weight (gm)", totals[5], 'weight'),
+            ("Old silver weight (gm)", totals[6], 'weight'),
+            ("Old items amount", totals[7], 'amount'),
+            ("Billable gold weight (gm)", totals[8], 'weight'),
+            ("Billable silver weight (gm)", totals[9], 'weight'),
+            ("Billable amount", totals[10], 'amount'),
+            ("Cash", totals[11], 'amount'),
+            ("Card", totals[12], 'amount'),
+            ("UPI", totals[13], 'amount'),
+            ("Net paid", totals[14], 'amount'),
+        ):
+            sheet.append([label, styled(value, style)])
+
+        sheet.append([])
+        header = [cell_type(sheet, value=text) for text in ("Top item codes", "Code", "Name", "Count", "Amount")]
+        for cell in header:
+            cell.font = bold
+        sheet.append(header)
+        cursor.execute('''
+            SELECT code, MAX(name), SUM(count), SUM(amount)
+            FROM daily_item_totals
+            WHERE date >= ? AND date < ?
+            GROUP BY code
+            ORDER BY SUM(amount) DESC, code
+            LIMIT 20
+        ''', (start, end_exclusive))
+        for code, name, count, amount in cursor.fetchall():
+            sheet.append(["", code, name, int(count), styled(amount, 'amount')])
@@ -0,0 +1,105 @@
+"""Renders the trends report chart to PNG files cached on disk."""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from utils.date_ranges import to_date
+
+class TrendsChartRenderer:
+    """Draws the 4-panel trends chart with matplotlib's Agg backend.
+
+    Images are cached by date range and a digest of the per-day data they
+    show, so asking again for an unchanged range returns the existing file
+    without drawing. The renderer uses the object-oriented Figure API rather
+    than pyplot and can therefore run on a worker thread.
+    """
+
+    def __init__(self, analytics, reports_dir: Optional[str] = None):
+        """Initialize the renderer.
+
+        Args:
+            analytics: Analytics instance providing the per-day totals.
+            reports_dir: Directory for the PNG files. Defaults to the analytics reports directory.
+        """
+        self.analytics = analytics
+        self.reports_dir = reports_dir or analytics.reports_dir
+        os.makedirs(self.reports_dir, exist_ok=True)
+        # One render at a time; matplotlib's font cache is not thread-safe
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def data_version(days: List[Dict]) -> str:
+        """Get a short digest identifying the data shown for a range."""
+        payload = json.dumps(days, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+    def chart_path(self, start_date, end_date, version: str) -> str:
+        """Get the cache file path for a range and data version."""
+        prefix = f"trends_{to_date(start_date).isoformat()}_to_{to_date(end_date).isoformat()}"
+        return os.path.join(self.reports_dir, f"{prefix}_{version}.png")
+
+    def render(self, start_date, end_date) -> Optional[str]:
+        """Get the chart image for a date range, drawing it only if it isn't cached.
+
+        Returns:
+            str: Path of the PNG file, or None if the range has no transactions.
+        """
+        days = self.analytics.get_daily_totals(start_date, end_date)
+        if not days:
+            return None
+
+        path = self.chart_path(start_date, end_date, self.data_version(days))
+        if os.path.exists(path):
+            return path
+
+        with self._lock:
+            if not os.path.exists(path):
+                self._remove_stale(start_date, end_date)
+                self._draw(days, path)
+        return path
+
+    def _remove_stale(self, start_date, end_date):
+        """Delete images drawn for the same range from older data."""
+        prefix = f"trends_{to_date(start_date).isoformat()}_to_{to_date(end_date).isoformat()}_"
+        for name in os.listdir(self.reports_dir):
+            if name.startswith(prefix) and name.endswith('.png'):
+                try:
+                    os.remove(os.path.join(self.reports_dir, name))
+                except OSError as e:
+                    print(f"[TrendsChartRenderer] Could not remove {name}: {e}")
+
+    def _draw(self, days: List[Dict], path: str):
+        """Draw the chart for a list of per-day totals and write it to path."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        dates = [day['date'] for day in days]
+        figure = Figure(figsize=(15, 10))
+        FigureCanvasAgg(figure)
+
+        # Daily totals
+        axes = figure.add_subplot(2, 2, 1)
+        axes.plot(dates, [day['daily_total'] for day in days], marker='o')
+        axes.set_title('Daily Total Sales')
+        axes.tick_params(axis='x', labelrotation=45)
+
+        # Payment method distribution
+        axes = figure.add_subplot(2, 2, 2)
+        totals = [sum(day[method] or 0 for day in days) for method in ('cash_total', 'card_total', 'upi_total')]
+        if any(totals):
+            axes.pie(totals, labels=['Cash', 'Card', 'UPI'], autopct='%1.1f%%')
+        axes.set_title('Payment Method Distribution')
+
+        # Transaction count trend
+        axes = figure.add_subplot(2, 2, 3)
+        axes.bar(dates, [day['transaction_count'] for day in days])
+        axes.set_title('Daily Transaction Count')
+        axes.tick_params(axis='x', labelrotation=45)
+
+        # Write to a temporary name so readers never see a half-written image
+        figure.tight_layout()
+        temp_path = f"{path}.tmp"
+        figure.savefig(temp_path, format='png')
+        os.replace(temp_path, path)
@@ -9,9 +9,11 @@ from PyQt6.QtWidgets import (
     QSpacerItem, QSizePolicy, QMenuBar, QMenu, QStatusBar, QScrollArea,
     QSplitter, QTabWidget, QListWidget, QListWidgetItem, QDialog,
     QHeaderView, QFileDialog, QTextEdit, QGridLayout, QProgressDialog,
-    QApplication
+    QApplication, QInputDialog, QDockWidget
+)
+from PyQt6.QtCore import (
+    Qt, QDate, QEvent, QTimer, pyqtSignal, QObject, QSize, QItemSelection, QItemSelectionModel
 )
-from PyQt6.QtCore import Qt, QDate, QEvent, QTimer, pyqtSignal, QObject, QSize
 from PyQt6.QtGui import QFont, QColor, QAction, QPainter, QPen, QPixmap, QIcon, QPalette, QFontDatabase
 
 from controllers.transaction_controller import TransactionController
@@ -20,8 +22,16 @@ from views.ui_components import TransactionTable, SummaryCard, DateRangeSelector
 from views.view_models import TransactionViewModel
 from views.slip_entry_form import SlipEntryForm
 from utils.excel_exporter import ExcelExporter
+from utils.csv_exporter import CsvExporter
 from utils.backup_manager import BackupManager
-from database.db_manager import DatabaseManager
+from utils.analytics import Analytics
+from utils.backup_scheduler import BackupScheduler
+from database.db_manager import DatabaseManager, app_data_dir, get_repository
+from database.remote_repository import RemoteRepository
+from views.workers import TrendsChartWorker, BackupWorker, RegisterRefreshWorker, run_in_background
+from views.row_index import TransactionRowIndex
+from views.search_panel import SearchPanel
+from views.register_filter_bar import RegisterFilterBar
 
 class JewellerySlip(QWidget):
     def __init__(self, transaction_data):
@@ -184,22 +194,76 @@ class JewellerySlip(QWidget):
         painter.drawRect(10, 10, self.width() - 20, self.height() - 20)
 
 class MainWindow(QMainWindow):
+    # How often to look for transactions saved by other counters
+    external_changes_interval_ms = 2000
+    # Environment variable with a sync server's URL, e.g. http://192.168.1.10:8765
+    server_url_setting = 'DAILY_REGISTER_SERVER'
+
     def __init__(self):
         print("inside __init__ of main_window.py")
         super().__init__()
         
-        # Initialize database manager
-        self.db_manager = DatabaseManager()
+        # Initialize the shared repository used by every component; with a
+        # sync server the counter works through it instead of a database file
+        server_url = os.getenv(self.server_url_setting, '').strip()
+        self.is_remote = bool(server_url)
+        if self.is_remote:
+            self.db_manager = RemoteRepository(server_url, queue_path=os.path.join(app_data_dir(), 'sync_queue.jsonl'))
+        else:
+            self.db_manager = get_repository()
         
         # Initialize view model with database manager
         self.view_model = TransactionViewModel(self.db_manager)
         
         # Initialize components
         self.controller = TransactionController(self.db_manager)
-        self.excel_exporter = ExcelExporter()
+        self.excel_exporter = ExcelExporter(self.db_manager)
+        self.csv_exporter = CsvExporter(self.db_manager)
+        self.analytics = Analytics(db=self.db_manager)
+        # Read-only JSON API for dashboards, started from the Settings menu
+        self.dashboard_server = None
+        # Backups, restores and exports work on the database file, on the server's machine when remote
+        self.backup_manager = None if self.is_remote else BackupManager(self.db_manager)
+        
+        # Trends charts are drawn off the UI thread
+        self.trends_worker = TrendsChartWorker(self.analytics.chart_renderer, self)
+        self.trends_worker.chart_ready.connect(self.show_trends_chart)
+        self.trends_worker.chart_empty.connect(
+            lambda: QMessageBox.information(self, "No Data", "No transactions found for the selected date range.")
+        )
+        self.trends_worker.chart_failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Failed to generate trends chart: {error}")
+        )
+        
+        # Backups run in the background with progress in the status bar
+        self.backup_worker = None
+        if self.backup_manager is not None:
+            self.backup_worker = BackupWorker(self.backup_manager, self)
+            self.backup_worker.progress.connect(self.on_backup_progress)
+            self.backup_worker.backup_finished.connect(self.on_backup_finished)
+            self.backup_worker.backup_failed.connect(
+                lambda error: QMessageBox.critical(self, "Error", f"Failed to backup database: {error}")
+            )
+        
+        # Register rows and totals are loaded off the UI thread, one fetch per refresh
+        self.register_refresher = RegisterRefreshWorker(self.view_model.get_register_data, parent=self)
+        self.register_refresher.register_ready.connect(self.on_register_loaded)
+        self.register_refresher.register_failed.connect(
+            lambda error: self.statusBar().showMessage(f"Failed to load register: {error}", 5000)
+        )
+        
+        # Automatic backups on a cadence, when the counter is idle and at day close
+        self.backup_scheduler = None if self.backup_manager is None else BackupScheduler(self.backup_manager)
+        
+        # Other counters write to the same database file; check for their commits
+        self.external_changes_timer = QTimer(self)
+        self.external_changes_timer.setInterval(self.external_changes_interval_ms)
+        self.external_changes_timer.timeout.connect(self.check_external_changes)
+        self.external_changes_timer.start()
         
         # Selection handling flag
         self.is_handling_selection = False
+        self.transaction_rows = TransactionRowIndex()
         
         # Create icons directory if it doesn't exist
         self.ensure_icons_directory()
@@ -212,6 +276,21 @@ class MainWindow(QMainWindow):
         # Load initial data
         self.refresh_register_view()
         
+        if self.backup_scheduler is not None:
+            self.backup_scheduler.start()
+        
+    def closeEvent(self, event):
+        print("inside closeEvent of main_window.py")
+        """Stop background work before the window closes."""
+        if self.backup_scheduler is not None:
+            self.backup_scheduler.stop(timeout=5)
+        if self.dashboard_server is not None:
+            self.dashboard_server.stop()
+            self.dashboard_server = None
+        # After the dashboard, which serves from the same cache
+        self.analytics.close()
+        super().closeEvent(event)
+        
     def ensure_icons_directory(self):
         print("inside ensure_icons_directory of main_window.py")
         """Create icons directory if it doesn't exist."""
@@ -369,9 +448,33 @@ class MainWindow(QMainWindow):
         toolbar.addWidget(date_range_group)
         toolbar.addStretch()
         
+        # Search box; results and filters open in a dock on the right
+        self.search_panel = SearchPanel(self.db_manager.search_transactions)
+        self.search_panel.search_box.setMinimumWidth(260)
+        self.search_panel.search_box.setToolTip("Search comments, item names and codes (Ctrl+F)")
+        self.search_panel.search_box.textChanged.connect(self.on_search_text_changed)
+        self.search_panel.transaction_activated.connect(self.show_search_result)
+        toolbar.addWidget(self.search_panel.search_box)
+        self.search_dock = QDockWidget("Search", self)
+        self.search_dock.setWidget(self.search_panel)
+        self.search_dock.setAllowedAreas(
+            Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea
+        )
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.search_dock)
+        self.search_dock.hide()
+        focus_search = QAction(self)
+        focus_search.setShortcut("Ctrl+F")
+        focus_search.triggered.connect(self.focus_search)
+        self.addAction(focus_search)
+        
         # Add toolbar to layout
         register_layout.addLayout(toolbar)
         
+        # Filters narrow the register and its totals within the date range
+        self.filter_bar = RegisterFilterBar()
+        self.filter_bar.filter_changed.connect(self.on_register_filter_changed)
+        register_layout.addWidget(self.filter_bar)
+        
         # Register table
         self.register_table = QTableWidget()
         
@@ -537,6 +640,12 @@ class MainWindow(QMainWindow):
             self.slip_form.old_item_added.connect(self.on_old_item_added)
             self.slip_form.payment_entered.connect(self.on_payment_entered)
             self.slip_form.transaction_saved.connect(self.refresh_register_view)
+            
+            # Slip entry holds off idle-time backups
+            if self.backup_scheduler is not None:
+                for signal in (self.slip_form.item_added, self.slip_form.old_item_added,
+                               self.slip_form.payment_entered, self.slip_form.transaction_saved):
+                    signal.connect(lambda *args: self.backup_scheduler.notify_activity())
         
             # Connect date range signals
             self.from_date.dateChanged.connect(self.on_date_range_changed)
@@ -550,6 +659,19 @@ class MainWindow(QMainWindow):
         # Ensure 'to_date' is not earlier than 'from_date'
         if self.to_date.date() < self.from_date.date():
             self.to_date.setDate(self.from_date.date())
+        # Reload once the pickers settle
+        self.register_refresher.schedule(
+            self.from_date.date().toPyDate(), self.to_date.date().toPyDate(),
+            self.filter_bar.register_filter()
+        )
+
+    def on_register_filter_changed(self):
+        print("inside on_register_filter_changed of main_window.py")
+        """Reload the register once the filter fields settle."""
+        self.register_refresher.schedule(
+            self.from_date.date().toPyDate(), self.to_date.date().toPyDate(),
+            self.filter_bar.register_filter()
+        )
 
     def show_today(self):
         print("inside show_today of main_window.py")
@@ -561,25 +683,67 @@ class MainWindow(QMainWindow):
 
     def refresh_register_view(self):
         print("inside refresh_register_view of main_window.py")
-        """Refresh the register view with the current date's transactions."""
+        """Reload the register and its totals for the selected date range.
+
+        The rows and summary are fetched in the background; refreshes asked
+        for in the same event-loop turn are coalesced into one fetch.
+        """
+        self.register_refresher.request(
+            self.from_date.date().toPyDate(), self.to_date.date().toPyDate(),
+            self.filter_bar.register_filter()
+        )
+        # Saved, edited or deleted slips can change what the search finds
+        if self.search_dock.isVisible():
+            self.search_panel.refresh()
+
+    def focus_search(self):
+        print("inside focus_search of main_window.py")
+        """Open the search dock and put the cursor in the search box."""
+        self.search_dock.show()
+        self.search_panel.search_box.setFocus()
+        self.search_panel.search_box.selectAll()
+
+    def on_search_text_changed(self, text):
+        print("inside on_search_text_changed of main_window.py")
+        """Show the search results as soon as something is typed."""
+        if text.strip():
+            self.search_dock.show()
+
+    def show_search_result(self, transaction):
+        print("inside show_search_result of main_window.py")
+        """Show the register of a found transaction's date."""
+        day = QDate.fromString(transaction['date'], "yyyy-MM-dd")
+        self.from_date.setDate(day)
+        self.to_date.setDate(day)
+        self.refresh_register_view()
+
+    def check_external_changes(self):
+        """Reload the register if another counter changed a date it shows."""
+        try:
+            dates = self.db_manager.poll_external_changes()
+        except Exception as e:
+            print(f"[MainWindow] Error checking for external changes: {e}")
+            return
+        if dates is not None and not dates:
+            return
+        from_date = self.from_date.date().toPyDate().isoformat()
+        to_date = self.to_date.date().toPyDate().isoformat()
+        # None means the changed dates are unknown
+        if dates is None or any(from_date <= day <= to_date for day in dates):
+            self.refresh_register_view()
+
+    def on_register_loaded(self, data):
+        print("inside on_register_loaded of main_window.py")
+        """Fill the register table and totals from a background load."""
         try:
-            print("Refreshing register view...")  # Debug print
-            
             # Clear existing rows
             self.register_table.setRowCount(0)
             
-            # Get selected date range and convert QDate to Python date
-            from_date = self.from_date.date().toPyDate()
-            print(f"From date: {from_date}")  # Debug print
-            to_date = self.to_date.date().toPyDate()
-            print(f"To date: {to_date}")  # Debug print
-            
-            # Get transactions for the selected date range
-            transactions = self.view_model.get_transactions_range(from_date, to_date)
+            transactions = data['transactions']
             print(f"Retrieved {len(transactions)} transactions")  # Debug print
             
-            # Dictionary to store row ranges for each transaction
-            self.transaction_rows = {}
+            # Row range of each transaction, for selecting whole slips
+            self.transaction_rows = TransactionRowIndex()
             
             # Insert rows for each transaction
             for transaction in transactions:
@@ -599,7 +763,7 @@ class MainWindow(QMainWindow):
                         self.register_table.insertRow(start_row + i)
                     
                     # Store the row range for this transaction
-                    self.transaction_rows[transaction['id']] = (start_row, start_row + max_rows - 1)
+                    self.transaction_rows.add(transaction['id'], start_row, start_row + max_rows - 1)
                     
                     # Get transaction details
                     date_str = str(transaction.get('date', ''))
@@ -697,8 +861,8 @@ class MainWindow(QMainWindow):
                     print(f"Error processing transaction: {trans_error}")
                     traceback.print_exc()
             
-            # Update daily totals
-            self.update_daily_totals()
+            # Totals come from the same fetch
+            self.show_range_summary(data['summary'])
             
         except Exception as e:
             print(f"Error refreshing register view: {e}")
@@ -724,20 +888,28 @@ class MainWindow(QMainWindow):
             # Get the row of the first selected item
             selected_row = selected_items[0].row()
             
-            # Find which transaction range this row belongs to
-            for base_row, (start_row, end_row) in self.transaction_rows.items():
-                if start_row <= selected_row <= end_row:
-                    # Select all rows in this transaction range
-                    self.register_table.clearSelection()
-                    for row in range(start_row, end_row + 1):
-                        self.register_table.selectRow(row)
-                    break
+            # Select all rows of the transaction this row belongs to
+            found = self.transaction_rows.find(selected_row)
+            if found:
+                self.select_transaction_rows(found[1], found[2])
                     
         except Exception as e:
             print(f"Error handling selection: {e}")
         finally:
             self.is_handling_selection = False
 
+    def select_transaction_rows(self, start_row, end_row):
+        """Replace the selection with a transaction's rows in one selection change."""
+        model = self.register_table.model()
+        selection = QItemSelection(
+            model.index(start_row, 0),
+            model.index(end_row, model.columnCount() - 1)
+        )
+        self.register_table.selectionModel().select(
+            selection,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect | QItemSelectionModel.SelectionFlag.Rows
+        )
+
     def eventFilter(self, source, event):
         # print("inside eventFilter of main_window.py" + str(source) + str(event) + str(self.is_handling_selection))
         """Event filter to handle deselection in table."""
@@ -759,12 +931,10 @@ class MainWindow(QMainWindow):
                         # Get the row that was clicked
                         clicked_row = item.row()
                         # Find and select all rows for this transaction
-                        for base_row, (start_row, end_row) in self.transaction_rows.items():
-                            if start_row <= clicked_row <= end_row:
-                                self.register_table.clearSelection()
-                                for row in range(start_row, end_row + 1):
-                                    self.register_table.selectRow(row)
-                                return True
+                        found = self.transaction_rows.find(clicked_row)
+                        if found:
+                            self.select_transaction_rows(found[1], found[2])
+                            return True
                 except Exception as e:
                             print(f"Error in event filter: {e}")
                 finally:
@@ -774,14 +944,16 @@ class MainWindow(QMainWindow):
 
     def update_daily_totals(self):
         print("inside update_daily_totals of main_window.py")
-        """Update the totals display for the selected date range."""
+        """Update the totals display for the selected date range.
+
+        Totals are loaded together with the register rows, so this is a
+        refresh that coalesces with any refresh_register_view in the same turn.
+        """
+        self.refresh_register_view()
+
+    def show_range_summary(self, summary):
+        """Show the totals of the selected date range."""
         try:
-            from_date = self.from_date.date().toPyDate()
-            to_date = self.to_date.date().toPyDate()
-            
-            # Get summary for the date range
-            summary = self.view_model.get_date_range_summary(from_date, to_date)
-            
             # Update New Items Summary
             self.new_items_gold_weight_label.setText(f"Gold Weight: {summary.get('new_gold_weight', 0):.3f}")
             self.new_items_silver_weight_label.setText(f"Silver Weight: {summary.get('new_silver_weight', 0):.3f}")
@@ -854,8 +1026,14 @@ class MainWindow(QMainWindow):
         export_excel.triggered.connect(self.export_to_excel)
         export_csv = QAction('Export to CSV', self)
         export_csv.triggered.connect(self.export_to_csv)
+        export_snapshot = QAction('Export Analysis Snapshot (.npz)', self)
+        export_snapshot.triggered.connect(self.export_columnar_snapshot)
         export_menu.addAction(export_excel)
         export_menu.addAction(export_csv)
+        export_changes = QAction('Export Changes for Head Office', self)
+        export_changes.triggered.connect(self.export_head_office_changeset)
+        export_menu.addAction(export_snapshot)
+        export_menu.addAction(export_changes)
         
         # Backup submenu
         backup_menu = QMenu('Backup', self)
@@ -869,6 +1047,10 @@ class MainWindow(QMainWindow):
         # Add actions to File menu
         file_menu.addMenu(export_menu)
         file_menu.addMenu(backup_menu)
+        if self.is_remote:
+            # They need the database file, which is on the sync server's machine
+            export_menu.setEnabled(False)
+            backup_menu.setEnabled(False)
         file_menu.addSeparator()
         exit_action = QAction('Exit', self)
         exit_action.triggered.connect(self.close)
@@ -878,7 +1060,14 @@ class MainWindow(QMainWindow):
         settings_menu = menubar.addMenu('Settings')
         item_codes_action = QAction('Item Codes', self)
         item_codes_action.triggered.connect(self.show_settings_dialog)
+        # The item master is edited on the sync server's machine
+        item_codes_action.setEnabled(not self.is_remote)
         settings_menu.addAction(item_codes_action)
+        settings_menu.addSeparator()
+        self.dashboard_action = QAction('Serve Dashboard on LAN', self)
+        self.dashboard_action.setCheckable(True)
+        self.dashboard_action.toggled.connect(self.toggle_dashboard_server)
+        settings_menu.addAction(self.dashboard_action)
         
         # Reports Menu
         reports_menu = menubar.addMenu('Reports')
@@ -888,8 +1077,11 @@ class MainWindow(QMainWindow):
         monthly_report.triggered.connect(self.generate_monthly_report)
         billable_summary = QAction('Billable Summary', self)
         billable_summary.triggered.connect(self.show_billable_summary)
+        trends_chart = QAction('Trends Chart', self)
+        trends_chart.triggered.connect(self.generate_trends_chart)
         reports_menu.addAction(daily_report)
         reports_menu.addAction(monthly_report)
+        reports_menu.addAction(trends_chart)
         reports_menu.addSeparator()
         reports_menu.addAction(billable_summary)
         
@@ -1089,60 +1281,182 @@ class MainWindow(QMainWindow):
         
     def export_to_excel(self):
         print("inside export_to_excel of main_window.py")
-        """Export transactions to Excel."""
+        """Export the selected date range to Excel."""
         try:
-            current_date = self.date_selector.date().toPyDate()
-            transactions = self.view_model.get_transactions(current_date)
-            
-            # Use the existing export_transactions method
-            filename = self.excel_exporter.export_transactions(
-                transactions, 
-                current_date.strftime("%Y-%m-%d")
-            )
-            
-            QMessageBox.information(
-                self, 
-                "Success", 
-                f"Data exported successfully to:\n{filename}"
+            from_date = self.from_date.date().toPyDate()
+            to_date = self.to_date.date().toPyDate()
+            if from_date > to_date:
+                from_date, to_date = to_date, from_date
+
+            # The workbook is streamed from the database off the UI thread
+            self.statusBar().showMessage("Exporting to Excel...")
+            self._export_task = run_in_background(
+                self.excel_exporter.export_range, from_date, to_date,
+                on_finished=self.on_excel_export_finished,
+                on_failed=lambda error: QMessageBox.critical(
+                    self, "Error", f"Failed to export data: {error}"
+                )
             )
-            self.statusBar().showMessage("Export completed successfully", 3000)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to export data: {str(e)}")
+
+    def on_excel_export_finished(self, filename):
+        """Report a finished Excel export."""
+        self._export_task = None
+        QMessageBox.information(
+            self, 
+            "Success", 
+            f"Data exported successfully to:\n{filename}"
+        )
+        self.statusBar().showMessage("Export completed successfully", 3000)
             
     def export_to_csv(self):
         print("inside export_to_csv of main_window.py")
-        """Export transactions to CSV."""
+        """Export the selected date range to CSV."""
         try:
+            layouts = {"Transactions": 'transactions', "Items": 'items', "Old items": 'old_items'}
+            choice, ok = QInputDialog.getItem(
+                self, "Export to CSV", "Rows to export:", list(layouts), 0, False
+            )
+            if not ok:
+                return
+
             # Get save file location
             file_path, _ = QFileDialog.getSaveFileName(
-                self, "Save CSV File", "", "CSV Files (*.csv);;All Files (*)"
+                self, "Save CSV File", "",
+                "CSV Files (*.csv);;Compressed CSV Files (*.csv.gz);;All Files (*)"
             )
             if file_path:
-                # Get current date's transactions
-                current_date = self.date_selector.date().toPyDate()
-                transactions = self.view_model.get_transactions(current_date)
-                
-                # Export to CSV
-                self.excel_exporter.export_to_csv(transactions, file_path)
-                QMessageBox.information(self, "Success", "Data exported successfully!")
-                self.statusBar().showMessage("Export completed successfully", 3000)
+                from_date = self.from_date.date().toPyDate()
+                to_date = self.to_date.date().toPyDate()
+                if from_date > to_date:
+                    from_date, to_date = to_date, from_date
+
+                # Streamed from the database off the UI thread; .gz paths are compressed
+                self.statusBar().showMessage("Exporting to CSV...")
+                self._export_task = run_in_background(
+                    self.csv_exporter.export, file_path, from_date, to_date, layout=layouts[choice],
+                    on_finished=self.on_csv_export_finished,
+                    on_failed=lambda error: QMessageBox.critical(
+                        self, "Error", f"Failed to export data: {error}"
+                    )
+                )
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to export data: {str(e)}")
+
+    def on_csv_export_finished(self, row_count):
+        """Report a finished CSV export."""
+        self._export_task = None
+        QMessageBox.information(self, "Success", f"Exported {row_count} rows successfully!")
+        self.statusBar().showMessage("Export completed successfully", 3000)
             
-    def backup_database(self):
-        print("inside backup_database of main_window.py")
-        """Backup the database."""
+    def export_columnar_snapshot(self):
+        print("inside export_columnar_snapshot of main_window.py")
+        """Export the selected date range as a columnar NumPy snapshot."""
         try:
-            # Use the existing create_backup method
-            backup_path = self.backup_manager.create_backup()
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "Save Analysis Snapshot", "", "NumPy Snapshot (*.npz);;All Files (*)"
+            )
+            if file_path:
+                from_date = self.from_date.date().toPyDate()
+                to_date = self.to_date.date().toPyDate()
+                if from_date > to_date:
+                    from_date, to_date = to_date, from_date
+
+                from database import columnar
+                self.statusBar().showMessage("Exporting analysis snapshot...")
+                self._export_task = run_in_background(
+                    columnar.write_snapshot, self.db_manager, file_path, from_date, to_date,
+                    on_finished=lambda counts: self.on_snapshot_export_finished(file_path, counts),
+                    on_failed=lambda error: QMessageBox.critical(
+                        self, "Error", f"Failed to export snapshot: {error}"
+                    )
+                )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export snapshot: {str(e)}")
+
+    def on_snapshot_export_finished(self, file_path, counts):
+        """Report a finished snapshot export."""
+        self._export_task = None
+        QMessageBox.information(
+            self, "Success",
+            f"Exported {counts['txn']} transactions and {counts['item']} items to:\n{file_path}"
+        )
+        self.statusBar().showMessage("Export completed successfully", 3000)
+            
+    def export_head_office_changeset(self):
+        print("inside export_head_office_changeset of main_window.py")
+        """Write the changes since the last export to a folder, e.g. on a USB stick."""
+        try:
+            out_dir = QFileDialog.getExistingDirectory(self, "Choose Folder for Head Office Changes")
+            if out_dir:
+                from database import replication
+                self.statusBar().showMessage("Exporting changes for head office...")
+                self._export_task = run_in_background(
+                    replication.export_changeset, self.db_manager, out_dir,
+                    on_finished=self.on_changeset_export_finished,
+                    on_failed=lambda error: QMessageBox.critical(
+                        self, "Error", f"Failed to export changes: {error}"
+                    )
+                )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export changes: {str(e)}")
+
+    def on_changeset_export_finished(self, header):
+        """Report a finished changeset export."""
+        self._export_task = None
+        if header is None:
+            QMessageBox.information(self, "No Changes", "Nothing changed since the last export.")
+        else:
             QMessageBox.information(
-                self, 
-                "Success", 
-                f"Database backed up successfully to:\n{backup_path}"
+                self, "Success",
+                f"Exported {header['count']} changed transactions to:\n{header['path']}"
             )
-            self.statusBar().showMessage("Backup completed successfully", 3000)
+        self.statusBar().showMessage("Export completed successfully", 3000)
+
+    def toggle_dashboard_server(self, enabled):
+        print("inside toggle_dashboard_server of main_window.py")
+        """Start or stop the read-only dashboard API on the shop LAN."""
+        if not enabled:
+            if self.dashboard_server is not None:
+                self.dashboard_server.stop()
+                self.dashboard_server = None
+            self.statusBar().showMessage("Dashboard stopped", 3000)
+            return
+        try:
+            from database.dashboard_api import DashboardServer
+            # Shares the analytics cache, so the dashboard reuses the window's results
+            self.dashboard_server = DashboardServer(self.db_manager, self.analytics.cache, host='0.0.0.0').start()
+            self.statusBar().showMessage(f"Dashboard serving on port {self.dashboard_server.port}", 5000)
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to backup database: {str(e)}")
+            self.dashboard_server = None
+            self.dashboard_action.blockSignals(True)
+            self.dashboard_action.setChecked(False)
+            self.dashboard_action.blockSignals(False)
+            QMessageBox.critical(self, "Error", f"Failed to start dashboard: {str(e)}")
+
+    def backup_database(self):
+        print("inside backup_database of main_window.py")
+        """Start a background backup of the database."""
+        if not self.backup_worker.start():
+            self.statusBar().showMessage("A backup is already running", 3000)
+            return
+        self.statusBar().showMessage("Backing up database...")
+        
+    def on_backup_progress(self, copied, total):
+        """Show backup progress in the status bar."""
+        percent = int(copied * 100 / total) if total else 100
+        self.statusBar().showMessage(f"Backing up database... {percent}%")
+        
+    def on_backup_finished(self, backup_path):
+        print("inside on_backup_finished of main_window.py")
+        """Report a completed backup."""
+        self.statusBar().showMessage("Backup completed successfully", 3000)
+        QMessageBox.information(
+            self, 
+            "Success", 
+            f"Database backed up successfully to:\n{backup_path}"
+        )
             
     def restore_database(self):
         print("inside restore_database of main_window.py")
@@ -1168,18 +1482,31 @@ class MainWindow(QMainWindow):
                     self, 
                     "Select Backup File", 
                     str(self.backup_manager.backup_dir),
-                    "Backup Files (*.db);;All Files (*)"
+                    "Backup Files (*.tar.xz *.db);;All Files (*)"
                 )
                 
                 if file_path:
-                    self.backup_manager.restore_backup(file_path)
-                    QMessageBox.information(self, "Success", "Database restored successfully!")
-                    self.statusBar().showMessage("Restore completed successfully", 3000)
-                    # Refresh view
-                    self.refresh_register_view()
+                    # Runs in the background; the open repositories are rebound to the restored file
+                    self.statusBar().showMessage("Restoring database...")
+                    self._restore_task = run_in_background(
+                        self.backup_manager.restore_backup, file_path,
+                        on_finished=self.on_restore_finished,
+                        on_failed=lambda error: QMessageBox.critical(
+                            self, "Error", f"Failed to restore database: {error}"
+                        )
+                    )
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to restore database: {str(e)}")
             
+    def on_restore_finished(self, result):
+        print("inside on_restore_finished of main_window.py")
+        """Reload the register after a restore."""
+        self._restore_task = None
+        self.refresh_register_view()
+        self.update_daily_totals()
+        self.statusBar().showMessage("Restore completed successfully", 3000)
+        QMessageBox.information(self, "Success", "Database restored successfully!")
+            
     def generate_daily_report(self):
         print("inside generate_daily_report of main_window.py")
         """Generate and show daily report."""
@@ -1235,22 +1562,132 @@ class MainWindow(QMainWindow):
             
     def generate_monthly_report(self):
         print("inside generate_monthly_report of main_window.py")
-        """Generate and show monthly report."""
+        """Generate and show the monthly report for the month of the 'From' date."""
         try:
-            current_date = self.date_selector.date()
-            start_date = QDate(current_date.year(), current_date.month(), 1)
-            end_date = start_date.addMonths(1).addDays(-1)
+            current_date = self.from_date.date()
+            report = self.view_model.get_monthly_report(current_date.year(), current_date.month())
+            month_name = current_date.toString("MMMM yyyy")
+            if not report:
+                QMessageBox.information(self, "No Data", f"No transactions found for {month_name}.")
+                return
+
+            totals = report['totals']
+            dialog = QDialog(self)
+            dialog.setWindowTitle(f"Monthly Report - {month_name}")
+            dialog.setMinimumSize(900, 650)
+            layout = QVBoxLayout(dialog)
+
+            # Month totals
+            summary_group = QGroupBox("Summary")
+            summary_layout = QGridLayout()
+            summary_layout.addWidget(QLabel("New Items:"), 0, 0)
+            summary_layout.addWidget(QLabel(f"  Gold Weight: {totals['new_gold_weight']:.3f} gm"), 1, 0)
+            summary_layout.addWidget(QLabel(f"  Silver Weight: {totals['new_silver_weight']:.3f} gm"), 2, 0)
+            summary_layout.addWidget(QLabel(f"  Total Amount: ₹{totals['new_amount']:.2f}"), 3, 0)
+            summary_layout.addWidget(QLabel("Old Items:"), 0, 1)
+            summary_layout.addWidget(QLabel(f"  Gold Weight: {totals['old_gold_weight']:.3f} gm"), 1, 1)
+            summary_layout.addWidget(QLabel(f"  Silver Weight: {totals['old_silver_weight']:.3f} gm"), 2, 1)
+            summary_layout.addWidget(QLabel(f"  Total Amount: ₹{totals['old_amount']:.2f}"), 3, 1)
+            summary_layout.addWidget(QLabel("Payments:"), 0, 2)
+            summary_layout.addWidget(QLabel(f"  Cash: ₹{totals['cash_amount']:.2f}"), 1, 2)
+            summary_layout.addWidget(QLabel(f"  Card: ₹{totals['card_amount']:.2f}"), 2, 2)
+            summary_layout.addWidget(QLabel(f"  UPI: ₹{totals['upi_amount']:.2f}"), 3, 2)
+            summary_layout.addWidget(QLabel(f"  Total: ₹{totals['net_amount_paid']:.2f}"), 4, 2)
+
+            busiest = report['busiest_day']
+            summary_layout.addWidget(QLabel(
+                f"Transactions: {int(totals['transaction_count'])} over {totals['day_count']} days"
+            ), 5, 0)
+            if busiest:
+                summary_layout.addWidget(QLabel(
+                    f"Busiest Day: {busiest['date']} ({int(busiest['transaction_count'])} transactions)"
+                ), 5, 1)
+            summary_layout.addWidget(QLabel(
+                f"Billable Share: {report['billable_share'] * 100:.1f}% (₹{totals['billable_amount']:.2f})"
+            ), 5, 2)
+            summary_group.setLayout(summary_layout)
+            layout.addWidget(summary_group)
+
+            # Per-day totals
+            headers = ["Date", "Transactions", "New Gold (gm)", "New Silver (gm)", "Old Gold (gm)",
+                       "Old Silver (gm)", "Cash", "Card", "UPI", "Total Paid"]
+            day_columns = ['transaction_count', 'new_gold_weight', 'new_silver_weight', 'old_gold_weight',
+                           'old_silver_weight', 'cash_amount', 'card_amount', 'upi_amount', 'net_amount_paid']
+            days_table = QTableWidget(len(report['days']), len(headers))
+            days_table.setHorizontalHeaderLabels(headers)
+            days_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            for row, day in enumerate(report['days']):
+                days_table.setItem(row, 0, QTableWidgetItem(day['date']))
+                for column, key in enumerate(day_columns, start=1):
+                    value = day[key]
+                    if key == 'transaction_count':
+                        text = str(int(value))
+                    elif key.endswith('_weight'):
+                        text = f"{value:.3f}"
+                    else:
+                        text = f"₹{value:.2f}"
+                    days_table.setItem(row, column, QTableWidgetItem(text))
+            days_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            layout.addWidget(days_table)
+
+            # Top item codes
+            items_group = QGroupBox("Top Item Codes")
+            items_layout = QVBoxLayout()
+            items_table = QTableWidget(len(report['top_items']), 5)
+            items_table.setHorizontalHeaderLabels(["Code", "Name", "Count", "Weight (gm)", "Amount"])
+            items_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            for row, item in enumerate(report['top_items']):
+                items_table.setItem(row, 0, QTableWidgetItem(item['code']))
+                items_table.setItem(row, 1, QTableWidgetItem(item['name'] or ''))
+                items_table.setItem(row, 2, QTableWidgetItem(str(int(item['count']))))
+                items_table.setItem(row, 3, QTableWidgetItem(f"{item['weight']:.3f}"))
+                items_table.setItem(row, 4, QTableWidgetItem(f"₹{item['amount']:.2f}"))
+            items_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            items_layout.addWidget(items_table)
+            items_group.setLayout(items_layout)
+            layout.addWidget(items_group)
+
+            close_button = QPushButton("Close")
+            close_button.clicked.connect(dialog.close)
+            layout.addWidget(close_button)
+
+            dialog.exec()
+
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to generate report: {str(e)}")
             
-            transactions = self.view_model.get_transactions_range(
-                start_date.toPyDate(),
-                end_date.toPyDate()
-            )
+    def generate_trends_chart(self):
+        print("inside generate_trends_chart of main_window.py")
+        """Request the trends chart for the selected date range; it is shown when ready."""
+        from_date = self.from_date.date().toPyDate()
+        to_date = self.to_date.date().toPyDate()
+        self.statusBar().showMessage("Generating trends chart...")
+        self.trends_worker.request(from_date, to_date)
+
+    def show_trends_chart(self, image_path):
+        print("inside show_trends_chart of main_window.py")
+        """Show a rendered trends chart image."""
+        try:
+            self.statusBar().showMessage("Trends chart ready", 3000)
+            
+            dialog = QDialog(self)
+            dialog.setWindowTitle("Trends Chart")
+            dialog.setMinimumSize(900, 650)
+            layout = QVBoxLayout(dialog)
             
-            # TODO: Implement monthly report dialog
-            QMessageBox.information(self, "Info", "Monthly report feature coming soon!")
+            image_label = QLabel()
+            image_label.setPixmap(QPixmap(image_path))
+            scroll_area = QScrollArea()
+            scroll_area.setWidget(image_label)
+            layout.addWidget(scroll_area)
+            
+            close_button = QPushButton("Close")
+            close_button.clicked.connect(dialog.close)
+            layout.addWidget(close_button)
             
+            dialog.exec()
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to generate report: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to show trends chart: {str(e)}")
             
     def show_billable_summary(self):
         print("inside show_billable_summary of main_window.py")
@@ -0,0 +1,88 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton
+from PyQt6.QtCore import pyqtSignal
+from database.filters import RegisterFilter
+from utils.validation import parse_amount, parse_weight
+
+class RegisterFilterBar(QWidget):
+    """Filter fields for the register: item code, metal, billable, payment mode, amount and weight."""
+
+    # Emitted whenever a field changes
+    filter_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.code = QLineEdit()
+        self.code.setPlaceholderText("Code, or prefix*")
+        self.code.setToolTip("An item code, e.g. GR, or the start of one followed by *, e.g. G*")
+        self.code.setMaximumWidth(120)
+
+        self.metal = QComboBox()
+        for label, value in (("Any metal", None), ("Gold", 'gold'), ("Silver", 'silver')):
+            self.metal.addItem(label, value)
+        self.billable = QComboBox()
+        for label, value in (("Billable or not", None), ("Billable", True), ("Not billable", False)):
+            self.billable.addItem(label, value)
+        self.payment = QComboBox()
+        for label, value in (("Any payment", ()), ("Cash", ('cash',)), ("Card", ('card',)), ("UPI", ('upi',))):
+            self.payment.addItem(label, value)
+
+        self.min_amount = QLineEdit()
+        self.max_amount = QLineEdit()
+        self.min_weight = QLineEdit()
+        self.max_weight = QLineEdit()
+        for field in (self.min_amount, self.max_amount, self.min_weight, self.max_weight):
+            field.setPlaceholderText("max" if field in (self.max_amount, self.max_weight) else "min")
+            field.setMaximumWidth(80)
+
+        self.clear_button = QPushButton("Clear Filters")
+        self.clear_button.clicked.connect(self.clear)
+
+        layout.addWidget(QLabel("Filter:"))
+        layout.addWidget(self.code)
+        layout.addWidget(self.metal)
+        layout.addWidget(self.billable)
+        layout.addWidget(self.payment)
+        layout.addWidget(QLabel("Slip amount"))
+        layout.addWidget(self.min_amount)
+        layout.addWidget(self.max_amount)
+        layout.addWidget(QLabel("Item weight"))
+        layout.addWidget(self.min_weight)
+        layout.addWidget(self.max_weight)
+        layout.addWidget(self.clear_button)
+        layout.addStretch()
+
+        for field in (self.code, self.min_amount, self.max_amount, self.min_weight, self.max_weight):
+            field.textChanged.connect(self.filter_changed)
+        for combo in (self.metal, self.billable, self.payment):
+            combo.currentIndexChanged.connect(self.filter_changed)
+
+    def register_filter(self) -> RegisterFilter:
+        """Get the filter the fields describe; fields that don't hold a number are ignored."""
+        code = self.code.text().strip().upper()
+        return RegisterFilter(
+            code=code if code and not code.endswith('*') else None,
+            code_prefix=(code.rstrip('*') or None) if code.endswith('*') else None,
+            metal=self.metal.currentData(),
+            billable=self.billable.currentData(),
+            payment_modes=tuple(self.payment.currentData() or ()),
+            min_amount=parse_amount(self.min_amount.text()),
+            max_amount=parse_amount(self.max_amount.text()),
+            min_weight=parse_weight(self.min_weight.text()),
+            max_weight=parse_weight(self.max_weight.text())
+        )
+
+    def clear(self):
+        """Reset every field, emitting filter_changed once."""
+        self.blockSignals(True)
+        for field in (self.code, self.min_amount, self.max_amount, self.min_weight, self.max_weight):
+            field.clear()
+        for combo in (self.metal, self.billable, self.payment):
+            combo.setCurrentIndex(0)
+        self.blockSignals(False)
+        self.filter_changed.emit()
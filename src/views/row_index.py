@@ -0,0 +1,48 @@
+"""Row lookup for transactions spanning several register table rows."""
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+class TransactionRowIndex:
+    """Maps register rows to the transaction they belong to.
+
+    Transactions occupy consecutive, non-overlapping row ranges appended in
+    table order, so the start rows form a sorted list and the transaction
+    owning a row is found by bisection instead of scanning every range.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget all row ranges."""
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._ids: List[int] = []
+        self._by_id: Dict[int, Tuple[int, int]] = {}
+
+    def add(self, transaction_id: int, start_row: int, end_row: int):
+        """Record the rows of the next transaction in the table.
+
+        Raises:
+            ValueError: If the range doesn't start after the previous one.
+        """
+        if end_row < start_row or (self._ends and start_row <= self._ends[-1]):
+            raise ValueError(f"Rows {start_row}-{end_row} don't follow the previous transaction")
+        self._starts.append(start_row)
+        self._ends.append(end_row)
+        self._ids.append(transaction_id)
+        self._by_id[transaction_id] = (start_row, end_row)
+
+    def find(self, row: int) -> Optional[Tuple[int, int, int]]:
+        """Get (transaction_id, start_row, end_row) for the transaction holding a row, or None."""
+        index = bisect_right(self._starts, row) - 1
+        if index < 0 or row > self._ends[index]:
+            return None
+        return self._ids[index], self._starts[index], self._ends[index]
+
+    def rows_of(self, transaction_id: int) -> Optional[Tuple[int, int]]:
+        """Get the (start_row, end_row) of a transaction, or None."""
+        return self._by_id.get(transaction_id)
+
+    def __len__(self) -> int:
+        return len(self._ids)
@@ -0,0 +1,151 @@
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
+                             QLabel, QLineEdit, QCheckBox, QTableWidget,
+                             QTableWidgetItem, QDateEdit)
+from PyQt6.QtCore import Qt, QDate, pyqtSignal
+from utils.validation import parse_amount, parse_weight
+from views.workers import LatestRequestWorker
+
+class SearchPanel(QWidget):
+    """Finds transactions as the user types, with amount, weight and date filters.
+
+    Searches run on the thread pool through a LatestRequestWorker, so
+    keystrokes are debounced and only the newest search is shown.
+    """
+
+    # Emitted with the transaction dictionary of a double-clicked result
+    transaction_activated = pyqtSignal(object)
+
+    def __init__(self, search_fn, debounce_ms: int = 150, limit: int = 200, parent=None):
+        """Initialize the panel.
+
+        Args:
+            search_fn: Called as search_fn(text, limit=..., **filters), e.g.
+                DatabaseManager.search_transactions.
+            debounce_ms: Quiet period after a keystroke before searching.
+            limit: Number of results shown at most.
+        """
+        super().__init__(parent)
+        self.search_fn = search_fn
+        self.limit = limit
+        self.results = []
+        self.worker = LatestRequestWorker(self._search, debounce_ms, self)
+        self.worker.ready.connect(self.show_results)
+        self.worker.failed.connect(lambda error: self.status_label.setText(f"Search failed: {error}"))
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+
+        # Owned by the panel, but MainWindow may place it in its toolbar
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search comments, item names, codes...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.schedule_search)
+
+        filters = QGridLayout()
+        self.min_amount = QLineEdit()
+        self.max_amount = QLineEdit()
+        self.min_weight = QLineEdit()
+        self.max_weight = QLineEdit()
+        for row, (label, low, high) in enumerate((("Amount", self.min_amount, self.max_amount),
+                                                  ("Weight", self.min_weight, self.max_weight))):
+            low.setPlaceholderText("min")
+            high.setPlaceholderText("max")
+            filters.addWidget(QLabel(label), row, 0)
+            filters.addWidget(low, row, 1)
+            filters.addWidget(high, row, 2)
+            low.textChanged.connect(self.schedule_search)
+            high.textChanged.connect(self.schedule_search)
+
+        self.date_filter = QCheckBox("Dates")
+        self.from_date = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.to_date = QDateEdit(QDate.currentDate())
+        for picker in (self.from_date, self.to_date):
+            picker.setCalendarPopup(True)
+            picker.setDisplayFormat("dd-MM-yyyy")
+            picker.setEnabled(False)
+            picker.dateChanged.connect(self.schedule_search)
+        self.date_filter.toggled.connect(self.from_date.setEnabled)
+        self.date_filter.toggled.connect(self.to_date.setEnabled)
+        self.date_filter.toggled.connect(self.schedule_search)
+        filters.addWidget(self.date_filter, 2, 0)
+        filters.addWidget(self.from_date, 2, 1)
+        filters.addWidget(self.to_date, 2, 2)
+        layout.addLayout(filters)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(['Date', 'Time', 'Comments', 'Items', 'Amount'])
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.cellDoubleClicked.connect(
+            lambda row, column: self.transaction_activated.emit(self.results[row])
+        )
+        layout.addWidget(self.table)
+
+        status = QHBoxLayout()
+        self.status_label = QLabel("")
+        status.addWidget(self.status_label)
+        layout.addLayout(status)
+
+    def filters(self):
+        """Get the filter arguments of search_fn from the filter fields.
+
+        Fields that are empty or don't hold a number are ignored.
+        """
+        filters = {}
+        for key, field, parse in (('min_amount', self.min_amount, parse_amount),
+                                  ('max_amount', self.max_amount, parse_amount),
+                                  ('min_weight', self.min_weight, parse_weight),
+                                  ('max_weight', self.max_weight, parse_weight)):
+            value = parse(field.text().strip())
+            if value is not None:
+                filters[key] = value
+        if self.date_filter.isChecked():
+            filters['from_date'] = self.from_date.date().toPyDate()
+            filters['to_date'] = self.to_date.date().toPyDate()
+        return filters
+
+    def has_criteria(self) -> bool:
+        """Check whether any text or filter is set."""
+        return bool(self.search_box.text().strip() or self.filters())
+
+    def schedule_search(self, *args):
+        """Search once typing pauses; clears the results if nothing is entered."""
+        if not self.has_criteria():
+            self.worker.cancel()
+            self.show_results([])
+            self.status_label.setText("")
+            return
+        self.worker.schedule(self.search_box.text(), self.filters())
+
+    def refresh(self):
+        """Run the current search again, e.g. after the register changed."""
+        if self.has_criteria():
+            self.worker.request(self.search_box.text(), self.filters())
+
+    def _search(self, text, filters):
+        return self.search_fn(text, limit=self.limit, **filters)
+
+    def show_results(self, transactions):
+        """Fill the results table."""
+        self.results = list(transactions)
+        self.table.setRowCount(len(self.results))
+        for row, transaction in enumerate(self.results):
+            items = ', '.join(
+                f"{item.get('code', '')} {item.get('name', '')}".strip()
+                for item in transaction.get('new_items', [])
+            )
+            amount = QTableWidgetItem(f"₹{transaction.get('total_amount', 0):,.2f}")
+            amount.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            cells = [QTableWidgetItem(transaction.get('date', '')), QTableWidgetItem(transaction.get('time', '')),
+                     QTableWidgetItem(transaction.get('comments') or ''), QTableWidgetItem(items), amount]
+            for column, cell in enumerate(cells):
+                self.table.setItem(row, column, cell)
+        self.table.resizeColumnsToContents()
+        more = " (showing the newest)" if len(self.results) >= self.limit else ""
+        self.status_label.setText(f"{len(self.results)} results{more}")
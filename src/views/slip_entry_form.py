@@ -6,7 +6,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor, QPalette
 from utils.validation import (
-    is_valid_float, is_valid_item_code, is_valid_item_type,
+    is_valid_float, is_valid_item_type,
     parse_amount, parse_weight, validate_payment_amounts
 )
 from services.item_service import ItemService
@@ -23,7 +23,8 @@ class SlipEntryForm(QWidget):
     def __init__(self, view_model=None, parent=None):
         super().__init__(parent)
         self.view_model = view_model
-        self.item_service = ItemService()  # Add ItemService instance
+        # The view model's item master is on the same repository (a sync server's, when remote)
+        self.item_service = view_model.item_service if view_model is not None else ItemService()
         
         # Initialize lists to store items
         self.new_items = []
@@ -414,7 +415,7 @@ class SlipEntryForm(QWidget):
         print(f"Code: {code}, Name: {name}, Weight: {weight_str}, Amount: {amount_str}")
         
         # Validate all fields
-        if not code or not is_valid_item_code(code):
+        if not code or code not in self.item_service.ITEM_CODES:
             print("Invalid or missing code - returning to code input")
             self.code_input.setFocus()
             return
@@ -460,7 +461,7 @@ class SlipEntryForm(QWidget):
         mark_bill = self.mark_bill_input.text().strip().upper()
         
         # Validate all fields
-        if not code or not is_valid_item_code(code):
+        if not code or code not in self.item_service.ITEM_CODES:
             self.code_input.setFocus()
             return
             
@@ -748,9 +749,10 @@ class SlipEntryForm(QWidget):
                 'is_billable': item_data.get('is_billable', False)
             }
             
-            # Add to current transaction
-            self.current_transaction['new_items'].append(new_item)
-            print(f"[ViewModel] Added new item: {new_item}")
+            # Add to the view model's transaction, which keeps its running totals
+            if not self.view_model.add_new_item(new_item):
+                return False
+            self.update_summary()
             return True
             
         except Exception as e:
@@ -803,29 +805,17 @@ class SlipEntryForm(QWidget):
         try:
             summary = self.view_model.get_current_transaction_summary()
             
-            # Update new items summary
-            new_gold_weight = sum(float(item['weight']) for item in self.view_model.current_transaction['new_items'] 
-                                if item.get('type', '').upper() == 'G')
-            new_silver_weight = sum(float(item['weight']) for item in self.view_model.current_transaction['new_items'] 
-                                  if item.get('type', '').upper() == 'S')
-            
             self.new_items_summary.setText(
                 f"New Items: {summary['new_items_count']}\n"
-                f"Gold Weight: {new_gold_weight:.3f}\n"
-                f"Silver Weight: {new_silver_weight:.3f}\n"
+                f"Gold Weight: {summary['new_gold_weight']:.3f}\n"
+                f"Silver Weight: {summary['new_silver_weight']:.3f}\n"
                 f"Amount: ₹{summary['new_amount']:.2f}"
             )
             
-            # Update old items summary
-            old_gold_weight = sum(float(item['weight']) for item in self.view_model.current_transaction['old_items'] 
-                                if item.get('type', '').upper() == 'G')
-            old_silver_weight = sum(float(item['weight']) for item in self.view_model.current_transaction['old_items'] 
-                                  if item.get('type', '').upper() == 'S')
-            
             self.old_items_summary.setText(
                 f"Old Items: {summary['old_items_count']}\n"
-                f"Gold Weight: {old_gold_weight:.3f}\n"
-                f"Silver Weight: {old_silver_weight:.3f}\n"
+                f"Gold Weight: {summary['old_gold_weight']:.3f}\n"
+                f"Silver Weight: {summary['old_silver_weight']:.3f}\n"
                 f"Amount: ₹{summary['old_amount']:.2f}"
             )
             
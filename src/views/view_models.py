@@ -1,29 +1,37 @@
+from dataclasses import replace
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
-from models.transaction import Transaction, NewItem, OldItem
+from models.transaction import Transaction, NewItem, OldItem, SlipTotals
 from controllers.transaction_controller import TransactionController
 from utils.validation import (
     is_valid_float, is_valid_item_code, is_valid_item_type,
     parse_amount, parse_weight, validate_payment_amounts
 )
 from PyQt6.QtCore import QObject, pyqtSignal
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, get_repository
 from services.item_service import ItemService
 
 class TransactionViewModel(QObject):
     """View model for handling transaction-related UI logic"""
+
+    # Ranges with at least this many new and old items are summarized with
+    # NumPy (database.array_summary) instead of looping over transactions
+    vectorized_summary_threshold = 20000
+
     def __init__(self, db_manager=None):
         print("inside __init__ of view_models.py")
         """Initialize the view model with a transaction controller."""
         super().__init__()
-        self.db_manager = db_manager or DatabaseManager()
-        self.item_service = ItemService()
+        self.db_manager = db_manager or get_repository()
+        self.item_service = ItemService(self.db_manager)
         self.current_transaction = {
             'new_items': [],
             'old_items': [],
             'comments': ''
         }
+        # Running totals of current_transaction's items
+        self.current_totals = SlipTotals()
 
     def add_new_item(self, item_data):
         print("inside add_new_item of view_models.py")
@@ -48,6 +56,7 @@ class TransactionViewModel(QObject):
             
             # Add to current transaction
             self.current_transaction['new_items'].append(new_item)
+            self.current_totals.add_new(new_item)
             print(f"[ViewModel] Added new item: {new_item}")
             return True
             
@@ -60,11 +69,30 @@ class TransactionViewModel(QObject):
         """Add an old item to the current transaction."""
         try:
             self.current_transaction['old_items'].append(item)
+            self.current_totals.add_old(item)
             return True
         except Exception as e:
             print(f"Error adding old item: {e}")
             return False
 
+    def remove_new_item(self, index):
+        print("inside remove_new_item of view_models.py")
+        """Remove a new item from the current transaction."""
+        items = self.current_transaction['new_items']
+        if 0 <= index < len(items):
+            self.current_totals.remove_new(items.pop(index))
+            return True
+        return False
+
+    def remove_old_item(self, index):
+        print("inside remove_old_item of view_models.py")
+        """Remove an old item from the current transaction."""
+        items = self.current_transaction['old_items']
+        if 0 <= index < len(items):
+            self.current_totals.remove_old(items.pop(index))
+            return True
+        return False
+
     def save_transaction(self, transaction_data):
         print("inside save_transaction of view_models.py")
         """Save a transaction to the database."""
@@ -125,6 +153,11 @@ class TransactionViewModel(QObject):
         """Get transactions for a date range."""
         return self.db_manager.get_transactions_range(start_date, end_date)
 
+    def get_monthly_report(self, year, month):
+        print("inside get_monthly_report of view_models.py")
+        """Get the monthly report built from the rollup tables (None for an empty month)."""
+        return self.db_manager.get_monthly_report(year, month)
+
     def format_transaction_for_display(self, transaction):
         print("inside format_transaction_for_display of view_models.py")
         """Format a transaction for display in the UI."""
@@ -231,67 +264,31 @@ class TransactionViewModel(QObject):
             'old_items': [],
             'comments': ''
         }
+        self.current_totals.reset()
         
     def get_total_amount(self) -> float:
         print("inside get_total_amount of view_models.py")
         """Get total amount of current transaction."""
-        new_total = sum(item['amount'] for item in self.current_transaction['new_items'])
-        old_total = sum(item['amount'] for item in self.current_transaction['old_items'])
-        return new_total + old_total
+        return self.current_totals.new_amount + self.current_totals.old_amount
         
     def get_current_transaction_summary(self):
         print("inside get_current_transaction_summary of view_models.py")
-        """Get summary of current transaction."""
-        try:
-            new_items = self.current_transaction.get('new_items', [])
-            old_items = self.current_transaction.get('old_items', [])
-            
-            # Calculate new items totals
-            new_gold_weight = sum(float(item['weight']) for item in new_items 
-                                if item.get('type', '').upper() == 'G')
-            new_silver_weight = sum(float(item['weight']) for item in new_items 
-                                  if item.get('type', '').upper() == 'S')
-            new_amount = sum(float(item['amount']) for item in new_items)
-            
-            # Calculate old items totals
-            old_gold_weight = sum(float(item['weight']) for item in old_items 
-                                if item.get('type', '').upper() == 'G')
-            old_silver_weight = sum(float(item['weight']) for item in old_items 
-                                  if item.get('type', '').upper() == 'S')
-            old_amount = sum(float(item['amount']) for item in old_items)
-            
-            print(f"[ViewModel] Current transaction summary:")
-            print(f"New items: {new_items}")
-            print(f"Old items: {old_items}")
-            print(f"New gold weight: {new_gold_weight}")
-            print(f"New silver weight: {new_silver_weight}")
-            print(f"Old gold weight: {old_gold_weight}")
-            print(f"Old silver weight: {old_silver_weight}")
-            
-            return {
-                'new_items_count': len(new_items),
-                'new_gold_weight': new_gold_weight,
-                'new_silver_weight': new_silver_weight,
-                'new_amount': new_amount,
-                'old_items_count': len(old_items),
-                'old_gold_weight': old_gold_weight,
-                'old_silver_weight': old_silver_weight,
-                'old_amount': old_amount,
-                'total_amount': new_amount + old_amount
-            }
-        except Exception as e:
-            print(f"[ViewModel] Error getting transaction summary: {e}")
-            return {
-                'new_items_count': 0,
-                'new_gold_weight': 0,
-                'new_silver_weight': 0,
-                'new_amount': 0,
-                'old_items_count': 0,
-                'old_gold_weight': 0,
-                'old_silver_weight': 0,
-                'old_amount': 0,
-                'total_amount': 0
-            }
+        """Get summary of current transaction from its running totals."""
+        totals = self.current_totals
+        return {
+            'new_items_count': totals.new_count,
+            'new_gold_weight': totals.new_weight['gold'],
+            'new_silver_weight': totals.new_weight['silver'],
+            'new_amount': totals.new_amount,
+            'old_items_count': totals.old_count,
+            'old_gold_weight': totals.old_weight['gold'],
+            'old_silver_weight': totals.old_weight['silver'],
+            'old_amount': totals.old_amount,
+            'billable_gold_weight': totals.billable_weight['gold'],
+            'billable_silver_weight': totals.billable_weight['silver'],
+            'billable_amount': totals.billable_amount,
+            'total_amount': totals.new_amount + totals.old_amount
+        }
         
     def get_billable_items(self, date):
         print("inside get_billable_items of view_models.py")
@@ -354,56 +351,117 @@ class TransactionViewModel(QObject):
                 'non_billable': {}
             }
 
+    def _array_summary_backend(self, from_date, to_date):
+        """Get the NumPy summary module if the range is large enough to need it, else None."""
+        if self.vectorized_summary_threshold is None:
+            return None
+        try:
+            from database import array_summary
+        except ImportError:
+            return None
+        if array_summary.item_row_count(self.db_manager, from_date, to_date) < self.vectorized_summary_threshold:
+            return None
+        return array_summary
+
     def get_date_range_summary(self, from_date, to_date):
         print("inside get_date_range_summary of view_models.py")
         """Get summary of transactions between from_date and to_date inclusive."""
         try:
+            backend = self._array_summary_backend(from_date, to_date)
+            if backend is not None:
+                return backend.date_range_summary(self.db_manager, from_date, to_date)
+
             transactions = self.get_transactions_range(from_date, to_date)
-            print("[TRANSACTIONS][VIEWMODELS]fetched transactions are: " + str(transactions))
-            summary = {
-                'new_gold_weight': 0,
-                'new_silver_weight': 0,
-                'new_amount': 0,
-                'old_gold_weight': 0,
-                'old_silver_weight': 0,
-                'old_amount': 0,
-                'cash_total': 0,
-                'card_total': 0,
-                'upi_total': 0
-            }
-            
-            for transaction in transactions:
-                # Process new items
-                for item in transaction.get('new_items', []):
-                    if 'G' in item.get('type', ''):
-                        summary['new_gold_weight'] += item.get('weight', 0)
-                    elif 'S' in item.get('type', ''):
-                        summary['new_silver_weight'] += item.get('weight', 0)
-                    summary['new_amount'] += item.get('amount', 0)
-                
-                # Process old items
-                for item in transaction.get('old_items', []):
-                    item_type = item.get('type', '').upper()
-                    if item_type in ['G', 'GOLD']:
-                        summary['old_gold_weight'] += item.get('weight', 0)
-                    elif item_type in ['S', 'SILVER']:
-                        summary['old_silver_weight'] += item.get('weight', 0)
-                    summary['old_amount'] += item.get('amount', 0)
-                
-                # Process payments
-                summary['cash_total'] += transaction.get('cash_amount', 0)
-                summary['card_total'] += transaction.get('card_amount', 0)
-                summary['upi_total'] += transaction.get('upi_amount', 0)
-            
-            return summary
+            return self._summarize_transactions(transactions)
         except Exception as e:
             print(f"Error getting summary for date range: {e}")
             return {}
 
+    def get_register_data(self, from_date, to_date, register_filter=None):
+        print("inside get_register_data of view_models.py")
+        """Get the register rows and their summary for a date range with one fetch.
+
+        Args:
+            from_date: First date (inclusive).
+            to_date: Last date (inclusive).
+            register_filter: Optional database.filters.RegisterFilter; its
+                dates are replaced by from_date and to_date.
+
+        Returns:
+            dict: 'from_date', 'to_date', 'transactions' (newest first) and 'summary'.
+        """
+        if register_filter is not None and register_filter.has_conditions():
+            # The summary totals exactly the filtered rows
+            register_filter = replace(register_filter, from_date=from_date, to_date=to_date)
+            transactions = self.db_manager.get_filtered_transactions(register_filter)
+            return {
+                'from_date': from_date,
+                'to_date': to_date,
+                'transactions': transactions,
+                'summary': self._summarize_transactions(transactions)
+            }
+
+        transactions = self.get_transactions_range(from_date, to_date)
+        backend = self._array_summary_backend(from_date, to_date)
+        if backend is not None:
+            summary = backend.date_range_summary(self.db_manager, from_date, to_date)
+        else:
+            summary = self._summarize_transactions(transactions)
+        return {
+            'from_date': from_date,
+            'to_date': to_date,
+            'transactions': transactions,
+            'summary': summary
+        }
+
+    @staticmethod
+    def _summarize_transactions(transactions):
+        """Total the new items, old items and payments of fetched transactions."""
+        summary = {
+            'new_gold_weight': 0,
+            'new_silver_weight': 0,
+            'new_amount': 0,
+            'old_gold_weight': 0,
+            'old_silver_weight': 0,
+            'old_amount': 0,
+            'cash_total': 0,
+            'card_total': 0,
+            'upi_total': 0
+        }
+        
+        for transaction in transactions:
+            # Process new items
+            for item in transaction.get('new_items', []):
+                if 'G' in item.get('type', ''):
+                    summary['new_gold_weight'] += item.get('weight', 0)
+                elif 'S' in item.get('type', ''):
+                    summary['new_silver_weight'] += item.get('weight', 0)
+                summary['new_amount'] += item.get('amount', 0)
+            
+            # Process old items
+            for item in transaction.get('old_items', []):
+                item_type = item.get('type', '').upper()
+                if item_type in ['G', 'GOLD']:
+                    summary['old_gold_weight'] += item.get('weight', 0)
+                elif item_type in ['S', 'SILVER']:
+                    summary['old_silver_weight'] += item.get('weight', 0)
+                summary['old_amount'] += item.get('amount', 0)
+            
+            # Process payments
+            summary['cash_total'] += transaction.get('cash_amount', 0)
+            summary['card_total'] += transaction.get('card_amount', 0)
+            summary['upi_total'] += transaction.get('upi_amount', 0)
+        
+        return summary
+
     def get_billable_items_range(self, from_date, to_date):
         print("inside get_billable_items_range of view_models.py")
         """Get billable and non-billable items summary for a date range."""
         try:
+            backend = self._array_summary_backend(from_date, to_date)
+            if backend is not None:
+                return backend.billable_items_range(self.db_manager, from_date, to_date)
+
             transactions = self.get_transactions_range(from_date, to_date)
             
             billable_items = {}
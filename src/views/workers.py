@@ -0,0 +1,227 @@
+"""Background workers that keep slow work off the UI thread."""
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+class TaskSignals(QObject):
+    """Signals a BackgroundTask uses to report back to the UI thread."""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+class BackgroundTask(QRunnable):
+    """Runs a function on the global thread pool and reports its result through signals."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        # Created on the calling (UI) thread so connected slots run there
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            print(f"[BackgroundTask] Error in {getattr(self.fn, '__name__', self.fn)}: {e}")
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+def run_in_background(fn, *args, on_finished=None, on_failed=None, **kwargs) -> BackgroundTask:
+    """Start fn(*args, **kwargs) on the global thread pool.
+
+    Args:
+        on_finished: Called on the UI thread with the result.
+        on_failed: Called on the UI thread with the error message.
+    """
+    task = BackgroundTask(fn, *args, **kwargs)
+    if on_finished:
+        task.signals.finished.connect(on_finished)
+    if on_failed:
+        task.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(task)
+    return task
+
+class TrendsChartWorker(QObject):
+    """Renders trends charts in the background and announces the finished image."""
+
+    chart_ready = pyqtSignal(str)  # Emitted with the PNG path
+    chart_empty = pyqtSignal()  # Emitted when the range has no transactions
+    chart_failed = pyqtSignal(str)  # Emitted with an error message
+
+    def __init__(self, renderer, parent=None):
+        super().__init__(parent)
+        self.renderer = renderer
+        self._request_id = 0
+        self._tasks = {}
+
+    def request(self, start_date, end_date):
+        """Render the chart for a date range; only the latest request is reported."""
+        self._request_id += 1
+        request_id = self._request_id
+        self._tasks[request_id] = run_in_background(
+            self.renderer.render, start_date, end_date,
+            on_finished=lambda path: self._on_finished(request_id, path),
+            on_failed=lambda error: self._on_failed(request_id, error)
+        )
+
+    def _on_finished(self, request_id, path):
+        self._tasks.pop(request_id, None)
+        if request_id != self._request_id:
+            return
+        if path:
+            self.chart_ready.emit(path)
+        else:
+            self.chart_empty.emit()
+
+    def _on_failed(self, request_id, error):
+        self._tasks.pop(request_id, None)
+        if request_id == self._request_id:
+            self.chart_failed.emit(error)
+
+class LatestRequestWorker(QObject):
+    """Runs a loader in the background for the latest request only, coalescing requests.
+
+    Requests restart a single-shot timer, so input changes are debounced
+    and several requests made in one event-loop turn cause one load. Only
+    one load runs at a time. A load superseded by a newer request is
+    discarded when it returns, and the latest request is loaded next.
+    """
+
+    ready = pyqtSignal(object)  # Emitted with the loader's result
+    failed = pyqtSignal(str)  # Emitted with an error message
+
+    def __init__(self, loader, debounce_ms: int = 250, parent=None):
+        """Initialize the worker.
+
+        Args:
+            loader: Called with a request's arguments on the thread pool.
+            debounce_ms: Quiet period after a scheduled request before loading.
+        """
+        super().__init__(parent)
+        self.loader = loader
+        self.debounce_ms = debounce_ms
+        self._args = None
+        self._request_id = 0
+        self._task = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._start)
+
+    def schedule(self, *args):
+        """Load once no other request has arrived for debounce_ms."""
+        self._queue(args, self.debounce_ms)
+
+    def request(self, *args):
+        """Load at the next event-loop turn."""
+        self._queue(args, 0)
+
+    def cancel(self):
+        """Drop the queued request and the result of a running load."""
+        self._args = None
+        self._request_id += 1
+        self._timer.stop()
+
+    def is_loading(self) -> bool:
+        """Check whether a load is running or queued."""
+        return self._task is not None or self._timer.isActive()
+
+    def _queue(self, args, delay_ms):
+        self._args = args
+        self._request_id += 1
+        self._timer.start(delay_ms)
+
+    def _start(self):
+        if self._task is not None:
+            # Started again when the running load returns
+            return
+        if self._args is None:
+            # Nothing queued, e.g. the request was cancelled
+            return
+        args, self._args = self._args, None
+        request_id = self._request_id
+        self._task = run_in_background(
+            self.loader, *args,
+            on_finished=lambda result: self._on_finished(request_id, result),
+            on_failed=lambda error: self._on_failed(request_id, error)
+        )
+
+    def _on_finished(self, request_id, result):
+        self._task = None
+        if request_id != self._request_id:
+            self._start_pending()
+            return
+        self.ready.emit(result)
+
+    def _on_failed(self, request_id, error):
+        self._task = None
+        if request_id != self._request_id:
+            self._start_pending()
+            return
+        self.failed.emit(error)
+
+    def _start_pending(self):
+        """Load the latest request unless its timer is still running."""
+        if not self._timer.isActive():
+            self._start()
+
+class RegisterRefreshWorker(LatestRequestWorker):
+    """Loads the register for a date range in the background.
+
+    ``schedule(from_date, to_date, ...)`` debounces picker and filter
+    changes and ``request(from_date, to_date, ...)`` loads at the next
+    event-loop turn; the arguments are passed on to the loader.
+    """
+
+    register_ready = pyqtSignal(object)  # Emitted with the loader's result
+    register_failed = pyqtSignal(str)  # Emitted with an error message
+
+    def __init__(self, loader, debounce_ms: int = 250, parent=None):
+        """Initialize the worker.
+
+        Args:
+            loader: Called with a request's arguments on the thread pool, e.g.
+                loader(from_date, to_date, register_filter).
+            debounce_ms: Quiet period after a picker change before loading.
+        """
+        super().__init__(loader, debounce_ms, parent)
+        self.ready.connect(self.register_ready)
+        self.failed.connect(self.register_failed)
+
+class BackupWorker(QObject):
+    """Runs database backups on the thread pool and reports their progress."""
+
+    progress = pyqtSignal(int, int)  # Emitted with (copied_pages, total_pages)
+    backup_finished = pyqtSignal(str)  # Emitted with the backup path
+    backup_failed = pyqtSignal(str)  # Emitted with an error message
+
+    def __init__(self, backup_manager, parent=None):
+        super().__init__(parent)
+        self.backup_manager = backup_manager
+        self._task = None
+
+    def is_running(self) -> bool:
+        """Check whether a backup is in progress."""
+        return self._task is not None
+
+    def start(self, backup_path=None):
+        """Start a backup unless one is already running.
+
+        Returns:
+            bool: True if a backup was started.
+        """
+        if self._task is not None:
+            return False
+        # progress is emitted from the worker thread and queued to the UI thread
+        self._task = run_in_background(
+            self.backup_manager.create_backup, backup_path, progress=self.progress.emit,
+            on_finished=self._on_finished, on_failed=self._on_failed
+        )
+        return True
+
+    def _on_finished(self, path):
+        self._task = None
+        self.backup_finished.emit(path)
+
+    def _on_failed(self, error):
+        self._task = None
+        self.backup_failed.emit(error)
@@ -21,6 +21,39 @@ def test_db():
         except PermissionError:
             print(f"Warning: Could not remove test database file: {db_path}")
 
+@pytest.fixture
+def tmp_db(tmp_path):
+    """Create a repository on a temporary file."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    yield db
+    db.close()
+
+def make_slip(timestamp, amount=100.0, code='GR', name='Gold Ring', type_='G', weight=1.0,
+              is_billable=None, comments=None, new_items=None, old_items=(), payment=None):
+    """Build a transaction dictionary for DatabaseManager.add_transaction().
+
+    By default the slip has one new item, no old items and is paid in cash
+    for the item's amount; pass new_items or payment to override them.
+    """
+    if new_items is None:
+        item = {'code': code, 'name': name, 'type': type_, 'weight': weight, 'amount': amount}
+        if is_billable is not None:
+            item['is_billable'] = is_billable
+        new_items = [item]
+    slip = {
+        'timestamp': timestamp,
+        'new_items': list(new_items),
+        'old_items': list(old_items),
+        'payment_details': dict(payment) if payment is not None else {'cash': amount, 'card': 0.0, 'upi': 0.0}
+    }
+    if comments is not None:
+        slip['comments'] = comments
+    return slip
+
+def add_slip(db, timestamp, amount=100.0, **fields):
+    """Add a make_slip() transaction to a repository and return its ID."""
+    return db.add_transaction(make_slip(timestamp, amount, **fields))
+
 @pytest.fixture
 def transaction_controller(test_db):
     """Create a transaction controller with test database."""
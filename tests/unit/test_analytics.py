@@ -0,0 +1,114 @@
+import pytest
+import os
+import sqlite3
+from datetime import date, datetime
+from src.utils.analytics import Analytics
+from conftest import add_slip
+
+@pytest.fixture
+def analytics(tmp_db):
+    return Analytics(db=tmp_db)
+
+def _add(db, timestamp, cash=0.0, card=0.0, upi=0.0, amount=1000.0):
+    return add_slip(db, timestamp, amount, code='GCH', name='Gold Chain',
+                    payment={'cash': cash, 'card': card, 'upi': upi})
+
+def test_monthly_statistics_uses_only_that_month(tmp_db, analytics):
+    """Test that the half-open month range excludes neighbouring days."""
+    _add(tmp_db, datetime(2024, 2, 29, 23, 0), cash=1.0)
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0), cash=100.0, amount=100.0)
+    _add(tmp_db, datetime(2024, 3, 5, 10, 0), card=300.0, amount=300.0)
+    _add(tmp_db, datetime(2024, 3, 5, 11, 0), upi=200.0, amount=200.0)
+    _add(tmp_db, datetime(2024, 4, 1, 0, 0), cash=1.0)
+    
+    stats = analytics.get_monthly_statistics(2024, 3)
+    assert stats['total_transactions'] == 3
+    assert stats['total_sales'] == 600.0
+    assert stats['busiest_day'] == '2024-03-05'
+    assert stats['payment_methods'] == {'cash': 100.0, 'card': 300.0, 'upi': 200.0}
+    assert analytics.get_monthly_statistics(2023, 12) is None
+
+def test_daily_summary_binds_parameters(analytics):
+    """Test that dates are bound rather than interpolated into SQL."""
+    summary = analytics.get_daily_summary("2024-03-01' OR '1'='1")
+    assert summary['total_transactions'] == 0
+
+def test_closed_periods_are_cached_until_their_dates_change(tmp_db, analytics):
+    """Test that a write only invalidates cached periods containing its date."""
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0), cash=100.0)
+    march = analytics.get_monthly_statistics(2024, 3)
+    analytics.get_monthly_statistics(2024, 2)
+    assert len(analytics.cache) == 2
+    
+    # A sale today leaves past months cached
+    _add(tmp_db, datetime.now(), cash=5.0)
+    assert len(analytics.cache) == 2
+    assert analytics.get_monthly_statistics(2024, 3) == march
+    
+    # Back-dated edits drop the month they touch
+    _add(tmp_db, datetime(2024, 3, 2, 10, 0), cash=50.0)
+    assert len(analytics.cache) == 1
+    assert analytics.get_monthly_statistics(2024, 3)['total_transactions'] == 2
+
+def test_other_connections_clear_the_cache(tmp_db, analytics):
+    """Test that commits from another connection are detected through data_version."""
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0), cash=100.0)
+    assert analytics.get_monthly_statistics(2024, 3)['total_transactions'] == 1
+    
+    other = sqlite3.connect(tmp_db.db_path)
+    other.execute(
+        "INSERT INTO transactions (date, timestamp, total_amount, cash_amount) "
+        "VALUES ('2024-03-09', '2024-03-09 10:00:00', 10, 10)"
+    )
+    other.commit()
+    other.close()
+    
+    assert analytics.get_monthly_statistics(2024, 3)['total_transactions'] == 2
+
+def test_daily_totals_for_current_period_only_query_today(tmp_db, analytics):
+    """Test that days before today are served from the cache in an open range."""
+    today = date.today()
+    start = date(today.year - 1, today.month, 1)
+    _add(tmp_db, datetime.combine(start, datetime.min.time()), cash=10.0)
+    _add(tmp_db, datetime.now(), cash=20.0)
+    
+    first = analytics.get_daily_totals(start, today)
+    assert [day['cash_total'] for day in first] == [10.0, 20.0]
+    assert len(analytics.cache) == 1
+    
+    # A new sale today is picked up without dropping the cached history
+    _add(tmp_db, datetime.now(), cash=5.0)
+    second = analytics.get_daily_totals(start, today)
+    assert [day['cash_total'] for day in second] == [10.0, 25.0]
+    assert len(analytics.cache) == 1
+
+def test_trends_chart_is_cached_by_range_and_data(tmp_db, analytics, monkeypatch):
+    """Test that an unchanged range reuses its image and changed data redraws it."""
+    drawn = []
+    def fake_draw(days, path):
+        drawn.append(path)
+        open(path, 'wb').close()
+    monkeypatch.setattr(analytics.chart_renderer, '_draw', fake_draw)
+    
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0), cash=100.0)
+    first = analytics.chart_renderer.render(date(2024, 3, 1), date(2024, 3, 31))
+    assert analytics.chart_renderer.render(date(2024, 3, 1), date(2024, 3, 31)) == first
+    assert len(drawn) == 1
+    
+    _add(tmp_db, datetime(2024, 3, 2, 10, 0), cash=50.0)
+    second = analytics.chart_renderer.render(date(2024, 3, 1), date(2024, 3, 31))
+    assert second != first
+    assert len(drawn) == 2
+    assert not os.path.exists(first)
+    
+    assert analytics.chart_renderer.render(date(2023, 1, 1), date(2023, 1, 31)) is None
+
+def test_close_releases_repository_listeners(tmp_db):
+    """Test that closed Analytics instances don't leave listeners on the shared repository."""
+    change_listeners, reset_listeners = len(tmp_db._change_listeners), len(tmp_db._reset_listeners)
+    for _ in range(3):
+        analytics = Analytics(db=tmp_db)
+        assert len(tmp_db._change_listeners) == change_listeners + 1
+        analytics.close()
+    assert len(tmp_db._change_listeners) == change_listeners
+    assert len(tmp_db._reset_listeners) == reset_listeners
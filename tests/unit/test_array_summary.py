@@ -0,0 +1,82 @@
+import pytest
+import random
+from datetime import date, datetime, timedelta
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PyQt6")
+
+from src.database.db_manager import DatabaseManager
+from src.database import array_summary
+from src.views.view_models import TransactionViewModel
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a repository with a year of mixed transactions."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    rng = random.Random(7)
+    types = ['G', 'S', 'GOLD', 'silver', 'X']
+    for n in range(300):
+        db.add_transaction({
+            'timestamp': datetime(2024, 1, 1, 10, 0) + timedelta(days=n % 366, minutes=n),
+            'new_items': [
+                {'code': rng.choice(['GR', 'SC', 'GB', 'SA']), 'name': 'Item', 'type': rng.choice(types),
+                 'weight': round(rng.uniform(0.1, 50), 3), 'amount': round(rng.uniform(10, 90000), 2),
+                 'is_billable': rng.random() < 0.5}
+                for _ in range(rng.randint(1, 4))
+            ],
+            'old_items': [
+                {'type': rng.choice(types), 'weight': round(rng.uniform(0.1, 20), 3),
+                 'amount': round(rng.uniform(10, 20000), 2)}
+                for _ in range(rng.randint(0, 2))
+            ],
+            'payment_details': {'cash': round(rng.uniform(0, 5000), 2), 'upi': round(rng.uniform(0, 5000), 2)}
+        })
+    yield db
+    db.close()
+
+def _summaries(view_model, threshold):
+    view_model.vectorized_summary_threshold = threshold
+    return (
+        view_model.get_date_range_summary(date(2024, 2, 1), date(2024, 11, 30)),
+        view_model.get_billable_items_range(date(2024, 2, 1), date(2024, 11, 30)),
+    )
+
+def test_vectorized_path_matches_row_loop(db):
+    """Test that the NumPy backend gives the row loop's results."""
+    view_model = TransactionViewModel(db)
+    loop_summary, loop_items = _summaries(view_model, None)
+    array_summary_, array_items = _summaries(view_model, 1)
+
+    assert array_summary_.keys() == loop_summary.keys()
+    for key, value in loop_summary.items():
+        assert array_summary_[key] == pytest.approx(value, rel=1e-12), key
+
+    for group in ('billable', 'non_billable'):
+        assert list(array_items[group]) == list(loop_items[group])
+        for code, expected in loop_items[group].items():
+            actual = array_items[group][code]
+            assert actual['name'] == expected['name']
+            assert actual['items'] == expected['items']
+            assert actual['total_weight'] == pytest.approx(expected['total_weight'], rel=1e-12)
+            assert actual['total_amount'] == pytest.approx(expected['total_amount'], rel=1e-12)
+
+def test_threshold_switch(db):
+    """Test that the backend is only used for ranges above the threshold."""
+    view_model = TransactionViewModel(db)
+    rows = array_summary.item_row_count(db, date(2024, 1, 1), date(2024, 12, 31))
+    assert rows > 300
+
+    view_model.vectorized_summary_threshold = rows + 1
+    assert view_model._array_summary_backend(date(2024, 1, 1), date(2024, 12, 31)) is None
+    view_model.vectorized_summary_threshold = rows
+    assert view_model._array_summary_backend(date(2024, 1, 1), date(2024, 12, 31)) is not None
+    view_model.vectorized_summary_threshold = None
+    assert view_model._array_summary_backend(date(2024, 1, 1), date(2024, 12, 31)) is None
+
+def test_empty_range(db):
+    """Test the NumPy backend on a range without transactions."""
+    summary = array_summary.date_range_summary(db, date(2023, 1, 1), date(2023, 1, 31))
+    assert set(summary.values()) == {0.0}
+    assert array_summary.billable_items_range(db, date(2023, 1, 1), date(2023, 1, 31)) == {
+        'billable': {}, 'non_billable': {}
+    }
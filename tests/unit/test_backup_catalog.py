@@ -0,0 +1,120 @@
+import pytest
+import json
+import threading
+from datetime import datetime, timedelta
+from src.utils.backup_catalog import BackupCatalog, select_retained
+from src.utils.backup_manager import BackupManager
+
+def _entry(name, moment, kind='full'):
+    return {'name': name, 'kind': kind, 'created_at': moment.isoformat(sep=' '), 'size': 1, 'manifest': None}
+
+def test_select_retained_grandfather_father_son():
+    """Test that one backup per recent day, week and month is kept."""
+    start = datetime(2024, 1, 1, 12, 0)
+    # Two backups a day for 120 days
+    entries = [
+        _entry(f"b{day}_{hour}", start + timedelta(days=day, hours=hour))
+        for day in range(120) for hour in (0, 6)
+    ]
+    keep = select_retained(entries, daily=3, weekly=3, monthly=2)
+
+    # Day 119 is Monday 2024-04-29: the last three days, the Sundays closing
+    # the two weeks before it, and the last days of April and March
+    assert keep == {'b119_6', 'b118_6', 'b117_6', 'b111_6', 'b90_6'}
+
+def test_prune_removes_unretained_backups(tmp_db, tmp_path):
+    """Test that pruning deletes old backups and their catalog entries."""
+    manager = BackupManager(tmp_db)
+    manager.auto_prune = False
+    manager.keep_daily, manager.keep_weekly, manager.keep_monthly = 2, 0, 0
+
+    old = datetime.now() - timedelta(days=10)
+    for day in range(5):
+        name = f"db_backup_{day}.tar.xz"
+        (manager.backup_dir / name).write_bytes(b'x')
+        manager.catalog.add(_entry(name, old + timedelta(days=day)))
+    recent = manager.create_backup()
+
+    removed = manager.prune_backups()
+    assert removed == ['db_backup_0.tar.xz', 'db_backup_1.tar.xz', 'db_backup_2.tar.xz', 'db_backup_3.tar.xz']
+    assert [backup['path'] for backup in manager.list_backups()] == [recent, str(manager.backup_dir / 'db_backup_4.tar.xz')]
+    assert not (manager.backup_dir / 'db_backup_0.tar.xz').exists()
+
+def test_prune_keeps_active_chain_and_drops_old_deltas(tmp_db):
+    """Test that deltas go with their base and the active chain survives."""
+    manager = BackupManager(tmp_db)
+    manager.auto_prune = False
+    manager.keep_recent_hours, manager.keep_daily, manager.keep_weekly, manager.keep_monthly = 0, 0, 0, 0
+
+    old = datetime.now() - timedelta(days=30)
+    (manager.backup_dir / 'db_base_old.tar.xz').write_bytes(b'x')
+    (manager.backup_dir / 'db_delta_old.jsonl.gz').write_bytes(b'x')
+    manager.catalog.add(_entry('db_base_old.tar.xz', old, kind='base'))
+    delta = _entry('db_delta_old.jsonl.gz', old + timedelta(hours=1), kind='delta')
+    delta['base'] = 'db_base_old.tar.xz'
+    manager.catalog.add(delta)
+    manager._save_chain_state({'chains': [{
+        'base': 'db_base_old.tar.xz', 'created_at': old.isoformat(sep=' '), 'seq': 0, 'deltas': []
+    }]})
+
+    base = manager.create_incremental_backup()
+    removed = manager.prune_backups()
+    assert removed == ['db_base_old.tar.xz', 'db_delta_old.jsonl.gz']
+    assert [chain['base'] for chain in manager._load_chain_state()['chains']] == [base.rsplit('/', 1)[-1]]
+    assert [backup['path'] for backup in manager.list_backups()] == [base]
+
+def test_prune_during_base_backup_keeps_chain_state(tmp_db):
+    """Test that a prune running while a base is taken neither loses the new chain nor keeps pruned ones."""
+    manager = BackupManager(tmp_db)
+    manager.auto_prune = False
+    manager.keep_recent_hours, manager.keep_daily, manager.keep_weekly, manager.keep_monthly = 0, 0, 0, 0
+
+    old = datetime.now() - timedelta(days=30)
+    chains = []
+    for index, name in enumerate(('db_base_old.tar.xz', 'db_base_older.tar.xz')):
+        (manager.backup_dir / name).write_bytes(b'x')
+        manager.catalog.add(_entry(name, old - timedelta(days=index), kind='base'))
+        chains.insert(0, {'base': name, 'created_at': old.isoformat(sep=' '), 'seq': 0, 'deltas': []})
+    manager._save_chain_state({'chains': chains})
+
+    pruner = threading.Thread(target=manager.prune_backups)
+
+    def progress(done, total):
+        if pruner.ident is None:
+            pruner.start()
+            # Give an unsynchronized prune time to finish inside the backup
+            pruner.join(timeout=0.5)
+
+    base = manager.create_incremental_backup(progress=progress)
+    pruner.join(timeout=10)
+    assert pruner.ident is not None and not pruner.is_alive()
+    state = manager._load_chain_state()
+    assert [chain['base'] for chain in state['chains']] == [base.rsplit('/', 1)[-1]]
+    assert [backup['path'] for backup in manager.list_backups()] == [base]
+
+def test_catalog_is_built_once_from_existing_files(tmp_db):
+    """Test that a backup directory without a catalog is scanned once and then read from catalog.json."""
+    manager = BackupManager(tmp_db)
+    path = manager.create_backup()
+    (manager.backup_dir / 'catalog.json').unlink()
+
+    catalog = BackupCatalog(manager.backup_dir, scan=manager._scan_backup_dir)
+    assert [entry['name'] for entry in catalog.entries()] == [path.rsplit('/', 1)[-1]]
+    with open(manager.backup_dir / 'catalog.json', 'r', encoding='utf-8') as f:
+        assert len(json.load(f)['backups']) == 1
+
+    # Later loads don't scan
+    reloaded = BackupCatalog(manager.backup_dir, scan=lambda: pytest.fail("scanned again"))
+    assert reloaded.latest()['kind'] == 'full'
+
+def test_prune_in_background(tmp_db):
+    """Test that a backup triggers background pruning."""
+    manager = BackupManager(tmp_db)
+    manager.keep_recent_hours, manager.keep_daily, manager.keep_weekly, manager.keep_monthly = 0, 1, 0, 0
+    (manager.backup_dir / 'db_backup_old.tar.xz').write_bytes(b'x')
+    manager.catalog.add(_entry('db_backup_old.tar.xz', datetime.now() - timedelta(days=3)))
+
+    manager.create_backup()
+    manager._prune_thread.join(timeout=10)
+    assert not (manager.backup_dir / 'db_backup_old.tar.xz').exists()
+    assert len(manager.list_backups()) == 1
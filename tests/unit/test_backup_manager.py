@@ -0,0 +1,203 @@
+import pytest
+import os
+import sqlite3
+from datetime import datetime
+from src.database import schema
+from src.database.db_manager import DatabaseManager
+from src.utils import backup_archive
+from src.utils.backup_manager import BackupManager
+from conftest import add_slip
+
+@pytest.fixture
+def backup_manager(tmp_db):
+    return BackupManager(tmp_db)
+
+def _add(db, timestamp, amount=1000.0):
+    # Long comments make the database big enough for backups to take several steps
+    return add_slip(db, timestamp, amount, comments='x' * 500)
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+    finally:
+        conn.close()
+
+def test_backup_is_consistent_while_writing(tmp_db, backup_manager, tmp_path):
+    """Test that writes during a backup neither block nor leak into the copy."""
+    for minute in range(200):
+        _add(tmp_db, datetime(2024, 3, 1, 10, minute % 60))
+
+    steps = []
+    def progress(copied, total):
+        steps.append((copied, total))
+        _add(tmp_db, datetime(2024, 3, 2, 10, 0))
+
+    path = backup_manager.create_backup(tmp_path / "copy.db", progress=progress, pages=4)
+    assert len(steps) > 1
+    assert steps[-1][0] == steps[-1][1]
+    assert _count(path) == 200
+    assert _count(tmp_db.db_path) == 200 + len(steps)
+    assert backup_manager.verify_backup(path)
+
+def test_default_backup_is_archive_with_manifest(tmp_db, backup_manager):
+    """Test that a default backup is a compressed archive listed through its manifest."""
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+    path = backup_manager.create_backup()
+    assert path.startswith(str(backup_manager.backup_dir))
+    assert path.endswith('.tar.xz')
+    assert not list(backup_manager.backup_dir.glob('*.part'))
+    assert not list(backup_manager.backup_dir.glob('*.snapshot'))
+
+    backups = backup_manager.list_backups()
+    assert [backup['path'] for backup in backups] == [path]
+    manifest = backups[0]['manifest']
+    assert manifest['row_counts'] == {'transactions': 1, 'items': 1, 'old_items': 0}
+    assert manifest['user_version'] == schema.SCHEMA_VERSION
+    assert len(manifest['sha256']) == 64
+    assert backup_manager.verify_backup(path)
+
+def test_restore_archive_swaps_database(tmp_db, backup_manager):
+    """Test that restoring an archive replaces the live database."""
+    first = _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+    path = backup_manager.create_backup()
+    _add(tmp_db, datetime(2024, 3, 2, 10, 0))
+
+    assert backup_manager.restore_backup(path)
+    assert _count(tmp_db.db_path) == 1
+    assert [row[0] for row in tmp_db.query('SELECT id FROM transactions')] == [first]
+    assert not os.path.exists(f"{tmp_db.db_path}.restore")
+
+def test_tampered_archive_is_rejected(tmp_db, backup_manager, tmp_path):
+    """Test that an archive whose database doesn't match the manifest checksum is refused."""
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+    path = backup_manager.create_backup()
+    manifest = backup_archive.read_manifest(path)
+
+    snapshot = tmp_path / "snapshot.db"
+    backup_archive.extract_database(path, snapshot)
+    manifest['sha256'] = '0' * 64
+    tampered = tmp_path / "db_backup_tampered.tar.xz"
+    backup_archive.write_archive(snapshot, tampered, manifest)
+
+    assert not backup_manager.verify_backup(tampered)
+    with pytest.raises(Exception, match='Checksum mismatch'):
+        backup_manager.restore_backup(tampered)
+    assert _count(tmp_db.db_path) == 1
+
+def test_plain_db_destination(backup_manager, tmp_path):
+    """Test that a .db destination still gets an uncompressed copy."""
+    path = backup_manager.create_backup(tmp_path / "plain.db")
+    assert _count(path) == 0
+
+def test_verify_rejects_corrupt_file(backup_manager, tmp_path):
+    """Test that a damaged backup fails verification."""
+    path = tmp_path / "corrupt.db"
+    path.write_bytes(b'not a database' * 100)
+    assert not backup_manager.verify_backup(path)
+
+def _transaction_ids(tmp_db):
+    return [row[0] for row in tmp_db.query('SELECT id FROM transactions ORDER BY id')]
+
+def test_incremental_backup_writes_only_changes(tmp_db, backup_manager):
+    """Test that deltas hold only the transactions changed since the last backup."""
+    first = _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+    base = backup_manager.create_incremental_backup()
+    assert base.endswith('.tar.xz')
+    assert tmp_db.query('SELECT COUNT(*) FROM change_log')[0][0] == 0
+    assert backup_manager.create_incremental_backup() is None
+
+    second = _add(tmp_db, datetime(2024, 3, 2, 10, 0))
+    tmp_db.delete_transaction(first)
+    delta = backup_manager.create_incremental_backup()
+    assert delta.endswith('.jsonl.gz')
+
+    from src.database import change_journal
+    header = change_journal.read_header(delta)
+    assert header['count'] == 2
+    state = backup_manager._load_chain_state()
+    assert len(state['chains']) == 1
+    assert [d['path'] for d in state['chains'][0]['deltas']] == [os.path.basename(delta)]
+
+def test_new_base_starts_at_its_own_sequence(tmp_db, backup_manager):
+    """Test that a base taken in the same second as an older one starts the chain at its own seq."""
+    backup_manager.full_backup_interval_days = 0
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+    backup_manager.create_incremental_backup()
+    _add(tmp_db, datetime(2024, 3, 2, 10, 0))
+    second = backup_manager.create_incremental_backup()
+
+    chains = backup_manager._load_chain_state()['chains']
+    assert chains[-1]['seq'] == backup_archive.read_manifest(second)['change_log_seq']
+    assert chains[-1]['seq'] > chains[0]['seq']
+
+def test_point_in_time_restore_replays_deltas(tmp_db, backup_manager):
+    """Test that restoring replays the base plus the deltas up to the chosen time."""
+    first = _add(tmp_db, datetime(2024, 3, 1, 10, 0), amount=100.0)
+    backup_manager.create_incremental_backup()
+
+    second = _add(tmp_db, datetime(2024, 3, 2, 10, 0), amount=200.0)
+    backup_manager.create_incremental_backup()
+    state = backup_manager._load_chain_state()
+
+    # Backdate the chain so a restore point can fall between its deltas
+    state['chains'][0]['deltas'][0]['created_at'] = '2000-01-01 00:00:00'
+    state['chains'][0]['created_at'] = '2000-01-01 00:00:00'
+    backup_manager._save_chain_state(state)
+    tmp_db.update_transaction(first, {
+        'new_items': [{'code': 'SR', 'name': 'Silver Ring', 'type': 'S', 'weight': 5.0, 'amount': 50.0}],
+        'old_items': [],
+        'payment_details': {'cash': 50.0}
+    })
+    tmp_db.delete_transaction(second)
+    backup_manager.create_incremental_backup()
+    assert _transaction_ids(tmp_db) == [first]
+
+    backup_manager.restore_point_in_time('2000-01-01 00:00:00')
+    assert _transaction_ids(tmp_db) == [first, second]
+    assert tmp_db.get_monthly_report(2024, 3)['totals']['new_amount'] == 300.0
+
+    backup_manager.restore_point_in_time(datetime.now())
+    assert _transaction_ids(tmp_db) == [first]
+    assert tmp_db.get_monthly_report(2024, 3)['totals']['new_silver_weight'] == 5.0
+
+    # A restore closes the chain, so the next backup is a new base
+    assert os.path.basename(backup_manager.create_incremental_backup()).startswith('db_base_')
+
+def test_hot_restore_rebinds_every_repository(tmp_db, backup_manager):
+    """Test that a restore reaches other repositories and clears their caches."""
+    from src.services.item_service import ItemService
+    from src.utils.analytics import Analytics
+
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+    path = backup_manager.create_backup()
+
+    other = DatabaseManager(tmp_db.db_path)
+    try:
+        items = ItemService(other)
+        items.add_item('NEWCODE', 'New Code', 'G')
+        analytics = Analytics(db=other)
+        _add(other, datetime(2024, 3, 2, 10, 0))
+        assert analytics.get_monthly_statistics(2024, 3)['total_transactions'] == 2
+
+        backup_manager.restore_backup(path)
+        assert _transaction_ids(other) == _transaction_ids(tmp_db) == [1]
+        assert analytics.get_monthly_statistics(2024, 3)['total_transactions'] == 1
+        assert 'NEWCODE' not in items.ITEM_CODES
+        assert not os.path.exists(f"{tmp_db.db_path}.restore")
+    finally:
+        other.close()
+
+def test_restore_refuses_newer_schema(tmp_db, backup_manager, tmp_path):
+    """Test that a backup from a newer schema is rejected before anything is replaced."""
+    path = tmp_path / "newer.db"
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA user_version = {schema.SCHEMA_VERSION + 1}')
+    conn.execute('CREATE TABLE transactions (id INTEGER PRIMARY KEY)')
+    conn.commit()
+    conn.close()
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0))
+
+    with pytest.raises(ValueError):
+        backup_manager.restore_backup(path)
+    assert _transaction_ids(tmp_db) == [1]
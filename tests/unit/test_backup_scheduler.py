@@ -0,0 +1,115 @@
+import pytest
+import threading
+from contextlib import contextmanager
+from time import sleep
+from datetime import datetime, time, timedelta
+from src.utils.backup_manager import BackupManager
+from src.utils.backup_scheduler import BackupScheduler
+from conftest import add_slip
+
+@pytest.fixture
+def scheduler(tmp_db):
+    manager = BackupManager(tmp_db)
+    manager.auto_prune = False
+    scheduler = BackupScheduler(manager, interval_minutes=60, idle_minutes=10,
+                                day_close=time(21, 0), throttle_seconds=0)
+    yield scheduler
+    scheduler.stop(timeout=5)
+
+def test_due_reasons(scheduler):
+    """Test cadence, idle and day-close triggers."""
+    morning = datetime(2024, 3, 1, 10, 0)
+    assert scheduler.due_reason(morning) == 'cadence'
+
+    scheduler.last_run_at = morning
+    assert scheduler.due_reason(morning + timedelta(minutes=30)) is None
+    assert scheduler.due_reason(morning + timedelta(minutes=60)) == 'cadence'
+
+    scheduler._last_activity = morning + timedelta(minutes=5)
+    assert scheduler.due_reason(morning + timedelta(minutes=10)) is None
+    assert scheduler.due_reason(morning + timedelta(minutes=15)) == 'idle'
+
+    scheduler._last_activity = None
+    assert scheduler.due_reason(datetime(2024, 3, 1, 21, 5)) == 'day_close'
+    scheduler._day_closed_on = datetime(2024, 3, 1).date()
+    scheduler.last_run_at = datetime(2024, 3, 1, 21, 0)
+    assert scheduler.due_reason(datetime(2024, 3, 1, 21, 5)) is None
+
+def test_skips_when_nothing_changed(tmp_db, scheduler):
+    """Test that a due backup is skipped until another commit happens."""
+    now = datetime.now()
+    first = scheduler.run_pending(now)
+    assert first is not None
+    assert len(scheduler.backup_manager.catalog.entries()) == 1
+
+    # Due again by cadence, but data_version hasn't moved
+    scheduler.last_run_at = now - timedelta(hours=2)
+    assert scheduler.run_pending(now) is None
+    assert len(scheduler.backup_manager.catalog.entries()) == 1
+
+    add_slip(tmp_db, datetime(2024, 3, 1, 10, 0))
+    scheduler.last_run_at = now - timedelta(hours=2)
+    delta = scheduler.run_pending(now)
+    assert delta.endswith('.jsonl.gz')
+
+def test_throttles_backup_steps(tmp_db, scheduler, monkeypatch):
+    """Test that the scheduler pauses after each backup step."""
+    for _ in range(50):
+        add_slip(tmp_db, datetime(2024, 3, 1, 10, 0))
+    sleeps = []
+    monkeypatch.setattr('src.utils.backup_scheduler.time.sleep', sleeps.append)
+    scheduler.throttle_seconds = 0.01
+    scheduler.pages_per_step = 1
+
+    scheduler.run_pending(datetime.now())
+    assert len(sleeps) > 1
+    assert set(sleeps) == {0.01}
+
+def test_thread_runs_requested_backup(scheduler):
+    """Test that a requested backup runs on the scheduler thread."""
+    scheduler.last_run_at = datetime.now()
+    scheduler.day_close = None
+    scheduler.poll_seconds = 0.05
+    scheduler.start()
+    scheduler.request_backup('day_close')
+    for _ in range(100):
+        if scheduler.last_result:
+            break
+        sleep(0.05)
+    scheduler.stop(timeout=5)
+    assert scheduler.last_result is not None
+
+def test_restore_waits_for_running_backup(tmp_db, scheduler, tmp_path, monkeypatch):
+    """Test that a restore lets a running scheduler backup finish and closes its connection first."""
+    add_slip(tmp_db, datetime(2024, 3, 1, 10, 0))
+    backup = tmp_path / "before.db"
+    scheduler.backup_manager.create_backup(backup)
+    for _ in range(20):
+        add_slip(tmp_db, datetime(2024, 3, 2, 10, 0))
+
+    started = threading.Event()
+    def slow_step(seconds):
+        if not started.is_set():
+            started.set()
+            sleep(0.3)
+    monkeypatch.setattr('src.utils.backup_scheduler.time.sleep', slow_step)
+    scheduler.throttle_seconds = 0.01
+    scheduler.pages_per_step = 1
+
+    seen = []
+    @contextmanager
+    def probe():
+        seen.append((scheduler.last_result, scheduler._monitor))
+        yield
+    tmp_db.add_swap_guard(probe)
+
+    worker = threading.Thread(target=scheduler.run_pending, args=(datetime.now(),))
+    worker.start()
+    assert started.wait(5)
+    scheduler.backup_manager.restore_backup(backup)
+    worker.join(5)
+
+    assert len(seen) == 1
+    finished, monitor = seen[0]
+    assert finished is not None and monitor is None
+    assert tmp_db.query('SELECT COUNT(*) FROM transactions')[0][0] == 1
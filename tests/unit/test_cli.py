@@ -0,0 +1,124 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from src import cli
+from src.database.db_manager import DatabaseManager
+
+SRC_DIR = Path(__file__).resolve().parents[2] / 'src'
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Create a database with two days of transactions."""
+    path = str(tmp_path / "transactions.db")
+    db = DatabaseManager(path)
+    for day, amount in ((1, 1000.0), (1, 500.0), (2, 300.0)):
+        db.add_transaction({
+            'timestamp': datetime(2024, 5, day, 10, int(amount) % 60),
+            'new_items': [{'code': 'GR', 'name': 'Ring', 'type': 'G', 'weight': 1.0,
+                           'amount': amount, 'is_billable': True}],
+            'old_items': [{'type': 'S', 'weight': 2.0, 'amount': 50.0}],
+            'payment_details': {'cash': amount - 50.0, 'card': 0.0, 'upi': 0.0}
+        })
+    db.close()
+    return path
+
+def _run(capsys, *argv):
+    code = cli.main(list(argv))
+    return code, capsys.readouterr().out
+
+def test_summary_json(db_path, capsys):
+    """Test that summary totals a date range from the rollups."""
+    code, out = _run(capsys, '--db', db_path, '--json', 'summary', '--from', '2024-05-01', '--to', '02-05-2024')
+    assert code == 0
+    result = json.loads(out)
+    assert result['totals']['transaction_count'] == 3
+    assert result['totals']['cash_amount'] == 1650.0
+    assert result['top_items'][0]['code'] == 'GR'
+
+    code, out = _run(capsys, '--db', db_path, 'summary', '--date', '2024-05-02')
+    assert 'Transactions: 1' in out
+    assert '₹300.00' in out
+
+def test_export_csv(db_path, tmp_path, capsys):
+    """Test that export writes a CSV file of the selected month."""
+    out_path = tmp_path / "may.csv"
+    code, out = _run(capsys, '--db', db_path, '--json', 'export', 'csv', '--month', '2024-05', '--out', str(out_path))
+    assert code == 0
+    assert json.loads(out)['rows'] == 3
+    assert len(out_path.read_text(encoding='utf-8').splitlines()) == 4
+
+def test_backup_verify_restore(db_path, tmp_path, capsys):
+    """Test that a backup verifies and restores only with --yes."""
+    backup_path = str(tmp_path / "backup.db")
+    code, out = _run(capsys, '--db', db_path, '--json', 'backup', '--out', backup_path)
+    assert code == 0 and json.loads(out)['path'] == backup_path
+
+    code, out = _run(capsys, '--db', db_path, '--json', 'verify', backup_path)
+    assert code == 0 and json.loads(out)['ok']
+
+    code, out = _run(capsys, '--db', db_path, '--json', 'restore', backup_path)
+    assert code == 1
+    assert '--yes' in json.loads(out)['error']
+    code, _ = _run(capsys, '--db', db_path, 'restore', backup_path, '--yes')
+    assert code == 0
+
+def test_verify_reports_failures(db_path, tmp_path, capsys):
+    """Test that a damaged backup makes verify exit with status 1."""
+    broken = tmp_path / "broken.db"
+    broken.write_bytes(b'not a database')
+    code, out = _run(capsys, '--db', db_path, '--json', 'verify', str(broken))
+    assert code == 1
+    assert not json.loads(out)['checks'][0]['ok']
+
+def test_common_options_after_the_command(db_path, capsys):
+    """Test that --db, --json and --quiet work after the command as well as before it."""
+    code, out = _run(capsys, 'summary', '--db', db_path, '--json', '-q', '--month', '2024-05')
+    assert code == 0
+    assert json.loads(out)['totals']['transaction_count'] == 3
+
+    code, out = _run(capsys, '--db', db_path, '--json', 'summary', '--month', '2024-05')
+    assert code == 0 and json.loads(out)['totals']['transaction_count'] == 3
+
+def test_rebuild_rollups_and_bench(db_path, capsys):
+    """Test that rollups are rebuilt and bench times every operation."""
+    code, out = _run(capsys, '--db', db_path, '--json', 'rebuild-rollups')
+    assert code == 0 and json.loads(out)['days'] == 2
+
+    code, out = _run(capsys, '--db', db_path, '--json', 'bench', '--repeat', '2')
+    result = json.loads(out)
+    assert result['transactions'] == 3
+    assert set(result['timings']) == {'transactions_range', 'transactions_day', 'rollup_totals', 'monthly_report'}
+    assert set(result['filter_timings']) == set(cli.FILTER_BENCHMARKS)
+    assert result['filter_timings']['code']['rows'] == 3
+    assert result['filter_timings']['card_or_upi']['rows'] == 0
+
+def test_bench_synthetic(db_path, capsys):
+    """Test that bench can time the filters on a temporary synthetic database."""
+    code, out = _run(capsys, '--db', db_path, '-q', '--json', 'bench', '--synthetic', '0.02',
+                     '--slips-per-day', '4', '--repeat', '1')
+    result = json.loads(out)
+    assert code == 0 and result['synthetic']['years'] == 0.02
+    assert result['transactions'] > 3
+    assert result['filter_timings']['code']['rows'] > 0
+
+def test_runs_without_qt(db_path):
+    """Test that the CLI as a script neither imports Qt nor writes progress to stdout."""
+    script = f"""
+import runpy, sys
+sys.argv = [{str(SRC_DIR / 'cli.py')!r}, '--db', {db_path!r}, '--json', 'summary', '--month', '2024-05']
+try:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+except SystemExit as e:
+    assert e.code == 0, e.code
+heavy = [name for name in sys.modules if name.startswith(('PyQt', 'numpy', 'openpyxl'))]
+assert not heavy, heavy
+"""
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout)['totals']['transaction_count'] == 3
@@ -0,0 +1,52 @@
+import pytest
+from datetime import date, datetime
+
+np = pytest.importorskip("numpy")
+
+from src.database.db_manager import DatabaseManager
+from src.database.columnar import load_snapshot, write_snapshot
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a repository with one transaction on each of three days."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    for day in (1, 2, 3):
+        db.add_transaction({
+            'timestamp': datetime(2024, 3, day, 10, 30),
+            'new_items': [
+                {'code': 'GR', 'name': 'Gold Ring', 'type': 'G', 'weight': 2.345, 'amount': 1000.5, 'is_billable': True},
+                {'code': 'SC', 'name': 'Silver Chain', 'type': 'S', 'weight': 10.0, 'amount': 500.0, 'is_billable': False},
+            ],
+            'old_items': [{'type': 'S', 'weight': 1.0, 'amount': 300.0}],
+            'payment_details': {'cash': 1000.0, 'upi': 200.5}
+        })
+    yield db
+    db.close()
+
+def test_snapshot_round_trip(db, tmp_path):
+    """Test that a range is written as typed columns and memory-mapped back."""
+    path = tmp_path / "snapshot.npz"
+    counts = write_snapshot(db, path, date(2024, 3, 2), date(2024, 3, 3))
+    assert counts == {'item': 4, 'old': 2, 'txn': 2}
+
+    snapshot = load_snapshot(path)
+    assert isinstance(snapshot['item_amount_paise'], np.memmap)
+    assert snapshot['item_day'].dtype == np.int32
+    assert list(snapshot.dates('txn')) == [np.datetime64('2024-03-02'), np.datetime64('2024-03-03')]
+    assert list(snapshot.codes) == ['GR', 'SC']
+    assert list(snapshot['code_names']) == ['Gold Ring', 'Silver Chain']
+
+    gold_ring = snapshot['item_code'] == snapshot.code_id('GR')
+    assert snapshot['item_weight_mg'][gold_ring].sum() == 2 * 2345
+    assert snapshot['item_amount_paise'][snapshot['item_billable']].sum() == 2 * 100050
+    assert snapshot.rupees('txn_upi_paise').sum() == pytest.approx(401.0)
+    assert snapshot.grams('old_weight_mg')[snapshot['old_metal'] == 1].sum() == pytest.approx(2.0)
+    assert snapshot.code_id('XX') is None
+
+def test_empty_range(db, tmp_path):
+    """Test that a range without transactions gives empty columns."""
+    path = tmp_path / "empty.npz"
+    assert write_snapshot(db, path, date(2023, 1, 1)) == {'item': 0, 'old': 0, 'txn': 0}
+    snapshot = load_snapshot(path)
+    assert len(snapshot['item_day']) == 0
+    assert snapshot.meta['start_date'] == '2023-01-01'
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from src.database import schema
+from src.database.db_manager import DatabaseManager
+from src.services.item_service import ItemService
+from conftest import add_slip
+
+SRC_DIR = Path(__file__).resolve().parents[2] / 'src'
+
+# Saves `count` slips from one process, each with a gold and an old silver item
+WRITER_SCRIPT = '''
+import sys
+from datetime import datetime
+from database.db_manager import DatabaseManager
+
+db_path, terminal, count = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+db = DatabaseManager(db_path)
+db.busy_timeout_ms = 200
+db.write_retries = 50
+for n in range(count):
+    db.add_transaction({
+        'timestamp': datetime(2024, 5, 1 + n % 3, 10, terminal, n % 60),
+        'new_items': [{'code': 'GR', 'name': 'Ring', 'type': 'G', 'weight': 1.0,
+                       'amount': 100.0, 'is_billable': True}],
+        'old_items': [{'type': 'S', 'weight': 2.0, 'amount': 10.0}],
+        'payment_details': {'cash': 90.0, 'card': 0.0, 'upi': 0.0}
+    })
+db.close()
+'''
+
+def test_terminals_write_concurrently(tmp_db):
+    """Test that several processes saving at once lose no slips and keep the rollups right."""
+    terminals, count = 4, 25
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    writers = [
+        subprocess.Popen([sys.executable, '-c', WRITER_SCRIPT, tmp_db.db_path, str(terminal), str(count)],
+                         env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for terminal in range(terminals)
+    ]
+    for writer in writers:
+        _, stderr = writer.communicate(timeout=120)
+        assert writer.returncode == 0, stderr.decode()
+
+    total = terminals * count
+    assert tmp_db.query('SELECT COUNT(*) FROM transactions')[0][0] == total
+    assert tmp_db.query('SELECT COUNT(*) FROM items')[0][0] == total
+    assert tmp_db.query('SELECT COUNT(*) FROM old_items')[0][0] == total
+    transactions, items, old_items, cash = tmp_db.query('''
+        SELECT SUM(transaction_count), SUM(item_count), SUM(old_item_count), SUM(cash_amount)
+        FROM daily_totals
+    ''')[0]
+    assert (transactions, items, old_items) == (total, total, total)
+    assert cash == pytest.approx(90.0 * total)
+
+def test_write_retries_while_locked(tmp_db):
+    """Test that a write waits for another connection's write lock to be released."""
+    tmp_db.busy_timeout_ms = 10
+    tmp_db.retry_backoff_seconds = 0.01
+    tmp_db.write_retries = 8
+    tmp_db.reconnect()
+
+    other = sqlite3.connect(tmp_db.db_path, isolation_level=None, check_same_thread=False)
+    other.execute('BEGIN IMMEDIATE')
+    releaser = threading.Timer(0.2, other.execute, args=('COMMIT',))
+    releaser.start()
+    try:
+        transaction_id = add_slip(tmp_db, datetime(2024, 5, 1, 10, 0))
+    finally:
+        releaser.join()
+        other.close()
+    assert tmp_db.query('SELECT id FROM transactions')[0][0] == transaction_id
+
+def test_item_save_retries_while_locked(tmp_db):
+    """Test that item master writes take the same retried write path as slips."""
+    items = ItemService(tmp_db)
+    tmp_db.busy_timeout_ms = 10
+    tmp_db.retry_backoff_seconds = 0.01
+    tmp_db.write_retries = 8
+    tmp_db.reconnect()
+
+    other = sqlite3.connect(tmp_db.db_path, isolation_level=None, check_same_thread=False)
+    other.execute('BEGIN IMMEDIATE')
+    releaser = threading.Timer(0.2, other.execute, args=('COMMIT',))
+    releaser.start()
+    try:
+        assert items.add_item('GR', 'Gold Ring', 'G')
+    finally:
+        releaser.join()
+        other.close()
+    assert tmp_db.query("SELECT name FROM item_codes WHERE code = 'GR'") == [('Gold Ring',)]
+
+def test_write_gives_up_after_retries(tmp_db):
+    """Test that a write still locked after its retries raises and leaves nothing behind."""
+    tmp_db.busy_timeout_ms = 10
+    tmp_db.retry_backoff_seconds = 0.001
+    tmp_db.write_retries = 2
+    tmp_db.reconnect()
+
+    other = sqlite3.connect(tmp_db.db_path, isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            add_slip(tmp_db, datetime(2024, 5, 1, 10, 0))
+    finally:
+        other.execute('ROLLBACK')
+        other.close()
+    assert tmp_db.query('SELECT COUNT(*) FROM transactions')[0][0] == 0
+    assert not tmp_db.conn.in_transaction
+
+def test_poll_reports_dates_changed_elsewhere(tmp_db, tmp_path):
+    """Test that poll_external_changes reports other connections' dates, not our own."""
+    other = DatabaseManager(tmp_db.db_path)
+    try:
+        notified = []
+        tmp_db.add_change_listener(notified.append)
+        assert tmp_db.poll_external_changes() == set()
+
+        add_slip(tmp_db, datetime(2024, 5, 1, 10, 0))
+        notified.clear()
+        assert tmp_db.poll_external_changes() == set()
+
+        add_slip(other, datetime(2024, 5, 2, 10, 0))
+        moved = add_slip(other, datetime(2024, 5, 3, 10, 0))
+        other.update_transaction(moved, {
+            'timestamp': datetime(2024, 5, 4, 10, 0),
+            'new_items': [], 'old_items': [],
+            'payment_details': {'cash': 0.0, 'card': 0.0, 'upi': 0.0}
+        })
+        assert tmp_db.poll_external_changes() == {'2024-05-02', '2024-05-03', '2024-05-04'}
+        assert notified == [{'2024-05-02', '2024-05-03', '2024-05-04'}]
+        assert tmp_db.poll_external_changes() == set()
+    finally:
+        other.close()
+
+def test_poll_after_pruned_log_is_unknown(tmp_db):
+    """Test that poll_external_changes returns None when the log was pruned past the last poll."""
+    other = DatabaseManager(tmp_db.db_path)
+    try:
+        add_slip(other, datetime(2024, 5, 2, 10, 0))
+        last_seq = other.query('SELECT MAX(seq) FROM change_log')[0][0]
+        other.prune_change_log(last_seq)
+        assert tmp_db.poll_external_changes() is None
+        assert tmp_db.poll_external_changes() == set()
+    finally:
+        other.close()
+
+def test_version_3_change_log_gains_dates(tmp_path):
+    """Test that a version 3 database gets the change_log date column and new triggers."""
+    path = tmp_path / "v3.db"
+    conn = sqlite3.connect(path)
+    conn.execute(schema.transactions_table_sql())
+    conn.execute('''
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id INTEGER NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER change_log_transactions_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO change_log (transaction_id) VALUES (NEW.id);
+        END
+    ''')
+    conn.execute('PRAGMA user_version = 3')
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(str(path))
+    try:
+        assert db.query('PRAGMA user_version')[0][0] == schema.SCHEMA_VERSION
+        add_slip(db, datetime(2024, 5, 2, 10, 0))
+        dates = {row[0] for row in db.query('SELECT date FROM change_log')}
+        assert dates == {'2024-05-02'}
+    finally:
+        db.close()
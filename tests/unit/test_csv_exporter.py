@@ -0,0 +1,62 @@
+import pytest
+import csv
+import gzip
+import sys
+from datetime import date, datetime
+from src.database.db_manager import DatabaseManager
+from src.utils.backup_manager import BackupManager
+from src.utils.csv_exporter import CsvExporter
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a repository with one transaction on each of three days."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    for day in (1, 2, 3):
+        db.add_transaction({
+            'timestamp': datetime(2024, 3, day, 10, 30),
+            'new_items': [
+                {'code': 'GR', 'name': 'Gold Ring', 'type': 'G', 'weight': 2.5, 'amount': 1000.0},
+                {'code': 'SC', 'name': 'Silver, Chain', 'type': 'S', 'weight': 10.0, 'amount': 500.0},
+            ],
+            'old_items': [{'type': 'G', 'weight': 1.0, 'amount': 300.0}],
+            'payment_details': {'cash': 1200.0},
+            'comments': 'note "quoted"'
+        })
+    yield db
+    db.close()
+
+def _read(path, opener=open):
+    with opener(path, 'rt', newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+def test_layouts(db, tmp_path):
+    """Test the transactions, items and old items layouts for a date range."""
+    exporter = CsvExporter(db, batch_size=1)
+
+    assert exporter.export(tmp_path / "t.csv", date(2024, 3, 1), date(2024, 3, 2)) == 2
+    rows = _read(tmp_path / "t.csv")
+    assert rows[0][:2] == ["id", "date"]
+    assert [row[1] for row in rows[1:]] == ["2024-03-01", "2024-03-02"]
+    assert rows[1][-1] == 'note "quoted"'
+
+    assert exporter.export(tmp_path / "i.csv", layout='items') == 6
+    items = _read(tmp_path / "i.csv")
+    assert items[2][3:6] == ["SC", "Silver, Chain", "S"]
+
+    assert exporter.export(tmp_path / "o.csv", date(2024, 3, 3), layout='old_items') == 1
+
+    with pytest.raises(ValueError):
+        exporter.export(tmp_path / "x.csv", layout='unknown')
+
+def test_gzip_output(db, tmp_path):
+    """Test that .gz paths are compressed."""
+    path = tmp_path / "items.csv.gz"
+    CsvExporter(db).export(path, layout='items')
+    assert len(_read(path, gzip.open)) == 7
+
+def test_backup_manager_export_without_pandas(db):
+    """Test that BackupManager exports CSV without importing pandas."""
+    manager = BackupManager(db)
+    path = manager.export_to_csv('2024-03-02', '2024-03-03', layout='items')
+    assert len(_read(path)) == 5
+    assert 'pandas' not in sys.modules
@@ -0,0 +1,96 @@
+import http.client
+import json
+import pytest
+from datetime import datetime
+from src.database.db_manager import DatabaseManager
+from src.database.dashboard_api import DashboardServer
+from src.database.result_cache import ResultCache
+from conftest import add_slip
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a repository with three slips over two days."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    for day, amount, billable in ((1, 1000.0, True), (1, 500.0, False), (2, 300.0, True)):
+        add_slip(db, datetime(2024, 5, day, 10, int(amount) % 60), amount, is_billable=billable)
+    yield db
+    db.close()
+
+@pytest.fixture
+def server(db):
+    """Serve the repository on a free localhost port."""
+    server = DashboardServer(db, port=0).start()
+    yield server
+    server.stop()
+
+def _get(connection, path, headers=None):
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    return response.status, response.getheader('ETag'), json.loads(body) if body else None
+
+def test_summaries(server):
+    """Test that day, range, billable and recent summaries come from the rollups."""
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    status, _, day = _get(connection, '/day?date=2024-05-01')
+    assert status == 200
+    assert day['totals']['transaction_count'] == 2
+    assert day['totals']['cash_amount'] == 1500.0
+
+    _, _, summary = _get(connection, '/range?from=2024-05-01&to=2024-05-02')
+    assert summary['totals']['day_count'] == 2
+    assert [row['date'] for row in summary['days']] == ['2024-05-01', '2024-05-02']
+
+    _, _, billable = _get(connection, '/billable?from=2024-05-01&to=2024-05-31')
+    assert billable['totals']['billable_amount'] == 1300.0
+    assert billable['items'][0]['code'] == 'GR' and billable['items'][0]['amount'] == 1800.0
+
+    _, _, recent = _get(connection, '/recent?limit=2')
+    assert [t['cash_amount'] for t in recent['transactions']] == [300.0, 500.0]
+    connection.close()
+
+def test_conditional_get(db, server):
+    """Test that an unchanged summary is revalidated with 304 and a write changes the ETag."""
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    status, etag, _ = _get(connection, '/day?date=2024-05-02')
+    assert status == 200 and etag
+
+    status, again, body = _get(connection, '/day?date=2024-05-02', {'If-None-Match': etag})
+    assert (status, again, body) == (304, etag, None)
+
+    db.add_transaction({
+        'timestamp': datetime(2024, 5, 2, 15, 0),
+        'new_items': [], 'old_items': [],
+        'payment_details': {'cash': 20.0, 'card': 0.0, 'upi': 0.0}
+    })
+    status, new_etag, day = _get(connection, '/day?date=2024-05-02', {'If-None-Match': etag})
+    assert status == 200 and new_etag != etag
+    assert day['totals']['transaction_count'] == 2
+    connection.close()
+
+def test_serves_from_shared_cache(db):
+    """Test that responses are kept in the cache passed in, until a write drops them."""
+    cache = ResultCache(db)
+    server = DashboardServer(db, cache, port=0)
+    status, first, _ = server.handle_get('/range', {'from': '2024-05-01', 'to': '2024-05-02'})
+    assert status == 200 and len(cache) == 1
+    assert server.handle_get('/range', {'from': '2024-05-01', 'to': '2024-05-02'})[1] is first
+
+    db.delete_all_transactions_for_date('2024-05-02')
+    assert len(cache) == 0
+    server.stop()
+
+def test_rejects_bad_requests(server):
+    """Test that writes, unknown paths and bad parameters are refused."""
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    connection.request('POST', '/day', body=b'{}')
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 405 and response.getheader('Allow') == 'GET'
+    connection.close()
+
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    assert _get(connection, '/nothing')[0] == 404
+    assert _get(connection, '/range?from=2024-05-02&to=2024-05-01')[0] == 400
+    assert _get(connection, '/recent?limit=5000')[0] == 400
+    connection.close()
@@ -1,5 +1,6 @@
 import pytest
 from datetime import datetime
+from src.database import db_manager
 from src.database.db_manager import DatabaseManager
 
 def test_init_db(test_db):
@@ -88,4 +89,32 @@ def test_get_transaction_summary(test_db, sample_transaction):
     assert 'total_amount' in summary
     assert 'total_weight' in summary
     assert summary['total_amount'] == sample_transaction['new_items'][0]['amount'] + sample_transaction['old_items'][0]['amount']
-    assert summary['total_weight'] == sample_transaction['new_items'][0]['weight'] + sample_transaction['old_items'][0]['weight'] 
\ No newline at end of file
+    assert summary['total_weight'] == sample_transaction['new_items'][0]['weight'] + sample_transaction['old_items'][0]['weight'] 
+
+def _journal_mode(db):
+    return db.query('PRAGMA journal_mode')[0][0]
+
+def test_journal_mode_follows_the_file_system(tmp_path, monkeypatch):
+    """Test that local files use WAL and files on a network share the rollback journal."""
+    monkeypatch.delenv('DAILY_REGISTER_JOURNAL_MODE', raising=False)
+    monkeypatch.setattr(db_manager, '_is_network_path', lambda path: False)
+    local = DatabaseManager(str(tmp_path / "local.db"))
+    assert _journal_mode(local) == 'wal'
+    local.close()
+
+    monkeypatch.setattr(db_manager, '_is_network_path', lambda path: True)
+    shared = DatabaseManager(str(tmp_path / "shared.db"))
+    assert _journal_mode(shared) == 'delete'
+    shared.close()
+
+def test_journal_mode_setting(tmp_path, monkeypatch):
+    """Test that DAILY_REGISTER_JOURNAL_MODE overrides the choice and rejects unknown modes."""
+    monkeypatch.setattr(db_manager, '_is_network_path', lambda path: False)
+    monkeypatch.setenv('DAILY_REGISTER_JOURNAL_MODE', 'delete')
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    assert _journal_mode(db) == 'delete'
+    db.close()
+
+    monkeypatch.setenv('DAILY_REGISTER_JOURNAL_MODE', 'memory')
+    with pytest.raises(ValueError):
+        db_manager.journal_mode_for(str(tmp_path / "transactions.db"))
@@ -0,0 +1,45 @@
+import pytest
+import sqlite3
+from datetime import date, datetime
+from src.services.db_service import DatabaseService
+from conftest import add_slip
+
+@pytest.fixture
+def db_service(tmp_path):
+    """Create a database service on a temporary file."""
+    service = DatabaseService(str(tmp_path / "transactions.db"))
+    yield service
+    service.db.close()
+
+def _add(service, timestamp, comments):
+    add_slip(service.db, timestamp, code='GCH', name='Gold Chain', comments=comments)
+
+def test_get_transactions_by_date(db_service):
+    """Test that transactions fall in the day of their timestamp only."""
+    _add(db_service, datetime(2024, 3, 1, 23, 59, 59), 'first')
+    _add(db_service, datetime(2024, 3, 2, 0, 0, 0), 'second')
+    _add(db_service, datetime(2024, 3, 2, 18, 30, 0), 'third')
+    _add(db_service, datetime(2024, 3, 3, 0, 0, 0), 'fourth')
+    
+    transactions = db_service.get_transactions_by_date(date(2024, 3, 2))
+    assert [t['comments'] for t in transactions] == ['second', 'third']
+    assert transactions[1]['time'] == '18:30:00'
+
+def test_get_transactions_range_is_inclusive(db_service):
+    """Test that the range includes the whole end day."""
+    _add(db_service, datetime(2024, 3, 1, 10, 0, 0), 'first')
+    _add(db_service, datetime(2024, 3, 2, 23, 59, 59), 'second')
+    _add(db_service, datetime(2024, 3, 3, 0, 0, 0), 'third')
+    
+    transactions = db_service.get_transactions_range(date(2024, 3, 1), datetime(2024, 3, 2))
+    assert [t['comments'] for t in transactions] == ['second', 'first']
+
+def test_date_lookup_uses_date_index(db_service):
+    """Test that date filtering is an index seek rather than a table scan."""
+    conn = sqlite3.connect(db_service.db_path)
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE date BETWEEN ? AND ?",
+        ('2024-03-01', '2024-03-02')
+    ).fetchall()
+    conn.close()
+    assert any('idx_transactions_date' in row[-1] for row in plan)
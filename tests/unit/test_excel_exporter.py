@@ -0,0 +1,33 @@
+import pytest
+from datetime import date, datetime
+from src.utils.excel_exporter import ExcelExporter
+from conftest import add_slip
+
+openpyxl = pytest.importorskip("openpyxl")
+
+def _add(db, day, amount):
+    return add_slip(db, datetime(2024, 3, day, 10, 30), new_items=[
+        {'code': 'GR', 'name': 'Gold Ring', 'type': 'G', 'weight': 2.5, 'amount': amount, 'is_billable': True},
+        {'code': 'SC', 'name': 'Silver Chain', 'type': 'S', 'weight': 10.0, 'amount': 500.0, 'is_billable': False},
+    ], old_items=[{'type': 'G', 'weight': 1.0, 'amount': 300.0}], payment={'cash': amount + 200.0})
+
+def test_export_range_streams_all_sheets(tmp_db, tmp_path):
+    """Test that a range export writes every row and the SQL summary."""
+    for day in (1, 2, 3):
+        _add(tmp_db, day, 1000.0 * day)
+
+    path = ExcelExporter(tmp_db).export_range(date(2024, 3, 1), date(2024, 3, 2), tmp_path / "out.xlsx")
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Summary", "Transactions", "Items", "Old Items"]
+
+    items = list(workbook["Items"].iter_rows(min_row=2, values_only=True))
+    assert len(items) == 4
+    assert items[0][2:6] == ('GR', 'Gold Ring', 'G', 'Yes')
+    assert workbook["Items"]["G2"].number_format == "0.000"
+    assert workbook["Items"]["H2"].number_format.startswith("₹")
+    assert len(list(workbook["Old Items"].iter_rows(min_row=2))) == 2
+
+    summary = {row[0]: row[1] for row in workbook["Summary"].iter_rows(values_only=True) if row and row[0]}
+    assert summary["Transactions"] == 2
+    assert summary["New items amount"] == pytest.approx(1000.0 + 2000.0 + 2 * 500.0)
+    assert summary["Old items amount"] == pytest.approx(600.0)
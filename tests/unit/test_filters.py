@@ -0,0 +1,97 @@
+import pytest
+from datetime import date, datetime
+from src.database.db_manager import DatabaseManager
+from src.database.filters import RegisterFilter
+from src.views.view_models import TransactionViewModel
+
+def _slip(timestamp, comments, items, payment):
+    total = sum(item['amount'] for item in items)
+    return {
+        'timestamp': timestamp,
+        'comments': comments,
+        'new_items': [dict(item, name=item['code']) for item in items],
+        'old_items': [],
+        'payment_details': {mode: total if mode == payment else 0.0 for mode in ('cash', 'card', 'upi')}
+    }
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a repository with slips of different items and payments."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    db.add_transaction(_slip(datetime(2024, 3, 5, 10, 0), 'ring', [
+        {'code': 'GR', 'type': 'G', 'weight': 3.5, 'amount': 21000.0, 'is_billable': True}
+    ], 'cash'))
+    db.add_transaction(_slip(datetime(2024, 3, 9, 11, 0), 'chain and anklet', [
+        {'code': 'GCH', 'type': 'G', 'weight': 10.0, 'amount': 64000.0, 'is_billable': False},
+        {'code': 'SAN', 'type': 'S', 'weight': 40.0, 'amount': 3200.0, 'is_billable': True}
+    ], 'card'))
+    db.add_transaction(_slip(datetime(2024, 4, 2, 12, 0), 'anklet', [
+        {'code': 'SAN', 'type': 'SILVER', 'weight': 25.0, 'amount': 2000.0, 'is_billable': False}
+    ], 'upi'))
+    yield db
+    db.close()
+
+def _comments(db, **fields):
+    return [t['comments'] for t in db.get_filtered_transactions(RegisterFilter(**fields))]
+
+def test_item_conditions(db):
+    """Test that code, prefix, metal, billable and weight select slips by their items."""
+    assert _comments(db, code='gr') == ['ring']
+    assert _comments(db, code_prefix='G') == ['chain and anklet', 'ring']
+    assert _comments(db, code_prefix='S', from_date='2024-03-01', to_date='2024-03-31') == ['chain and anklet']
+    assert _comments(db, metal='silver') == ['anklet', 'chain and anklet']
+    assert _comments(db, metal='gold', billable=True) == ['ring']
+    assert _comments(db, min_weight=20, max_weight=30) == ['anklet']
+
+def test_conditions_hold_for_the_same_item(db):
+    """Test that item conditions must all match one item, not different items of a slip."""
+    assert _comments(db, code='GCH', billable=True) == []
+    assert _comments(db, metal='gold', min_weight=40) == []
+    assert _comments(db, metal='silver', min_weight=40) == ['chain and anklet']
+
+def test_payment_and_amount(db):
+    """Test that payment modes and the slip total band filter slips."""
+    assert _comments(db, payment_modes=('card', 'upi')) == ['anklet', 'chain and anklet']
+    assert _comments(db, min_amount=10000, max_amount=30000) == ['ring']
+    assert _comments(db, min_amount=10000, from_date=date(2024, 3, 6)) == ['chain and anklet']
+    assert _comments(db) == ['anklet', 'chain and anklet', 'ring']
+
+def test_invalid_values():
+    """Test that unknown metals and payment modes are rejected and blank codes ignored."""
+    with pytest.raises(ValueError):
+        RegisterFilter(metal='platinum')
+    with pytest.raises(ValueError):
+        RegisterFilter(payment_modes=('cheque',))
+    assert RegisterFilter(code=' gr ', code_prefix=' ') == RegisterFilter(code='GR')
+    assert RegisterFilter(code_prefix=' ').where() == ('1', [])
+    assert RegisterFilter(from_date='2024-03-01').is_empty() is False
+    assert RegisterFilter(from_date='2024-03-01').has_conditions() is False
+
+def test_blank_prefix_through_search(db):
+    """Test that search ignores a blank code prefix instead of failing."""
+    assert len(db.search_transactions('', code_prefix=' ')) == 3
+
+def test_register_summary_totals_the_filtered_rows(db):
+    """Test that the register shows and totals only the slips the filter selects."""
+    view_model = TransactionViewModel(db)
+    data = view_model.get_register_data(date(2024, 3, 1), date(2024, 4, 30), RegisterFilter(metal='silver'))
+    assert [t['comments'] for t in data['transactions']] == ['anklet', 'chain and anklet']
+    assert data['summary']['upi_total'] == 2000.0
+    assert data['summary']['card_total'] == 67200.0
+    assert data['summary']['cash_total'] == 0
+    assert data['summary']['new_silver_weight'] == 65.0
+
+@pytest.mark.parametrize('fields, index', [
+    ({'metal': 'gold', 'billable': True, 'from_date': '2024-03-01'}, 'idx_items_filter'),
+    ({'code': 'GR', 'from_date': '2024-03-01', 'to_date': '2024-03-31'}, 'idx_items_code'),
+    ({'code_prefix': 'S'}, 'idx_items_code'),
+    ({'min_amount': 50000}, 'idx_transactions_amount'),
+])
+def test_query_plan_uses_indexes(db, fields, index):
+    """Test that the compiled conditions are answered from the covering indexes."""
+    db.query('ANALYZE')
+    where, params = RegisterFilter(**fields).where()
+    plan = ' '.join(row[-1] for row in db.query(
+        f'EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE {where}', params
+    ))
+    assert index in plan
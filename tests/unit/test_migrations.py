@@ -0,0 +1,83 @@
+import pytest
+import json
+import sqlite3
+from datetime import date
+from src.database.db_manager import DatabaseManager
+from src.database.schema import SCHEMA_VERSION
+
+JSON_BLOB_SCHEMA = """
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        new_items TEXT,
+        old_items TEXT,
+        comments TEXT,
+        cash_amount REAL DEFAULT 0,
+        card_amount REAL DEFAULT 0,
+        upi_amount REAL DEFAULT 0
+    )
+"""
+
+@pytest.fixture
+def legacy_db_path(tmp_path):
+    """Create a database in the JSON-blob layout of the old DatabaseService."""
+    db_path = str(tmp_path / "transactions.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(JSON_BLOB_SCHEMA)
+    conn.executemany(
+        "INSERT INTO transactions (id, timestamp, new_items, old_items, comments, cash_amount, card_amount, upi_amount) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (3, '2024-03-02T10:15:00',
+             json.dumps([{'code': 'GCH', 'name': 'Gold Chain', 'weight': 10.5, 'amount': 50000.0, 'is_billable': True},
+                         {'code': 'SRG', 'name': 'Silver Ring', 'weight': 4.0, 'amount': 800.0}]),
+             json.dumps([{'type': 'G', 'weight': 5.0, 'amount': 25000.0}]),
+             'Sharma ring', 20000.0, 5000.0, 0.0),
+            (7, '2024-03-03 09:00:00', 'not json', None, '', 100.0, 0.0, 0.0),
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+def test_json_blob_rows_are_normalized(legacy_db_path):
+    """Test that opening a JSON-blob database converts it to the normalized tables."""
+    db = DatabaseManager(legacy_db_path)
+    try:
+        transactions = db.get_transactions_by_date(date(2024, 3, 2))
+        assert len(transactions) == 1
+        transaction = transactions[0]
+        assert transaction['id'] == 3
+        assert transaction['timestamp'] == '2024-03-02 10:15:00'
+        assert transaction['comments'] == 'Sharma ring'
+        assert transaction['net_amount_paid'] == 25000.0
+        assert [(i['code'], i['type'], i['is_billable']) for i in transaction['new_items']] == [
+            ('GCH', 'G', True), ('SRG', 'S', False)
+        ]
+        assert transaction['old_items'][0]['weight'] == 5.0
+
+        # Malformed blobs become transactions without items
+        broken = db.get_transactions_by_date(date(2024, 3, 3))
+        assert broken[0]['id'] == 7
+        assert broken[0]['new_items'] == []
+
+        cursor = db.conn.cursor()
+        cursor.execute('PRAGMA user_version')
+        assert cursor.fetchone()[0] == SCHEMA_VERSION
+    finally:
+        db.close()
+
+def test_migration_runs_once(legacy_db_path):
+    """Test that reopening a migrated database keeps its data and ids."""
+    DatabaseManager(legacy_db_path).close()
+    db = DatabaseManager(legacy_db_path)
+    try:
+        new_id = db.add_transaction({
+            'new_items': [], 'old_items': [], 'payment_details': {'cash': 1.0}
+        })
+        assert new_id == 8
+        cursor = db.conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM items')
+        assert cursor.fetchone()[0] == 2
+    finally:
+        db.close()
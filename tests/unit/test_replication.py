@@ -0,0 +1,204 @@
+import gzip
+import sqlite3
+import pytest
+from datetime import datetime
+from src.database import replication
+from src.database.db_manager import DatabaseManager
+from src.database.head_office import HeadOfficeDatabase
+from src.utils.backup_manager import BackupManager
+from conftest import make_slip
+
+@pytest.fixture
+def branches(tmp_path):
+    """Create two branch registers."""
+    dbs = []
+    for name in ('Main Road', 'Market'):
+        db = DatabaseManager(str(tmp_path / f"{name}.db"))
+        replication.set_branch_name(db, name)
+        dbs.append(db)
+    yield dbs
+    for db in dbs:
+        db.close()
+
+@pytest.fixture
+def head_office(tmp_path):
+    """Create an empty head office database."""
+    db = HeadOfficeDatabase(str(tmp_path / "head_office.db"))
+    yield db
+    db.close()
+
+def _slip(timestamp, amount, old_amount=0.0):
+    return make_slip(timestamp, amount, is_billable=True,
+                     old_items=[{'type': 'S', 'weight': 2.0, 'amount': old_amount}] if old_amount else [],
+                     payment={'cash': amount - old_amount, 'card': 0.0, 'upi': 0.0})
+
+def _totals(head_office):
+    return {row['name']: (row['transaction_count'], row['cash_amount'])
+            for row in head_office.branch_totals('2024-05-01', '2024-05-31')}
+
+def test_branches_consolidate_at_head_office(branches, head_office, tmp_path):
+    """Test that changesets of several branches build one register with per-branch rows."""
+    usb = tmp_path / "usb"
+    main_road, market = branches
+    main_road.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0, 100.0))
+    main_road.add_transaction(_slip(datetime(2024, 5, 2, 10, 0), 500.0))
+    market.add_transaction(_slip(datetime(2024, 5, 1, 11, 0), 300.0))
+
+    assert replication.export_changeset(main_road, usb)['full']
+    replication.export_changeset(market, usb)
+    applied = head_office.apply_directory(usb)
+    assert [header['applied'] for header in applied] == [True, True]
+
+    assert _totals(head_office) == {'Main Road': (2, 1400.0), 'Market': (1, 300.0)}
+    # Both branches have a transaction with id 1; they stay apart
+    assert head_office.query('SELECT COUNT(*) FROM transactions WHERE source_id = 1')[0][0] == 2
+    assert head_office.query('SELECT COUNT(*) FROM old_items')[0][0] == 1
+    transactions, cash = head_office.query(
+        "SELECT transaction_count, cash_amount FROM daily_totals WHERE date = '2024-05-01'"
+    )[0]
+    assert (transactions, cash) == (2, 1200.0)
+
+def test_incremental_changesets_carry_updates_and_deletes(branches, head_office, tmp_path):
+    """Test that later changesets hold only the changes and apply them at the head office."""
+    branch = branches[0]
+    kept = branch.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0))
+    removed = branch.add_transaction(_slip(datetime(2024, 5, 1, 11, 0), 200.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "first")['path'])
+
+    assert replication.export_changeset(branch, tmp_path / "empty") is None
+
+    branch.update_transaction(kept, _slip(datetime(2024, 5, 3, 10, 0), 700.0))
+    branch.delete_transaction(removed)
+    branch.add_transaction(_slip(datetime(2024, 5, 4, 10, 0), 50.0))
+    header = replication.export_changeset(branch, tmp_path / "second")
+    assert not header['full'] and header['count'] == 3
+    head_office.apply_changeset(header['path'])
+
+    rows = head_office.query('SELECT source_id, date, cash_amount FROM transactions ORDER BY source_id')
+    assert rows == [(kept, '2024-05-03', 700.0), (removed + 1, '2024-05-04', 50.0)]
+    days = dict(head_office.query('SELECT date, transaction_count FROM daily_totals'))
+    assert days == {'2024-05-03': 1, '2024-05-04': 1}
+    assert head_office.query('SELECT COUNT(*) FROM items')[0][0] == 2
+
+def test_applying_twice_changes_nothing(branches, head_office, tmp_path):
+    """Test that a changeset applied again, or an older one applied late, is skipped."""
+    branch = branches[0]
+    branch.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0))
+    first = replication.export_changeset(branch, tmp_path)
+    branch.add_transaction(_slip(datetime(2024, 5, 2, 10, 0), 500.0))
+    second = replication.export_changeset(branch, tmp_path)
+
+    assert head_office.apply_changeset(first['path'])['applied']
+    assert head_office.apply_changeset(second['path'])['applied']
+    assert not head_office.apply_changeset(second['path'])['applied']
+    assert not head_office.apply_changeset(first['path'])['applied']
+    assert head_office.apply_directory(tmp_path) and _totals(head_office) == {'Main Road': (2, 1500.0)}
+
+def test_missing_changeset_is_refused(branches, head_office, tmp_path):
+    """Test that an incremental changeset after a gap is refused and a full one recovers."""
+    branch = branches[0]
+    branch.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "a")['path'])
+    branch.add_transaction(_slip(datetime(2024, 5, 2, 10, 0), 500.0))
+    replication.export_changeset(branch, tmp_path / "lost")
+    branch.add_transaction(_slip(datetime(2024, 5, 3, 10, 0), 250.0))
+    later = replication.export_changeset(branch, tmp_path / "b")
+
+    with pytest.raises(ValueError, match='missing'):
+        head_office.apply_changeset(later['path'])
+    assert _totals(head_office) == {'Main Road': (1, 1000.0)}
+
+    full = replication.export_changeset(branch, tmp_path / "c", full=True)
+    head_office.apply_changeset(full['path'])
+    assert _totals(head_office) == {'Main Road': (3, 1750.0)}
+
+def test_pruned_log_exports_full_changeset(branches, head_office, tmp_path):
+    """Test that a branch whose change log lost entries past the watermark sends everything."""
+    branch = branches[0]
+    gone = branch.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "a")['path'])
+
+    branch.delete_transaction(gone)
+    branch.add_transaction(_slip(datetime(2024, 5, 2, 10, 0), 500.0))
+    conn = sqlite3.connect(branch.db_path)
+    conn.execute('DELETE FROM change_log')
+    conn.commit()
+    conn.close()
+
+    header = replication.export_changeset(branch, tmp_path / "b")
+    assert header['full'] and header['count'] == 1
+    head_office.apply_changeset(header['path'])
+    assert _totals(head_office) == {'Main Road': (1, 500.0)}
+
+def test_stale_full_changeset_is_skipped(branches, head_office, tmp_path):
+    """Test that a full changeset older than the applied ones doesn't roll the branch back."""
+    branch = branches[0]
+    branch.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0))
+    stale = replication.export_changeset(branch, tmp_path / "a", full=True)
+    branch.add_transaction(_slip(datetime(2024, 5, 2, 10, 0), 500.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "b", full=True)['path'])
+
+    assert head_office.apply_changeset(stale['path'])['applied'] is False
+    assert _totals(head_office) == {'Main Road': (2, 1500.0)}
+    assert head_office.branches()[0]['last_seq'] > stale['to_seq']
+
+def test_rejects_other_files(head_office, tmp_path):
+    """Test that a file that isn't a changeset is refused."""
+    path = tmp_path / "backup.changeset.jsonl.gz"
+    with gzip.open(path, 'wt') as f:
+        f.write('{"type": "header", "from_seq": 0}\n')
+    with pytest.raises(ValueError, match='Not a changeset'):
+        head_office.apply_changeset(path)
+
+def test_backup_base_keeps_changes_for_the_next_changeset(branches, head_office, tmp_path):
+    """Test that an incremental backup's new base doesn't prune changes not yet replicated."""
+    branch = branches[0]
+    for minute in range(5):
+        branch.add_transaction(_slip(datetime(2024, 5, 1, 10, minute), 100.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "a")['path'])
+
+    for minute in range(2):
+        branch.add_transaction(_slip(datetime(2024, 5, 2, 10, minute), 200.0))
+    BackupManager(branch).create_incremental_backup()
+
+    header = replication.export_changeset(branch, tmp_path / "b")
+    assert not header['full'] and header['count'] == 2
+    head_office.apply_changeset(header['path'])
+    assert _totals(head_office) == {'Main Road': (7, 900.0)}
+
+def test_restore_exports_full_changeset(branches, head_office, tmp_path):
+    """Test that the first changeset after a restore is full and replaces the branch's rows."""
+    branch = branches[0]
+    for minute in range(3):
+        branch.add_transaction(_slip(datetime(2024, 5, 1, 10, minute), 100.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "a")['path'])
+    backup = tmp_path / "before.db"
+    BackupManager(branch).create_backup(backup)
+
+    for minute in range(5):
+        branch.add_transaction(_slip(datetime(2024, 5, 2, 10, minute), 200.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "b")['path'])
+    assert _totals(head_office) == {'Main Road': (8, 1300.0)}
+
+    BackupManager(branch).restore_backup(backup)
+    for minute in range(2):
+        branch.add_transaction(_slip(datetime(2024, 5, 3, 10, minute), 50.0))
+    header = replication.export_changeset(branch, tmp_path / "c")
+    assert header['full'] and header['count'] == 5
+    assert head_office.apply_changeset(header['path'])['applied']
+    assert _totals(head_office) == {'Main Road': (5, 400.0)}
+
+def test_overlapping_changeset_is_refused(branches, head_office, tmp_path):
+    """Test that an unseen incremental changeset over already applied sequence numbers is refused."""
+    branch = branches[0]
+    branch.add_transaction(_slip(datetime(2024, 5, 1, 10, 0), 1000.0))
+    first = replication.export_changeset(branch, tmp_path / "a")
+    head_office.apply_changeset(first['path'])
+    branch.add_transaction(_slip(datetime(2024, 5, 2, 10, 0), 500.0))
+    head_office.apply_changeset(replication.export_changeset(branch, tmp_path / "b")['path'])
+    branch.add_transaction(_slip(datetime(2024, 5, 3, 10, 0), 250.0))
+
+    again = replication.export_changeset(branch, tmp_path / "c", since_seq=first['to_seq'])
+    with pytest.raises(ValueError, match='overlaps'):
+        head_office.apply_changeset(again['path'])
+    assert _totals(head_office) == {'Main Road': (2, 1500.0)}
@@ -0,0 +1,110 @@
+import pytest
+import sqlite3
+from datetime import datetime
+from src.database import schema
+from src.database.db_manager import DatabaseManager
+from conftest import add_slip
+
+def _add(db, timestamp, new_items=(), old_items=(), cash=0.0, card=0.0, upi=0.0):
+    return add_slip(db, timestamp, new_items=new_items, old_items=old_items,
+                    payment={'cash': cash, 'card': card, 'upi': upi})
+
+def _item(code, type_, weight, amount, is_billable=False):
+    return {'code': code, 'name': f'Item {code}', 'type': type_, 'weight': weight,
+            'amount': amount, 'is_billable': is_billable}
+
+def test_monthly_report_totals(tmp_db):
+    """Test that the monthly report adds up weights, payments and item codes."""
+    _add(tmp_db, datetime(2024, 3, 1, 10, 0),
+         new_items=[_item('GR', 'G', 2.0, 1000.0, True), _item('SR', 'S', 10.0, 200.0)],
+         old_items=[{'type': 'G', 'weight': 1.0, 'amount': 400.0}], cash=800.0)
+    _add(tmp_db, datetime(2024, 3, 5, 10, 0), new_items=[_item('GR', 'G', 1.0, 500.0)], card=500.0)
+    _add(tmp_db, datetime(2024, 3, 5, 11, 0), new_items=[_item('SB', 'S', 5.0, 100.0, True)], upi=100.0)
+    _add(tmp_db, datetime(2024, 4, 1, 9, 0), new_items=[_item('GR', 'G', 9.0, 9000.0)], cash=9000.0)
+
+    report = tmp_db.get_monthly_report(2024, 3)
+    totals = report['totals']
+    assert report['month'] == '2024-03'
+    assert totals['transaction_count'] == 3
+    assert totals['day_count'] == 2
+    assert totals['new_gold_weight'] == 3.0
+    assert totals['new_silver_weight'] == 15.0
+    assert totals['old_gold_weight'] == 1.0
+    assert (totals['cash_amount'], totals['card_amount'], totals['upi_amount']) == (800.0, 500.0, 100.0)
+    assert [day['date'] for day in report['days']] == ['2024-03-01', '2024-03-05']
+    assert report['busiest_day']['date'] == '2024-03-05'
+    assert report['top_items'][0]['code'] == 'GR'
+    assert report['top_items'][0]['amount'] == 1500.0
+    assert report['billable_share'] == pytest.approx(1100.0 / 1800.0)
+    assert tmp_db.get_monthly_report(2024, 2) is None
+
+def test_rollups_follow_updates_and_deletes(tmp_db):
+    """Test that editing or deleting a transaction refreshes its day and month."""
+    first = _add(tmp_db, datetime(2024, 3, 1, 10, 0), new_items=[_item('GR', 'G', 2.0, 1000.0)], cash=1000.0)
+    second = _add(tmp_db, datetime(2024, 3, 2, 10, 0), new_items=[_item('GR', 'G', 1.0, 500.0)], cash=500.0)
+
+    tmp_db.update_transaction(first, {
+        'new_items': [_item('SR', 'S', 4.0, 80.0)],
+        'old_items': [],
+        'payment_details': {'cash': 80.0}
+    })
+    totals = tmp_db.get_monthly_report(2024, 3)['totals']
+    assert totals['new_gold_weight'] == 1.0
+    assert totals['new_silver_weight'] == 4.0
+    assert totals['cash_amount'] == 580.0
+
+    # Moving a transaction to another month refreshes both months
+    tmp_db.update_transaction(second, {
+        'timestamp': datetime(2024, 4, 2, 10, 0),
+        'new_items': [_item('GR', 'G', 1.0, 500.0)],
+        'old_items': [],
+        'payment_details': {'cash': 500.0}
+    })
+    assert tmp_db.get_monthly_report(2024, 3)['totals']['transaction_count'] == 1
+    assert tmp_db.get_monthly_report(2024, 4)['totals']['transaction_count'] == 1
+
+    tmp_db.delete_transaction(first)
+    assert tmp_db.get_monthly_report(2024, 3) is None
+
+def test_rollups_match_rebuild(tmp_db):
+    """Test that incrementally maintained rollups equal a full rebuild."""
+    for day in range(1, 6):
+        _add(tmp_db, datetime(2024, 5, day, 10, 0),
+             new_items=[_item('GR', 'G', day, day * 100.0, day % 2 == 0)],
+             old_items=[{'type': 'S', 'weight': 1.0, 'amount': 10.0}], upi=day * 100.0)
+    tmp_db.delete_all_transactions_for_date('2024-05-03')
+    before = tmp_db.query('SELECT * FROM daily_totals ORDER BY date')
+    monthly_before = tmp_db.query('SELECT * FROM monthly_totals')
+
+    tmp_db.rebuild_rollups()
+    assert tmp_db.query('SELECT * FROM daily_totals ORDER BY date') == before
+    assert tmp_db.query('SELECT * FROM monthly_totals') == monthly_before
+
+def test_existing_database_is_backfilled(tmp_path):
+    """Test that opening a version 1 database fills the rollup tables."""
+    path = str(tmp_path / "transactions.db")
+    db = DatabaseManager(path)
+    _add(db, datetime(2024, 3, 1, 10, 0), new_items=[_item('GR', 'G', 2.0, 1000.0)], cash=1000.0)
+    db.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM daily_totals')
+    conn.execute('DELETE FROM monthly_totals')
+    conn.execute('PRAGMA user_version = 1')
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    try:
+        assert db.get_monthly_report(2024, 3)['totals']['new_gold_weight'] == 2.0
+        assert db.query('PRAGMA user_version')[0][0] == schema.SCHEMA_VERSION
+    finally:
+        db.close()
+
+def test_monthly_report_reads_rollups_by_index(tmp_db):
+    """Test that the per-day read seeks the daily_totals primary key."""
+    plan = tmp_db.query('''
+        EXPLAIN QUERY PLAN
+        SELECT * FROM daily_totals WHERE date >= ? AND date < ? ORDER BY date
+    ''', ('2024-03-01', '2024-04-01'))
+    assert any('USING INDEX' in row[-1] for row in plan)
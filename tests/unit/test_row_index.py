@@ -0,0 +1,29 @@
+import pytest
+from src.views.row_index import TransactionRowIndex
+
+def test_find_by_row():
+    """Test that rows map to the transaction whose range holds them."""
+    index = TransactionRowIndex()
+    index.add(30, 0, 2)
+    index.add(20, 3, 3)
+    index.add(10, 4, 7)
+
+    assert index.find(0) == (30, 0, 2)
+    assert index.find(2) == (30, 0, 2)
+    assert index.find(3) == (20, 3, 3)
+    assert index.find(6) == (10, 4, 7)
+    assert index.find(8) is None
+    assert index.find(-1) is None
+    assert index.rows_of(10) == (4, 7)
+    assert len(index) == 3
+
+def test_gap_and_order():
+    """Test rows between ranges and out-of-order ranges."""
+    index = TransactionRowIndex()
+    index.add(1, 0, 1)
+    index.add(2, 5, 6)
+    assert index.find(3) is None
+    with pytest.raises(ValueError):
+        index.add(3, 6, 8)
+    index.clear()
+    assert index.find(0) is None
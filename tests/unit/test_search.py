@@ -0,0 +1,80 @@
+import sqlite3
+import pytest
+from datetime import datetime
+from src.database import search
+from src.database.db_manager import DatabaseManager
+from conftest import make_slip
+
+def _slip(timestamp, comments, code, name, weight, amount):
+    return make_slip(timestamp, amount, code=code, name=name, weight=weight, comments=comments)
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a repository with a few slips to search."""
+    db = DatabaseManager(str(tmp_path / "transactions.db"))
+    db.add_transaction(_slip(datetime(2024, 3, 5, 10, 0), 'Sharma ji, resize', 'GR', 'Gold Ring', 3.5, 21000.0))
+    db.add_transaction(_slip(datetime(2024, 3, 9, 11, 0), 'Verma', 'SCH', 'Silver Chain', 12.0, 1500.0))
+    db.add_transaction(_slip(datetime(2024, 4, 2, 12, 0), 'Sharma bhabhi', 'SAN', 'Silver Anklet', 20.0, 2500.0))
+    yield db
+    db.close()
+
+def _comments(transactions):
+    return [t['comments'] for t in transactions]
+
+def test_words_match_as_prefixes(db):
+    """Test that every typed word must match a comment, item name or code as a prefix."""
+    assert _comments(db.search_transactions('sharma')) == ['Sharma bhabhi', 'Sharma ji, resize']
+    assert _comments(db.search_transactions('shar rin')) == ['Sharma ji, resize']
+    assert _comments(db.search_transactions('sch')) == ['Verma']
+    assert db.search_transactions('"unbalanced (quote') == []
+
+def test_filters(db):
+    """Test that amount, weight and date filters narrow the results, with or without text."""
+    assert _comments(db.search_transactions('sharma', min_amount=5000)) == ['Sharma ji, resize']
+    assert _comments(db.search_transactions('', min_weight=10, max_weight=15)) == ['Verma']
+    assert _comments(db.search_transactions('', from_date='2024-03-01', to_date='2024-03-31')) == [
+        'Verma', 'Sharma ji, resize'
+    ]
+    assert len(db.search_transactions('', limit=2)) == 2
+
+def test_index_follows_writes(db):
+    """Test that the triggers keep the index in step with updates and deletes."""
+    verma = db.search_transactions('verma')[0]['id']
+    db.update_transaction(verma, _slip(datetime(2024, 3, 9, 11, 0), 'Verma', 'SAN', 'Silver Anklet', 12.0, 1500.0))
+    assert _comments(db.search_transactions('chain')) == []
+    assert _comments(db.search_transactions('verma ankl')) == ['Verma']
+
+    db.delete_transaction(verma)
+    assert db.search_transactions('verma') == []
+    assert db.query('SELECT COUNT(*) FROM search_index')[0][0] == 2
+
+def test_existing_database_is_indexed(tmp_path):
+    """Test that a database from before the index is indexed when it is opened."""
+    path = str(tmp_path / "old.db")
+    db = DatabaseManager(path)
+    db.add_transaction(_slip(datetime(2024, 3, 5, 10, 0), 'Sharma', 'GR', 'Gold Ring', 3.5, 21000.0))
+    db.close()
+
+    conn = sqlite3.connect(path)
+    for name in search.TRIGGER_NAMES:
+        conn.execute(f'DROP TRIGGER {name}')
+    conn.execute('DROP TABLE search_index')
+    conn.execute('PRAGMA user_version = 5')
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    try:
+        assert _comments(db.search_transactions('gold')) == ['Sharma']
+    finally:
+        db.close()
+
+def test_like_fallback_finds_the_same_rows(db):
+    """Test that the query used without FTS5 matches word starts, like the index."""
+    db.add_transaction(_slip(datetime(2024, 4, 5, 10, 0), 'Gupta', 'GER', 'Gold Earring', 2.0, 12000.0))
+    for text in ('sharma', 'silver', 'gr', 'ring', 'arma', 'gold ear'):
+        indexed = [t['id'] for t in db.search_transactions(text)]
+        sql, params = search.build_query(text, use_index=False)
+        assert [row[0] for row in db.query(sql, params)] == indexed
+    assert _comments(db.search_transactions('ring')) == ['Sharma ji, resize']
+    assert db.search_transactions('arma') == []
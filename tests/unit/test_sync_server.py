@@ -0,0 +1,157 @@
+import pytest
+from datetime import datetime
+from src.database import rollups
+from src.database.db_manager import DatabaseManager
+from src.database.filters import RegisterFilter
+from src.database.remote_repository import RemoteRepository, ServerRejected
+from src.database.sync_server import SyncServer
+from conftest import make_slip
+
+@pytest.fixture
+def server(tmp_db):
+    """Serve the repository on a free localhost port."""
+    server = SyncServer(tmp_db, port=0).start()
+    yield server
+    server.stop()
+
+def test_writes_and_reads_through_server(tmp_db, server):
+    """Test that a remote repository writes to and reads from the server's database."""
+    remote = RemoteRepository(server.url)
+    transaction_id = remote.add_transaction(make_slip(datetime(2024, 5, 1, 10, 0)))
+    assert transaction_id > 0
+    assert remote.update_transaction(transaction_id, make_slip(datetime(2024, 5, 1, 11, 0), 250.0))
+
+    transactions = remote.get_transactions_range('2024-05-01', '2024-05-01')
+    assert [t['id'] for t in transactions] == [transaction_id]
+    assert transactions[0]['new_items'][0]['amount'] == 250.0
+    assert tmp_db.get_transactions_by_date('2024-05-01')[0]['timestamp'] == '2024-05-01 11:00:00'
+    assert remote.get_transaction_summary('2024-05-01')['payments']['cash'] == 250.0
+
+    assert remote.delete_transaction(transaction_id)
+    assert tmp_db.query('SELECT COUNT(*) FROM transactions')[0][0] == 0
+
+def test_unchanged_range_is_revalidated(server):
+    """Test that rereading an unchanged range gets 304 and a write changes the ETag."""
+    remote = RemoteRepository(server.url)
+    remote.add_transaction(make_slip(datetime(2024, 5, 1, 10, 0)))
+    first = remote.get_transactions_range('2024-05-01', '2024-05-02')
+    etag = remote._ranges[('2024-05-01', '2024-05-02')][0]
+
+    status, _, _ = remote._request('GET', '/transactions', {'from': '2024-05-01', 'to': '2024-05-02'},
+                                   headers={'If-None-Match': etag})
+    assert status == 304
+    assert remote.get_transactions_range('2024-05-01', '2024-05-02') is first
+
+    remote.add_transaction(make_slip(datetime(2024, 5, 2, 10, 0)))
+    assert len(remote.get_transactions_range('2024-05-01', '2024-05-02')) == 2
+    assert remote._ranges[('2024-05-01', '2024-05-02')][0] != etag
+
+def test_writes_queue_while_server_is_down(tmp_db, tmp_path):
+    """Test that writes made offline are kept on disk and sent in order once the server is back."""
+    server = SyncServer(tmp_db, port=0).start()
+    url = server.url
+    port = server.httpd.server_address[1]
+    server.stop()
+
+    queue_path = str(tmp_path / "outbox.jsonl")
+    remote = RemoteRepository(url, queue_path=queue_path, timeout=1.0)
+    first = remote.add_transaction(make_slip(datetime(2024, 5, 1, 10, 0)))
+    second = remote.add_transaction(make_slip(datetime(2024, 5, 1, 11, 0)))
+    dropped = remote.add_transaction(make_slip(datetime(2024, 5, 1, 12, 0)))
+    assert first < 0 and second < 0 and dropped < 0
+    assert remote.update_transaction(second, make_slip(datetime(2024, 5, 1, 11, 0), 500.0))
+    assert remote.delete_transaction(dropped)
+    assert remote.pending_count == 2
+
+    # A restarted counter picks up the queue file
+    restarted = RemoteRepository(url, queue_path=queue_path, timeout=1.0)
+    assert restarted.pending_count == 2
+
+    server = SyncServer(tmp_db, port=port).start()
+    try:
+        assert restarted.flush() == 0
+        rows = tmp_db.query('SELECT timestamp, total_amount FROM transactions ORDER BY id')
+        assert rows == [('2024-05-01 10:00:00', 100.0), ('2024-05-01 11:00:00', 500.0)]
+        assert RemoteRepository(url, queue_path=queue_path).pending_count == 0
+    finally:
+        server.stop()
+
+def test_resent_batch_is_applied_once(tmp_db, server):
+    """Test that operations resent with the same op ids aren't applied twice."""
+    slip = make_slip('2024-05-01 10:00:00')
+    operations = [{'op': 'add', 'op_id': 'a1', 'transaction': slip},
+                  {'op': 'add', 'op_id': 'a2', 'transaction': slip}]
+    first = server.apply_batch(operations)
+    again = server.apply_batch(operations)
+    assert again['results'] == first['results']
+    assert tmp_db.query('SELECT COUNT(*) FROM transactions')[0][0] == 2
+
+def test_resent_batch_is_applied_once_after_restart(tmp_path):
+    """Test that a batch committed before a restart isn't applied again by the new server."""
+    path = str(tmp_path / "transactions.db")
+    operations = [{'op': 'add', 'op_id': 'b1', 'transaction': make_slip('2024-05-01 10:00:00')},
+                  {'op': 'delete', 'op_id': 'b2', 'id': 12345}]
+    results = []
+    for _ in range(2):
+        db = DatabaseManager(path)
+        server = SyncServer(db, port=0)
+        try:
+            results.append(server.apply_batch(operations)['results'])
+            count = db.query('SELECT COUNT(*) FROM transactions')[0][0]
+        finally:
+            server.httpd.server_close()
+            db.close()
+    assert results[0] == results[1]
+    assert count == 1
+
+def test_rejected_write_is_reported(server):
+    """Test that a write the server refuses raises instead of staying queued."""
+    remote = RemoteRepository(server.url)
+    broken = make_slip(datetime(2024, 5, 1, 10, 0))
+    del broken['new_items'][0]['code']
+    with pytest.raises(ValueError, match='code'):
+        remote.add_transaction(broken)
+    assert remote.pending_count == 0
+    assert not remote.update_transaction(12345, make_slip(datetime(2024, 5, 1, 10, 0)))
+
+def test_poll_reports_other_counters_changes(server):
+    """Test that a counter is told the dates other counters changed, but not its own."""
+    counter = RemoteRepository(server.url)
+    other = RemoteRepository(server.url)
+    notified = []
+    counter.add_change_listener(notified.append)
+
+    counter.add_transaction(make_slip(datetime(2024, 5, 1, 10, 0)))
+    assert counter.poll_external_changes() == set()
+
+    other.add_transaction(make_slip(datetime(2024, 5, 2, 10, 0)))
+    other.add_transaction(make_slip(datetime(2024, 5, 3, 10, 0)))
+    assert counter.poll_external_changes() == {'2024-05-02', '2024-05-03'}
+    assert notified == [{'2024-05-02', '2024-05-03'}]
+    assert counter.poll_external_changes() == set()
+
+def test_register_reads_through_server(tmp_db, server):
+    """Test that filtered, search, recent and rollup reads are answered by the server."""
+    tmp_db.add_transaction(make_slip(datetime(2024, 5, 1, 10, 0), 100.0, comments='ring for bride'))
+    tmp_db.add_transaction(make_slip(datetime(2024, 5, 2, 10, 0), 300.0, code='SAN', name='Anklet', type_='S',
+                                     payment={'cash': 0.0, 'card': 300.0, 'upi': 0.0}))
+    remote = RemoteRepository(server.url)
+    third = remote.add_transaction(make_slip(datetime(2024, 5, 3, 10, 0), 50.0))
+
+    register_filter = RegisterFilter(from_date='2024-05-01', to_date='2024-05-31', payment_modes=('card',))
+    assert remote.get_filtered_transactions(register_filter) == tmp_db.get_filtered_transactions(register_filter)
+    assert [t['comments'] for t in remote.search_transactions('bride')] == ['ring for bride']
+    assert remote.search_transactions('', code_prefix='S') == tmp_db.search_transactions('', code_prefix='S')
+    assert [t['id'] for t in remote.get_recent_transactions(2)] == [third, 2]
+    assert rollups.range_totals(remote, '2024-05-01', '2024-05-31') == rollups.range_totals(tmp_db, '2024-05-01', '2024-05-31')
+    assert remote.query('SELECT COUNT(*) FROM transactions WHERE date >= ?', ('2024-05-02',)) == [(2,)]
+
+def test_query_is_read_only(tmp_db, server):
+    """Test that a query can't write to the server's database or attach other files."""
+    remote = RemoteRepository(server.url)
+    with pytest.raises(ServerRejected):
+        remote.query('DELETE FROM transactions')
+    with pytest.raises(ServerRejected):
+        remote.query("ATTACH DATABASE ':memory:' AS other")
+    with pytest.raises(NotImplementedError):
+        remote._write(lambda cursor: cursor.execute('DELETE FROM item_codes'))
@@ -0,0 +1,53 @@
+import pytest
+from src.models.transaction import SlipTotals, Transaction
+
+def _new(code, weight, amount, billable=False, type_=None):
+    item = {'code': code, 'name': code, 'weight': weight, 'amount': amount, 'is_billable': billable}
+    if type_:
+        item['type'] = type_
+    return item
+
+def test_running_totals_follow_adds_and_removes():
+    """Test that the summary tracks added and removed items without re-summing."""
+    transaction = Transaction()
+    transaction.add_new_item(_new('GR', 2.5, 1000.0, billable=True, type_='G'))
+    transaction.add_new_item(_new('SC', 10.0, 500.0, type_='S'))
+    transaction.add_new_item(_new('GB', 1.25, 700.0, billable=True))  # metal from the code prefix
+    transaction.add_old_item({'type': 'G', 'weight': 1.0, 'amount': 300.0})
+    transaction.add_old_item({'type': 'Silver', 'weight': 5.0, 'amount': 50.0})
+
+    summary = transaction.get_summary()
+    assert summary['new_items_count'] == 3
+    assert summary['new_items_total'] == pytest.approx(2200.0)
+    assert summary['new_items'] == pytest.approx({'gold': 3.75, 'silver': 10.0})
+    assert summary['old_items'] == pytest.approx({'gold': 1.0, 'silver': 5.0})
+    assert summary['billable_items'] == pytest.approx({'gold': 3.75, 'silver': 0.0, 'amount': 1700.0})
+    assert summary['total_to_pay'] == pytest.approx(1850.0)
+
+    transaction.remove_new_item(0)
+    transaction.remove_old_item(1)
+    transaction.remove_old_item(5)  # out of range is ignored
+    summary = transaction.get_summary()
+    assert summary['new_items_count'] == 2
+    assert summary['billable_items'] == pytest.approx({'gold': 1.25, 'silver': 0.0, 'amount': 700.0})
+    assert summary['old_items'] == pytest.approx({'gold': 1.0, 'silver': 0.0})
+    assert summary['total_to_pay'] == pytest.approx(900.0)
+
+def test_totals_reset_exactly_when_emptied():
+    """Test that removing every item leaves exact zeros."""
+    totals = SlipTotals()
+    items = [_new('GR', 0.1, 0.1, billable=True) for _ in range(10)]
+    for item in items:
+        totals.add_new(item)
+    for item in items:
+        totals.remove_new(item)
+    assert (totals.new_count, totals.new_amount, totals.new_weight['gold'], totals.billable_amount) == (0, 0.0, 0.0, 0.0)
+
+def test_from_dict_rebuilds_totals():
+    """Test that a loaded transaction gets totals for its items."""
+    transaction = Transaction.from_dict({
+        'new_items': [_new('GR', 2.0, 100.0, type_='G')],
+        'old_items': [{'type': 'S', 'weight': 3.0, 'amount': 40.0}]
+    })
+    assert transaction.get_total_amount() == pytest.approx(60.0)
+    assert transaction.get_summary()['old_items'] == {'gold': 0.0, 'silver': 3.0}
@@ -0,0 +1,87 @@
+import pytest
+import threading
+import time
+from datetime import date
+
+pytest.importorskip("PyQt6")
+from PyQt6.QtCore import QCoreApplication
+
+from src.views.workers import LatestRequestWorker, RegisterRefreshWorker
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+def _wait(app, predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+
+def test_requests_in_one_turn_are_coalesced(app):
+    """Test that several refresh requests before the loop runs cause one load."""
+    calls = []
+    worker = RegisterRefreshWorker(lambda start, end: calls.append((start, end)) or (start, end))
+    results = []
+    worker.register_ready.connect(results.append)
+
+    worker.schedule(date(2024, 3, 1), date(2024, 3, 1))
+    worker.request(date(2024, 3, 2), date(2024, 3, 5))
+    worker.request(date(2024, 3, 3), date(2024, 3, 5))
+    _wait(app, lambda: results)
+
+    assert calls == [(date(2024, 3, 3), date(2024, 3, 5))]
+    assert results == [(date(2024, 3, 3), date(2024, 3, 5))]
+
+def test_superseded_result_is_discarded(app):
+    """Test that a load overtaken by a newer request is dropped and the latest range loaded next."""
+    release = threading.Event()
+    calls = []
+
+    def loader(start, end):
+        calls.append(start)
+        if len(calls) == 1:
+            release.wait(5)
+        return start
+
+    worker = RegisterRefreshWorker(loader, debounce_ms=10)
+    results = []
+    worker.register_ready.connect(results.append)
+
+    worker.request(date(2024, 1, 1), date(2024, 1, 1))
+    _wait(app, lambda: calls)
+    # Both arrive while the first load is running; only the last one is loaded
+    worker.schedule(date(2024, 2, 1), date(2024, 2, 1))
+    worker.schedule(date(2024, 3, 1), date(2024, 3, 1))
+    _wait(app, lambda: not worker._timer.isActive())
+    release.set()
+    _wait(app, lambda: results)
+
+    assert results == [date(2024, 3, 1)]
+    assert calls == [date(2024, 1, 1), date(2024, 3, 1)]
+    assert not worker.is_loading()
+
+def test_cancel_during_a_running_load(app):
+    """Test that cancelling while a load runs neither emits its result nor loads it again."""
+    release = threading.Event()
+    calls = []
+
+    def loader(text):
+        calls.append(text)
+        release.wait(5)
+        return text
+
+    worker = LatestRequestWorker(loader, debounce_ms=10)
+    results = []
+    worker.ready.connect(results.append)
+
+    worker.request('sharma')
+    _wait(app, lambda: calls)
+    worker.cancel()
+    release.set()
+    _wait(app, lambda: not worker.is_loading())
+    _wait(app, lambda: False, timeout=0.05)
+
+    assert calls == ['sharma']
+    assert results == []